@@ -0,0 +1,22 @@
+"""card_media.storage_provider defaults to the local backend.
+
+Revision ID: add_card_media_local_default
+Revises: add_deck_schedulers
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_card_media_local_default"
+down_revision = "add_deck_schedulers"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Seul le stockage local est fourni : une insertion SQL brute ne doit pas nommer un backend absent
+    op.alter_column("card_media", "storage_provider", existing_type=sa.String(length=32), server_default="local")
+
+
+def downgrade() -> None:
+    op.alter_column("card_media", "storage_provider", existing_type=sa.String(length=32), server_default="vercel_blob")
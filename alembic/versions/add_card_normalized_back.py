@@ -0,0 +1,93 @@
+"""Persist a normalized Italian key on cards with a unique index.
+
+Revision ID: add_card_normalized_back
+Revises: add_image_enrichment_jobs
+Create Date: 2026-10-17
+
+The key mirrors ``app.core.normalization.normalize_back`` (NFKC, whitespace
+collapse, casefold). Existing duplicates do not block the upgrade: the oldest
+card of each group keeps the key, the others stay NULL and are listed so that
+``scripts/deduplicate_cards.py`` can merge them.
+"""
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_card_normalized_back"
+down_revision = "add_image_enrichment_jobs"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _normalize_back(value: str) -> str:
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+
+
+def upgrade() -> None:
+    op.add_column("cards", sa.Column("normalized_back", sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+    cards = sa.table(
+        "cards",
+        sa.column("card_pk", sa.Integer),
+        sa.column("back", sa.Text),
+        sa.column("normalized_back", sa.Text),
+    )
+    stmt = (
+        sa.update(cards)
+        .where(cards.c.card_pk == sa.bindparam("pk"))
+        .values(normalized_back=sa.bindparam("key"))
+    )
+    # Parcours par clé (card_pk) : une seule page de cartes en mémoire à la fois
+    page = sa.select(cards.c.card_pk, cards.c.back).order_by(cards.c.card_pk).limit(BATCH_SIZE)
+    last_pk = None
+    while True:
+        rows = bind.execute(page if last_pk is None else page.where(cards.c.card_pk > last_pk)).all()
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        bind.execute(stmt, [{"pk": card_pk, "key": _normalize_back(back or "")} for card_pk, back in rows])
+
+    # Doublons : la plus ancienne carte de chaque groupe garde la clé
+    keepers = (
+        sa.select(sa.func.min(cards.c.card_pk))
+        .where(cards.c.normalized_back.isnot(None))
+        .group_by(cards.c.normalized_back)
+    )
+    duplicated = (
+        sa.select(cards.c.normalized_back)
+        .group_by(cards.c.normalized_back)
+        .having(sa.func.count() > 1)
+    )
+    collisions: dict[str, list[int]] = {}
+    for key, card_pk in bind.execute(
+        sa.select(cards.c.normalized_back, cards.c.card_pk)
+        .where(cards.c.normalized_back.in_(duplicated))
+        .order_by(cards.c.normalized_back, cards.c.card_pk)
+    ):
+        collisions.setdefault(key, []).append(card_pk)
+    if collisions:
+        bind.execute(
+            sa.update(cards)
+            .where(cards.c.normalized_back.isnot(None), cards.c.card_pk.not_in(keepers))
+            .values(normalized_back=None)
+        )
+        duplicate_count = sum(len(card_pks) - 1 for card_pks in collisions.values())
+        print(
+            f"⚠️ {len(collisions)} groupe(s) de cartes en doublon ({duplicate_count} carte(s) "
+            "laissée(s) sans normalized_back). Lancer scripts/deduplicate_cards.py pour les fusionner :"
+        )
+        for key, card_pks in sorted(collisions.items()):
+            print(f"   - '{key}': cartes {card_pks} (conservée : {card_pks[0]})")
+
+    op.create_index("uq_cards_normalized_back", "cards", ["normalized_back"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("uq_cards_normalized_back", table_name="cards")
+    op.drop_column("cards", "normalized_back")
@@ -0,0 +1,71 @@
+"""Add generated full-text and trigram search columns on cards (PostgreSQL).
+
+Revision ID: add_card_search_indexes
+Revises: add_card_normalized_back
+Create Date: 2026-10-17
+
+``search_vector`` weights back/front (A), translations (B) and
+explanation/example (C). ``search_document`` is the accent-folded, lowercased
+concatenation used for fuzzy ``<%`` matching. Both are maintained by
+PostgreSQL itself; other dialects use the in-memory index of app.core.search.
+"""
+from alembic import op
+
+revision = "add_card_search_indexes"
+down_revision = "add_card_normalized_back"
+branch_labels = None
+depends_on = None
+
+
+def _field(name: str) -> str:
+    return f"immutable_unaccent(coalesce({name}, ''))"
+
+
+SEARCH_VECTOR_SQL = " || ".join(
+    [
+        f"setweight(to_tsvector('simple', {_field('back')} || ' ' || {_field('front')}), 'A')",
+        "setweight(to_tsvector('simple', "
+        f"{_field('translation_en')} || ' ' || {_field('translation_de')} || ' ' || {_field('translation_mg')}), 'B')",
+        f"setweight(to_tsvector('simple', {_field('explanation_it')} || ' ' || {_field('example')}), 'C')",
+    ]
+)
+
+SEARCH_DOCUMENT_SQL = "lower(" + " || ' ' || ".join(
+    _field(name)
+    for name in ("back", "front", "translation_en", "translation_de", "translation_mg", "explanation_it", "example")
+) + ")"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # unaccent() n'est pas IMMUTABLE : enveloppe nécessaire pour une colonne générée
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION immutable_unaccent(text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$
+        """
+    )
+    op.execute(
+        f"ALTER TABLE cards ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED"
+    )
+    op.execute(
+        f"ALTER TABLE cards ADD COLUMN search_document text "
+        f"GENERATED ALWAYS AS ({SEARCH_DOCUMENT_SQL}) STORED"
+    )
+    op.execute("CREATE INDEX ix_cards_search_vector ON cards USING gin (search_vector)")
+    op.execute("CREATE INDEX ix_cards_search_document_trgm ON cards USING gin (search_document gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_cards_search_document_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_cards_search_vector")
+    op.execute("ALTER TABLE cards DROP COLUMN IF EXISTS search_document")
+    op.execute("ALTER TABLE cards DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP FUNCTION IF EXISTS immutable_unaccent(text)")
@@ -0,0 +1,39 @@
+"""Per-deck distractor pools for server-built multiple-choice questions.
+
+Revision ID: add_deck_distractors
+Revises: add_score_aggregation
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_deck_distractors"
+down_revision = "add_score_aggregation"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Les groupes se calculent en Python (tags et réponse) : chaque deck est
+    # construit à son premier QCM (crud_distractors.ensure_pool), ou d'avance
+    # par scripts/rebuild_distractors.py
+    op.create_table(
+        "deck_distractors",
+        sa.Column("deck_pk", sa.Integer(), nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.Column("pos", sa.Text(), nullable=False, server_default=""),
+        sa.Column("length_band", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("theme", sa.Text(), nullable=False, server_default=""),
+        sa.Column("answer", sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(["deck_pk"], ["decks.deck_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("deck_pk", "card_pk"),
+    )
+    op.create_index("ix_deck_distractors_card_pk", "deck_distractors", ["card_pk"])
+    op.create_index("ix_deck_distractors_pool", "deck_distractors", ["deck_pk", "pos", "length_band", "theme"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_deck_distractors_pool", table_name="deck_distractors")
+    op.drop_index("ix_deck_distractors_card_pk", table_name="deck_distractors")
+    op.drop_table("deck_distractors")
@@ -0,0 +1,25 @@
+"""Per-deck scheduler selection and memory-model stability.
+
+Revision ID: add_deck_schedulers
+Revises: add_review_sync
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_deck_schedulers"
+down_revision = "add_review_sync"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("decks", sa.Column("scheduler", sa.String(length=32), nullable=False, server_default="sm2"))
+    op.add_column("decks", sa.Column("scheduler_params", sa.JSON(), nullable=True))
+    op.add_column("user_card_schedules", sa.Column("stability", sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("user_card_schedules", "stability")
+    op.drop_column("decks", "scheduler_params")
+    op.drop_column("decks", "scheduler")
@@ -0,0 +1,68 @@
+"""Add the persistent queue of deferred card image lookups.
+
+Revision ID: add_image_enrichment_jobs
+Revises: add_user_deck_uniqueness
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_image_enrichment_jobs"
+down_revision = "add_user_deck_uniqueness"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "image_enrichment_jobs",
+        sa.Column("job_pk", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.Column("search_query", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=16), nullable=False, server_default="pending"),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("sha256", sa.String(length=64), nullable=True),
+        sa.Column("content_type", sa.String(length=127), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.CheckConstraint(
+            "status IN ('pending', 'running', 'done', 'failed')",
+            name="ck_image_enrichment_jobs_status",
+        ),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("job_pk"),
+        sa.UniqueConstraint("card_pk"),
+    )
+    op.create_index(
+        "ix_image_enrichment_jobs_search_query",
+        "image_enrichment_jobs",
+        ["search_query"],
+    )
+    op.create_index(
+        "ix_image_enrichment_jobs_due",
+        "image_enrichment_jobs",
+        ["status", "next_attempt_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_image_enrichment_jobs_due", table_name="image_enrichment_jobs")
+    op.drop_index("ix_image_enrichment_jobs_search_query", table_name="image_enrichment_jobs")
+    op.drop_table("image_enrichment_jobs")
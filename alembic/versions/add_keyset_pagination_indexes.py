@@ -0,0 +1,32 @@
+"""Add composite indexes backing cursor pagination of cards and scores.
+
+Revision ID: add_keyset_pagination_indexes
+Revises: add_card_search_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+
+revision = "add_keyset_pagination_indexes"
+down_revision = "add_card_search_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_cards_next_review_card_pk", "cards", ["next_review", "card_pk"])
+    op.create_index(
+        "ix_user_scores_user_created_score",
+        "user_scores",
+        ["user_pk", "created_at", "score_pk"],
+    )
+    op.create_index(
+        "ix_user_scores_user_deck_created_score",
+        "user_scores",
+        ["user_pk", "deck_pk", "created_at", "score_pk"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_scores_user_deck_created_score", table_name="user_scores")
+    op.drop_index("ix_user_scores_user_created_score", table_name="user_scores")
+    op.drop_index("ix_cards_next_review_card_pk", table_name="cards")
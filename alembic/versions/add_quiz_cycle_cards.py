@@ -0,0 +1,52 @@
+"""Track quiz cycle cards in a table and backfill them from session JSON.
+
+Revision ID: add_quiz_cycle_cards
+Revises: add_user_card_schedules
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_quiz_cycle_cards"
+down_revision = "add_user_card_schedules"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "quiz_cycle_cards",
+        sa.Column("user_pk", sa.Integer(), nullable=False),
+        sa.Column("deck_pk", sa.Integer(), nullable=False),
+        sa.Column("cycle_number", sa.Integer(), nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_pk"], ["users.user_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_pk"], ["decks.deck_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_pk", "deck_pk", "cycle_number", "card_pk"),
+    )
+    op.create_index("ix_quiz_cycle_cards_card_pk", "quiz_cycle_cards", ["card_pk"])
+    op.create_index(
+        "ix_quiz_sessions_user_deck_cycle",
+        "quiz_sessions",
+        ["user_pk", "deck_pk", "cycle_number"],
+    )
+
+    # Les JSON illisibles étaient ignorés par l'ancien code : ils le sont aussi ici
+    op.execute(
+        r"""
+        INSERT INTO quiz_cycle_cards (user_pk, deck_pk, cycle_number, card_pk)
+        SELECT DISTINCT s.user_pk, s.deck_pk, s.cycle_number, used.card_pk::integer
+        FROM quiz_sessions s
+        CROSS JOIN LATERAL json_array_elements_text(s.used_card_pks::json) AS used(card_pk)
+        JOIN cards c ON c.card_pk = used.card_pk::integer
+        WHERE s.used_card_pks ~ '^\s*\[[0-9,\s]*\]\s*$'
+        ON CONFLICT DO NOTHING
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quiz_sessions_user_deck_cycle", table_name="quiz_sessions")
+    op.drop_index("ix_quiz_cycle_cards_card_pk", table_name="quiz_cycle_cards")
+    op.drop_table("quiz_cycle_cards")
@@ -0,0 +1,39 @@
+"""Mixed review sessions spanning several decks.
+
+Revision ID: add_quiz_mixed_sessions
+Revises: add_deck_distractors
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_quiz_mixed_sessions"
+down_revision = "add_deck_distractors"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # NULL : session mixte, le deck de chaque carte est dans quiz_session_cards
+    op.alter_column("quiz_sessions", "deck_pk", existing_type=sa.Integer(), nullable=True)
+    op.create_table(
+        "quiz_session_cards",
+        sa.Column("session_pk", sa.Integer(), nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.Column("deck_pk", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("answered", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("correct", sa.Integer(), nullable=False, server_default="0"),
+        sa.ForeignKeyConstraint(["session_pk"], ["quiz_sessions.session_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["deck_pk"], ["decks.deck_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("session_pk", "card_pk"),
+    )
+    op.create_index("ix_quiz_session_cards_deck_pk", "quiz_session_cards", ["deck_pk"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_quiz_session_cards_deck_pk", table_name="quiz_session_cards")
+    op.drop_table("quiz_session_cards")
+    op.execute("DELETE FROM quiz_sessions WHERE deck_pk IS NULL")
+    op.alter_column("quiz_sessions", "deck_pk", existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,26 @@
+"""Client event ids for offline review sync.
+
+Revision ID: add_review_sync
+Revises: add_quiz_mixed_sessions
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_review_sync"
+down_revision = "add_quiz_mixed_sessions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("user_scores", sa.Column("client_event_id", sa.String(length=36), nullable=True))
+    # NULL (scores en ligne) n'entre pas en conflit
+    op.create_unique_constraint(
+        "uq_user_scores_client_event", "user_scores", ["user_pk", "client_event_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_user_scores_client_event", "user_scores", type_="unique")
+    op.drop_column("user_scores", "client_event_id")
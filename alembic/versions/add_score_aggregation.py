@@ -0,0 +1,33 @@
+"""Fold user scores into counters asynchronously.
+
+Revision ID: add_score_aggregation
+Revises: add_quiz_cycle_cards
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_score_aggregation"
+down_revision = "add_quiz_cycle_cards"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Les scores existants ont déjà été reportés de façon synchrone
+    op.add_column(
+        "user_scores",
+        sa.Column("aggregated", sa.Boolean(), nullable=False, server_default=sa.true()),
+    )
+    op.alter_column("user_scores", "aggregated", server_default=sa.false())
+    op.create_index(
+        "ix_user_scores_pending",
+        "user_scores",
+        ["user_pk", "deck_pk"],
+        postgresql_where=sa.text("NOT aggregated"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_scores_pending", table_name="user_scores")
+    op.drop_column("user_scores", "aggregated")
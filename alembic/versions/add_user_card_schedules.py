@@ -0,0 +1,51 @@
+"""Add per-user card scheduling state and backfill it from reviewed cards.
+
+Revision ID: add_user_card_schedules
+Revises: add_user_due_cards
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_user_card_schedules"
+down_revision = "add_user_due_cards"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_card_schedules",
+        sa.Column("user_pk", sa.Integer(), nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.Column("easiness", sa.Float(), nullable=False, server_default="2.5"),
+        sa.Column("interval", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("consecutive_correct", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("box", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("next_review", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_reviewed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_pk"], ["users.user_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_pk", "card_pk"),
+    )
+    op.create_index("ix_user_card_schedules_card_pk", "user_card_schedules", ["card_pk"])
+
+    # Chaque utilisateur ayant déjà révisé une carte hérite de l'état global actuel de celle-ci
+    op.execute(
+        """
+        INSERT INTO user_card_schedules
+            (user_pk, card_pk, easiness, interval, consecutive_correct, box, next_review, last_reviewed_at)
+        SELECT p.user_pk, p.card_pk, c.easiness, c.interval, c.consecutive_correct,
+               COALESCE(c.box, 0), c.next_review, MAX(p.last_reviewed_at)
+        FROM card_performance p
+        JOIN cards c ON c.card_pk = p.card_pk
+        WHERE p.total_attempts > 0
+        GROUP BY p.user_pk, p.card_pk, c.easiness, c.interval, c.consecutive_correct,
+                 c.box, c.next_review
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_card_schedules_card_pk", table_name="user_card_schedules")
+    op.drop_table("user_card_schedules")
@@ -0,0 +1,44 @@
+"""Add the per-user review queue and backfill it from user decks.
+
+Revision ID: add_user_due_cards
+Revises: add_keyset_pagination_indexes
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_user_due_cards"
+down_revision = "add_keyset_pagination_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_due_cards",
+        sa.Column("user_pk", sa.Integer(), nullable=False),
+        sa.Column("card_pk", sa.Integer(), nullable=False),
+        sa.Column("due_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_pk"], ["users.user_pk"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["card_pk"], ["cards.card_pk"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_pk", "card_pk"),
+    )
+    op.create_index("ix_user_due_cards_card_pk", "user_due_cards", ["card_pk"])
+    op.create_index("ix_user_due_cards_user_due", "user_due_cards", ["user_pk", "due_at", "card_pk"])
+
+    # Toutes les cartes des decks de chaque utilisateur, à l'échéance actuelle de la carte
+    op.execute(
+        """
+        INSERT INTO user_due_cards (user_pk, card_pk, due_at)
+        SELECT DISTINCT ud.user_pk, dc.card_pk, c.next_review
+        FROM user_decks ud
+        JOIN deck_cards dc ON dc.deck_pk = ud.deck_pk
+        JOIN cards c ON c.card_pk = dc.card_pk
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_due_cards_user_due", table_name="user_due_cards")
+    op.drop_index("ix_user_due_cards_card_pk", table_name="user_due_cards")
+    op.drop_table("user_due_cards")
@@ -0,0 +1,27 @@
+"""Partial index on pending user scores by deck.
+
+Revision ID: add_user_scores_pending_deck_index
+Revises: add_card_media_local_default
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "add_user_scores_pending_deck_index"
+down_revision = "add_card_media_local_default"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ix_user_scores_pending commence par user_pk : inutilisable pour les compteurs globaux d'un deck
+    op.create_index(
+        "ix_user_scores_pending_deck",
+        "user_scores",
+        ["deck_pk"],
+        postgresql_where=sa.text("NOT aggregated"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_scores_pending_deck", table_name="user_scores")
@@ -1,10 +1,20 @@
 # app/api/endpoints_cards.py
-from fastapi import APIRouter, Depends, Query, HTTPException, File, UploadFile, Response
+import hmac
+import os
+import re
+
+from fastapi import APIRouter, Depends, Query, HTTPException, File, UploadFile, Response, Request, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
 
-from .. import crud_access, crud_cards, crud_decks, crud_card_audio, crud_public_card_qr, schemas
+from .. import crud_access, crud_cards, crud_deck_archive, crud_decks, crud_card_audio, crud_card_media, crud_card_search, crud_image_enrichment, crud_public_card_qr, schemas
+from ..core.deck_archive import ARCHIVE_MEDIA_TYPE, DeckArchiveError
+from ..core.fieldsets import UnknownFieldError, parse_fields
+from ..core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, next_cursor
+from ..core.media_storage import RASTER_IMAGE_TYPES, MediaStorageError, decode_data_uri, get_media_storage, is_data_uri, sha256_hex
 from ..database import get_db
 from ..security import get_current_active_user, require_teacher_or_admin
 from .. import models
@@ -14,6 +24,27 @@ router = APIRouter(
     tags=["decks", "cards"]
 )
 
+# URL versionnée par le contenu (?v=<sha256>) : la réponse ne change jamais.
+IMAGE_CACHE_IMMUTABLE = "public, max-age=31536000, immutable"
+IMAGE_CACHE_REVALIDATE = "public, no-cache"
+# Contenu fourni par les utilisateurs : pas de détection de type, aucun script même ouvert directement
+IMAGE_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; sandbox",
+}
+
+# Projection partielle (?fields=front,back) des cartes renvoyées
+CARD_FIELDS = list(schemas.Card.model_fields)
+FIELDS_DESCRIPTION = "Champs à renvoyer, séparés par des virgules (ex. front,back). card_pk est toujours inclus."
+
+
+def _card_fields(fields: Optional[str]) -> Optional[List[str]]:
+    try:
+        return parse_fields(fields, CARD_FIELDS)
+    except UnknownFieldError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 # === DECKS ===
 @router.post("/decks/", response_model=schemas.DeckSimple)
 async def create_deck(
@@ -23,38 +54,111 @@ async def create_deck(
 ):
     return await crud_cards.create_deck(db, deck, created_by=current_user.user_pk)
 
-@router.get("/decks/", response_model=List[schemas.Deck])
+@router.get("/decks/", response_model=List[schemas.DeckSummary])
 async def read_decks(
     skip: int = 0,
     limit: int = 10,
     search: str = Query(None),
     db: AsyncSession = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user),
+    _current_user: models.User = Depends(get_current_active_user),
 ):
-    decks = await crud_cards.get_decks(db, skip=skip, limit=limit, search=search)
-    if current_user.role == "etudiant":
-        for deck in decks:
-            access = await crud_access.access_response(db, current_user, "deck", deck.deck_pk)
-            if not access.allowed:
-                # Aperçu du catalogue sans exposer les cartes d'un deck non activé.
-                deck.cards = []
-    return decks
+    """
+    Catalogue des decks (métadonnées + nombre de cartes, d'audios et d'images).
+    Les cartes ne sont jamais incluses ici : utiliser `GET /decks/{deck_pk}`.
+    """
+    return await crud_cards.get_decks(db, skip=skip, limit=limit, search=search)
 
 @router.get("/decks/{deck_pk}", response_model=schemas.Deck)
 async def read_deck(
     deck_pk: int,
+    fields: str = Query(None, description=FIELDS_DESCRIPTION + " S'applique aux cartes du deck."),
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
-    deck = await crud_cards.get_deck(db, deck_pk)
+    selected_fields = _card_fields(fields)
+    deck = await crud_cards.get_deck(db, deck_pk, fields=selected_fields)
     if not deck:
         raise HTTPException(status_code=404, detail="Deck not found")
     if current_user.role == "etudiant":
         access = await crud_access.access_response(db, current_user, "deck", deck_pk)
         if not access.allowed:
             deck.cards = []
+    if selected_fields is not None:
+        payload = {name: getattr(deck, name) for name in schemas.Deck.model_fields if name != "cards"}
+        payload["cards"] = [schemas.project_card(card, selected_fields) for card in deck.cards]
+        return JSONResponse(jsonable_encoder(payload))
     return deck
 
+@router.get("/decks/{deck_pk}/export")
+async def export_deck(
+    deck_pk: int,
+    db: AsyncSession = Depends(get_db),
+    _current_user: models.User = Depends(require_teacher_or_admin),
+):
+    """
+    Archive zip du deck : manifest.json, cards.ndjson et chaque média (image, MP3)
+    une seule fois sous media/<sha256>.<ext>. Envoyée au fil de la lecture.
+    """
+    deck = await db.get(models.Deck, deck_pk)
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    filename = re.sub(r"[^A-Za-z0-9_.-]+", "_", deck.id_json) or str(deck_pk)
+    return StreamingResponse(
+        crud_deck_archive.export_deck_archive(db, deck),
+        media_type=ARCHIVE_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="deck-{filename}.zip"'},
+    )
+
+@router.post("/decks/import")
+async def import_deck(
+    archive: UploadFile = File(...),
+    chunk_size: Optional[int] = Query(None, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_teacher_or_admin),
+):
+    """
+    Importe une archive produite par `GET /decks/{deck_pk}/export`.
+    - Réutilise le deck de même `id_json`, sinon le crée.
+    - Stocke chaque média distinct une seule fois.
+    - Fusionne les cartes par lots comme `POST /cards/batch_import`.
+    """
+    try:
+        return await crud_deck_archive.import_deck_archive(
+            db, archive.file, created_by=current_user.user_pk, chunk_size=chunk_size
+        )
+    except DeckArchiveError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+@router.get("/decks/{deck_pk}/scheduler", response_model=schemas.DeckScheduler)
+async def read_deck_scheduler(
+    deck_pk: int,
+    db: AsyncSession = Depends(get_db),
+    _current_user: models.User = Depends(require_teacher_or_admin),
+):
+    deck = await db.get(models.Deck, deck_pk)
+    if not deck:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    return crud_decks.scheduler_config(deck)
+
+@router.put("/decks/{deck_pk}/scheduler", response_model=schemas.DeckScheduler)
+async def update_deck_scheduler(
+    deck_pk: int,
+    config: schemas.DeckSchedulerConfig,
+    db: AsyncSession = Depends(get_db),
+    _current_user: models.User = Depends(require_teacher_or_admin),
+):
+    """
+    Choisit le planificateur des révisions du deck (`sm2` ou `memory`) et ses paramètres.
+    Les paramètres absents prennent leur valeur par défaut ; s'applique aux prochaines révisions.
+    """
+    try:
+        updated = await crud_decks.set_deck_scheduler(db, deck_pk, config.scheduler, config.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Deck not found")
+    return updated
+
 @router.delete("/decks/{deck_pk}")
 async def delete_deck(
     deck_pk: int,
@@ -70,6 +174,7 @@ async def delete_deck(
 @router.post("/cards/batch_import")
 async def batch_import_cards(
     cards: List[schemas.CardCreate],
+    chunk_size: Optional[int] = Query(None, ge=1, le=5000),
     db: AsyncSession = Depends(get_db),
     _current_user: models.User = Depends(require_teacher_or_admin),
 ):
@@ -78,8 +183,10 @@ async def batch_import_cards(
     - Met à jour les cartes existantes (basé sur le mot italien 'back').
     - Crée les nouvelles cartes.
     - Gère les liens Many-to-Many avec les decks.
+    - Traite les cartes par lots de `chunk_size` (défaut : BATCH_IMPORT_CHUNK_SIZE)
+      et renvoie la durée de chaque lot dans `chunks`.
     """
-    return await crud_cards.batch_upsert_cards(db, cards)
+    return await crud_cards.batch_upsert_cards(db, cards, chunk_size=chunk_size)
 
 @router.post("/cards/", response_model=schemas.Card)
 async def create_card(
@@ -87,29 +194,75 @@ async def create_card(
     db: AsyncSession = Depends(get_db),
     _current_user: models.User = Depends(require_teacher_or_admin),
 ):
-    return await crud_cards.create_card(db, card)
+    try:
+        return await crud_cards.create_card(db, card)
+    except crud_cards.CardConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+CARDS_CURSOR_SCOPE = "cards"
 
 @router.get("/cards/", response_model=List[schemas.Card])
 async def read_cards(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
     deck_pk: int = Query(None),
     search: str = Query(None),
     min_box: int = Query(None),
     due_only: bool = Query(False, description="Seulement les cartes à réviser aujourd'hui"),
+    cursor: str = Query(None, description="Jeton X-Next-Cursor de la page précédente (remplace skip)"),
+    fields: str = Query(None, description=FIELDS_DESCRIPTION),
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
+    selected_fields = _card_fields(fields)
     if current_user.role == "etudiant":
         if deck_pk is None:
             raise HTTPException(status_code=400, detail="Un deck est requis pour consulter les cartes")
         access = await crud_access.access_response(db, current_user, "deck", deck_pk)
         if not access.allowed:
             raise HTTPException(status_code=402, detail="Un pass actif est requis pour accéder aux cartes")
-    return await crud_cards.get_cards(
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(CARDS_CURSOR_SCOPE, cursor)
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+    cards = await crud_cards.get_cards(
         db, skip=skip, limit=limit, deck_pk=deck_pk, search=search, 
-        min_box=min_box, due_only=due_only
+        min_box=min_box, due_only=due_only, after=after, fields=selected_fields
     )
+    token = next_cursor(CARDS_CURSOR_SCOPE, cards, limit, "next_review", "card_pk")
+    if selected_fields is not None:
+        # Réponse partielle : sérialisée sans passer par schemas.Card
+        response = JSONResponse(
+            jsonable_encoder([schemas.project_card(card, selected_fields) for card in cards])
+        )
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+    return response if selected_fields is not None else cards
+
+@router.get("/cards/search", response_model=List[schemas.CardSearchResult])
+async def search_cards(
+    q: str = Query(..., min_length=1, max_length=200),
+    deck_pk: int = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_active_user),
+):
+    """
+    Recherche plein texte et approchée (fautes de frappe, accents ignorés)
+    dans le recto, le verso, les traductions, l'exemple et l'explication.
+    Résultats classés par pertinence, avec extraits surlignés par champ.
+    """
+    if current_user.role == "etudiant":
+        if deck_pk is None:
+            raise HTTPException(status_code=400, detail="Un deck est requis pour consulter les cartes")
+        access = await crud_access.access_response(db, current_user, "deck", deck_pk)
+        if not access.allowed:
+            raise HTTPException(status_code=402, detail="Un pass actif est requis pour accéder aux cartes")
+    return await crud_card_search.search_cards(db, q, deck_pk=deck_pk, skip=skip, limit=limit)
 
 @router.post("/cards/{card_pk}/audio", response_model=schemas.CardAudioPublic)
 async def upload_card_audio(
@@ -154,6 +307,97 @@ async def read_card_audio(
     )
 
 
+@router.get("/cards/{card_pk}/image")
+async def read_card_image(
+    card_pk: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Image d'une carte, envoyée en streaming depuis le stockage de médias.
+
+    Route publique (les balises <img> n'envoient pas de jeton). L'ETag est
+    l'empreinte SHA-256 du contenu ; avec le paramètre `v` correspondant, la
+    réponse peut être mise en cache un an. Seules les images matricielles
+    (PNG, JPEG, WebP, GIF) sont servies : tout autre type renvoie 415.
+    """
+    media = await crud_card_media.get_card_image(db, card_pk)
+    if media is not None:
+        if media.content_type not in RASTER_IMAGE_TYPES:
+            raise HTTPException(status_code=415, detail="Type d'image non servi")
+        etag = f'"{media.sha256}"'
+        versioned = request.query_params.get("v") == media.sha256[:12]
+        headers = {
+            "ETag": etag,
+            "Cache-Control": IMAGE_CACHE_IMMUTABLE if versioned else IMAGE_CACHE_REVALIDATE,
+            **IMAGE_SECURITY_HEADERS,
+        }
+        if etag in request.headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+        storage = get_media_storage()
+        if not storage.exists(media.pathname):
+            raise HTTPException(status_code=404, detail="Image introuvable dans le stockage")
+        headers["Content-Length"] = str(media.size_bytes)
+        return StreamingResponse(storage.iter_chunks(media.pathname), media_type=media.content_type, headers=headers)
+
+    # Compatibilité : cartes dont l'image n'a pas encore été migrée.
+    image = (await db.execute(select(models.Card.image).where(models.Card.card_pk == card_pk))).scalar_one_or_none()
+    if image and image.startswith("http"):
+        return RedirectResponse(image)
+    if not is_data_uri(image):
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        payload, content_type = decode_data_uri(image)
+    except MediaStorageError as exc:
+        raise HTTPException(status_code=500, detail="Image invalide") from exc
+    if content_type not in RASTER_IMAGE_TYPES:
+        raise HTTPException(status_code=415, detail="Type d'image non servi")
+    etag = f'"{sha256_hex(payload)}"'
+    headers = {"ETag": etag, "Cache-Control": IMAGE_CACHE_REVALIDATE, **IMAGE_SECURITY_HEADERS}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload, media_type=content_type, headers=headers)
+
+
+@router.post("/cards/media/migrate-inline-images")
+async def migrate_inline_card_images(
+    batch_size: int = Query(50, ge=1, le=500),
+    max_cards: int = Query(None, ge=1),
+    x_media_migration_token: str = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Déplace les images base64 de `cards.image` vers `card_media` (protégé par MEDIA_MIGRATION_TOKEN).
+
+    `409` si le stockage n'est pas persistant : les Data URI sont alors conservés.
+    """
+    expected = os.getenv("MEDIA_MIGRATION_TOKEN")
+    if not expected or not x_media_migration_token or not hmac.compare_digest(expected, x_media_migration_token):
+        raise HTTPException(status_code=403, detail="Jeton de migration invalide")
+    try:
+        return await crud_card_media.migrate_inline_images(db, batch_size=batch_size, max_cards=max_cards)
+    except MediaStorageError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
+@router.get("/cards/media/enrichment")
+async def read_image_enrichment_status(
+    db: AsyncSession = Depends(get_db),
+    _current_user: models.User = Depends(require_teacher_or_admin),
+):
+    """Nombre de recherches d'images différées par statut."""
+    return await crud_image_enrichment.get_enrichment_status(db)
+
+
+@router.post("/cards/media/enrichment/run")
+async def run_image_enrichment(
+    batch_size: int = Query(crud_image_enrichment.IMAGE_ENRICHMENT_BATCH_SIZE, ge=1, le=200),
+    db: AsyncSession = Depends(get_db),
+    _current_user: models.User = Depends(require_teacher_or_admin),
+):
+    """Traite immédiatement un lot de recherches d'images (hébergement sans worker permanent)."""
+    return await crud_image_enrichment.run_enrichment_batch(db, batch_size=batch_size)
+
+
 @router.delete("/cards/{card_pk}/audio")
 async def remove_card_audio(
     card_pk: int,
@@ -232,7 +476,10 @@ async def update_card(
     db: AsyncSession = Depends(get_db),
     _current_user: models.User = Depends(require_teacher_or_admin),
 ):
-    updated_card = await crud_cards.update_card(db, card_pk, card)
+    try:
+        updated_card = await crud_cards.update_card(db, card_pk, card)
+    except crud_cards.CardConflictError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
     if not updated_card:
         raise HTTPException(status_code=404, detail="Card not found")
     return updated_card
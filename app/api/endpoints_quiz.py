@@ -9,17 +9,22 @@ Fonctionnalités:
 - Historique des sessions
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
+from ..core.fieldsets import UnknownFieldError, parse_fields
 from ..database import get_db
-from .. import crud_access, schemas, crud_quiz
-from ..security import get_current_active_user
+from .. import crud_access, crud_distractors, crud_schedules, schemas, crud_quiz
+from ..security import get_current_active_user, require_teacher_or_admin
 
 
 router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 
+QUIZ_CARD_FIELDS = list(schemas.QuizCardPublic.model_fields)
+
 
 # ============================================================================
 # CONFIGURATION ET LANCEMENT D'UN QUIZ
@@ -28,6 +33,10 @@ router = APIRouter(prefix="/api/quiz", tags=["quiz"])
 @router.post("/start", response_model=schemas.QuizCardSelection, status_code=status.HTTP_201_CREATED)
 async def start_quiz(
     config: schemas.QuizConfigRequest,
+    fields: str = Query(
+        None,
+        description="Champs des cartes à renvoyer, séparés par des virgules (ex. front,back). card_pk est toujours inclus.",
+    ),
     current_user = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -43,12 +52,20 @@ async def start_quiz(
     - **deck_pk**: ID du deck à réviser
     - **card_count**: Nombre de cartes demandées pour le quiz
     - **quiz_type**: Type de quiz (classique, frappe, association, qcm)
+    - **include_questions**: renvoyer aussi les questions à choix multiples (distracteurs pris dans le deck)
+    - **choice_count**: nombre de propositions par question
+    - **fields** (query, optionnel): champs des cartes à renvoyer
     
     **Retourne:**
     - Liste des cartes sélectionnées
     - Informations sur le cycle en cours
     - Message descriptif
     """
+    try:
+        selected_fields = parse_fields(fields, QUIZ_CARD_FIELDS)
+    except UnknownFieldError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
     try:
         access = await crud_access.access_response(db, current_user, "deck", config.deck_pk)
         if not access.allowed:
@@ -59,23 +76,39 @@ async def start_quiz(
             db,
             current_user.user_pk,
             config.deck_pk,
-            config.card_count
+            config.card_count,
+            fields=selected_fields
         )
         
         # Préparer les données des cartes AVANT commit pour éviter MissingGreenlet
         selected_card_pks = [card.card_pk for card in selected_cards]
-        selected_cards_payload = [
-            schemas.QuizCardPublic(
-                card_pk=card.card_pk,
-                front=card.front,
-                back=card.back,
-                pronunciation=getattr(card, "pronunciation", None),
-                image=getattr(card, "image", None),
-                box=card.box,
-                tags=getattr(card, "tags", [])
+        # La boîte affichée est celle de l'utilisateur, pas la valeur partagée de la carte
+        schedules = await crud_schedules.get_schedules(db, current_user.user_pk, selected_card_pks)
+        boxes = {pk: state.box for pk, state in schedules.items()}
+        if selected_fields is not None:
+            selected_cards_payload = [schemas.project_card(card, selected_fields) for card in selected_cards]
+            if "box" in selected_fields:
+                for payload in selected_cards_payload:
+                    payload["box"] = boxes.get(payload["card_pk"], 0)
+        else:
+            selected_cards_payload = [
+                schemas.QuizCardPublic(
+                    card_pk=card.card_pk,
+                    front=card.front,
+                    back=card.back,
+                    pronunciation=getattr(card, "pronunciation", None),
+                    image=getattr(card, "image", None),
+                    box=boxes.get(card.card_pk, 0),
+                    tags=schemas.CardBase.parse_tags_if_string(getattr(card, "tags", []))
+                )
+                for card in selected_cards
+            ]
+
+        questions = None
+        if config.include_questions:
+            questions = await crud_distractors.build_questions(
+                db, config.deck_pk, selected_card_pks, config.choice_count
             )
-            for card in selected_cards
-        ]
 
         # Créer une session de quiz
         session = await crud_quiz.create_quiz_session(
@@ -95,6 +128,22 @@ async def start_quiz(
         result = await db.execute(stmt)
         total_cards = result.scalar() or 0
         
+        if selected_fields is not None:
+            # Cartes partielles : sérialisées sans passer par QuizCardPublic
+            return JSONResponse(
+                status_code=status.HTTP_201_CREATED,
+                content=jsonable_encoder({
+                    "session_pk": session.session_pk,
+                    "deck_pk": config.deck_pk,
+                    "cycle_number": cycle_number,
+                    "total_cards_in_deck": total_cards,
+                    "requested_card_count": config.card_count,
+                    "selected_cards": selected_cards_payload,
+                    "message": message,
+                    "questions": questions,
+                }),
+            )
+
         # Retourner la réponse
         return schemas.QuizCardSelection(
             session_pk=session.session_pk,
@@ -103,7 +152,8 @@ async def start_quiz(
             total_cards_in_deck=total_cards,
             requested_card_count=config.card_count,
             selected_cards=selected_cards_payload,
-            message=message
+            message=message,
+            questions=questions
         )
         
     except ValueError as e:
@@ -118,6 +168,80 @@ async def start_quiz(
         )
 
 
+async def _denied_decks(db: AsyncSession, user, deck_pks: list[int]) -> list[int]:
+    """Decks pour lesquels l'utilisateur n'a pas de pass actif"""
+    denied = []
+    for deck_pk in deck_pks:
+        access = await crud_access.access_response(db, user, "deck", deck_pk)
+        if not access.allowed:
+            denied.append(deck_pk)
+    return denied
+
+
+@router.post("/start-mixed", response_model=schemas.QuizMixedSelection, status_code=status.HTTP_201_CREATED)
+async def start_mixed_quiz(
+    config: schemas.QuizMixedConfigRequest,
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Démarre une session de révision mélangeant plusieurs decks.
+    
+    Les cartes les plus urgentes de tous les decks choisis (échéance, puis
+    difficulté) sont fusionnées en une seule session. Chaque carte indique le
+    deck auquel sa réponse sera attribuée.
+    
+    **Paramètres:**
+    - **deck_pks**: decks à mélanger ; absent = tous mes decks (ceux sans pass actif sont ignorés)
+    - **card_count**: nombre de cartes de la session
+    - **quiz_type**: type de quiz
+    
+    **Réponses :** à envoyer par `POST /api/quiz/sessions/{session_pk}/answers`,
+    qui les répartit par deck ; `POST /api/quiz/complete/{session_pk}` reporte
+    ensuite les résultats sur chaque UserDeck.
+    """
+    if config.deck_pks is None:
+        deck_pks = await crud_quiz.get_user_deck_pks(db, current_user.user_pk)
+        denied = await _denied_decks(db, current_user, deck_pks)
+        deck_pks = [deck_pk for deck_pk in deck_pks if deck_pk not in denied]
+    else:
+        deck_pks = sorted(set(config.deck_pks))
+        denied = await _denied_decks(db, current_user, deck_pks)
+        if denied:
+            raise HTTPException(status_code=402, detail=f"Un pass actif est requis pour les decks {denied}")
+
+    entries = await crud_quiz.select_mixed_cards(db, current_user.user_pk, deck_pks, config.card_count)
+    card_pks = [entry.card_pk for entry in entries]
+    cards = {card.card_pk: card for card in await crud_quiz.load_quiz_cards(db, card_pks)}
+    schedules = await crud_schedules.get_schedules(db, current_user.user_pk, card_pks)
+    selected_cards = [
+        schemas.QuizMixedCard(
+            card_pk=entry.card_pk,
+            deck_pk=entry.deck_pk,
+            front=cards[entry.card_pk].front,
+            back=cards[entry.card_pk].back,
+            pronunciation=cards[entry.card_pk].pronunciation,
+            image=cards[entry.card_pk].image,
+            box=schedules.get(entry.card_pk, crud_schedules.NEW_CARD).box,
+            tags=schemas.CardBase.parse_tags_if_string(cards[entry.card_pk].tags),
+        )
+        for entry in entries
+        if entry.card_pk in cards
+    ]
+
+    session = await crud_quiz.create_mixed_session(
+        db, current_user.user_pk, entries, config.card_count, config.quiz_type
+    )
+    due_now = sum(1 for entry in entries if crud_quiz.is_due(entry.due))
+    return schemas.QuizMixedSelection(
+        session_pk=session.session_pk,
+        deck_pks=deck_pks,
+        requested_card_count=config.card_count,
+        selected_cards=selected_cards,
+        message=f"Session mixte de {len(selected_cards)} cartes sur {len(deck_pks)} decks ({due_now} à revoir).",
+    )
+
+
 # ============================================================================
 # MISE À JOUR DES PERFORMANCES
 # ============================================================================
@@ -154,16 +278,10 @@ async def record_answer(
             is_correct
         )
         
-        # Charger la carte pour avoir consecutive_correct
-        from sqlalchemy import select
-        from ..models import Card
-        stmt = select(Card).where(Card.card_pk == card_pk)
-        result = await db.execute(stmt)
-        card = result.scalar_one_or_none()
-        
-        # Injecter consecutive_correct manuellement
+        # consecutive_correct provient de l'état propre à l'utilisateur
+        schedules = await crud_schedules.get_schedules(db, current_user.user_pk, [card_pk])
         perf_dict = performance.__dict__.copy()
-        perf_dict['consecutive_correct'] = card.consecutive_correct if card else 0
+        perf_dict['consecutive_correct'] = schedules.get(card_pk, crud_schedules.NEW_CARD).consecutive_correct
         
         return schemas.CardPerformanceResponse(**perf_dict)
         
@@ -174,6 +292,58 @@ async def record_answer(
         )
 
 
+@router.post("/sessions/{session_pk}/answers", response_model=list[schemas.CardPerformanceResponse])
+async def record_session_answers(
+    session_pk: int,
+    batch: schemas.QuizAnswerBatch,
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Enregistre en une requête toutes les réponses d'une session.
+    
+    Même effet que `POST /answer` appelé pour chaque réponse, dans l'ordre
+    (performances, algorithme Anki, points), mais en une seule transaction.
+    Pour une session mixte, chaque réponse va au deck de sa carte.
+    Seules les cartes de la session sont acceptées (400) ; une session
+    terminée refuse les réponses (409).
+    
+    **Retourne:** les performances mises à jour, une par carte (ordre de première réponse)
+    """
+    # Lu avant le commit de record_answers, qui expire l'utilisateur chargé dans la même session
+    user_pk = current_user.user_pk
+    session = await crud_quiz.get_user_quiz_session(db, user_pk, session_pk)
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session de quiz introuvable")
+    if session.completed_at is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Session de quiz déjà terminée")
+    if session.deck_pk is None:
+        deck_pks = sorted(set((await crud_quiz.get_session_card_decks(db, session_pk)).values()))
+    else:
+        deck_pks = [session.deck_pk]
+    if await _denied_decks(db, current_user, deck_pks):
+        raise HTTPException(status_code=402, detail="Un pass actif est requis pour enregistrer ces réponses")
+
+    try:
+        performances = await crud_quiz.record_answers(
+            db,
+            user_pk,
+            session,
+            [(answer.card_pk, answer.is_correct) for answer in batch.answers]
+        )
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    schedules = await crud_schedules.get_schedules(db, user_pk, [p.card_pk for p in performances])
+    return [
+        schemas.CardPerformanceResponse(
+            **p.__dict__,
+            consecutive_correct=schedules.get(p.card_pk, crud_schedules.NEW_CARD).consecutive_correct
+        ) for p in performances
+    ]
+
+
 # ============================================================================
 # FINALISATION D'UNE SESSION
 # ============================================================================
@@ -183,11 +353,15 @@ async def complete_quiz(
     session_pk: int,
     correct_count: int,
     total_questions: int,
+    background_tasks: BackgroundTasks,
     current_user = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Marque une session de quiz comme terminée et enregistre les résultats finaux.
+
+    La sélection du prochain quiz (même deck, même nombre de cartes) est
+    préparée après la réponse : le ``/start`` suivant la réutilise.
     
     **Paramètres:**
     - **session_pk**: ID de la session
@@ -207,7 +381,25 @@ async def complete_quiz(
             detail="Session de quiz introuvable"
         )
     
-    return schemas.QuizSessionResponse.model_validate(session)
+    response = schemas.QuizSessionResponse.model_validate(session)
+    if session.deck_pk is not None:
+        background_tasks.add_task(
+            crud_quiz.prefetch_quiz_selection, session.user_pk, session.deck_pk, session.card_count
+        )
+    return response
+
+
+@router.get("/prefetch/stats")
+async def get_prefetch_stats(
+    _current_user = Depends(require_teacher_or_admin),
+):
+    """
+    Compteurs du cache des sélections préparées (propres à ce processus).
+
+    ``hits`` / ``misses`` : ``/start`` servis ou non par une sélection préparée ;
+    ``discarded`` : préparations abandonnées car une réponse est arrivée pendant le calcul.
+    """
+    return crud_quiz.quiz_prefetch_cache.stats()
 
 
 # ============================================================================
@@ -255,10 +447,11 @@ async def get_deck_performances(
         deck_pk
     )
     
+    schedules = await crud_schedules.get_schedules(db, user_pk, [p.card_pk for p in performances])
     return [
         schemas.CardPerformanceResponse(
             **p.__dict__,
-            consecutive_correct=p.card.consecutive_correct if p.card else 0
+            consecutive_correct=schedules.get(p.card_pk, crud_schedules.NEW_CARD).consecutive_correct
         ) for p in performances
     ]
 
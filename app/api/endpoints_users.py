@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
+from ..core.pagination import NEXT_CURSOR_HEADER, InvalidCursorError, decode_cursor, next_cursor
+from ..core.review_sync import SyncPayloadError, SyncPayloadTooLarge, decode_body
 from ..database import get_db
-from .. import schemas, crud_users
+from .. import schemas, crud_due_queue, crud_forecast, crud_review_sync, crud_score_aggregation, crud_users
 from ..security import (
     create_access_token,
     create_refresh_token,
     get_current_user,
     get_current_active_user,
+    require_admin,
     require_teacher_or_admin,
     ACCESS_TOKEN_EXPIRE_MINUTES,
 )
@@ -52,6 +57,8 @@ async def register(
         expires_delta=access_token_expires
     )
     
+    # Compteurs incluant les scores pas encore agrégés, comme GET /me
+    await crud_score_aggregation.merge_user(db, user)
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -95,6 +102,8 @@ async def login(
         expires_delta=access_token_expires
     )
     
+    # Compteurs incluant les scores pas encore agrégés, comme GET /me
+    await crud_score_aggregation.merge_user(db, user)
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -134,6 +143,8 @@ async def google_login(
         expires_delta=access_token_expires
     )
     
+    # Compteurs incluant les scores pas encore agrégés, comme GET /me
+    await crud_score_aggregation.merge_user(db, user)
     return {
         "access_token": access_token,
         "token_type": "bearer",
@@ -147,9 +158,11 @@ async def google_login(
 
 @router.get("/me", response_model=schemas.UserDetailResponse)
 async def get_current_user_profile(
-    current_user = Depends(get_current_active_user)
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Récupère le profil de l'utilisateur actuel."""
+    """Récupère le profil de l'utilisateur actuel (compteurs incluant les scores pas encore agrégés)."""
+    await crud_score_aggregation.merge_user(db, current_user)
     return schemas.UserDetailResponse.model_validate(current_user)
 
 
@@ -161,6 +174,7 @@ async def update_current_user_profile(
 ):
     """Met à jour le profil de l'utilisateur actuel."""
     updated_user = await crud_users.update_user(db, current_user, user_data)
+    await crud_score_aggregation.merge_user(db, updated_user)
     return schemas.UserDetailResponse.model_validate(updated_user)
 
 
@@ -278,31 +292,87 @@ async def create_user_score(
     return schemas.UserScore.model_validate(score)
 
 
+SCORES_CURSOR_SCOPE = "scores"
+
+
+def _scores_cursor(cursor: str | None):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(SCORES_CURSOR_SCOPE, cursor)
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _set_scores_cursor(response: Response, scores: list, limit: int) -> None:
+    token = next_cursor(SCORES_CURSOR_SCOPE, scores, limit, "created_at", "score_pk")
+    if token:
+        response.headers[NEXT_CURSOR_HEADER] = token
+
+
 @router.get("/scores", response_model=list[schemas.UserScore])
 async def get_user_scores(
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
     offset: int = 0,
+    cursor: str = Query(None, description="Jeton X-Next-Cursor de la page précédente (remplace offset)"),
     current_user = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """Récupère les scores de l'utilisateur actuel."""
-    scores = await crud_users.get_user_scores(db, current_user.user_pk, limit, offset)
+    """Récupère les scores de l'utilisateur actuel (du plus récent au plus ancien)."""
+    scores = await crud_users.get_user_scores(
+        db, current_user.user_pk, limit, offset, before=_scores_cursor(cursor)
+    )
+    _set_scores_cursor(response, scores, limit)
     return [schemas.UserScore.model_validate(s) for s in scores]
 
 
 @router.get("/scores/deck/{deck_pk}", response_model=list[schemas.UserScore])
 async def get_user_deck_scores(
     deck_pk: int,
-    limit: int = 100,
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
     offset: int = 0,
+    cursor: str = Query(None, description="Jeton X-Next-Cursor de la page précédente (remplace offset)"),
     current_user = Depends(require_teacher_or_admin),
     db: AsyncSession = Depends(get_db)
 ):
     """Récupère les scores de l'utilisateur actuel pour un deck spécifique."""
-    scores = await crud_users.get_user_deck_scores(db, current_user.user_pk, deck_pk, limit, offset)
+    scores = await crud_users.get_user_deck_scores(
+        db, current_user.user_pk, deck_pk, limit, offset, before=_scores_cursor(cursor)
+    )
+    _set_scores_cursor(response, scores, limit)
     return [schemas.UserScore.model_validate(s) for s in scores]
 
 
+@router.post("/reviews/sync", response_model=schemas.ReviewSyncResponse)
+async def sync_offline_reviews(
+    request: Request,
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Synchronise les révisions faites hors ligne (corps `ReviewSyncRequest`,
+    éventuellement compressé : `Content-Encoding: gzip`).
+
+    Chaque révision porte un `event_id` (UUID client) : renvoyer un lot déjà
+    reçu ne l'applique pas deux fois. Les nouvelles révisions sont appliquées
+    dans l'ordre de `reviewed_at`, en une transaction ; la réponse donne
+    l'état de planification de chaque carte du lot.
+    """
+    try:
+        body = decode_body(await request.body(), request.headers.get("content-encoding"))
+    except SyncPayloadTooLarge as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+    except SyncPayloadError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    try:
+        payload = schemas.ReviewSyncRequest.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False))
+    return await crud_review_sync.sync_reviews(db, current_user.user_pk, payload.events)
+
+
 # ============================================================================
 # GESTION DES ENREGISTREMENTS AUDIO
 # ============================================================================
@@ -352,6 +422,43 @@ async def delete_user_audio(
 # STATISTIQUES UTILISATEUR
 # ============================================================================
 
+@router.get("/due", response_model=schemas.DueQueue)
+async def get_due_queue(
+    limit: int = Query(20, ge=1, le=200),
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    File de révision de l'utilisateur : nombre de cartes échues, à réviser
+    aujourd'hui et au total, puis les `limit` prochaines cartes échues.
+    """
+    return await crud_due_queue.get_due_queue(db, current_user.user_pk, limit=limit)
+
+
+@router.get("/forecast", response_model=schemas.ReviewForecast)
+async def get_review_forecast(
+    days: int = Query(30, ge=1, le=365),
+    current_user = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Révisions prévues par jour pour les `days` prochains jours : échéances
+    actuelles et révisions simulées (relectures après oubli comprises, selon
+    le taux de réussite de l'utilisateur). Recalculée après chaque révision.
+    """
+    return await crud_forecast.get_user_forecast(db, current_user.user_pk, days)
+
+
+@router.get("/forecast/all", response_model=schemas.ReviewForecast)
+async def get_global_review_forecast(
+    days: int = Query(30, ge=1, le=365),
+    _admin = Depends(require_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Même prévision pour l'ensemble des utilisateurs (charge attendue du service, admin)."""
+    return await crud_forecast.get_global_forecast(db, days)
+
+
 @router.get("/stats", response_model=schemas.UserStatsResponse)
 async def get_user_stats(
     current_user = Depends(get_current_active_user),
@@ -391,4 +498,5 @@ async def get_user(
             detail="User not found"
         )
     
+    await crud_score_aggregation.merge_user(db, user)
     return schemas.UserResponse.model_validate(user)
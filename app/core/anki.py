@@ -5,14 +5,20 @@ from typing import Literal
 
 Grade = Literal[0, 1, 2, 3]  # Again, Hard, Good, Easy
 
+# Variation aléatoire des intervalles d'au moins 7 jours
+FUZZ_LOW, FUZZ_HIGH = 0.925, 1.075
+
 def anki_review(
     easiness: float,
     interval: int,
     consecutive_correct: int,
     grade: Grade,
     last_reviewed_at: datetime | None = None,
+    now: datetime | None = None,
+    rng=random,
 ) -> dict:
-    now = datetime.utcnow()
+    # now : heure de la révision (naïve, UTC) ; une révision hors ligne passe la sienne
+    now = now or datetime.utcnow()
     last_reviewed_at = last_reviewed_at or now
 
     if grade == 0:  # Again
@@ -38,7 +44,7 @@ def anki_review(
 
     # Fuzz
     if interval >= 7:
-        fuzz = random.uniform(0.925, 1.075)
+        fuzz = rng.uniform(FUZZ_LOW, FUZZ_HIGH)
         interval = max(1, int(interval * fuzz + 0.5))
 
     return {
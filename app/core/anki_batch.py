@@ -0,0 +1,105 @@
+"""Version vectorisée (NumPy) de ``core.anki.anki_review`` pour des milliers de cartes.
+
+``anki_review_batch`` reçoit des tableaux (``easiness``, ``interval``,
+``consecutive_correct``, ``grade``) et renvoie les nouveaux tableaux. Les
+résultats sont identiques, valeur par valeur, à ``anki_review`` appelée carte
+par carte dans l'ordre des tableaux avec le même générateur aléatoire :
+mêmes opérations flottantes, même troncature, même arrondi, et un tirage de
+variation par carte concernée, dans le même ordre.
+
+Utilisé par le planificateur ``sm2`` (``core.schedulers``), par lequel
+passent toutes les révisions, et par les traitements de masse (simulations,
+``crud_reschedule``).
+"""
+
+import random
+from datetime import datetime
+
+import numpy as np
+
+from .anki import FUZZ_HIGH, FUZZ_LOW
+
+AGAIN_DELAY = np.timedelta64(10 * 60 * 1_000_000, "us")
+DAY = np.timedelta64(86_400 * 1_000_000, "us")
+
+# |x·10⁴ - (n + ½)| en dessous duquel np.round et round() peuvent diverger
+_TIE_TOLERANCE = 1e-6
+
+
+def _uniform(rng, size: int) -> np.ndarray:
+    """``size`` tirages de ``rng.uniform`` dans l'ordre (``random.Random`` ou ``np.random.Generator``)."""
+    if isinstance(rng, np.random.Generator):
+        return rng.uniform(FUZZ_LOW, FUZZ_HIGH, size=size)
+    return np.array([rng.uniform(FUZZ_LOW, FUZZ_HIGH) for _ in range(size)], dtype=np.float64)
+
+
+def round4(values: np.ndarray) -> np.ndarray:
+    """``round(x, 4)`` de Python, vectorisé.
+
+    ``np.round`` passe par ``x * 10⁴`` et arrondit les demis au pair : il ne
+    diffère de ``round`` que près d'un demi ; ces rares valeurs sont
+    recalculées une par une.
+    """
+    rounded = np.round(values, 4)
+    scaled = values * 1e4
+    ties = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < _TIE_TOLERANCE)
+    for index in ties:
+        rounded[index] = round(float(values[index]), 4)
+    return rounded
+
+
+def as_datetime64(now) -> np.ndarray:
+    """Heure(s) de révision naïve(s) en UTC : ``datetime`` ou tableau, en microsecondes."""
+    return np.asarray(now if now is not None else datetime.utcnow(), dtype="datetime64[us]")
+
+
+def anki_review_batch(
+    easiness,
+    interval,
+    consecutive_correct,
+    grade,
+    now=None,
+    rng=random,
+) -> dict:
+    """Applique ``anki_review`` à chaque carte ; renvoie ``easiness``, ``interval``,
+    ``consecutive_correct`` et ``next_review`` (``datetime64[us]``, naïf UTC).
+
+    ``now`` : une heure commune ou un tableau d'heures par carte (défaut : maintenant).
+    """
+    easiness = np.asarray(easiness, dtype=np.float64)
+    interval = np.asarray(interval, dtype=np.int64)
+    consecutive_correct = np.asarray(consecutive_correct, dtype=np.int64)
+    grade = np.asarray(grade, dtype=np.int64)
+    again = grade == 0
+
+    lapse = 3 - grade
+    new_easiness = np.maximum(1.3, easiness + (0.1 - lapse * (0.08 + lapse * 0.02)))
+
+    multiplier = np.where(grade == 1, 1.2, np.where(grade == 3, 1.3, 1.0))
+    grown = np.maximum(1, np.trunc(interval * new_easiness * multiplier).astype(np.int64))
+    new_interval = np.where(consecutive_correct < 1, 1, np.where(consecutive_correct == 1, 6, grown))
+
+    fuzzed = np.flatnonzero(~again & (new_interval >= 7))
+    if fuzzed.size:
+        fuzz = _uniform(rng, fuzzed.size)
+        new_interval[fuzzed] = np.maximum(1, np.trunc(new_interval[fuzzed] * fuzz + 0.5).astype(np.int64))
+
+    new_interval = np.where(again, 0, new_interval)
+    delay = np.where(again, AGAIN_DELAY, new_interval * DAY)
+    return {
+        "easiness": np.where(again, np.maximum(1.3, easiness - 0.20), round4(new_easiness)),
+        "interval": new_interval,
+        "consecutive_correct": np.where(again, 0, consecutive_correct + 1),
+        "next_review": as_datetime64(now) + delay,
+    }
+
+
+def due_dates(last_reviewed_at, interval) -> np.ndarray:
+    """Échéance d'un état enregistré : dernière révision + ``interval`` jours (10 minutes si 0)."""
+    interval = np.asarray(interval, dtype=np.int64)
+    return as_datetime64(last_reviewed_at) + np.where(interval > 0, interval * DAY, AGAIN_DELAY)
+
+
+def to_datetimes(values: np.ndarray) -> list[datetime]:
+    """``datetime64[us]`` → ``datetime`` naïfs (UTC)."""
+    return values.astype("datetime64[us]").tolist()
@@ -0,0 +1,146 @@
+"""Format d'archive de deck (``GET /decks/{deck_pk}/export``, ``POST /decks/import``).
+
+Une archive est un zip contenant :
+
+- ``manifest.json`` : format, version et métadonnées du deck ;
+- ``media/<sha256>.<ext>`` : chaque image ou MP3 distinct, une seule fois ;
+- ``cards.ndjson`` : une carte JSON par ligne, les médias étant référencés
+  par leur empreinte (``image_sha256``, ``audio_sha256``).
+
+Le zip est produit sur un flux non positionnable (descripteurs de données
+après chaque membre) : l'export est envoyé au fur et à mesure, sans jamais
+construire l'archive en mémoire.
+"""
+
+import io
+import json
+import re
+import zipfile
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from .media_storage import EXTENSIONS
+
+ARCHIVE_FORMAT = "apprendiamo-deck"
+ARCHIVE_VERSION = 1
+ARCHIVE_MEDIA_TYPE = "application/zip"
+MANIFEST_NAME = "manifest.json"
+CARDS_NAME = "cards.ndjson"
+MEDIA_DIR = "media/"
+
+# Champs de contenu exportés ; la planification (box, next_review…) reste propre à chaque environnement.
+CARD_FIELDS = (
+    "id_json", "front", "back", "pronunciation",
+    "explanation_it", "translation_en", "translation_de", "translation_mg",
+    "example", "tags",
+)
+
+_CONTENT_TYPES = {extension: content_type for content_type, extension in EXTENSIONS.items()}
+_MEDIA_RE = re.compile(r"^media/([0-9a-f]{64})\.([a-z0-9]+)$")
+
+
+class DeckArchiveError(ValueError):
+    """Archive illisible ou d'un format non supporté."""
+
+
+def media_member(sha256: str, content_type: str) -> str:
+    return f"{MEDIA_DIR}{sha256}.{EXTENSIONS.get(content_type, 'bin')}"
+
+
+def parse_media_member(name: str) -> Optional[Tuple[str, str]]:
+    """``(sha256, content_type)`` d'un membre ``media/…``, None pour un autre membre."""
+    match = _MEDIA_RE.match(name)
+    if not match or match.group(2) not in _CONTENT_TYPES:
+        return None
+    return match.group(1), _CONTENT_TYPES[match.group(2)]
+
+
+def build_manifest(deck: dict) -> bytes:
+    return json.dumps(
+        {
+            "format": ARCHIVE_FORMAT,
+            "version": ARCHIVE_VERSION,
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "deck": deck,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+
+
+def read_manifest(archive: zipfile.ZipFile) -> dict:
+    """Manifeste validé ; lève ``DeckArchiveError`` si l'archive n'est pas un export de deck."""
+    try:
+        manifest = json.loads(archive.read(MANIFEST_NAME))
+    except KeyError as exc:
+        raise DeckArchiveError(f"{MANIFEST_NAME} absent de l'archive") from exc
+    except ValueError as exc:
+        raise DeckArchiveError(f"{MANIFEST_NAME} illisible") from exc
+    if not isinstance(manifest, dict) or manifest.get("format") != ARCHIVE_FORMAT:
+        raise DeckArchiveError("Ce fichier n'est pas une archive de deck")
+    if manifest.get("version") != ARCHIVE_VERSION:
+        raise DeckArchiveError(f"Version d'archive non supportée : {manifest.get('version')}")
+    deck = manifest.get("deck")
+    if not isinstance(deck, dict) or not deck.get("name"):
+        raise DeckArchiveError("Métadonnées du deck absentes du manifeste")
+    if CARDS_NAME not in archive.namelist():
+        raise DeckArchiveError(f"{CARDS_NAME} absent de l'archive")
+    return manifest
+
+
+def card_line(record: dict) -> bytes:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def open_archive(fileobj) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile as exc:
+        raise DeckArchiveError("Le fichier n'est pas une archive zip valide") from exc
+
+
+class _StreamBuffer(io.RawIOBase):
+    """Sortie non positionnable d'un ``ZipFile`` : les octets écrits sont récupérés par ``drain``."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ArchiveStreamWriter:
+    """Construit le zip membre par membre et rend les octets produits à chaque étape.
+
+    Un seul membre peut être ouvert à la fois : ``open_member`` retourne un
+    flux écrivable, ``drain`` les octets prêts à envoyer.
+    """
+
+    def __init__(self):
+        self._buffer = _StreamBuffer()
+        self._zip = zipfile.ZipFile(self._buffer, mode="w")
+
+    def open_member(self, name: str, compress: bool = True):
+        info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        return self._zip.open(info, mode="w", force_zip64=True)
+
+    def write_member(self, name: str, payload: bytes, compress: bool = True) -> None:
+        with self.open_member(name, compress) as member:
+            member.write(payload)
+
+    def drain(self) -> bytes:
+        return self._buffer.drain()
+
+    def close(self) -> bytes:
+        """Écrit le répertoire central et retourne les derniers octets."""
+        self._zip.close()
+        return self._buffer.drain()
@@ -0,0 +1,131 @@
+"""Groupes de distracteurs pour les questions à choix multiples (QCM).
+
+Chaque carte d'un deck est rangée dans un groupe (nature, tranche de
+longueur, thème) calculé à partir de ses tags et de sa réponse (``back``).
+Les mauvaises réponses proposées sont prises dans le groupe de la carte :
+même nature de mot, longueur voisine et, si possible, même thème. Elles
+ne se devinent donc pas à la forme.
+"""
+
+import heapq
+import random
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+
+from .normalization import normalize_back
+
+# Tags de nature (tels qu'utilisés dans les decks, français ou italien)
+POS_TAGS = {
+    "nom": "nom", "nome": "nom",
+    "verbe": "verbe", "verbo": "verbe", "verbo pronominale": "verbe", "pronominal": "verbe",
+    "participio passato": "participe",
+    "adjectif": "adjectif", "aggettivo": "adjectif",
+    "adverbe": "adverbe", "avverbio": "adverbe",
+    "expression": "expression", "espressione": "expression",
+}
+# Tags présents sur presque toutes les cartes : ils ne distinguent aucun thème
+GENERIC_TAGS = {
+    "italien", "italiano", "fréquent", "courant", "irrégulier", "rare",
+    "a1", "a2", "b1", "b2", "c1", "c2",
+}
+# Bornes supérieures des tranches de longueur de la réponse
+LENGTH_BANDS = (4, 8, 14)
+_INFINITIVE_ENDINGS = ("are", "ere", "ire", "arsi", "ersi", "irsi")
+
+
+@dataclass(frozen=True)
+class PoolKey:
+    pos: str
+    length_band: int
+    theme: str
+
+
+def _tags(tags: Iterable[str]) -> List[str]:
+    return [tag.strip().casefold() for tag in tags or [] if tag and tag.strip()]
+
+
+def part_of_speech(tags: Iterable[str], answer: str) -> str:
+    """Nature du mot : tag explicite, sinon déduite de la réponse ("" si inconnue)."""
+    for tag in _tags(tags):
+        if tag in POS_TAGS:
+            return POS_TAGS[tag]
+    answer = normalize_back(answer)
+    if " " in answer:
+        return "expression"
+    if answer.endswith(_INFINITIVE_ENDINGS):
+        return "verbe"
+    return ""
+
+
+def length_band(answer: str) -> int:
+    length = len(normalize_back(answer))
+    return next((band for band, limit in enumerate(LENGTH_BANDS) if length <= limit), len(LENGTH_BANDS))
+
+
+def theme(tags: Iterable[str]) -> str:
+    """Premier tag qui n'est ni une nature ni un tag générique."""
+    return next((tag for tag in _tags(tags) if tag not in POS_TAGS and tag not in GENERIC_TAGS), "")
+
+
+def pool_key(tags: Iterable[str], answer: str) -> PoolKey:
+    return PoolKey(part_of_speech(tags, answer), length_band(answer), theme(tags))
+
+
+@dataclass(frozen=True)
+class PoolEntry:
+    """Carte du deck candidate comme distracteur."""
+    card_pk: int
+    key: PoolKey
+    answer: str
+
+
+def closest_answers(
+    key: PoolKey,
+    card_pk: int,
+    entries: Iterable[PoolEntry],
+    limit: int,
+    rng: random.Random = random,
+) -> List[str]:
+    """Réponses voisines de ``key``, de la plus proche à la plus lointaine.
+
+    Même nature d'abord, puis les autres ; dans chaque cas même thème, puis
+    tranche de longueur la plus proche, au hasard entre cartes équivalentes.
+    La carte ``card_pk`` elle-même est écartée.
+    """
+    ranked = heapq.nsmallest(limit, (
+        (
+            entry.key.pos != key.pos,
+            entry.key.theme != key.theme,
+            abs(entry.key.length_band - key.length_band),
+            rng.random(),
+            entry.answer,
+        )
+        for entry in entries
+        if entry.card_pk != card_pk
+    ))
+    return [answer for *_, answer in ranked]
+
+
+def build_choices(
+    answer: str,
+    distractors: Sequence[str],
+    choice_count: int,
+    rng: random.Random = random,
+) -> List[str]:
+    """Bonne réponse et ``choice_count - 1`` distracteurs distincts, mélangés.
+
+    ``distractors`` est trié du plus proche au plus lointain ; les doublons
+    (à la casse et aux espaces près) et la bonne réponse sont écartés.
+    """
+    seen = {normalize_back(answer)}
+    choices = [answer]
+    for distractor in distractors:
+        key = normalize_back(distractor)
+        if key in seen:
+            continue
+        seen.add(key)
+        choices.append(distractor)
+        if len(choices) == choice_count:
+            break
+    rng.shuffle(choices)
+    return choices
@@ -0,0 +1,29 @@
+"""Sélection de champs (``fields=front,back``) pour alléger les réponses de cartes."""
+
+from typing import Iterable, List, Optional
+
+
+class UnknownFieldError(ValueError):
+    """Champ demandé absent du schéma de réponse."""
+
+
+def parse_fields(
+    raw: Optional[str],
+    allowed: Iterable[str],
+    always: Iterable[str] = ("card_pk",),
+) -> Optional[List[str]]:
+    """Liste ordonnée des champs demandés, ``None`` si le paramètre est absent.
+
+    Les champs de ``always`` (identifiant) sont toujours inclus ; un nom
+    inconnu lève ``UnknownFieldError``.
+    """
+    if raw is None:
+        return None
+    allowed = list(allowed)
+    names = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise UnknownFieldError(
+            f"Champ(s) inconnu(s) : {', '.join(unknown)}. Champs disponibles : {', '.join(allowed)}"
+        )
+    return list(dict.fromkeys([*always, *names]))
@@ -0,0 +1,89 @@
+"""Recherche d'icônes hors requête HTTP : fournisseur interchangeable et parallélisme borné.
+
+Le fournisseur par défaut interroge Magnific (``image_scraper``). Les tests
+peuvent en injecter un autre via ``set_image_fetcher`` ou pointer
+``MAGNIFIC_API_BASE_URL`` vers un faux serveur local.
+"""
+
+import logging
+import os
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import anyio
+
+from .image_scraper import download_image, fetch_icon_urls
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ENRICHMENT_CONCURRENCY = int(os.getenv("IMAGE_ENRICHMENT_CONCURRENCY", "4"))
+IMAGE_ENRICHMENT_MAX_ATTEMPTS = int(os.getenv("IMAGE_ENRICHMENT_MAX_ATTEMPTS", "5"))
+IMAGE_ENRICHMENT_BACKOFF_SECONDS = float(os.getenv("IMAGE_ENRICHMENT_BACKOFF_SECONDS", "60"))
+IMAGE_ENRICHMENT_MAX_BACKOFF_SECONDS = float(os.getenv("IMAGE_ENRICHMENT_MAX_BACKOFF_SECONDS", "21600"))
+MAX_CANDIDATES = 5
+
+FetchedImage = Tuple[bytes, str]
+ImageFetcher = Callable[[str], Optional[FetchedImage]]
+
+
+def fetch_magnific_image(search_query: str) -> Optional[FetchedImage]:
+    """Cherche une icône Magnific et télécharge le premier candidat accessible (bloquant)."""
+    logger.info(f"🖼️ Auto-fetching icon for '{search_query}'...")
+    for url in fetch_icon_urls(search_query)[:MAX_CANDIDATES]:
+        downloaded = download_image(url)
+        if downloaded:
+            logger.info("   ✅ Icon successfully found and downloaded from Magnific.")
+            return downloaded
+    logger.info("   ❌ No reachable icon found.")
+    return None
+
+
+_fetcher: ImageFetcher = fetch_magnific_image
+
+
+def get_image_fetcher() -> ImageFetcher:
+    return _fetcher
+
+
+def set_image_fetcher(fetcher: Optional[ImageFetcher]) -> None:
+    """Remplace le fournisseur d'images (tests, scripts) ; ``None`` rétablit Magnific."""
+    global _fetcher
+    _fetcher = fetcher or fetch_magnific_image
+
+
+def is_image_url(search_query: str) -> bool:
+    """Vrai si la tâche porte l'URL d'une image à télécharger plutôt qu'une recherche."""
+    return search_query.startswith(("http://", "https://"))
+
+
+def backoff_delay(attempts: int) -> float:
+    """Délai avant la tentative suivante : exponentiel, plafonné."""
+    delay = IMAGE_ENRICHMENT_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return min(delay, IMAGE_ENRICHMENT_MAX_BACKOFF_SECONDS)
+
+
+async def fetch_images(
+    queries: Iterable[str],
+    fetcher: Optional[ImageFetcher] = None,
+    concurrency: int = IMAGE_ENRICHMENT_CONCURRENCY,
+) -> Dict[str, Optional[FetchedImage]]:
+    """Exécute une recherche par requête distincte, au plus ``concurrency`` à la fois.
+
+    Les appels bloquants passent par un limiteur dédié plutôt que par celui
+    d'anyio partagé avec les requêtes HTTP. Une exception du fournisseur est
+    journalisée et traitée comme une absence de résultat.
+    """
+    fetcher = fetcher or get_image_fetcher()
+    limiter = anyio.CapacityLimiter(max(concurrency, 1))
+    results: Dict[str, Optional[FetchedImage]] = {}
+
+    async def run(query: str) -> None:
+        try:
+            results[query] = await anyio.to_thread.run_sync(fetcher, query, limiter=limiter)
+        except Exception as exc:
+            logger.warning(f"Recherche d'image échouée pour '{query}': {exc}")
+            results[query] = None
+
+    async with anyio.create_task_group() as tg:
+        for query in dict.fromkeys(queries):
+            tg.start_soon(run, query)
+    return results
@@ -2,11 +2,11 @@
 import logging
 import os
 import requests
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 logger = logging.getLogger(__name__)
 
-MAGNIFIC_API_BASE_URL = "https://api.magnific.com/v1"
+MAGNIFIC_API_BASE_URL = os.getenv("MAGNIFIC_API_BASE_URL", "https://api.magnific.com/v1")
 
 def get_magnific_headers():
     # Fetch key dynamically to allow updating env vars without restart if needed (or for testing)
@@ -122,3 +122,29 @@ def fetch_icon_urls(query: str) -> List[str]:
     # Deduplicate while preserving order
     seen = set()
     return [x for x in all_urls if not (x in seen or seen.add(x))]
+
+DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+def download_image(url: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Downloads an image and returns (payload, content_type), or None on failure.
+    """
+    try:
+        response = requests.get(url, headers=DOWNLOAD_HEADERS, timeout=10)
+        response.raise_for_status()
+    except requests.RequestException as e:
+        logger.warning(f"Image download failed for {url}: {e}")
+        return None
+
+    content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+    if not content_type or 'text' in content_type:
+        # Fallback based on extension if content-type is missing or wrong
+        if url.endswith('.png'): content_type = 'image/png'
+        elif url.endswith('.svg'): content_type = 'image/svg+xml'
+        elif url.endswith('.webp'): content_type = 'image/webp'
+        else: content_type = 'image/jpeg'
+    if not response.content:
+        return None
+    return response.content, content_type
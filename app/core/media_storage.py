@@ -0,0 +1,163 @@
+"""Stockage adressé par contenu (SHA-256) des médias de flashcards.
+
+Chaque fichier est rangé sous une clé dérivée de son empreinte : deux cartes
+partageant la même icône pointent vers le même objet. Seul le backend
+système de fichiers local est fourni ; la classe ``MediaStorage`` décrit le
+contrat attendu d'un autre backend (Vercel Blob, S3…).
+"""
+
+import base64
+import binascii
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", "media"))
+MEDIA_STORAGE_BACKEND = os.getenv("MEDIA_STORAGE_BACKEND", "local")
+# MEDIA_ROOT est-il un disque persistant (volume Docker, disque Render) ? Sur
+# Vercel ou Render sans disque, le système de fichiers est perdu au redéploiement.
+MEDIA_ROOT_PERSISTENT = os.getenv("MEDIA_ROOT_PERSISTENT", "0") == "1"
+MAX_MEDIA_BYTES = int(os.getenv("BLOB_MAX_UPLOAD_BYTES", str(4 * 1024 * 1024)))
+CHUNK_SIZE = 64 * 1024
+
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+    "image/gif": "gif",
+    "image/svg+xml": "svg",
+    "audio/mpeg": "mp3",
+}
+
+# Images servies inline par GET /cards/{card_pk}/image : jamais de SVG ni de HTML
+# (contenu actif sur l'origine de l'API)
+RASTER_IMAGE_TYPES = frozenset({"image/png", "image/jpeg", "image/webp", "image/gif"})
+
+
+class MediaStorageError(ValueError):
+    """Média invalide ou introuvable dans le stockage."""
+
+
+def sha256_hex(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()
+
+
+def media_key(sha256: str, content_type: str) -> str:
+    """Clé de stockage : ``ab/cd/<sha256>.<ext>`` (répertoires à faible cardinalité)."""
+    extension = EXTENSIONS.get(content_type, "bin")
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}"
+
+
+def card_image_url(card_pk: int, sha256: Optional[str] = None) -> str:
+    """URL publique de l'image d'une carte, versionnée par l'empreinte du contenu."""
+    url = f"/cards/{card_pk}/image"
+    return f"{url}?v={sha256[:12]}" if sha256 else url
+
+
+def public_image_value(card_pk: int, image: Optional[str]) -> Optional[str]:
+    """Remplace une image encore inline (Data URI) par son URL de streaming."""
+    return card_image_url(card_pk) if is_data_uri(image) else image
+
+
+def is_data_uri(value: Optional[str]) -> bool:
+    return bool(value) and value.startswith("data:")
+
+
+def decode_data_uri(data_uri: str) -> tuple[bytes, str]:
+    """Décode un Data URI base64 en ``(octets, content_type)``."""
+    if not is_data_uri(data_uri) or ";base64," not in data_uri:
+        raise MediaStorageError("Le contenu n'est pas un Data URI base64")
+    header, encoded = data_uri.split(",", 1)
+    content_type = header[len("data:"):].split(";", 1)[0].strip().lower() or "application/octet-stream"
+    try:
+        payload = base64.b64decode(encoded, validate=True)
+    except (ValueError, binascii.Error) as exc:
+        raise MediaStorageError("Le contenu base64 est invalide") from exc
+    return payload, content_type
+
+
+class MediaStorage:
+    """Contrat minimal d'un backend de stockage de médias."""
+
+    provider = "abstract"
+    # Faux si les fichiers ne survivent pas à un redéploiement
+    durable = False
+
+    def put(self, payload: bytes, content_type: str) -> tuple[str, str]:
+        """Enregistre ``payload`` et retourne ``(sha256, pathname)``. Idempotent."""
+        raise NotImplementedError
+
+    def exists(self, pathname: str) -> bool:
+        raise NotImplementedError
+
+    def iter_chunks(self, pathname: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def read(self, pathname: str) -> bytes:
+        return b"".join(self.iter_chunks(pathname))
+
+
+class LocalMediaStorage(MediaStorage):
+    """Backend système de fichiers : ``<root>/ab/cd/<sha256>.<ext>``."""
+
+    provider = "local"
+
+    def __init__(self, root: Path = MEDIA_ROOT, durable: bool = MEDIA_ROOT_PERSISTENT):
+        self.root = Path(root)
+        self.durable = durable
+
+    def _path(self, pathname: str) -> Path:
+        path = (self.root / pathname).resolve()
+        if self.root.resolve() not in path.parents:
+            raise MediaStorageError("Chemin de média invalide")
+        return path
+
+    def put(self, payload: bytes, content_type: str) -> tuple[str, str]:
+        if not payload:
+            raise MediaStorageError("Le média est vide")
+        if len(payload) > MAX_MEDIA_BYTES:
+            raise MediaStorageError(f"Le média dépasse la limite de {MAX_MEDIA_BYTES} octets")
+        digest = sha256_hex(payload)
+        pathname = media_key(digest, content_type)
+        path = self._path(pathname)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Écriture atomique : un lecteur concurrent ne voit jamais de fichier partiel.
+            tmp_path = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, path)
+        return digest, pathname
+
+    def exists(self, pathname: str) -> bool:
+        return self._path(pathname).is_file()
+
+    def iter_chunks(self, pathname: str, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        path = self._path(pathname)
+        if not path.is_file():
+            raise MediaStorageError("Média introuvable dans le stockage")
+        with path.open("rb") as handle:
+            while chunk := handle.read(chunk_size):
+                yield chunk
+
+
+_storage: Optional[MediaStorage] = None
+
+
+def get_media_storage() -> MediaStorage:
+    """Retourne le backend configuré par ``MEDIA_STORAGE_BACKEND``."""
+    global _storage
+    if _storage is None:
+        if MEDIA_STORAGE_BACKEND != "local":
+            logger.warning(f"⚠️ Backend média '{MEDIA_STORAGE_BACKEND}' inconnu, utilisation du stockage local.")
+        _storage = LocalMediaStorage()
+    return _storage
+
+
+def set_media_storage(storage: Optional[MediaStorage]) -> None:
+    """Remplace le backend courant (tests, scripts)."""
+    global _storage
+    _storage = storage
@@ -0,0 +1,46 @@
+"""Fusion des files de révision de plusieurs decks (sessions mixtes).
+
+Chaque deck fournit un flux de cartes déjà trié (échéance, puis cartes
+difficiles d'abord) ; ``merge_streams`` les fusionne avec un tas
+(``heapq.merge``, k flux) et s'arrête dès que la session est pleine : seules
+les têtes de flux sont comparées, aucun deck n'est trié en entier.
+"""
+
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, List, Optional
+
+from .quiz_selection import naive_utc
+
+
+@dataclass(frozen=True)
+class StreamEntry:
+    deck_pk: int
+    card_pk: int
+    due: datetime
+    priority_score: Optional[float] = None
+
+
+def sort_key(entry: StreamEntry) -> tuple:
+    """Plus tôt dû d'abord ; à échéance égale, la carte la plus difficile."""
+    return (naive_utc(entry.due), -(entry.priority_score or 0), entry.card_pk)
+
+
+def merge_streams(streams: Iterable[Iterable[StreamEntry]], count: int) -> List[StreamEntry]:
+    """Les ``count`` premières cartes distinctes de la fusion des flux.
+
+    Chaque flux doit être trié selon ``sort_key``. Une carte présente dans
+    plusieurs decks n'est retenue qu'une fois, pour le deck où elle arrive
+    en premier : ses réponses seront attribuées à ce deck.
+    """
+    seen = set()
+
+    def distinct(merged):
+        for entry in merged:
+            if entry.card_pk not in seen:
+                seen.add(entry.card_pk)
+                yield entry
+
+    return list(islice(distinct(heapq.merge(*streams, key=sort_key)), count))
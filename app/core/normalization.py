@@ -0,0 +1,16 @@
+"""Clés de comparaison des textes saisis par les utilisateurs."""
+
+import re
+import unicodedata
+
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_back(value: str) -> str:
+    """Clé d'unicité d'une carte à partir de son mot italien (``back``).
+
+    Même logique que ``conjugation_corpus.normalize_infinitive`` (NFKC puis
+    casefold), avec en plus la fusion des espaces : « Buona  Sera » et
+    « buona sera » désignent la même carte.
+    """
+    return _SPACES_RE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
@@ -0,0 +1,45 @@
+"""Pagination par curseur (keyset) : jetons opaques encodant la dernière clé lue.
+
+Une page suivante filtre ``(clé, pk) > (dernière clé, dernier pk)`` au lieu de
+sauter ``offset`` lignes : son coût ne dépend pas de la profondeur et les
+pages ne se décalent pas quand des lignes changent entre deux appels.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    """Curseur illisible ou émis pour une autre liste."""
+
+
+def encode_cursor(scope: str, position: datetime, pk: int) -> str:
+    payload = json.dumps({"s": scope, "t": position.isoformat(), "pk": pk}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(scope: str, token: str) -> Tuple[datetime, int]:
+    """Retourne ``(position, pk)`` ; lève ``InvalidCursorError`` si le jeton ne convient pas."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if payload["s"] != scope:
+            raise InvalidCursorError("Curseur émis pour une autre liste")
+        return datetime.fromisoformat(payload["t"]), int(payload["pk"])
+    except InvalidCursorError:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Curseur invalide") from exc
+
+
+def next_cursor(scope: str, items: list, limit: int, position_attr: str, pk_attr: str) -> Optional[str]:
+    """Curseur de la page suivante, ou None si la page n'est pas pleine."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(scope, getattr(last, position_attr), getattr(last, pk_attr))
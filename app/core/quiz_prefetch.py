@@ -0,0 +1,95 @@
+"""Cache des prochaines sélections de quiz, par (utilisateur, deck).
+
+La sélection suivante est préparée en tâche de fond à la fin d'une session ;
+``/api/quiz/start`` la consomme si elle est encore valable. Une réponse
+enregistrée entre-temps l'invalide : un compteur de génération par clé
+empêche aussi une préparation commencée avant cette réponse d'être stockée.
+
+Cache propre au processus, borné (LRU) et à durée de vie limitée : les
+échéances changent avec le temps même sans nouvelle réponse.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+Key = Tuple[int, int]  # (user_pk, deck_pk)
+
+
+@dataclass(frozen=True)
+class PrefetchedSelection:
+    card_count: int
+    card_pks: List[int]
+    cycle_number: int
+    review_count: int
+    created_at: float
+
+
+class QuizSelectionCache:
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Key, PrefetchedSelection]" = OrderedDict()
+        # Borné lui aussi : en oublier une clé change ``_epoch``, ce qui écarte
+        # toutes les préparations en cours plutôt que d'en accepter une obsolète
+        self._generations: "OrderedDict[Key, int]" = OrderedDict()
+        self._epoch = 0
+        self.counters = {"hits": 0, "misses": 0, "stored": 0, "discarded": 0, "invalidations": 0, "evictions": 0}
+
+    def generation(self, key: Key) -> Tuple[int, int]:
+        """À relever avant de préparer une sélection, puis à passer à ``put``."""
+        return (self._epoch, self._generations.get(key, 0))
+
+    def put(self, key: Key, generation: Tuple[int, int], card_count: int, card_pks: List[int], cycle_number: int, review_count: int) -> bool:
+        """Stocke la sélection, sauf si la clé a été invalidée depuis ``generation``."""
+        if self.generation(key) != generation:
+            self.counters["discarded"] += 1
+            return False
+        self._entries[key] = PrefetchedSelection(card_count, list(card_pks), cycle_number, review_count, self._clock())
+        self._entries.move_to_end(key)
+        self.counters["stored"] += 1
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters["evictions"] += 1
+        return True
+
+    def pop(self, key: Key, card_count: int) -> Optional[PrefetchedSelection]:
+        """Consomme la sélection préparée pour ce nombre de cartes (usage unique)."""
+        entry = self._entries.pop(key, None)
+        if (
+            entry is None
+            or entry.card_count != card_count
+            or self._clock() - entry.created_at > self.ttl_seconds
+        ):
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return entry
+
+    def invalidate(self, user_pk: int, deck_pk: Optional[int] = None) -> None:
+        """Oublie la sélection d'un deck, ou de tous les decks de l'utilisateur si ``deck_pk`` est None."""
+        if deck_pk is not None:
+            keys = [(user_pk, deck_pk)]
+        else:
+            keys = {key for key in (*self._entries, *self._generations) if key[0] == user_pk}
+            # Préparations en cours pour des decks sans génération connue : cas rare, on les écarte toutes
+            self._epoch += 1
+        for key in keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._generations.move_to_end(key)
+            if self._entries.pop(key, None) is not None:
+                self.counters["invalidations"] += 1
+        while len(self._generations) > 4 * self.max_entries:
+            self._generations.popitem(last=False)
+            self._epoch += 1
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return {
+            **self.counters,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
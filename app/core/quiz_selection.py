@@ -0,0 +1,94 @@
+"""Choix des cartes d'un quiz à partir de candidats légers.
+
+La sélection ne travaille que sur des tuples ``(card_pk, next_review,
+priority_score)`` lus en une requête : les cartes complètes (images,
+audio…) ne sont chargées qu'une fois le choix fait, pour les seules
+cartes retenues.
+"""
+
+import heapq
+import random
+from math import log
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class Candidate:
+    card_pk: int
+    next_review: datetime
+    priority_score: Optional[float] = None  # None : carte jamais vue par l'utilisateur
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Échéance comparable à ``datetime.utcnow()`` (aware en PostgreSQL, naïve en SQLite)."""
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def weight(candidate: Candidate) -> float:
+    """Poids = 1 + max(priority_score, 0) : les cartes difficiles sortent plus souvent."""
+    if candidate.priority_score is None:
+        return 1.0
+    return 1.0 + max(candidate.priority_score, 0)
+
+
+def weighted_sample(
+    items: Sequence[T],
+    weights: Sequence[float],
+    k: int,
+    rng: random.Random = random,
+) -> List[T]:
+    """Tirage pondéré sans remise de ``min(k, len(items))`` éléments distincts.
+
+    Clés exponentielles (Efraimidis-Spirakis) : chaque élément reçoit
+    ``log(u) / poids`` (soit ``-Exp(1) / poids``) et les ``k`` plus grandes
+    clés sont retenues, en une passe (O(n log k)). La probabilité d'être
+    tiré en premier est proportionnelle au poids, comme un tirage
+    séquentiel sans remise.
+    """
+    if k <= 0:
+        return []
+    uniform = rng.random
+    # 1 - u est dans ]0, 1] : log toujours défini
+    keys = [log(1.0 - uniform()) / w for w in weights]
+    return [items[index] for index in heapq.nlargest(k, range(len(keys)), key=keys.__getitem__)]
+
+
+def choose_cards(
+    candidates: Sequence[Candidate],
+    card_count: int,
+    now: datetime,
+    rng: random.Random = random,
+) -> Tuple[List[int], int]:
+    """Retourne ``(card_pks choisis, nombre de cartes à revoir)``.
+
+    1. Toutes les cartes échues (``next_review <= now``), dans un ordre aléatoire ;
+    2. complétées par un tirage pondéré sans remise parmi les cartes en cours ou nouvelles ;
+    3. sélection finale mélangée.
+
+    Exactement ``card_count`` cartes distinctes dès que le deck en contient assez.
+    """
+    # Une carte peut apparaître deux fois (performances historiques en double)
+    unique = {}
+    for candidate in candidates:
+        unique.setdefault(candidate.card_pk, candidate)
+
+    review, learning = [], []
+    for candidate in unique.values():
+        (review if naive_utc(candidate.next_review) <= now else learning).append(candidate)
+
+    rng.shuffle(review)
+    selected = [candidate.card_pk for candidate in review[:card_count]]
+    cards_needed = card_count - len(selected)
+
+    if cards_needed > 0 and learning:
+        selected.extend(
+            candidate.card_pk
+            for candidate in weighted_sample(learning, [weight(c) for c in learning], cards_needed, rng)
+        )
+
+    rng.shuffle(selected)
+    return selected, len(review)
@@ -0,0 +1,183 @@
+"""Prévision de la charge de révision (``GET /api/users/forecast``).
+
+À partir de l'état de planification des cartes, ``simulate`` rejoue jour
+par jour toutes les révisions à venir, toutes cartes à la fois (NumPy) :
+chaque carte échue est réussie avec sa probabilité historique, passe par
+le planificateur de son deck (``schedulers.review_batch``) et revient à sa
+nouvelle échéance. Une carte ratée est
+revue le jour même (10 minutes plus tard, réponse connue) puis le
+lendemain. La simulation est répétée ``runs`` fois en parallèle (cartes
+dupliquées) et les comptes sont moyennés.
+
+``ForecastCache`` garde les prévisions par utilisateur jusqu'à sa prochaine
+révision (ou expiration).
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .anki_batch import AGAIN_DELAY, DAY
+from .schedulers import DEFAULT_SCHEDULER, review_batch
+
+DEFAULT_SUCCESS_RATE = 0.8
+# Poids (en réponses) du taux de l'utilisateur dans le taux d'une carte peu vue
+PRIOR_WEIGHT = 5.0
+GOOD = 3
+AGAIN = 0
+
+Key = Tuple[Optional[int], int]  # (user_pk, days) ; user_pk None = tous les utilisateurs
+
+
+def smoothed_rates(correct, total, prior, weight: float = PRIOR_WEIGHT) -> np.ndarray:
+    """Taux de réussite ramené vers ``prior`` quand il y a peu de réponses."""
+    correct = np.asarray(correct, dtype=np.float64)
+    total = np.asarray(total, dtype=np.float64)
+    return (correct + weight * np.asarray(prior, dtype=np.float64)) / (total + weight)
+
+
+def due_days(due_at, start) -> np.ndarray:
+    """Jour d'échéance relatif à ``start`` (minuit UTC) ; une carte en retard tombe le jour 0."""
+    due_at = np.asarray(due_at, dtype="datetime64[us]")
+    return np.maximum(0, (due_at - np.datetime64(start, "us")) // DAY).astype(np.int64)
+
+
+def last_review_days(last_reviewed_at, start) -> np.ndarray:
+    """Jours (fractionnaires, négatifs) entre la dernière révision et ``start`` ; NaN si jamais révisée."""
+    last = np.asarray(last_reviewed_at, dtype="datetime64[us]")
+    days = (last - np.datetime64(start, "us")) / DAY
+    return np.where(np.isnat(last), np.nan, days)
+
+
+def simulate(
+    easiness,
+    interval,
+    consecutive_correct,
+    due_day,
+    success_rate,
+    days: int,
+    runs: int = 20,
+    rng: Optional[np.random.Generator] = None,
+    stability=None,
+    last_review_day=None,
+    scheduler=None,
+    schedulers: Sequence[Tuple[str, Optional[dict]]] = ((DEFAULT_SCHEDULER, None),),
+) -> np.ndarray:
+    """Nombre moyen de révisions par jour sur ``days`` jours (tableau de flottants).
+
+    ``scheduler`` donne, pour chaque carte, l'indice de son planificateur
+    dans ``schedulers`` (nom et paramètres du deck ; SM-2 par défaut) ;
+    chaque groupe passe par ``schedulers.review_batch``. ``stability`` et
+    ``last_review_day`` (voir ``last_review_days``) servent au planificateur
+    ``memory`` ; NaN si inconnues.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    counts = np.zeros(days, dtype=np.float64)
+    size = len(due_day)
+    due_day = np.tile(np.asarray(due_day, dtype=np.int64), runs)
+    if not due_day.size:
+        return counts
+    easiness = np.tile(np.asarray(easiness, dtype=np.float64), runs)
+    interval = np.tile(np.asarray(interval, dtype=np.int64), runs)
+    consecutive_correct = np.tile(np.asarray(consecutive_correct, dtype=np.int64), runs)
+    success_rate = np.tile(np.asarray(success_rate, dtype=np.float64), runs)
+    stability = np.tile(np.asarray(np.full(size, np.nan) if stability is None else stability, dtype=np.float64), runs)
+    last_day = np.tile(np.asarray(np.full(size, np.nan) if last_review_day is None else last_review_day, dtype=np.float64), runs)
+    scheduler = np.tile(np.asarray(np.zeros(size) if scheduler is None else scheduler, dtype=np.int64), runs)
+    # Horloge simulée : jour 0 à l'époque, seuls les écarts comptent
+    epoch = np.datetime64(0, "us")
+    last_reviewed_at = np.where(
+        np.isnan(last_day),
+        np.datetime64("NaT", "us"),
+        epoch + np.rint(np.nan_to_num(last_day) * (DAY / np.timedelta64(1, "us"))).astype("timedelta64[us]"),
+    )
+
+    def state(cards) -> dict:
+        return {
+            "easiness": easiness[cards],
+            "interval": interval[cards],
+            "consecutive_correct": consecutive_correct[cards],
+            "stability": stability[cards],
+            "last_reviewed_at": last_reviewed_at[cards],
+        }
+
+    for day in range(days):
+        due = np.flatnonzero(due_day == day)
+        if not due.size:
+            continue
+        correct = rng.random(due.size) < success_rate[due]
+        counts[day] += due.size + np.count_nonzero(~correct)
+        now = epoch + day * DAY
+        for group in np.unique(scheduler[due]):
+            in_group = scheduler[due] == group
+            cards, remembered = due[in_group], correct[in_group]
+            name, params = schedulers[group]
+            result = review_batch(name, params, state(cards), np.where(remembered, GOOD, AGAIN), now=now, rng=rng)
+            last_reviewed_at[cards] = now
+            # Carte ratée : revue 10 minutes plus tard, réponse connue
+            failed = np.flatnonzero(~remembered)
+            if failed.size:
+                relearn_at = now + AGAIN_DELAY
+                relearned = review_batch(
+                    name, params,
+                    {**{key: value[failed] for key, value in result.items()}, "last_reviewed_at": np.full(failed.size, now)},
+                    np.full(failed.size, GOOD), now=relearn_at, rng=rng,
+                )
+                for key in ("easiness", "interval", "consecutive_correct", "stability"):
+                    result[key][failed] = relearned[key]
+                last_reviewed_at[cards[failed]] = relearn_at
+            easiness[cards] = result["easiness"]
+            interval[cards] = result["interval"]
+            consecutive_correct[cards] = result["consecutive_correct"]
+            stability[cards] = result["stability"]
+            due_day[cards] = day + np.maximum(1, result["interval"])
+    return counts / runs
+
+
+class ForecastCache:
+    """Prévisions par (utilisateur, horizon), bornées (LRU) et à durée de vie limitée.
+
+    Même principe que ``QuizSelectionCache`` : une révision invalide les
+    prévisions de l'utilisateur, et un calcul commencé avant elle n'est pas
+    stocké (génération relevée avant le calcul).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 600, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Key, Tuple[float, dict]]" = OrderedDict()
+        self._generations: "OrderedDict[Optional[int], int]" = OrderedDict()
+        self._epoch = 0
+
+    def generation(self, user_pk: Optional[int]) -> Tuple[int, int]:
+        return (self._epoch, self._generations.get(user_pk, 0))
+
+    def get(self, key: Key) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None or self._clock() - entry[0] > self.ttl_seconds:
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Key, generation: Tuple[int, int], forecast: dict) -> bool:
+        if self.generation(key[0]) != generation:
+            return False
+        self._entries[key] = (self._clock(), forecast)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return True
+
+    def invalidate(self, user_pk: int) -> None:
+        """Oublie les prévisions de l'utilisateur (la prévision globale expire d'elle-même)."""
+        self._generations[user_pk] = self._generations.get(user_pk, 0) + 1
+        self._generations.move_to_end(user_pk)
+        for key in [key for key in self._entries if key[0] == user_pk]:
+            del self._entries[key]
+        while len(self._generations) > 4 * self.max_entries:
+            self._generations.popitem(last=False)
+            self._epoch += 1
@@ -0,0 +1,78 @@
+"""Synchronisation des révisions faites hors ligne (``POST /api/users/reviews/sync``).
+
+Fonctions pures : décodage du lot (éventuellement compressé en gzip),
+dédoublonnage par identifiant client, ordre d'application et heure retenue
+pour chaque révision. L'écriture est dans ``crud_review_sync``.
+"""
+
+import zlib
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, TypeVar
+
+# Taille maximale d'un lot une fois décompressé (protège contre les « bombes » gzip)
+MAX_SYNC_BYTES = 5 * 1024 * 1024
+
+Event = TypeVar("Event")
+
+
+class SyncPayloadError(ValueError):
+    """Corps de requête illisible : encodage inconnu ou gzip invalide."""
+
+
+class SyncPayloadTooLarge(SyncPayloadError):
+    """Lot plus gros que ``MAX_SYNC_BYTES`` une fois décompressé."""
+
+
+def decode_body(body: bytes, content_encoding: Optional[str], max_bytes: int = MAX_SYNC_BYTES) -> bytes:
+    """Corps décompressé selon ``Content-Encoding`` (``gzip``, ``deflate`` ou aucun)."""
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding == "identity":
+        data = body
+    elif encoding in ("gzip", "deflate"):
+        # wbits : gzip (16 + 15) ou zlib (15) ; max_length borne la sortie
+        decompressor = zlib.decompressobj(31 if encoding == "gzip" else 15)
+        try:
+            data = decompressor.decompress(body, max_bytes + 1)
+        except zlib.error as exc:
+            raise SyncPayloadError(f"Corps {encoding} invalide : {exc}") from exc
+        if not decompressor.eof and len(data) <= max_bytes:
+            raise SyncPayloadError(f"Corps {encoding} tronqué")
+    else:
+        raise SyncPayloadError(f"Content-Encoding non pris en charge : {content_encoding}")
+    if len(data) > max_bytes:
+        raise SyncPayloadTooLarge(f"Lot trop volumineux (plus de {max_bytes} octets)")
+    return data
+
+
+def utc(value: datetime) -> datetime:
+    """Date aware en UTC ; une date naïve envoyée par le client est supposée UTC."""
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def unique_events(events: Iterable[Event]) -> List[Event]:
+    """Première occurrence de chaque ``event_id`` du lot (un client qui renvoie deux fois la même révision)."""
+    seen = set()
+    unique = []
+    for event in events:
+        if event.event_id not in seen:
+            seen.add(event.event_id)
+            unique.append(event)
+    return unique
+
+
+def in_review_order(events: Iterable[Event]) -> List[Event]:
+    """Ordre d'application : heure client, puis identifiant (ordre stable entre deux envois)."""
+    return sorted(events, key=lambda event: (utc(event.reviewed_at), str(event.event_id)))
+
+
+def review_time(reviewed_at: datetime, last_reviewed_at: Optional[datetime], now: datetime) -> datetime:
+    """Heure retenue pour une révision hors ligne.
+
+    Bornée par ``now`` (horloge du téléphone en avance) et par la dernière
+    révision déjà connue de la carte : l'état d'une carte n'est jamais
+    recalculé à partir d'un instant antérieur à celui qui l'a produit.
+    """
+    value = min(utc(reviewed_at), utc(now))
+    if last_reviewed_at is not None:
+        value = max(value, utc(last_reviewed_at))
+    return value
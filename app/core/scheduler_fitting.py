@@ -0,0 +1,122 @@
+"""Calibrage hors ligne des paramètres du planificateur ``memory`` (``core.schedulers``).
+
+Le journal ``user_scores`` donne, pour chaque (utilisateur, carte), la suite
+des révisions datées et réussies ou non. Pour un jeu de paramètres, le
+modèle prédit avant chaque révision la probabilité de s'en souvenir
+(``retrievability``) ; ``fit`` retient, sur une grille, le jeu qui minimise
+la perte logarithmique de ces prédictions.
+
+Tout est vectorisé : au tour k, la k-ième révision de toutes les suites est
+traitée d'un coup, pour ``combo_batch`` jeux de paramètres à la fois
+(tableaux jeux × suites). La première révision d'une carte n'est pas
+prédite (carte nouvelle) ; elle initialise la stabilité.
+"""
+
+import itertools
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from .anki_batch import DAY
+from .schedulers import GRADE_THRESHOLDS, SCHEDULERS, next_stability, retrievability
+
+FITTED_PARAMS = ("initial_stability", "growth", "lapse")
+DEFAULT_GRID: Mapping[str, Sequence[float]] = {
+    "initial_stability": (0.25, 0.5, 1.0, 2.0, 4.0, 8.0),
+    "growth": (0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 6.0),
+    "lapse": (0.1, 0.2, 0.3, 0.5, 0.7),
+}
+# Probabilités bornées : une réponse contraire à une prédiction certaine ne coûte pas l'infini
+_EPSILON = 1e-3
+
+
+def grades_from_scores(score) -> np.ndarray:
+    """Notes Anki (0-3) de scores sur 100, version vectorisée de ``schedulers.answer_grade``."""
+    return np.searchsorted(np.array(GRADE_THRESHOLDS), np.asarray(score), side="right").astype(np.int64)
+
+
+def review_log(user_pk, card_pk, reviewed_at, score, is_correct) -> dict:
+    """Journal trié par (utilisateur, carte, date) et découpé en suites de révisions.
+
+    Renvoie ``sequence`` (numéro de suite), ``position`` (rang dans la
+    suite), ``elapsed`` (jours depuis la révision précédente), ``grade`` et
+    ``correct`` pour chaque révision, et ``sequences`` (nombre de suites).
+    """
+    user_pk = np.asarray(user_pk, dtype=np.int64)
+    card_pk = np.asarray(card_pk, dtype=np.int64)
+    reviewed_at = np.asarray(reviewed_at, dtype="datetime64[us]")
+    order = np.lexsort((reviewed_at, card_pk, user_pk))
+    user_pk, card_pk, reviewed_at = user_pk[order], card_pk[order], reviewed_at[order]
+
+    starts = np.ones(order.size, dtype=bool)
+    starts[1:] = (user_pk[1:] != user_pk[:-1]) | (card_pk[1:] != card_pk[:-1])
+    sequence = np.cumsum(starts) - 1
+    first = np.flatnonzero(starts)
+    elapsed = np.zeros(order.size, dtype=np.float64)
+    elapsed[1:] = (reviewed_at[1:] - reviewed_at[:-1]) / DAY
+    return {
+        "sequence": sequence,
+        "position": np.arange(order.size) - first[sequence] if order.size else sequence,
+        "elapsed": np.where(starts, 0.0, elapsed),
+        "grade": grades_from_scores(np.asarray(score)[order]),
+        "correct": np.asarray(is_correct, dtype=bool)[order],
+        "sequences": int(first.size),
+    }
+
+
+def log_losses(log: dict, initial_stability, growth, lapse) -> np.ndarray:
+    """Perte logarithmique moyenne de chaque jeu de paramètres (tableaux de même taille)."""
+    initial_stability = np.asarray(initial_stability, dtype=np.float64)[:, None]
+    growth = np.asarray(growth, dtype=np.float64)[:, None]
+    lapse = np.asarray(lapse, dtype=np.float64)[:, None]
+    stability = np.full((initial_stability.shape[0], log["sequences"]), np.nan)
+    total = np.zeros(initial_stability.shape[0])
+    predicted = 0
+
+    by_round = np.argsort(log["position"], kind="stable")
+    bounds = np.searchsorted(log["position"][by_round], np.arange(int(log["position"].max(initial=-1)) + 2))
+    for round_index in range(bounds.size - 1):
+        rows = by_round[bounds[round_index]:bounds[round_index + 1]]
+        sequence = log["sequence"][rows]
+        current = stability[:, sequence]
+        elapsed = log["elapsed"][rows]
+        if round_index:
+            recall = np.clip(retrievability(elapsed, current), _EPSILON, 1 - _EPSILON)
+            correct = log["correct"][rows]
+            total -= np.where(correct, np.log(recall), np.log1p(-recall)).sum(axis=1)
+            predicted += rows.size
+        stability[:, sequence] = next_stability(current, elapsed, log["grade"][rows], initial_stability, growth, lapse)
+    return total / max(predicted, 1)
+
+
+def predicted_reviews(log: dict) -> int:
+    """Révisions prédites (toutes sauf la première de chaque suite)."""
+    return int(log["position"].size - log["sequences"])
+
+
+def fit(
+    log: dict,
+    grid: Optional[Mapping[str, Sequence[float]]] = None,
+    combo_batch: int = 64,
+) -> dict:
+    """Meilleurs paramètres de la grille ; compare avec les paramètres par défaut.
+
+    Renvoie ``params`` (paramètres calibrés, ``target_retention`` exclu : il
+    reste un choix pédagogique), ``log_loss``, ``default_log_loss`` et
+    ``reviews`` (révisions prédites).
+    """
+    grid = {**DEFAULT_GRID, **(grid or {})}
+    combos = np.array(list(itertools.product(*(grid[name] for name in FITTED_PARAMS))), dtype=np.float64)
+    losses = np.concatenate([
+        log_losses(log, *combos[start:start + combo_batch].T)
+        for start in range(0, len(combos), combo_batch)
+    ])
+    best = int(np.argmin(losses))
+    defaults = SCHEDULERS["memory"].defaults
+    default_loss = log_losses(log, *([defaults[name]] for name in FITTED_PARAMS))[0]
+    return {
+        "params": {name: float(value) for name, value in zip(FITTED_PARAMS, combos[best])},
+        "log_loss": round(float(losses[best]), 6),
+        "default_log_loss": round(float(default_loss), 6),
+        "reviews": predicted_reviews(log),
+    }
@@ -0,0 +1,179 @@
+"""Planificateurs de révision interchangeables, choisis deck par deck.
+
+Chaque planificateur reçoit des tableaux NumPy (une case par carte) et
+renvoie les nouveaux tableaux : toutes les révisions, une seule réponse de
+quiz comme un lot hors ligne de milliers de cartes, passent par la même
+fonction ``review``.
+
+- ``sm2`` : l'algorithme historique (``anki_review_batch``), identique à
+  ``core.anki.anki_review`` carte par carte.
+- ``memory`` : modèle de mémoire à stabilité. La probabilité de se
+  souvenir d'une carte après ``t`` jours est ``R = 0,9^(t / S)`` (``S`` :
+  stabilité en jours). Une réussite fait croître ``S`` d'autant plus que la
+  carte était près d'être oubliée, un oubli la réduit (``lapse``). La
+  carte revient quand ``R`` atteint ``target_retention``. Les paramètres se
+  calibrent sur l'historique ``user_scores`` (``core.scheduler_fitting``).
+
+Le deck enregistre son planificateur (``decks.scheduler``) et ses
+paramètres (``decks.scheduler_params``, fusionnés avec ``defaults``).
+Toutes les réponses (quiz, scores, synchronisation hors ligne) sont notées
+par ``answer_grade``.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable, Mapping, Optional
+
+import numpy as np
+
+from .anki import Grade
+from .anki_batch import AGAIN_DELAY, DAY, anki_review_batch, as_datetime64
+
+DEFAULT_SCHEDULER = "sm2"
+
+# Rétention d'une carte révisée exactement à l'échéance de sa stabilité
+BASE_RETENTION = 0.9
+MIN_STABILITY = 0.1
+MAX_INTERVAL = 36500
+# Gain de stabilité selon la note (Hard, Good, Easy) ; une note 0 est un oubli
+GRADE_GAIN = np.array([0.0, 0.5, 1.0, 1.3])
+# Score sur 100 minimal des notes Hard, Good et Easy
+GRADE_THRESHOLDS = (50, 75, 90)
+
+
+def answer_grade(score: Optional[int] = None, is_correct: Optional[bool] = None) -> Grade:
+    """Note (0-3) d'une réponse : d'après son score sur 100, sinon 100 si juste et 0 si fausse.
+
+    Seul barème des révisions : ``POST /api/quiz/answer``, lots de session,
+    ``POST /api/users/scores`` et synchronisation hors ligne.
+    """
+    if score is None:
+        score = 100 if is_correct else 0
+    return sum(score >= threshold for threshold in GRADE_THRESHOLDS)
+
+
+def retrievability(elapsed_days, stability) -> np.ndarray:
+    """Probabilité de se souvenir après ``elapsed_days`` jours pour une stabilité donnée."""
+    return np.power(BASE_RETENTION, np.asarray(elapsed_days, dtype=np.float64) / stability)
+
+
+def next_stability(stability, elapsed_days, grade, initial_stability, growth, lapse) -> np.ndarray:
+    """Stabilité après une révision ; ``stability`` NaN = première révision de la carte.
+
+    Les paramètres peuvent être des tableaux diffusables (calibrage de
+    plusieurs jeux de paramètres à la fois).
+    """
+    stability = np.asarray(stability, dtype=np.float64)
+    grade = np.asarray(grade, dtype=np.int64)
+    new = np.isnan(stability)
+    known = np.where(new, 1.0, stability)
+    recall = retrievability(np.where(new, 0.0, elapsed_days), known)
+    gain = 1 + growth * GRADE_GAIN[grade] * (1 - recall) / (1 - BASE_RETENTION)
+    remembered = np.where(new, initial_stability, known * gain)
+    forgotten = np.maximum(MIN_STABILITY, np.where(new, initial_stability, known) * lapse)
+    return np.where(grade == 0, forgotten, remembered)
+
+
+def _review_sm2(state: dict, grade, now, params: Mapping[str, float], rng) -> dict:
+    result = anki_review_batch(
+        state["easiness"], state["interval"], state["consecutive_correct"], grade, now=now, rng=rng,
+    )
+    # La stabilité n'a pas de sens pour SM-2 : recalculée depuis l'intervalle si le deck change de planificateur
+    result["stability"] = np.full(result["interval"].shape, np.nan)
+    return result
+
+
+def _review_memory(state: dict, grade, now, params: Mapping[str, float], rng) -> dict:
+    grade = np.asarray(grade, dtype=np.int64)
+    now = as_datetime64(now)
+    interval = np.asarray(state["interval"], dtype=np.int64)
+    stability = np.asarray(state["stability"], dtype=np.float64)
+    last = np.asarray(state["last_reviewed_at"], dtype="datetime64[us]")
+    never_reviewed = np.isnat(last)
+    # Carte révisée jusqu'ici par SM-2 : son intervalle tient lieu de stabilité
+    stability = np.where(np.isnan(stability) & ~never_reviewed & (interval > 0), interval, stability)
+    stability = np.where(never_reviewed, np.nan, stability)
+    elapsed = np.where(never_reviewed, 0.0, (now - np.where(never_reviewed, now, last)) / DAY)
+
+    stability = next_stability(
+        stability, np.maximum(0.0, elapsed), grade,
+        params["initial_stability"], params["growth"], params["lapse"],
+    )
+    again = grade == 0
+    days = stability * np.log(params["target_retention"]) / np.log(BASE_RETENTION)
+    new_interval = np.where(again, 0, np.clip(np.rint(days), 1, MAX_INTERVAL).astype(np.int64))
+    return {
+        "easiness": np.asarray(state["easiness"], dtype=np.float64),
+        "interval": new_interval,
+        "consecutive_correct": np.where(again, 0, np.asarray(state["consecutive_correct"], dtype=np.int64) + 1),
+        "stability": np.round(stability, 4),
+        "next_review": now + np.where(again, AGAIN_DELAY, new_interval * DAY),
+    }
+
+
+def _between(low: float, high: float) -> Callable[[float], bool]:
+    return lambda value: low <= value <= high
+
+
+@dataclass(frozen=True)
+class Scheduler:
+    """Planificateur enregistré : fonction vectorisée et paramètres par défaut avec leurs bornes.
+
+    ``review(state, grade, now, params, rng)`` : ``state`` contient les
+    tableaux ``easiness``, ``interval``, ``consecutive_correct``,
+    ``stability`` (NaN si inconnue) et ``last_reviewed_at``
+    (``datetime64[us]``, NaT si jamais révisée) ; ``now`` est naïf UTC
+    (commun ou par carte). Renvoie les mêmes clés d'état et ``next_review``.
+    """
+    name: str
+    review: Callable[..., dict]
+    defaults: Mapping[str, float]
+    bounds: Mapping[str, Callable[[float], bool]]
+
+    def params(self, overrides: Optional[Mapping[str, float]] = None) -> dict:
+        """Paramètres effectifs : ``defaults`` complétés par ``overrides`` (ValueError si invalides)."""
+        merged = dict(self.defaults)
+        for key, value in (overrides or {}).items():
+            if key not in self.defaults:
+                raise ValueError(f"Paramètre inconnu pour {self.name} : {key}")
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not self.bounds[key](value):
+                raise ValueError(f"Valeur invalide pour {self.name}.{key} : {value!r}")
+            merged[key] = float(value)
+        return merged
+
+
+SCHEDULERS: dict[str, Scheduler] = {
+    "sm2": Scheduler("sm2", _review_sm2, {}, {}),
+    "memory": Scheduler(
+        "memory",
+        _review_memory,
+        defaults={"initial_stability": 1.0, "growth": 2.0, "lapse": 0.3, "target_retention": 0.9},
+        bounds={
+            "initial_stability": _between(0.1, 365.0),
+            "growth": _between(0.0, 20.0),
+            "lapse": _between(0.01, 1.0),
+            "target_retention": _between(0.5, 0.99),
+        },
+    ),
+}
+
+
+def get_scheduler(name: Optional[str]) -> Scheduler:
+    """Planificateur enregistré sous ``name`` (``sm2`` si absent) ; ValueError si inconnu."""
+    try:
+        return SCHEDULERS[name or DEFAULT_SCHEDULER]
+    except KeyError:
+        raise ValueError(f"Planificateur inconnu : {name} (disponibles : {', '.join(SCHEDULERS)})") from None
+
+
+def review_batch(
+    name: Optional[str],
+    params: Optional[Mapping[str, float]],
+    state: dict,
+    grade,
+    now=None,
+    rng=random,
+) -> dict:
+    """Applique le planificateur ``name`` avec ses paramètres enregistrés à un lot de cartes."""
+    scheduler = get_scheduler(name)
+    return scheduler.review(state, grade, as_datetime64(now), scheduler.params(params), rng)
@@ -0,0 +1,69 @@
+"""Report des scores (``user_scores``) sur les compteurs agrégés.
+
+``user_scores`` est le journal : ``create_score`` n'y ajoute qu'une ligne et
+le worker d'agrégation reporte les lignes non encore traitées, par lots, sur
+``users``, ``user_decks`` et ``decks``. Les mêmes règles servent aux lectures
+exactes, qui ajoutent aux compteurs les lignes encore en attente.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+USER_COUNTERS = ("total_score", "total_cards_learned", "total_cards_reviewed")
+USER_DECK_COUNTERS = (
+    "total_attempts", "total_points", "successful_attempts",
+    "points_frappe", "points_association", "points_qcm", "points_classique",
+)
+DECK_COUNTERS = ("total_attempts", "total_correct")
+QUIZ_TYPE_COUNTERS = {
+    "frappe": "points_frappe",
+    "association": "points_association",
+    "qcm": "points_qcm",
+    "classique": "points_classique",
+}
+
+
+@dataclass(frozen=True)
+class ScoreEvent:
+    user_pk: int
+    deck_pk: Optional[int]
+    card_pk: Optional[int]
+    score: int
+    is_correct: bool
+    quiz_type: str
+
+
+@dataclass
+class Deltas:
+    users: Dict[int, Counter] = field(default_factory=dict)
+    user_decks: Dict[Tuple[int, int], Counter] = field(default_factory=dict)
+    decks: Dict[int, Counter] = field(default_factory=dict)
+
+
+def fold_events(events: Iterable[ScoreEvent]) -> Deltas:
+    """Incréments cumulés par utilisateur, (utilisateur, deck) et deck.
+
+    Un score compte pour le deck seulement s'il porte sur une carte d'un deck,
+    comme l'ancienne mise à jour synchrone.
+    """
+    deltas = Deltas()
+    for event in events:
+        user = deltas.users.setdefault(event.user_pk, Counter())
+        user["total_score"] += event.score
+        user["total_cards_learned"] += int(event.is_correct)
+        user["total_cards_reviewed"] += 1
+
+        if event.deck_pk is None or event.card_pk is None:
+            continue
+        user_deck = deltas.user_decks.setdefault((event.user_pk, event.deck_pk), Counter())
+        user_deck["total_attempts"] += 1
+        user_deck["total_points"] += event.score
+        user_deck["successful_attempts"] += int(event.is_correct)
+        if event.quiz_type in QUIZ_TYPE_COUNTERS:
+            user_deck[QUIZ_TYPE_COUNTERS[event.quiz_type]] += event.score
+
+        deck = deltas.decks.setdefault(event.deck_pk, Counter())
+        deck["total_attempts"] += 1
+        deck["total_correct"] += int(event.is_correct)
+    return deltas
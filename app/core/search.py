@@ -0,0 +1,252 @@
+"""Recherche plein texte des cartes : normalisation, index inversé et extraits.
+
+Sous PostgreSQL, la recherche s'appuie sur les colonnes générées
+``search_vector`` (tsvector) et ``search_document`` (trigrammes) ; ce module
+fournit la même logique en mémoire pour SQLite (``TESTING``) ainsi que la
+mise en évidence des termes trouvés, commune aux deux moteurs.
+"""
+
+import html
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+# Champs indexés et poids (A/B/C côté PostgreSQL)
+SEARCH_FIELDS: Dict[str, float] = {
+    "back": 1.0,
+    "front": 1.0,
+    "translation_en": 0.4,
+    "translation_de": 0.4,
+    "translation_mg": 0.4,
+    "explanation_it": 0.2,
+    "example": 0.2,
+}
+
+# Mots vides italiens et français : ignorés dans les requêtes
+STOPWORDS = frozenset(
+    """
+    il lo la i gli le l un uno una un di del dello della dei degli delle
+    a al allo alla ai agli alle da dal dallo dalla dai dagli dalle in nel
+    nello nella nei negli nelle con su sul sullo sulla sui sugli sulle per
+    tra fra e ed o che
+    les une des de du d au aux et ou en qu
+    """.split()
+)
+
+MIN_PREFIX_LENGTH = 3
+FUZZY_THRESHOLD = 0.5
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+SNIPPET_WORDS = 12
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PUNCTUATION_RE = re.compile(r"[^\w\s]*", re.UNICODE)
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents : « Perché » → « perche »."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return unicodedata.normalize("NFKC", stripped).casefold()
+
+
+def tokenize(text: Optional[str], keep_stopwords: bool = True) -> List[str]:
+    """Découpe en mots repliés ; les élisions (l', dell', qu') sont séparées."""
+    if not text:
+        return []
+    tokens = _WORD_RE.findall(fold(text).replace("_", " "))
+    if keep_stopwords:
+        return tokens
+    return [token for token in tokens if token not in STOPWORDS]
+
+
+def query_terms(query: str) -> List[str]:
+    """Termes significatifs d'une requête (mots vides retirés sauf s'il ne reste rien)."""
+    terms = tokenize(query, keep_stopwords=False) or tokenize(query)
+    return list(dict.fromkeys(terms))
+
+
+def trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(left: str, right: str) -> float:
+    """Similarité trigrammes (Jaccard), comme ``pg_trgm.similarity``."""
+    a, b = trigrams(left), trigrams(right)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+@dataclass
+class SearchHit:
+    card_pk: int
+    score: float
+
+
+class InvertedIndex:
+    """Index inversé en mémoire ``terme → {card_pk: poids}``.
+
+    Chaque terme de la requête doit être trouvé (exact, préfixe ou approché
+    par trigrammes) ; le score additionne le poids des champs concernés.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._documents: Dict[int, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, card_pk: int, fields: Dict[str, Optional[str]]) -> None:
+        self.remove(card_pk)
+        terms: Set[str] = set()
+        for name, weight in SEARCH_FIELDS.items():
+            for term in tokenize(fields.get(name)):
+                postings = self._postings.setdefault(term, {})
+                postings[card_pk] = max(postings.get(card_pk, 0.0), weight)
+                if term not in terms:
+                    terms.add(term)
+                    for gram in trigrams(term):
+                        self._trigrams.setdefault(gram, set()).add(term)
+        self._documents[card_pk] = terms
+
+    def remove(self, card_pk: int) -> None:
+        for term in self._documents.pop(card_pk, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(card_pk, None)
+            if not postings:
+                del self._postings[term]
+                for gram in trigrams(term):
+                    bucket = self._trigrams.get(gram)
+                    if bucket is not None:
+                        bucket.discard(term)
+
+    def _expand(self, term: str) -> Dict[str, float]:
+        """Termes indexés correspondant à ``term`` avec leur qualité de correspondance."""
+        matches: Dict[str, float] = {}
+        if term in self._postings:
+            matches[term] = 1.0
+        candidates: Set[str] = set()
+        for gram in trigrams(term):
+            candidates |= self._trigrams.get(gram, set())
+        for candidate in candidates:
+            if candidate in matches:
+                continue
+            if len(term) >= MIN_PREFIX_LENGTH and candidate.startswith(term):
+                matches[candidate] = PREFIX_WEIGHT
+                continue
+            score = similarity(term, candidate)
+            if score >= FUZZY_THRESHOLD:
+                matches[candidate] = FUZZY_WEIGHT * score
+        return matches
+
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = None,
+        allowed: Optional[Iterable[int]] = None,
+    ) -> List[SearchHit]:
+        terms = query_terms(query)
+        if not terms:
+            return []
+        allowed_set = set(allowed) if allowed is not None else None
+
+        hits: Optional[Dict[int, SearchHit]] = None
+        for term in terms:
+            term_hits: Dict[int, SearchHit] = {}
+            for candidate, quality in self._expand(term).items():
+                for card_pk, weight in self._postings[candidate].items():
+                    if allowed_set is not None and card_pk not in allowed_set:
+                        continue
+                    hit = term_hits.setdefault(card_pk, SearchHit(card_pk, 0.0))
+                    hit.score = max(hit.score, quality * weight)
+            if hits is None:
+                hits = term_hits
+            else:
+                hits = {
+                    card_pk: SearchHit(card_pk, hits[card_pk].score + hit.score)
+                    for card_pk, hit in term_hits.items()
+                    if card_pk in hits
+                }
+            if not hits:
+                return []
+
+        ranked = sorted(hits.values(), key=lambda hit: (-hit.score, hit.card_pk))
+        return ranked[:limit] if limit is not None else ranked
+
+
+def _matches(word: str, terms: Iterable[str]) -> bool:
+    folded = fold(word)
+    return any(
+        folded.startswith(term) or similarity(folded, term) >= FUZZY_THRESHOLD
+        for term in terms
+    )
+
+
+def highlight(
+    text: Optional[str],
+    terms: Iterable[str],
+    max_words: int = SNIPPET_WORDS,
+) -> Optional[str]:
+    """Extrait de ``text`` centré sur le premier mot trouvé, termes entourés de <mark>.
+
+    Un mot correspond s'il commence par un terme ou s'en approche (trigrammes),
+    après repli des accents. Le texte est échappé (HTML) : seules les balises
+    <mark> ajoutées ici sont interprétées. Retourne None si aucun mot ne
+    correspond.
+    """
+    if not text:
+        return None
+    terms = [term for term in terms if term]
+    words = list(_WORD_RE.finditer(text))
+    matched = [index for index, match in enumerate(words) if _matches(match.group(), terms)]
+    if not matched:
+        return None
+
+    first = max(matched[0] - max_words // 3, 0)
+    last = min(first + max_words, len(words)) - 1
+    # Ponctuation collée aux mots extrêmes conservée (« ¿qué? »)
+    start = words[first].start()
+    while start > 0 and _PUNCTUATION_RE.fullmatch(text[start - 1]):
+        start -= 1
+    end = _PUNCTUATION_RE.match(text, words[last].end()).end()
+    pieces = []
+    cursor = start
+    for index in matched:
+        if index > last:
+            break
+        match = words[index]
+        pieces.append(html.escape(text[cursor:match.start()]))
+        pieces.append(f"{HIGHLIGHT_START}{html.escape(match.group())}{HIGHLIGHT_END}")
+        cursor = match.end()
+    pieces.append(html.escape(text[cursor:end]))
+    snippet = "".join(pieces)
+    if first > 0:
+        snippet = "…" + snippet
+    if last < len(words) - 1:
+        snippet += "…"
+    return snippet
+
+
+def highlights(fields: Dict[str, Optional[str]], query: str) -> Dict[str, str]:
+    """Extraits des champs indexés contenant au moins un terme de la requête."""
+    terms = query_terms(query)
+    snippets = {}
+    for name in SEARCH_FIELDS:
+        snippet = highlight(fields.get(name), terms)
+        if snippet:
+            snippets[name] = snippet
+    return snippets
+
+
+def tsquery_text(query: str) -> str:
+    """Requête ``to_tsquery('simple', …)`` : chaque terme en préfixe, reliés par ET."""
+    return " & ".join(f"{term}:*" for term in query_terms(query))
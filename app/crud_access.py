@@ -4,7 +4,7 @@ from typing import Iterable
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from . import models, schemas
+from . import crud_due_queue, models, schemas
 
 DURATION_DELTAS = {
     "1d": timedelta(days=1),
@@ -160,6 +160,7 @@ async def ensure_user_deck_for_subscription(
     user_deck = models.UserDeck(user_pk=user_pk, deck_pk=product_id)
     db.add(user_deck)
     await db.flush()
+    await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=product_id)
     return user_deck
 
 
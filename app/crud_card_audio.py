@@ -5,13 +5,14 @@ import binascii
 import os
 from datetime import datetime
 from pathlib import PurePath
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from fastapi import UploadFile
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from . import models
+from .database import dialect_insert
 
 MAX_CARD_AUDIO_BYTES = int(os.getenv("MAX_CARD_AUDIO_BYTES", str(10 * 1024 * 1024)))
 AUDIO_CONTENT_TYPE = "audio/mpeg"
@@ -48,12 +49,7 @@ def _decode_audio_data_uri(audio_data: str) -> bytes:
         raise CardAudioValidationError("Le contenu audio base64 est invalide") from exc
 
 
-async def _read_and_validate_upload(audio_file: UploadFile) -> tuple[bytes, str, Optional[str]]:
-    content_type = (audio_file.content_type or "").split(";", 1)[0].strip().lower()
-    if content_type not in {AUDIO_CONTENT_TYPE, "audio/mp3", "application/octet-stream"}:
-        raise CardAudioValidationError("Le fichier doit être un MP3 (audio/mpeg)")
-
-    payload = await audio_file.read(MAX_CARD_AUDIO_BYTES + 1)
+def _validate_payload(payload: bytes) -> None:
     if not payload:
         raise CardAudioValidationError("Le fichier audio est vide")
     if len(payload) > MAX_CARD_AUDIO_BYTES:
@@ -63,6 +59,14 @@ async def _read_and_validate_upload(audio_file: UploadFile) -> tuple[bytes, str,
     if not _looks_like_mp3(payload):
         raise CardAudioValidationError("Le contenu du fichier ne ressemble pas à un MP3 valide")
 
+
+async def _read_and_validate_upload(audio_file: UploadFile) -> tuple[bytes, str, Optional[str]]:
+    content_type = (audio_file.content_type or "").split(";", 1)[0].strip().lower()
+    if content_type not in {AUDIO_CONTENT_TYPE, "audio/mp3", "application/octet-stream"}:
+        raise CardAudioValidationError("Le fichier doit être un MP3 (audio/mpeg)")
+
+    payload = await audio_file.read(MAX_CARD_AUDIO_BYTES + 1)
+    _validate_payload(payload)
     return payload, AUDIO_CONTENT_TYPE, _normalise_filename(audio_file.filename)
 
 
@@ -114,6 +118,41 @@ async def upsert_card_audio(
     return _public_audio(audio)
 
 
+def encode_audio_payload(payload: bytes) -> str:
+    """Valide un MP3 et retourne le Data URI à enregistrer dans ``card_audio``."""
+    _validate_payload(payload)
+    return AUDIO_DATA_URI_PREFIX + base64.b64encode(payload).decode("ascii")
+
+
+async def add_missing_card_audio(db: AsyncSession, items: Dict[int, Tuple[str, int]]) -> int:
+    """Ajoute en une requête les prononciations ``{card_pk: (data_uri, size_bytes)}``.
+
+    Une carte qui a déjà un audio le conserve. Ne commit pas.
+    """
+    if not items:
+        return 0
+    now = datetime.utcnow()
+    rows = [
+        {
+            "card_pk": card_pk,
+            "filename": None,
+            "content_type": AUDIO_CONTENT_TYPE,
+            "size_bytes": size_bytes,
+            "audio_data": audio_data,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for card_pk, (audio_data, size_bytes) in items.items()
+    ]
+    result = await db.execute(
+        dialect_insert(db, models.CardAudio.__table__)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["card_pk"])
+        .returning(models.CardAudio.card_pk)
+    )
+    return len(result.all())
+
+
 async def get_card_audio(db: AsyncSession, card_pk: int) -> Optional[models.CardAudio]:
     result = await db.execute(
         select(models.CardAudio).where(models.CardAudio.card_pk == card_pk)
@@ -0,0 +1,254 @@
+"""Images de flashcards stockées hors de PostgreSQL (table ``card_media``).
+
+``cards.image`` ne contient plus que l'URL de streaming versionnée
+(``/cards/{card_pk}/image?v=…``) ou une URL externe ; les octets vivent dans
+le stockage adressé par contenu de ``core.media_storage``.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+import anyio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
+
+from . import models
+from .core.image_scraper import download_image
+from .database import dialect_insert
+from .core.media_storage import (
+    MediaStorage,
+    MediaStorageError,
+    card_image_url,
+    decode_data_uri,
+    get_media_storage,
+    is_data_uri,
+)
+
+logger = logging.getLogger(__name__)
+
+MEDIA_KIND_IMAGE = "image"
+
+
+@dataclass(frozen=True)
+class StoredImage:
+    """Image déjà présente dans le stockage, partageable entre plusieurs cartes."""
+    sha256: str
+    content_type: str
+    pathname: str
+    size_bytes: int
+    provider: str
+
+
+async def get_card_image(db: AsyncSession, card_pk: int) -> Optional[models.CardMedia]:
+    result = await db.execute(
+        select(models.CardMedia).where(
+            models.CardMedia.card_pk == card_pk,
+            models.CardMedia.kind == MEDIA_KIND_IMAGE,
+            models.CardMedia.is_primary.is_(True),
+        )
+    )
+    return result.scalars().first()
+
+
+async def store_image_payload(
+    payload: bytes,
+    content_type: str,
+    storage: Optional[MediaStorage] = None,
+) -> StoredImage:
+    """Stocke une image une seule fois, sans la rattacher à une carte."""
+    if not content_type.startswith("image/"):
+        raise MediaStorageError(f"Type de média non supporté pour une image : {content_type}")
+    storage = storage or get_media_storage()
+    digest, pathname = await anyio.to_thread.run_sync(storage.put, payload, content_type)
+    return StoredImage(digest, content_type, pathname, len(payload), storage.provider)
+
+
+async def put_card_image(
+    db: AsyncSession,
+    card_pk: int,
+    payload: bytes,
+    content_type: str,
+    original_filename: Optional[str] = None,
+    storage: Optional[MediaStorage] = None,
+) -> models.CardMedia:
+    """Stocke les octets et crée/actualise la ligne ``card_media`` principale.
+
+    Ne modifie pas ``cards.image`` : voir ``store_card_image`` ou les imports en lot.
+    """
+    stored = await store_image_payload(payload, content_type, storage)
+
+    media = await get_card_image(db, card_pk)
+    if media is None:
+        media = models.CardMedia(card_pk=card_pk, kind=MEDIA_KIND_IMAGE, is_primary=True)
+        db.add(media)
+    media.storage_provider = stored.provider
+    media.url = card_image_url(card_pk, stored.sha256)
+    media.pathname = stored.pathname
+    media.content_type = content_type
+    media.size_bytes = stored.size_bytes
+    media.sha256 = stored.sha256
+    media.original_filename = original_filename
+    media.updated_at = datetime.utcnow()
+    await db.flush()
+    return media
+
+
+async def attach_stored_images(db: AsyncSession, images: Dict[int, StoredImage]) -> Dict[int, str]:
+    """Crée/actualise en une requête les lignes ``card_media`` principales de ``{card_pk: image}``.
+
+    Retourne ``{card_pk: url}`` ; ``cards.image`` n'est pas modifié (voir ``store_card_image``).
+    """
+    if not images:
+        return {}
+    now = datetime.utcnow()
+    rows = [
+        {
+            "card_pk": card_pk,
+            "kind": MEDIA_KIND_IMAGE,
+            "is_primary": True,
+            "storage_provider": image.provider,
+            "url": card_image_url(card_pk, image.sha256),
+            "pathname": image.pathname,
+            "content_type": image.content_type,
+            "size_bytes": image.size_bytes,
+            "sha256": image.sha256,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for card_pk, image in images.items()
+    ]
+    stmt = dialect_insert(db, models.CardMedia.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["card_pk", "kind"],
+        index_where=models.CardMedia.is_primary,
+        set_={
+            field: getattr(stmt.excluded, field)
+            for field in ("storage_provider", "url", "pathname", "content_type", "size_bytes", "sha256", "updated_at")
+        },
+    )
+    await db.execute(stmt)
+    return {row["card_pk"]: row["url"] for row in rows}
+
+
+async def store_card_image(
+    db: AsyncSession,
+    card: models.Card,
+    payload: bytes,
+    content_type: str,
+    original_filename: Optional[str] = None,
+    storage: Optional[MediaStorage] = None,
+) -> models.CardMedia:
+    """Enregistre l'image principale d'une carte et pointe ``card.image`` vers elle.
+
+    Ne commit pas : l'appelant reste maître de la transaction.
+    """
+    media = await put_card_image(db, card.card_pk, payload, content_type, original_filename, storage)
+    card.image = media.url
+    return media
+
+
+async def resolve_image_value(value: str) -> Optional[tuple[bytes, str, Optional[str]]]:
+    """Retourne ``(octets, content_type, nom)`` pour un Data URI ou une URL http.
+
+    ``None`` si la valeur n'est pas un média à rapatrier ou si le téléchargement échoue.
+    """
+    if is_data_uri(value):
+        payload, content_type = decode_data_uri(value)
+        return payload, content_type, None
+    if value.startswith("http"):
+        downloaded = await anyio.to_thread.run_sync(download_image, value)
+        if downloaded:
+            return downloaded[0], downloaded[1], value.rsplit("/", 1)[-1][:255]
+    return None
+
+
+def is_remote_image_value(value: Optional[str]) -> bool:
+    """Vrai si la valeur doit être rapatriée dans le stockage (Data URI ou URL http)."""
+    return bool(value) and (is_data_uri(value) or value.startswith("http"))
+
+
+async def apply_card_image_value(db: AsyncSession, card: models.Card, value: Optional[str]) -> bool:
+    """Applique une valeur d'image reçue par l'API (Data URI, URL http ou URL interne).
+
+    Les Data URI et les URL distantes sont rapatriés dans le stockage de médias.
+    Retourne True si ``card.image`` a changé ; un média illisible est ignoré.
+    """
+    if not value:
+        return False
+    if is_remote_image_value(value):
+        try:
+            resolved = await resolve_image_value(value)
+            if not resolved:
+                return False
+            await store_card_image(db, card, resolved[0], resolved[1], original_filename=resolved[2])
+            return True
+        except MediaStorageError as exc:
+            logger.warning(f"Image ignorée pour la carte {card.card_pk}: {exc}")
+            return False
+
+    if card.image != value:
+        card.image = value
+        return True
+    return False
+
+
+async def migrate_inline_images(
+    db: AsyncSession,
+    batch_size: int = 50,
+    max_cards: Optional[int] = None,
+) -> dict:
+    """Déplace les images base64 de ``cards.image`` vers ``card_media``.
+
+    Traite les cartes par lots (une transaction par lot) pour ne jamais charger
+    plus de ``batch_size`` images en mémoire. Relançable sans risque.
+
+    Le Data URI est la seule copie durable de l'image : la migration refuse
+    (MediaStorageError) de le remplacer si le stockage n'est pas durable
+    (stockage local sans ``MEDIA_ROOT_PERSISTENT=1``).
+    """
+    storage = get_media_storage()
+    if not storage.durable:
+        raise MediaStorageError(
+            f"Stockage '{storage.provider}' non persistant : les images migrées seraient perdues au "
+            "prochain déploiement (définir MEDIA_ROOT_PERSISTENT=1 si MEDIA_ROOT est un disque persistant)"
+        )
+    report = {"migrated": 0, "errors": 0, "batches": 0}
+    failed: set[int] = set()
+
+    while True:
+        limit = batch_size
+        if max_cards is not None:
+            limit = min(batch_size, max_cards - report["migrated"] - report["errors"])
+            if limit <= 0:
+                break
+        stmt = (
+            select(models.Card)
+            .options(noload(models.Card.audio))
+            .where(models.Card.image.like("data:%"))
+            .order_by(models.Card.card_pk)
+            .limit(limit)
+        )
+        if failed:
+            stmt = stmt.where(models.Card.card_pk.notin_(failed))
+        cards = (await db.execute(stmt)).scalars().all()
+        if not cards:
+            break
+
+        for card in cards:
+            try:
+                payload, content_type = decode_data_uri(card.image)
+                await store_card_image(db, card, payload, content_type, storage=storage)
+                report["migrated"] += 1
+            except MediaStorageError as exc:
+                logger.warning(f"Migration image carte {card.card_pk} impossible: {exc}")
+                failed.add(card.card_pk)
+                report["errors"] += 1
+
+        await db.commit()
+        db.expunge_all()
+        report["batches"] += 1
+
+    return report
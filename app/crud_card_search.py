@@ -0,0 +1,119 @@
+"""Recherche plein texte et approchée des cartes (``GET /cards/search``).
+
+PostgreSQL : colonnes générées ``search_vector`` (tsvector pondéré, index
+GIN) et ``search_document`` (texte replié, index GIN trigrammes) créées par
+la migration ``add_card_search_indexes``. Autres moteurs (SQLite en
+``TESTING``) : index inversé en mémoire de ``core.search``, reconstruit à la
+demande après toute écriture sur les cartes.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy import func, literal, literal_column, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from . import models
+from .core.search import SEARCH_FIELDS, InvertedIndex, highlights, query_terms, tsquery_text
+
+_fallback_index: Optional[InvertedIndex] = None
+
+
+def invalidate_search_index() -> None:
+    """À appeler après une écriture sur le texte des cartes (moteur en mémoire)."""
+    global _fallback_index
+    _fallback_index = None
+
+
+def _uses_postgres(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+async def _get_fallback_index(db: AsyncSession) -> InvertedIndex:
+    global _fallback_index
+    if _fallback_index is None:
+        columns = [getattr(models.Card, name) for name in SEARCH_FIELDS]
+        result = await db.execute(select(models.Card.card_pk, *columns))
+        index = InvertedIndex()
+        for row in result.mappings():
+            index.add(row["card_pk"], row)
+        _fallback_index = index
+    return _fallback_index
+
+
+def _deck_card_pks(deck_pk: int):
+    return select(models.deck_cards.c.card_pk).where(models.deck_cards.c.deck_pk == deck_pk)
+
+
+def _postgres_match(query: str):
+    """Condition et score PostgreSQL : préfixes tsquery OU similarité trigrammes."""
+    vector = literal_column("cards.search_vector")
+    document = literal_column("cards.search_document")
+    tsquery = func.to_tsquery("simple", tsquery_text(query))
+    folded = literal(" ".join(query_terms(query)))
+    condition = or_(vector.op("@@")(tsquery), folded.op("<%")(document))
+    score = func.ts_rank_cd(vector, tsquery) * 2 + func.word_similarity(folded, document)
+    return condition, score
+
+
+async def matching_card_pks(db: AsyncSession, query: str):
+    """Cartes correspondant à ``query``, utilisable dans ``Card.card_pk.in_(...)``."""
+    if not query_terms(query):
+        return []
+    if _uses_postgres(db):
+        condition, _ = _postgres_match(query)
+        return select(models.Card.card_pk).where(condition)
+    index = await _get_fallback_index(db)
+    return [hit.card_pk for hit in index.search(query)]
+
+
+async def search_cards(
+    db: AsyncSession,
+    query: str,
+    deck_pk: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> List[dict]:
+    """Cartes classées par pertinence, avec extraits surlignés par champ."""
+    if not query_terms(query):
+        return []
+
+    if _uses_postgres(db):
+        condition, score = _postgres_match(query)
+        stmt = select(models.Card.card_pk, score.label("score")).where(condition)
+        if deck_pk is not None:
+            stmt = stmt.where(models.Card.card_pk.in_(_deck_card_pks(deck_pk)))
+        stmt = stmt.order_by(score.desc(), models.Card.card_pk).offset(skip).limit(limit)
+        ranked = [(card_pk, float(value)) for card_pk, value in (await db.execute(stmt)).all()]
+    else:
+        allowed = None
+        if deck_pk is not None:
+            allowed = (await db.execute(_deck_card_pks(deck_pk))).scalars().all()
+        index = await _get_fallback_index(db)
+        hits = index.search(query, limit=skip + limit, allowed=allowed)[skip:]
+        ranked = [(hit.card_pk, hit.score) for hit in hits]
+
+    if not ranked:
+        return []
+    result = await db.execute(
+        select(models.Card)
+        .options(selectinload(models.Card.audio))
+        .where(models.Card.card_pk.in_([card_pk for card_pk, _ in ranked]))
+    )
+    cards = {card.card_pk: card for card in result.scalars().all()}
+
+    results = []
+    for card_pk, value in ranked:
+        card = cards.get(card_pk)
+        if card is None:
+            continue
+        if deck_pk is not None:
+            # Vue contextuelle, comme get_cards(deck_pk=...)
+            card.deck_pk = deck_pk
+        fields = {name: getattr(card, name) for name in SEARCH_FIELDS}
+        results.append({
+            "card": card,
+            "score": round(value, 4),
+            "highlights": highlights(fields, query),
+        })
+    return results
@@ -1,20 +1,28 @@
 # app/crud_cards.py
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, or_, and_, func
-from sqlalchemy.orm import joinedload, selectinload
-from . import models, schemas
+from sqlalchemy import select, update, delete, or_, and_, func, case, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only, noload, selectinload
+from . import crud_card_media, crud_card_search, crud_distractors, crud_due_queue, crud_image_enrichment, crud_score_aggregation, models, schemas
+from .database import dialect_insert
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta, timezone
 import base64
-import requests
-import anyio
+import os
+import time
 import logging
-from requests.exceptions import RequestException
-from .core.image_scraper import fetch_icon_url, fetch_icon_urls # Import du scraper
+from .core.image_scraper import download_image # Import du scraper
+from .core.media_storage import MediaStorageError, decode_data_uri, is_data_uri
+from .core.normalization import normalize_back
 
 logger = logging.getLogger(__name__)
 
+
+class CardConflictError(ValueError):
+    """Le mot italien ou l'id_json est déjà utilisé par une autre carte."""
+
+
 def generate_id_json() -> str:
     return str(uuid.uuid4()).replace('-', '')[:7]
 
@@ -56,118 +64,148 @@ async def create_deck(db: AsyncSession, deck: schemas.DeckCreate, created_by: in
     return db_deck
 
 
-async def get_decks(db: AsyncSession, skip: int = 0, limit: int = 10, search: Optional[str] = None) -> List[models.Deck]:
-    stmt = select(models.Deck).options(
-        joinedload(models.Deck.cards).selectinload(models.Card.audio)
-    ).offset(skip).limit(limit)
+async def get_decks(db: AsyncSession, skip: int = 0, limit: int = 10, search: Optional[str] = None) -> List[dict]:
+    """Catalogue des decks : métadonnées et compteurs calculés en SQL.
+
+    Aucune carte n'est chargée : les compteurs proviennent d'une seule requête
+    agrégée sur ``deck_cards``. La liste complète des cartes reste disponible
+    via ``get_deck``.
+    """
+    card_count = func.count(models.deck_cards.c.card_pk)
+    has_audio_count = func.count(models.CardAudio.audio_pk)
+    has_image_count = func.count(case((models.Card.image.isnot(None), 1)))
+
+    stmt = (
+        select(models.Deck, card_count, has_audio_count, has_image_count)
+        .outerjoin(models.deck_cards, models.deck_cards.c.deck_pk == models.Deck.deck_pk)
+        .outerjoin(models.Card, models.Card.card_pk == models.deck_cards.c.card_pk)
+        .outerjoin(models.CardAudio, models.CardAudio.card_pk == models.Card.card_pk)
+        .group_by(models.Deck.deck_pk)
+        .order_by(models.Deck.deck_pk)
+        .offset(skip)
+        .limit(limit)
+    )
     if search:
         stmt = stmt.where(models.Deck.name.ilike(f"%{search}%"))
-    result = await db.execute(stmt)
-    return result.unique().scalars().all()
+    rows = (await db.execute(stmt)).all()
+    # total_correct / total_attempts incluent les scores pas encore agrégés
+    await crud_score_aggregation.merge_decks(db, [deck for deck, *_ in rows])
+    return [
+        {
+            **schemas.DeckSimple.model_validate(deck).model_dump(),
+            "card_count": cards or 0,
+            "has_audio_count": audios or 0,
+            "has_image_count": images or 0,
+        }
+        for deck, cards, audios, images in rows
+    ]
+
+
+def card_load_options(fields: Optional[List[str]] = None) -> list:
+    """Options de chargement limitant le SELECT aux colonnes de ``fields``.
+
+    Les colonnes non demandées (image, explications, traductions…) sont
+    différées et l'audio n'est chargé que s'il est demandé. ``card_pk`` et
+    ``next_review`` (tri et curseur) sont toujours lus. ``None`` : carte complète.
+    """
+    if fields is None:
+        return [selectinload(models.Card.audio)]
+    columns = {"card_pk", "next_review", *fields} & set(models.Card.__table__.columns.keys())
+    audio = selectinload if "audio" in fields else noload
+    return [
+        load_only(*(getattr(models.Card, name) for name in sorted(columns))),
+        audio(models.Card.audio),
+    ]
 
 
-async def get_deck(db: AsyncSession, deck_pk: int) -> Optional[models.Deck]:
+async def get_deck(db: AsyncSession, deck_pk: int, fields: Optional[List[str]] = None) -> Optional[models.Deck]:
     stmt = select(models.Deck).options(
-        joinedload(models.Deck.cards).selectinload(models.Card.audio)
+        joinedload(models.Deck.cards).options(*card_load_options(fields))
     ).where(models.Deck.deck_pk == deck_pk)
     result = await db.execute(stmt)
-    return result.unique().scalar_one_or_none()
+    deck = result.unique().scalar_one_or_none()
+    if deck:
+        await crud_score_aggregation.merge_decks(db, [deck])
+    return deck
 
 
 # ==================== UTILS ====================
 
 def url_to_base64(url: str) -> Optional[str]:
-    """Télécharge une image depuis une URL et la convertit en chaîne Base64 (Data URI)."""
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()  # Lève une exception pour les codes d'erreur HTTP (4xx ou 5xx)
-        
-        # Déterminer le type de contenu (Content-Type)
-        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
-        if not content_type or 'text' in content_type:
-             # Fallback based on extension if content-type is missing or wrong
-             if url.endswith('.png'): content_type = 'image/png'
-             elif url.endswith('.svg'): content_type = 'image/svg+xml'
-             elif url.endswith('.webp'): content_type = 'image/webp'
-             else: content_type = 'image/jpeg'
-        
-        # Encoder le contenu en Base64
-        base64_encoded_data = base64.b64encode(response.content)
-        base64_string = base64_encoded_data.decode('utf-8')
-        
-        # Formater l'URI de données (Data URI scheme)
-        return f"data:{content_type};base64,{base64_string}"
-        
-    except RequestException as e:
-        print(f"Erreur lors du téléchargement de l'image depuis {url}: {e}")
-        return None
-    except Exception as e:
-        print(f"Une erreur inattendue s'est produite lors de la conversion Base64 pour {url}: {e}")
+    """Télécharge une image depuis une URL et la convertit en chaîne Base64 (Data URI).
+
+    Conservé pour les scripts existants : l'API stocke désormais les images
+    dans ``card_media`` (voir ``crud_card_media``).
+    """
+    downloaded = download_image(url)
+    if not downloaded:
         return None
+    payload, content_type = downloaded
+    return f"data:{content_type};base64,{base64.b64encode(payload).decode('utf-8')}"
 
 
 # ==================== CARTES – MISE À JOUR ANKI CRITIQUE ====================
 
+async def get_card_by_normalized_back(db: AsyncSession, key: str) -> Optional[models.Card]:
+    result = await db.execute(select(models.Card).where(models.Card.normalized_back == key))
+    return result.scalars().first()
+
+
+async def _insert_card(db: AsyncSession, card: schemas.CardCreate) -> Optional[models.Card]:
+    """Insère la carte ; ``None`` si une carte de même clé normalisée existe déjà."""
+    stmt = (
+        dialect_insert(db, models.Card.__table__)
+        .values(_new_card_values(card, datetime.now(timezone.utc)))
+        .on_conflict_do_nothing(index_elements=["normalized_back"])
+        .returning(models.Card.card_pk)
+    )
+    try:
+        card_pk = (await db.execute(stmt)).scalar_one_or_none()
+    except IntegrityError as exc:
+        await db.rollback()
+        raise CardConflictError(f"id_json '{card.id_json}' déjà utilisé") from exc
+    if card_pk is None:
+        return None
+    return await db.get(models.Card, card_pk)
+
+
 async def create_card(db: AsyncSession, card: schemas.CardCreate) -> models.Card:
     # 1. Vérifier si la carte existe déjà (basé sur le mot italien 'back' GLOBALEMENT)
     # L'utilisateur veut partager les cartes entre les decks (Many-to-Many)
-    stmt = select(models.Card).where(
-        models.Card.back.ilike(card.back)  # Recherche insensible à la casse
-    )
-    result = await db.execute(stmt)
-    existing_card = result.scalars().first()
-
-    # === AUTO-IMAGE LOGIC (Before creation/update) ===
-    # Si aucune image fournie, on essaie de la trouver via scraping
+    # Recherche par clé normalisée : lecture de l'index uq_cards_normalized_back
+    key = normalize_back(card.back)
+    existing_card = await get_card_by_normalized_back(db, key)
+
+    # 2. Création si la carte n'existe pas. ON CONFLICT DO NOTHING : si une
+    # requête concurrente vient de créer la même carte, on bascule sur l'enrichissement.
+    db_card = None
+    if existing_card is None:
+        db_card = await _insert_card(db, card)
+        if db_card is None:
+            existing_card = await get_card_by_normalized_back(db, key)
+
+    # === AUTO-IMAGE LOGIC ===
+    # Si aucune image fournie, la recherche est planifiée en tâche de fond
+    # (crud_image_enrichment) : la carte est renvoyée sans attendre Magnific.
     # IMPORTANT: Ne pas remplacer une image déjà existante sur une carte existante
+    search_query = None
     if not card.image and (not existing_card or not existing_card.image):
         search_query = clean_search_query(card.translation_en or card.front)
-        if search_query:
-            logger.info(f"🖼️ Auto-fetching icon for '{search_query}'...")
-            # On utilise anyio.to_thread.run_sync pour ne pas bloquer l'event loop
-            candidate_urls = await anyio.to_thread.run_sync(fetch_icon_urls, search_query)
-
-            scraped_url = None
-            for url in candidate_urls[:5]: # Essayer les 5 premiers
-                # Vérifier si l'URL est accessible et non interdite (403)
-                converted = await anyio.to_thread.run_sync(url_to_base64, url)
-                if converted:
-                    scraped_url = converted # On stocke directement le base64
-                    break
-
-            if scraped_url:
-                # On ne logue que si on a trouvé un candidat réussi
-                logger.info("   ✅ Icon successfully found and downloaded from Magnific.")
-                card.image = scraped_url # card.image contient déjà le base64
-            else:
-                logger.info("   ❌ No reachable icon found.")
 
     if existing_card:
         # === LOGIQUE D'ENRICHISSEMENT ET DE LIAISON (MANY-TO-MANY) ===
         
         # A. Lier la carte existante au nouveau deck si ce n'est pas déjà fait
-        # On vérifie si le lien existe déjà
-        stmt_link = select(models.deck_cards).where(
-            and_(
-                models.deck_cards.c.deck_pk == card.deck_pk,
-                models.deck_cards.c.card_pk == existing_card.card_pk
-            )
+        # (ON CONFLICT DO NOTHING : le lien existe peut-être déjà)
+        result_link = await db.execute(
+            dialect_insert(db, models.deck_cards)
+            .values(deck_pk=card.deck_pk, card_pk=existing_card.card_pk)
+            .on_conflict_do_nothing()
         )
-        result_link = await db.execute(stmt_link)
-        link_exists = result_link.first()
-        
-        if not link_exists:
-            # Créer le lien Many-to-Many
-            await db.execute(
-                models.deck_cards.insert().values(
-                    deck_pk=card.deck_pk,
-                    card_pk=existing_card.card_pk
-                )
-            )
+        if result_link.rowcount:
             print(f"🔗 Carte existante (ID {existing_card.card_pk}) liée au deck {card.deck_pk}")
+            await crud_due_queue.enqueue_cards(db, deck_pk=card.deck_pk, card_pks=[existing_card.card_pk])
+            await crud_distractors.sync_cards(db, [existing_card.card_pk])
 
         # B. Enrichissement des données (Upsert partiel)
         changes = False
@@ -182,18 +220,21 @@ async def create_card(db: AsyncSession, card: schemas.CardCreate) -> models.Card
             
             # Si une nouvelle valeur est fournie ET que la valeur actuelle est vide/nulle
             if new_val and not current_val:
-                # Cas spécial pour l'image (conversion URL -> Base64)
-                if field == 'image' and new_val.startswith('http'):
-                    converted_image = await anyio.to_thread.run_sync(url_to_base64, new_val)
-                    if converted_image:
-                        setattr(existing_card, field, converted_image)
-                        changes = True
+                # Cas spécial pour l'image (stockage dans card_media)
+                if field == 'image':
+                    changes = await crud_card_media.apply_card_image_value(db, existing_card, new_val) or changes
                 else:
                     setattr(existing_card, field, new_val)
                     changes = True
+
+        if search_query and not existing_card.image:
+            await crud_image_enrichment.enqueue_card_images(db, [(existing_card.card_pk, search_query)])
         
         # Commit des changements (liaison + enrichissement)
         await db.commit()
+        crud_card_search.invalidate_search_index()
+        if search_query:
+            crud_image_enrichment.image_enrichment_worker.notify()
         await db.refresh(existing_card)
             
         # Pour maintenir la compatibilité avec le frontend qui attend deck_pk sur l'objet retourné
@@ -202,46 +243,10 @@ async def create_card(db: AsyncSession, card: schemas.CardCreate) -> models.Card
         existing_card.deck_pk = card.deck_pk 
         return existing_card
 
-    # 2. Création normale si la carte n'existe pas
-    id_json = card.id_json or generate_id_json()
-    now = datetime.now(timezone.utc)
-    
-    # Conversion image
-    image_val = await anyio.to_thread.run_sync(url_to_base64, card.image) if card.image and card.image.startswith('http') else card.image
-
-    db_card = models.Card(
-        id_json=id_json,
-        # deck_pk=card.deck_pk, # ON NE LE SET PAS DIRECTEMENT ICI SI ON VEUT ETRE FULL M2M
-        # Mais pour la compatibilité transitionnelle, on le met.
-        # Attention : si une carte a plusieurs decks, ce champ ne reflète que le "premier" ou "principal".
-        deck_pk=card.deck_pk, 
-        
-        front=card.front,
-        back=card.back,
-        pronunciation=card.pronunciation,
-        image=image_val,
-        
-        # Nouveaux champs optionnels
-        explanation_it=card.explanation_it,
-        translation_en=card.translation_en,
-        translation_de=card.translation_de,
-        translation_mg=card.translation_mg,
-        example=card.example,
-        
-        created_at=now,
-        next_review=now + timedelta(days=1),
-        box=0,
-        tags=card.tags or [],
-
-        # === CHAMPS ANKI OBLIGATOIRES ===
-        easiness=2.5,
-        interval=0,
-        consecutive_correct=0,
-        last_reviewed_at=None,
-    )
-    
-    db.add(db_card)
-    await db.flush() # Pour avoir l'ID
+    if card.image:
+        await crud_card_media.apply_card_image_value(db, db_card, card.image)
+    elif search_query:
+        await crud_image_enrichment.enqueue_card_images(db, [(db_card.card_pk, search_query)])
     
     # Créer le lien Many-to-Many
     await db.execute(
@@ -250,8 +255,13 @@ async def create_card(db: AsyncSession, card: schemas.CardCreate) -> models.Card
             card_pk=db_card.card_pk
         )
     )
+    await crud_due_queue.enqueue_cards(db, deck_pk=card.deck_pk, card_pks=[db_card.card_pk])
+    await crud_distractors.sync_cards(db, [db_card.card_pk])
     
     await db.commit()
+    crud_card_search.invalidate_search_index()
+    if search_query and not card.image:
+        crud_image_enrichment.image_enrichment_worker.notify()
     await db.refresh(db_card)
     return db_card
 
@@ -265,19 +275,26 @@ async def get_cards(
     min_box: Optional[int] = None,
     tags_filter: Optional[List[str]] = None,
     due_only: bool = False,
+    after: Optional[Tuple[datetime, int]] = None,
+    fields: Optional[List[str]] = None,
 ) -> List[models.Card]:
+    """Cartes triées par (next_review, card_pk).
+
+    ``after`` (clé de la dernière carte de la page précédente, voir
+    ``core.pagination``) remplace ``skip`` : la page est lue directement dans
+    l'index ix_cards_next_review_card_pk, quelle que soit sa profondeur.
+    ``fields`` limite les colonnes lues (voir ``card_load_options``).
+    """
     # On commence par sélectionner les cartes
-    stmt = select(models.Card).options(selectinload(models.Card.audio))
+    stmt = select(models.Card).options(*card_load_options(fields))
     # JOINTURE IMPORTANTE : Si on filtre par deck, on passe par la table d'association
     if deck_pk:
         stmt = stmt.join(models.deck_cards, models.Card.card_pk == models.deck_cards.c.card_pk)\
                    .where(models.deck_cards.c.deck_pk == deck_pk)
     
     if search:
-        stmt = stmt.where(or_(
-            models.Card.front.ilike(f"%{search}%"),
-            models.Card.back.ilike(f"%{search}%")
-        ))
+        # Index plein texte / trigrammes (voir crud_card_search)
+        stmt = stmt.where(models.Card.card_pk.in_(await crud_card_search.matching_card_pks(db, search)))
     if min_box is not None:
         stmt = stmt.where(models.Card.box >= min_box)
     if tags_filter:
@@ -285,7 +302,11 @@ async def get_cards(
     if due_only:
         stmt = stmt.where(models.Card.next_review <= datetime.now(timezone.utc))
 
-    stmt = stmt.offset(skip).limit(limit).order_by(models.Card.next_review)
+    if after is not None:
+        stmt = stmt.where(tuple_(models.Card.next_review, models.Card.card_pk) > tuple_(*after))
+    else:
+        stmt = stmt.offset(skip)
+    stmt = stmt.limit(limit).order_by(models.Card.next_review, models.Card.card_pk)
 
     result = await db.execute(stmt)
     cards = result.scalars().all()
@@ -311,16 +332,34 @@ async def get_card(db: AsyncSession, card_pk: int) -> Optional[models.Card]:
 
 async def update_card(db: AsyncSession, card_pk: int, card_update: schemas.CardBase) -> Optional[models.Card]:
     update_data = card_update.model_dump(exclude_unset=True)
+    new_image = update_data.get("image")
+    if crud_card_media.is_remote_image_value(new_image):
+        # Le média est stocké à part ; cards.image ne reçoit que son URL.
+        update_data.pop("image")
+        card = await get_card(db, card_pk)
+        if card is None:
+            return None
+        await crud_card_media.apply_card_image_value(db, card, new_image)
     if not update_data:
+        await db.commit()
         return await get_card(db, card_pk)
+    if update_data.get("back"):
+        update_data["normalized_back"] = normalize_back(update_data["back"])
 
     stmt = update(models.Card)\
         .where(models.Card.card_pk == card_pk)\
         .values(**update_data)
         # .returning(models.Card) # Pas nécessaire car on recharge après
 
-    await db.execute(stmt)
+    try:
+        await db.execute(stmt)
+    except IntegrityError as exc:
+        await db.rollback()
+        raise CardConflictError(f"Une autre carte utilise déjà '{update_data.get('back')}'") from exc
+    if "back" in update_data or "tags" in update_data:
+        await crud_distractors.sync_cards(db, [card_pk])
     await db.commit()
+    crud_card_search.invalidate_search_index()
     
     # Recharger la carte pour éviter MissingGreenlet après commit
     return await get_card(db, card_pk)
@@ -333,162 +372,284 @@ async def delete_card(db: AsyncSession, card_pk: int) -> bool:
         .returning(models.Card.card_pk)
     )
     await db.commit()
+    crud_card_search.invalidate_search_index()
     return result.scalar_one_or_none() is not None
 
 
 # ==================== FONCTION BONUS : Cartes dues aujourd'hui (pour le mode révision) ====================
 
 async def get_due_cards(db: AsyncSession, user_pk: int, limit: int = 50) -> List[models.Card]:
-    """Retourne les cartes à réviser aujourd'hui pour l'utilisateur (via user_decks)."""
-    # M2M Support: User -> UserDeck -> Deck -> deck_cards -> Card
-    stmt = select(models.Card)\
-        .join(models.deck_cards, models.deck_cards.c.card_pk == models.Card.card_pk)\
-        .join(models.UserDeck, models.UserDeck.deck_pk == models.deck_cards.c.deck_pk)\
-        .where(
-            models.UserDeck.user_pk == user_pk,
-            models.Card.next_review <= datetime.now(timezone.utc)
-        )\
-        .order_by(models.Card.next_review)\
-        .limit(limit)
-
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    """Retourne les cartes à réviser aujourd'hui pour l'utilisateur (file user_due_cards)."""
+    queue = await crud_due_queue.get_due_queue(db, user_pk, limit=limit)
+    return [item["card"] for item in queue["cards"]]
 
 
 # ==================== IMPORTATION EN LOT (UPSERT) ====================
 
-async def batch_upsert_cards(db: AsyncSession, cards: List[schemas.CardCreate]) -> dict:
+BATCH_IMPORT_CHUNK_SIZE = int(os.getenv("BATCH_IMPORT_CHUNK_SIZE", "500"))
+
+# Champs écrasés sur une carte existante lorsqu'une nouvelle valeur est fournie
+UPSERT_FIELDS = (
+    'explanation_it', 'translation_en', 'translation_de',
+    'translation_mg', 'example', 'pronunciation',
+    'front' # On met à jour le recto (français) aussi si changé
+)
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _new_card_values(card: schemas.CardCreate, now: datetime) -> dict:
+    return {
+        "id_json": card.id_json or generate_id_json(),
+        # deck_pk ne reflète que le deck "principal" : les liens réels sont dans deck_cards
+        "deck_pk": card.deck_pk,
+        "front": card.front,
+        "back": card.back,
+        "normalized_back": normalize_back(card.back),
+        "pronunciation": card.pronunciation,
+        "image": None, # Renseignée après l'insertion, une fois le média stocké
+        "explanation_it": card.explanation_it,
+        "translation_en": card.translation_en,
+        "translation_de": card.translation_de,
+        "translation_mg": card.translation_mg,
+        "example": card.example,
+        "created_at": now,
+        "next_review": now + timedelta(days=1),
+        "box": 0,
+        "tags": card.tags or [],
+        "easiness": 2.5,
+        "interval": 0,
+        "consecutive_correct": 0,
+        "last_reviewed_at": None,
+    }
+
+
+async def _upsert_chunk(
+    db: AsyncSession,
+    chunk: List[schemas.CardCreate],
+    stored_images: Optional[Dict[str, crud_card_media.StoredImage]] = None,
+) -> dict:
+    """Upsert ensembliste d'un lot : un nombre constant de requêtes, quel que soit sa taille."""
+    report = {"created": 0, "updated": 0, "errors": 0}
+    stored_images = stored_images or {}
+    keys = {normalize_back(card.back) for card in chunk}
+
+    # 1. Résolution des cartes existantes en une requête
+    existing_rows = await db.execute(
+        select(
+            models.Card.card_pk,
+            models.Card.normalized_back,
+            models.Card.image.isnot(None).label("has_image"),
+            *(getattr(models.Card, field) for field in UPSERT_FIELDS),
+        )
+        .where(models.Card.normalized_back.in_(keys))
+    )
+    state: dict[str, dict] = {row["normalized_back"]: dict(row) for row in existing_rows.mappings()}
+
+    existing_pks = [current["card_pk"] for current in state.values()]
+    linked: set[tuple[int, str]] = set()
+    if existing_pks:
+        pk_to_key = {current["card_pk"]: key for key, current in state.items()}
+        link_rows = await db.execute(
+            select(models.deck_cards.c.deck_pk, models.deck_cards.c.card_pk)
+            .where(models.deck_cards.c.card_pk.in_(existing_pks))
+        )
+        linked = {(deck_pk, pk_to_key[card_pk]) for deck_pk, card_pk in link_rows.all()}
+
+    # 2. Fusion en mémoire (les doublons du lot se fusionnent comme des mises à jour)
+    now = datetime.now(timezone.utc)
+    creates: dict[str, dict] = {}
+    updates: dict[int, dict] = {}
+    images: dict[str, str | crud_card_media.StoredImage] = {}
+    for card in chunk:
+        key = normalize_back(card.back)
+        current = state.get(key)
+        image = card.image or stored_images.get(key)
+        if current is None:
+            values = _new_card_values(card, now)
+            creates[key] = values
+            state[key] = {**values, "card_pk": None, "has_image": False}
+            linked.add((card.deck_pk, key))
+            if image:
+                images[key] = image
+            report["created"] += 1
+            continue
+
+        changed = {
+            field: getattr(card, field)
+            for field in UPSERT_FIELDS
+            if getattr(card, field) and current.get(field) != getattr(card, field)
+        }
+        current.update(changed)
+        if changed:
+            if key in creates:
+                creates[key].update(changed)
+            else:
+                updates.setdefault(current["card_pk"], {}).update(changed)
+
+        # IMAGE: ne pas écraser si déjà présente
+        image_set = bool(image) and not current["has_image"] and key not in images
+        if image_set:
+            images[key] = image
+
+        # M2M LINK (on compte le lien comme une mise à jour)
+        new_link = (card.deck_pk, key) not in linked
+        linked.add((card.deck_pk, key))
+
+        if changed or image_set or new_link:
+            report["updated"] += 1
+
+    # 3. Écritures ensemblistes
+    key_to_pk = {key: current["card_pk"] for key, current in state.items() if current["card_pk"]}
+    if creates:
+        inserted = await db.execute(
+            dialect_insert(db, models.Card.__table__)
+            .values(list(creates.values()))
+            .on_conflict_do_nothing()
+            .returning(models.Card.card_pk, models.Card.normalized_back)
+        )
+        key_to_pk.update({key: card_pk for card_pk, key in inserted.all()})
+        rejected = [key for key in creates if key not in key_to_pk]
+        if rejected:
+            # Carte créée entre-temps par une requête concurrente : simple liaison
+            raced = await db.execute(
+                select(models.Card.normalized_back, models.Card.card_pk)
+                .where(models.Card.normalized_back.in_(rejected))
+            )
+            key_to_pk.update(dict(raced.all()))
+            # Sinon, conflit sur id_json : la carte n'a pas été créée
+            lost = sum(1 for key in rejected if key not in key_to_pk)
+            report["created"] -= len(rejected)
+            report["updated"] += len(rejected) - lost
+            report["errors"] += lost
+
+    if updates:
+        await db.execute(
+            update(models.Card),
+            [{"card_pk": card_pk, **fields} for card_pk, fields in updates.items()],
+        )
+
+    links = [
+        {"deck_pk": deck_pk, "card_pk": key_to_pk[key]}
+        for deck_pk, key in linked
+        if key in key_to_pk
+    ]
+    if links:
+        await db.execute(
+            dialect_insert(db, models.deck_cards)
+            .values(links)
+            .on_conflict_do_nothing()
+        )
+        # Nouvelles cartes des decks possédés : ajoutées aux files de révision
+        await crud_due_queue.enqueue_cards(db, card_pks={link["card_pk"] for link in links})
+        # Groupes de distracteurs QCM des cartes créées, modifiées ou liées
+        await crud_distractors.sync_cards(db, {link["card_pk"] for link in links})
+
+    # 4. Images dans leur propre savepoint : un média en échec ne fait pas échouer la carte
+    try:
+        async with db.begin_nested():
+            await _apply_batch_images(db, chunk, state, key_to_pk, images)
+    except Exception as exc:
+        logger.exception(f"Images ignorées pour un lot de {len(chunk)} cartes: {exc}")
+    return report
+
+
+async def _apply_batch_images(
+    db: AsyncSession,
+    chunk: List[schemas.CardCreate],
+    state: dict[str, dict],
+    key_to_pk: dict[str, int],
+    images: dict[str, str | crud_card_media.StoredImage],
+) -> None:
+    image_urls: dict[int, str] = {}
+    stored: dict[int, crud_card_media.StoredImage] = {}
+    pending: dict[int, str] = {}
+    for key, value in images.items():
+        card_pk = key_to_pk.get(key)
+        if card_pk is None:
+            continue
+        if isinstance(value, crud_card_media.StoredImage):
+            stored[card_pk] = value
+            continue
+        if not crud_card_media.is_remote_image_value(value):
+            image_urls[card_pk] = value
+            continue
+        if not is_data_uri(value):
+            # URL distante : téléchargée par le worker, hors de la transaction du lot
+            pending[card_pk] = value
+            continue
+        try:
+            payload, content_type = decode_data_uri(value)
+            media = await crud_card_media.put_card_image(db, card_pk, payload, content_type)
+            image_urls[card_pk] = media.url
+        except MediaStorageError as exc:
+            logger.warning(f"Image ignorée pour la carte {card_pk}: {exc}")
+    image_urls.update(await crud_card_media.attach_stored_images(db, stored))
+
+    # === AUTO-IMAGE LOGIC === (différée : voir crud_image_enrichment)
+    for card in chunk:
+        key = normalize_back(card.back)
+        card_pk = key_to_pk.get(key)
+        if card_pk is None or card_pk in image_urls or key in images or state[key]["has_image"]:
+            continue
+        search_query = clean_search_query(card.translation_en or card.front)
+        if search_query:
+            pending.setdefault(card_pk, search_query)
+    await crud_image_enrichment.enqueue_card_images(db, pending.items())
+
+    if image_urls:
+        await db.execute(
+            update(models.Card),
+            [{"card_pk": card_pk, "image": url} for card_pk, url in image_urls.items()],
+        )
+
+
+async def batch_upsert_cards(
+    db: AsyncSession,
+    cards: List[schemas.CardCreate],
+    chunk_size: Optional[int] = None,
+    stored_images: Optional[Dict[str, crud_card_media.StoredImage]] = None,
+) -> dict:
     """
     Importe une liste de cartes avec logique Upsert (Mise à jour si existe, sinon Création).
     - Basé sur le mot italien ('back') pour l'unicité.
     - Met à jour les champs si une nouvelle valeur est fournie (écrasement).
     - Assure le lien avec le deck spécifié.
+
+    Les cartes sont traitées par lots de ``chunk_size`` : chaque lot coûte un
+    nombre constant de requêtes (résolution, INSERT multi-lignes, UPDATE
+    groupé, liens deck_cards) au lieu de plusieurs allers-retours par carte.
+
+    ``stored_images`` associe à une clé ``normalize_back`` une image déjà
+    présente dans le stockage (import d'archive) : elle est rattachée sans
+    nouvel envoi, avec la même règle de non-écrasement qu'une image fournie.
     """
-    results = {"created": 0, "updated": 0, "errors": 0}
-    
-    for card in cards:
-        try:
-            # 1. Vérifier si la carte existe déjà (basé sur le mot italien 'back')
-            stmt = select(models.Card).where(models.Card.back.ilike(card.back))
-            result = await db.execute(stmt)
-            existing_card = result.scalars().first()
-
-            # === AUTO-IMAGE LOGIC ===
-            # Si aucune image fournie, on essaie de la trouver via scraping
-            # IMPORTANT: Ne pas remplacer une image déjà existante sur une carte existante
-            if not card.image and (not existing_card or not existing_card.image):
-                search_query = clean_search_query(card.translation_en or card.front)
-                if search_query:
-                    logger.info(f"🖼️ Auto-fetching icon for '{search_query}'...")
-                    candidate_urls = await anyio.to_thread.run_sync(fetch_icon_urls, search_query)
-
-                    scraped_url = None
-                    for url in candidate_urls[:5]:
-                        converted = await anyio.to_thread.run_sync(url_to_base64, url)
-                        if converted:
-                            scraped_url = converted
-                            break
-
-                    if scraped_url:
-                        logger.info("   ✅ Icon successfully found and downloaded from Magnific.")
-                        card.image = scraped_url
-                    else:
-                        logger.info("   ❌ No reachable icon found.")
-
-            if existing_card:
-                # === UPDATE LOGIC (Merge/Overwrite) ===
-                updated = False
-                fields_to_check = [
-                    'explanation_it', 'translation_en', 'translation_de', 
-                    'translation_mg', 'example', 'pronunciation',
-                    'front' # On met à jour le recto (français) aussi si changé
-                ]
-
-                for field in fields_to_check:
-                    new_val = getattr(card, field)
-                    # Si une nouvelle valeur est fournie (non vide/null)
-                    if new_val:
-                         # Gestion spéciale Image
-                        # (image est traitée séparément ci-dessous)
-                        # Comparaison et mise à jour
-                        if getattr(existing_card, field) != new_val:
-                            setattr(existing_card, field, new_val)
-                            updated = True
-                
-                # === IMAGE: ne pas écraser si déjà présente ===
-                if card.image:
-                    # Convertir si nécessaire
-                    image_val = await anyio.to_thread.run_sync(url_to_base64, card.image) if card.image.startswith('http') else card.image
-                    if not existing_card.image and image_val and existing_card.image != image_val:
-                        existing_card.image = image_val
-                        updated = True
-                
-                # === M2M LINK CHECK ===
-                stmt_link = select(models.deck_cards).where(
-                    and_(
-                        models.deck_cards.c.deck_pk == card.deck_pk,
-                        models.deck_cards.c.card_pk == existing_card.card_pk
-                    )
-                )
-                link_exists = (await db.execute(stmt_link)).first()
-                
-                if not link_exists:
-                    await db.execute(
-                        models.deck_cards.insert().values(
-                            deck_pk=card.deck_pk,
-                            card_pk=existing_card.card_pk
-                        )
-                    )
-                    updated = True # On compte le lien comme une mise à jour
-                
-                if updated:
-                    results["updated"] += 1
-                    # On ajoute à la session pour être sûr que les modifs sont trackées
-                    db.add(existing_card)
-                    
-            else:
-                # === CREATE LOGIC ===
-                id_json = card.id_json or generate_id_json()
-                now = datetime.now(timezone.utc)
-                
-                image_val = await anyio.to_thread.run_sync(url_to_base64, card.image) if card.image and card.image.startswith('http') else card.image
-
-                db_card = models.Card(
-                    id_json=id_json,
-                    deck_pk=card.deck_pk,
-                    front=card.front,
-                    back=card.back,
-                    pronunciation=card.pronunciation,
-                    image=image_val,
-                    explanation_it=card.explanation_it,
-                    translation_en=card.translation_en,
-                    translation_de=card.translation_de,
-                    translation_mg=card.translation_mg,
-                    example=card.example,
-                    created_at=now,
-                    next_review=now + timedelta(days=1),
-                    box=0,
-                    tags=card.tags or [],
-                    easiness=2.5,
-                    interval=0,
-                    consecutive_correct=0,
-                    last_reviewed_at=None,
-                )
-                db.add(db_card)
-                await db.flush() # Pour avoir l'ID
-                
-                # Création du lien
-                await db.execute(
-                    models.deck_cards.insert().values(
-                        deck_pk=card.deck_pk,
-                        card_pk=db_card.card_pk
-                    )
-                )
-                results["created"] += 1
+    chunk_size = chunk_size or BATCH_IMPORT_CHUNK_SIZE
+    results = {"created": 0, "updated": 0, "errors": 0, "chunks": []}
 
+    for index, chunk in enumerate(_chunks(list(cards), chunk_size)):
+        started = time.perf_counter()
+        try:
+            # Tout le lot (lectures comprises) dans un savepoint : une erreur SQL
+            # n'interrompt pas la transaction, les autres lots et le commit final passent
+            async with db.begin_nested():
+                chunk_report = await _upsert_chunk(db, chunk, stored_images)
         except Exception as e:
-            print(f"Error processing card {card.back}: {e}")
-            results["errors"] += 1
+            logger.exception(f"Error processing import chunk {index} ({len(chunk)} cards): {e}")
+            chunk_report = {"created": 0, "updated": 0, "errors": len(chunk)}
+        for field in ("created", "updated", "errors"):
+            results[field] += chunk_report[field]
+        results["chunks"].append({
+            "index": index,
+            "size": len(chunk),
+            **chunk_report,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
 
     await db.commit()
+    crud_card_search.invalidate_search_index()
+    crud_image_enrichment.image_enrichment_worker.notify()
     return results
@@ -0,0 +1,357 @@
+"""Export et import de decks sous forme d'archive (voir ``core.deck_archive``).
+
+L'export lit le deck par tranches de ``DECK_EXPORT_CHUNK_SIZE`` cartes
+(pagination par clé) et envoie le zip au fil de l'eau. L'import stocke
+chaque média distinct une seule fois puis passe les cartes, par lots, au
+chemin d'upsert ensembliste de ``crud_cards.batch_upsert_cards``.
+"""
+
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AsyncIterator, Dict, Iterator, Optional
+
+import anyio
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_card_audio, crud_card_media, crud_cards, models, schemas
+from .core.deck_archive import (
+    CARD_FIELDS,
+    CARDS_NAME,
+    MANIFEST_NAME,
+    ArchiveStreamWriter,
+    build_manifest,
+    card_line,
+    media_member,
+    open_archive,
+    parse_media_member,
+    read_manifest,
+)
+from .core.media_storage import (
+    EXTENSIONS,
+    MAX_MEDIA_BYTES,
+    MediaStorageError,
+    decode_data_uri,
+    get_media_storage,
+    is_data_uri,
+    sha256_hex,
+)
+from .core.normalization import normalize_back
+
+logger = logging.getLogger(__name__)
+
+DECK_EXPORT_CHUNK_SIZE = int(os.getenv("DECK_EXPORT_CHUNK_SIZE", "500"))
+
+
+def _deck_card_pks(deck_pk: int):
+    return select(models.deck_cards.c.card_pk).where(models.deck_cards.c.deck_pk == deck_pk)
+
+
+# ==================== EXPORT ====================
+
+class _MediaIndex:
+    """Empreintes des médias déjà écrits et références par carte, pour un export."""
+
+    def __init__(self):
+        self.written: set[str] = set()
+        self.images: Dict[int, str] = {}
+        self.audio: Dict[int, str] = {}
+
+
+def _write_media(writer: ArchiveStreamWriter, index: _MediaIndex, payload: bytes, content_type: str) -> str:
+    digest = sha256_hex(payload)
+    if digest not in index.written:
+        # Images et MP3 sont déjà compressés : stockés tels quels
+        writer.write_member(media_member(digest, content_type), payload, compress=False)
+        index.written.add(digest)
+    return digest
+
+
+def _decode_audio(audio_data: str) -> tuple[bytes, str]:
+    return crud_card_audio._decode_audio_data_uri(audio_data), crud_card_audio.AUDIO_CONTENT_TYPE
+
+
+async def _export_media(db: AsyncSession, deck_pk: int, writer: ArchiveStreamWriter, index: _MediaIndex) -> AsyncIterator[bytes]:
+    storage = get_media_storage()
+
+    # 1. Images du stockage de médias (une lecture par empreinte distincte)
+    rows = await db.execute(
+        select(
+            models.CardMedia.card_pk,
+            models.CardMedia.sha256,
+            models.CardMedia.content_type,
+            models.CardMedia.pathname,
+        )
+        .where(
+            models.CardMedia.card_pk.in_(_deck_card_pks(deck_pk)),
+            models.CardMedia.kind == crud_card_media.MEDIA_KIND_IMAGE,
+            models.CardMedia.is_primary.is_(True),
+        )
+        .order_by(models.CardMedia.sha256)
+    )
+    for card_pk, digest, content_type, pathname in rows.all():
+        if content_type not in EXTENSIONS:
+            continue
+        if digest not in index.written:
+            try:
+                payload = await anyio.to_thread.run_sync(storage.read, pathname)
+            except MediaStorageError as exc:
+                logger.warning(f"Export : image {digest} absente du stockage ({exc})")
+                continue
+            _write_media(writer, index, payload, content_type)
+            yield writer.drain()
+        index.images[card_pk] = digest
+
+    # 2. Images encore inline (Data URI) et prononciations, par tranches
+    inline = (
+        select(models.Card.card_pk, models.Card.image)
+        .where(models.Card.card_pk.in_(_deck_card_pks(deck_pk)), models.Card.image.like("data:%"))
+    )
+    audio = (
+        select(models.CardAudio.card_pk, models.CardAudio.audio_data)
+        .where(models.CardAudio.card_pk.in_(_deck_card_pks(deck_pk)))
+    )
+    for stmt, pk_column, target, decode in (
+        (inline, models.Card.card_pk, index.images, decode_data_uri),
+        (audio, models.CardAudio.card_pk, index.audio, _decode_audio),
+    ):
+        last_pk = 0
+        while True:
+            rows = (await db.execute(
+                stmt.where(pk_column > last_pk).order_by(pk_column).limit(DECK_EXPORT_CHUNK_SIZE)
+            )).all()
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            for card_pk, value in rows:
+                try:
+                    payload, content_type = decode(value)
+                except ValueError as exc:
+                    logger.warning(f"Export : média illisible pour la carte {card_pk} ({exc})")
+                    continue
+                if content_type in EXTENSIONS:
+                    target[card_pk] = _write_media(writer, index, payload, content_type)
+            yield writer.drain()
+
+
+def _card_record(row: dict, index: _MediaIndex) -> dict:
+    record = {field: row[field] for field in CARD_FIELDS}
+    record["tags"] = schemas.CardBase.parse_tags_if_string(row["tags"])
+    card_pk, image = row["card_pk"], row["image"]
+    if card_pk in index.images and (is_data_uri(image) or (image or "").startswith("/cards/")):
+        record["image_sha256"] = index.images[card_pk]
+    elif image and image.startswith("http"):
+        record["image"] = image
+    if card_pk in index.audio:
+        record["audio_sha256"] = index.audio[card_pk]
+    return record
+
+
+async def export_deck_archive(db: AsyncSession, deck: models.Deck) -> AsyncIterator[bytes]:
+    """Produit l'archive d'un deck morceau par morceau (à servir via ``StreamingResponse``)."""
+    deck_pk = deck.deck_pk
+    card_count = (await db.execute(
+        select(func.count()).select_from(_deck_card_pks(deck_pk).subquery())
+    )).scalar_one()
+    writer = ArchiveStreamWriter()
+    writer.write_member(MANIFEST_NAME, build_manifest({
+        "id_json": deck.id_json,
+        "name": deck.name,
+        "description": deck.description,
+        "card_count": card_count,
+    }))
+    yield writer.drain()
+
+    index = _MediaIndex()
+    async for data in _export_media(db, deck_pk, writer, index):
+        yield data
+
+    columns = [models.Card.card_pk, models.Card.image, *(getattr(models.Card, field) for field in CARD_FIELDS)]
+    with writer.open_member(CARDS_NAME) as member:
+        last_pk = 0
+        while True:
+            rows = (await db.execute(
+                select(*columns)
+                .where(models.Card.card_pk.in_(_deck_card_pks(deck_pk)), models.Card.card_pk > last_pk)
+                .order_by(models.Card.card_pk)
+                .limit(DECK_EXPORT_CHUNK_SIZE)
+            )).mappings().all()
+            if not rows:
+                break
+            last_pk = rows[-1]["card_pk"]
+            for row in rows:
+                member.write(card_line(_card_record(row, index)))
+            yield writer.drain()
+    yield writer.close()
+
+
+# ==================== IMPORT ====================
+
+async def _resolve_deck(db: AsyncSession, meta: dict, created_by: Optional[int]) -> tuple[int, bool]:
+    """Deck cible : celui de même ``id_json`` s'il existe, sinon un nouveau deck."""
+    id_json = meta.get("id_json")
+    if id_json:
+        existing = (await db.execute(
+            select(models.Deck.deck_pk).where(models.Deck.id_json == id_json)
+        )).scalar_one_or_none()
+        if existing is not None:
+            return existing, False
+    deck = await crud_cards.create_deck(
+        db,
+        schemas.DeckCreate(name=meta["name"], id_json=id_json, description=meta.get("description")),
+        created_by=created_by,
+    )
+    return deck.deck_pk, True
+
+
+def _read_member(archive, info, limit: int, digest: str) -> bytes:
+    if info.file_size > limit:
+        raise MediaStorageError(f"Le média dépasse la limite de {limit} octets")
+    payload = archive.read(info)
+    if sha256_hex(payload) != digest:
+        raise MediaStorageError("Empreinte SHA-256 incohérente")
+    return payload
+
+
+async def _store_images(archive, report: dict) -> tuple[Dict[str, crud_card_media.StoredImage], dict]:
+    """Stocke chaque image distincte une fois ; les MP3 sont seulement indexés (lus par lot)."""
+    images: Dict[str, crud_card_media.StoredImage] = {}
+    audio_members = {}
+    for info in archive.infolist():
+        parsed = parse_media_member(info.filename)
+        if parsed is None:
+            continue
+        digest, content_type = parsed
+        if content_type == crud_card_audio.AUDIO_CONTENT_TYPE:
+            audio_members[digest] = info
+            continue
+        try:
+            payload = await anyio.to_thread.run_sync(_read_member, archive, info, MAX_MEDIA_BYTES, digest)
+            images[digest] = await crud_card_media.store_image_payload(payload, content_type)
+            report["media"]["images"] += 1
+        except MediaStorageError as exc:
+            logger.warning(f"Import : image {digest} ignorée ({exc})")
+            report["media"]["errors"] += 1
+    return images, audio_members
+
+
+def _iter_records(archive) -> Iterator[tuple[int, object]]:
+    with archive.open(CARDS_NAME) as member:
+        for line_number, line in enumerate(io.TextIOWrapper(member, encoding="utf-8"), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, None
+
+
+async def _attach_audio(
+    db: AsyncSession,
+    archive,
+    audio_refs: Dict[str, str],
+    audio_members: dict,
+    report: dict,
+) -> None:
+    pks = dict((await db.execute(
+        select(models.Card.normalized_back, models.Card.card_pk)
+        .where(models.Card.normalized_back.in_(audio_refs))
+    )).all())
+    encoded: Dict[str, Optional[tuple[str, int]]] = {}
+    items = {}
+    for key, digest in audio_refs.items():
+        if key not in pks:
+            continue
+        if digest not in encoded:
+            try:
+                payload = await anyio.to_thread.run_sync(
+                    _read_member, archive, audio_members[digest], crud_card_audio.MAX_CARD_AUDIO_BYTES, digest
+                )
+                encoded[digest] = (crud_card_audio.encode_audio_payload(payload), len(payload))
+            except (MediaStorageError, crud_card_audio.CardAudioValidationError) as exc:
+                logger.warning(f"Import : audio {digest} ignoré ({exc})")
+                report["media"]["errors"] += 1
+                encoded[digest] = None
+        if encoded[digest]:
+            items[pks[key]] = encoded[digest]
+    report["media"]["audio_attached"] += await crud_card_audio.add_missing_card_audio(db, items)
+    await db.commit()
+
+
+async def import_deck_archive(
+    db: AsyncSession,
+    fileobj,
+    created_by: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+) -> dict:
+    """Importe une archive de deck ; lève ``DeckArchiveError`` si elle est invalide.
+
+    Les cartes sont fusionnées par ``normalize_back`` comme dans l'import en
+    lot ; une image ou un audio déjà présent sur une carte n'est pas écrasé.
+    """
+    started = time.perf_counter()
+    chunk_size = chunk_size or crud_cards.BATCH_IMPORT_CHUNK_SIZE
+    archive = open_archive(fileobj)
+    manifest = read_manifest(archive)
+    deck_pk, deck_created = await _resolve_deck(db, manifest["deck"], created_by)
+    report = {
+        "deck_pk": deck_pk,
+        "deck_created": deck_created,
+        "created": 0,
+        "updated": 0,
+        "errors": 0,
+        "media": {"images": 0, "audio_attached": 0, "errors": 0},
+        "chunks": [],
+    }
+    images, audio_members = await _store_images(archive, report)
+
+    records = _iter_records(archive)
+    while True:
+        batch = await anyio.to_thread.run_sync(lambda: list(islice(records, chunk_size)))
+        if not batch:
+            break
+        now = datetime.now(timezone.utc)
+        cards = []
+        stored_images: Dict[str, crud_card_media.StoredImage] = {}
+        audio_refs: Dict[str, str] = {}
+        for line_number, record in batch:
+            try:
+                if not isinstance(record, dict):
+                    raise ValueError("ligne JSON invalide")
+                card = schemas.CardCreate(
+                    **{field: record[field] for field in CARD_FIELDS if record.get(field) is not None},
+                    image=record.get("image"),
+                    deck_pk=deck_pk,
+                    created_at=now,
+                    next_review=now,
+                )
+            except (ValueError, ValidationError) as exc:
+                logger.warning(f"Import : ligne {line_number} de {CARDS_NAME} ignorée ({exc})")
+                report["errors"] += 1
+                continue
+            cards.append(card)
+            key = normalize_back(card.back)
+            if record.get("image_sha256") in images:
+                stored_images[key] = images[record["image_sha256"]]
+            if record.get("audio_sha256") in audio_members:
+                audio_refs[key] = record["audio_sha256"]
+
+        if cards:
+            result = await crud_cards.batch_upsert_cards(
+                db, cards, chunk_size=chunk_size, stored_images=stored_images
+            )
+            for field in ("created", "updated", "errors"):
+                report[field] += result[field]
+            for chunk in result["chunks"]:
+                report["chunks"].append({**chunk, "index": len(report["chunks"])})
+        if audio_refs:
+            await _attach_audio(db, archive, audio_refs, audio_members, report)
+
+    report["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return report
@@ -6,7 +6,8 @@ Séparé de crud_cards.py pour plus de clarté.
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from . import models
+from . import crud_due_queue, crud_forecast, crud_quiz, models
+from .core.schedulers import get_scheduler
 from typing import Optional
 
 
@@ -35,6 +36,8 @@ async def delete_deck(db: AsyncSession, deck_pk: int) -> bool:
     if not deck:
         return False
     
+    # Les cartes partagées restent en file pour les autres decks de chaque utilisateur
+    await crud_due_queue.remove_deck_cards(db, deck_pk)
     await db.delete(deck)
     await db.commit()
     return True
@@ -69,3 +72,44 @@ async def get_deck_creator(db: AsyncSession, deck_pk: int) -> Optional[int]:
     # Pour l'instant, on ne peut pas déterminer le créateur
     # TODO: Ajouter un champ creator_user_pk au modèle Deck
     return None
+
+
+def scheduler_config(deck: models.Deck) -> dict:
+    """Planificateur du deck, paramètres enregistrés et paramètres effectifs."""
+    scheduler = get_scheduler(deck.scheduler)
+    return {
+        "deck_pk": deck.deck_pk,
+        "scheduler": scheduler.name,
+        "params": deck.scheduler_params or {},
+        "effective_params": scheduler.params(deck.scheduler_params),
+    }
+
+
+async def set_deck_scheduler(
+    db: AsyncSession,
+    deck_pk: int,
+    scheduler_name: str,
+    params: Optional[dict] = None,
+) -> Optional[dict]:
+    """
+    Change le planificateur du deck pour les prochaines révisions.
+
+    Les états déjà enregistrés sont repris tels quels par le nouveau
+    planificateur (voir core.schedulers). Les sélections de quiz préparées
+    et les prévisions des utilisateurs du deck sont oubliées. Lève
+    ValueError si le planificateur ou un paramètre est invalide ; None si le
+    deck n'existe pas.
+    """
+    get_scheduler(scheduler_name).params(params)
+    deck = await db.get(models.Deck, deck_pk)
+    if not deck:
+        return None
+    deck.scheduler = scheduler_name
+    deck.scheduler_params = dict(params) if params else None
+    await db.commit()
+    await db.refresh(deck)
+    owners = await db.execute(select(models.UserDeck.user_pk).where(models.UserDeck.deck_pk == deck_pk))
+    for user_pk in owners.scalars().all():
+        crud_quiz.quiz_prefetch_cache.invalidate(user_pk, deck_pk)
+        crud_forecast.forecast_cache.invalidate(user_pk)
+    return scheduler_config(deck)
@@ -0,0 +1,126 @@
+"""Groupes de distracteurs QCM par deck (table ``deck_distractors``).
+
+Une ligne par lien deck ↔ carte avec le groupe de la carte (voir
+``core.distractors``) et sa réponse. La table est mise à jour de façon
+incrémentale à chaque écriture de carte (``sync_cards``) ; la suppression
+d'une carte ou d'un deck l'efface en cascade. Un deck encore absent de la
+table (cartes antérieures à la migration ``add_deck_distractors``) est
+construit à son premier QCM (``ensure_pool``) ; ``scripts/rebuild_distractors.py``
+reste disponible pour tout remplir d'avance.
+
+Aucune fonction ne commit : l'appelant garde la maîtrise de la transaction.
+"""
+
+import random
+from collections import Counter
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .database import dialect_insert
+from .core.distractors import PoolEntry, PoolKey, build_choices, closest_answers, pool_key
+
+Pool = models.DeckDistractor
+
+SYNC_CHUNK_SIZE = 500
+
+
+def _parse_tags(tags) -> List[str]:
+    return schemas.CardBase.parse_tags_if_string(tags)
+
+
+async def sync_cards(db: AsyncSession, card_pks: Iterable[int]) -> None:
+    """Recalcule les lignes de ces cartes, pour tous les decks qui les contiennent."""
+    card_pks = sorted(set(card_pks))
+    for start in range(0, len(card_pks), SYNC_CHUNK_SIZE):
+        chunk = card_pks[start:start + SYNC_CHUNK_SIZE]
+        rows = (await db.execute(
+            select(models.deck_cards.c.deck_pk, models.Card.card_pk, models.Card.back, models.Card.tags)
+            .join(models.Card, models.Card.card_pk == models.deck_cards.c.card_pk)
+            .where(models.deck_cards.c.card_pk.in_(chunk))
+        )).all()
+        await db.execute(delete(Pool).where(Pool.card_pk.in_(chunk)).execution_options(synchronize_session=False))
+        values = []
+        for deck_pk, card_pk, back, tags in rows:
+            key = pool_key(_parse_tags(tags), back)
+            values.append({
+                "deck_pk": deck_pk,
+                "card_pk": card_pk,
+                "pos": key.pos,
+                "length_band": key.length_band,
+                "theme": key.theme,
+                "answer": back,
+            })
+        if values:
+            # Deux premiers QCM simultanés d'un même deck (ensure_pool) insèrent les mêmes lignes
+            await db.execute(dialect_insert(db, Pool.__table__).on_conflict_do_nothing(), values)
+
+
+async def ensure_pool(db: AsyncSession, deck_pk: int) -> bool:
+    """Construit les lignes d'un deck qui n'en a aucune ; True si elles ont été créées."""
+    exists = (await db.execute(select(Pool.card_pk).where(Pool.deck_pk == deck_pk).limit(1))).first()
+    if exists is not None:
+        return False
+    card_pks = (await db.execute(
+        select(models.deck_cards.c.card_pk).where(models.deck_cards.c.deck_pk == deck_pk)
+    )).scalars().all()
+    await sync_cards(db, card_pks)
+    return bool(card_pks)
+
+
+async def load_pool(db: AsyncSession, deck_pk: int, pos: Optional[Iterable[str]] = None) -> List[PoolEntry]:
+    """Lignes du deck, limitées aux natures ``pos`` si données (index (deck_pk, pos, …))."""
+    stmt = select(Pool.card_pk, Pool.pos, Pool.length_band, Pool.theme, Pool.answer).where(Pool.deck_pk == deck_pk)
+    if pos is not None:
+        stmt = stmt.where(Pool.pos.in_(sorted(set(pos))))
+    rows = (await db.execute(stmt)).all()
+    return [PoolEntry(card_pk, PoolKey(pos, band, theme), answer) for card_pk, pos, band, theme, answer in rows]
+
+
+async def build_questions(
+    db: AsyncSession,
+    deck_pk: int,
+    card_pks: List[int],
+    choice_count: int,
+    rng: random.Random = random,
+) -> List[dict]:
+    """Questions QCM (``front`` → ``back``) pour les cartes d'un quiz, dans leur ordre.
+
+    Les groupes du quiz sont lus en une requête et les distracteurs choisis
+    en mémoire ; le reste du deck n'est lu (une fois) que si un groupe est
+    trop petit. Les lignes créées par ``ensure_pool`` sont validées par le
+    commit de l'appelant.
+    """
+    if not card_pks:
+        return []
+    rows = (await db.execute(
+        select(models.Card.card_pk, models.Card.front, models.Card.back, models.Card.tags)
+        .where(models.Card.card_pk.in_(card_pks))
+    )).all()
+    cards = {row.card_pk: row for row in rows}
+    keys = {card_pk: pool_key(_parse_tags(card.tags), card.back) for card_pk, card in cards.items()}
+    # Marge pour les doublons écartés par build_choices
+    limit = 2 * (choice_count - 1)
+
+    pool = await load_pool(db, deck_pk, {key.pos for key in keys.values()})
+    # Aucune carte du quiz dans la table : deck jamais construit, on le construit une fois
+    if cards and not any(entry.card_pk in cards for entry in pool) and await ensure_pool(db, deck_pk):
+        pool = await load_pool(db, deck_pk, {key.pos for key in keys.values()})
+    group_sizes = Counter(entry.key.pos for entry in pool)
+    if any(group_sizes[key.pos] - 1 < limit for key in keys.values()):
+        pool += [entry for entry in await load_pool(db, deck_pk) if entry.key.pos not in group_sizes]
+
+    questions = []
+    for card_pk in card_pks:
+        card = cards.get(card_pk)
+        if card is None:
+            continue
+        distractors = closest_answers(keys[card_pk], card_pk, pool, limit, rng)
+        questions.append({
+            "card_pk": card_pk,
+            "prompt": card.front,
+            "choices": build_choices(card.back, distractors, choice_count, rng),
+        })
+    return questions
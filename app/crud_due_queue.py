@@ -0,0 +1,183 @@
+"""File de révision par utilisateur (table ``user_due_cards``).
+
+Chaque utilisateur a une ligne par carte de ses decks avec sa propre
+échéance. La file est mise à jour de façon incrémentale : révision d'une
+carte, ajout ou retrait d'un deck, nouvelle carte dans un deck possédé.
+Les lectures (``GET /api/users/due``) ne parcourent plus que l'intervalle
+``user_pk`` de l'index (user_pk, due_at, card_pk).
+
+Aucune fonction ne commit : l'appelant garde la maîtrise de la transaction.
+"""
+
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, delete, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from . import crud_forecast, models
+from .database import dialect_insert
+
+Queue = models.UserDueCard
+
+
+def _utc(value: datetime) -> datetime:
+    """``anki_review`` renvoie des dates naïves en UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def enqueue_cards(
+    db: AsyncSession,
+    user_pk: Optional[int] = None,
+    deck_pk: Optional[int] = None,
+    card_pks: Optional[Iterable[int]] = None,
+) -> None:
+    """Ajoute à la file les cartes des decks possédés, filtrées par utilisateur, deck ou cartes.
+
+    Une seule requête INSERT … SELECT ; une carte déjà en file garde son échéance.
+    Les prévisions des utilisateurs concernés sont invalidées (sans
+    ``user_pk`` : ceux dont la file a reçu une carte, lus par RETURNING).
+    """
+    schedule = models.UserCardSchedule
+    source = (
+        select(
+            models.UserDeck.user_pk,
+            models.deck_cards.c.card_pk,
+            # Échéance propre à l'utilisateur si la carte a déjà été révisée (deck retiré puis rajouté)
+            func.coalesce(schedule.next_review, models.Card.next_review),
+        )
+        .join(models.deck_cards, models.deck_cards.c.deck_pk == models.UserDeck.deck_pk)
+        .join(models.Card, models.Card.card_pk == models.deck_cards.c.card_pk)
+        .outerjoin(
+            schedule,
+            and_(schedule.user_pk == models.UserDeck.user_pk, schedule.card_pk == models.deck_cards.c.card_pk),
+        )
+        .distinct()
+    )
+    conditions = []
+    if user_pk is not None:
+        conditions.append(models.UserDeck.user_pk == user_pk)
+    if deck_pk is not None:
+        conditions.append(models.UserDeck.deck_pk == deck_pk)
+    if card_pks is not None:
+        card_pks = list(card_pks)
+        if not card_pks:
+            return
+        conditions.append(models.deck_cards.c.card_pk.in_(card_pks))
+    if not conditions:
+        raise ValueError("enqueue_cards exige au moins un filtre")
+    # La clause WHERE lève aussi l'ambiguïté « INSERT … SELECT … ON CONFLICT » de SQLite
+    stmt = (
+        dialect_insert(db, Queue.__table__)
+        .from_select(["user_pk", "card_pk", "due_at"], source.where(and_(*conditions)))
+        .on_conflict_do_nothing()
+    )
+    if user_pk is not None:
+        crud_forecast.forecast_cache.invalidate(user_pk)
+        await db.execute(stmt)
+        return
+    result = await db.execute(stmt.returning(Queue.user_pk))
+    for owner_pk in set(result.scalars().all()):
+        crud_forecast.forecast_cache.invalidate(owner_pk)
+
+
+async def remove_deck_cards(db: AsyncSession, deck_pk: int, user_pk: Optional[int] = None) -> None:
+    """Retire de la file les cartes du deck qui ne sont dans aucun autre deck de l'utilisateur.
+
+    Sans ``user_pk`` : pour tous les utilisateurs (suppression du deck), dont
+    les prévisions sont invalidées d'après les lignes retirées.
+    """
+    other = models.deck_cards.alias("other_deck_cards")
+    still_owned = (
+        select(other.c.card_pk)
+        .join(models.UserDeck, models.UserDeck.deck_pk == other.c.deck_pk)
+        .where(
+            models.UserDeck.user_pk == Queue.user_pk,
+            other.c.card_pk == Queue.card_pk,
+            other.c.deck_pk != deck_pk,
+        )
+    )
+    stmt = delete(Queue).where(
+        Queue.card_pk.in_(
+            select(models.deck_cards.c.card_pk).where(models.deck_cards.c.deck_pk == deck_pk)
+        ),
+        ~exists(still_owned),
+    )
+    stmt = stmt.execution_options(synchronize_session=False)
+    if user_pk is not None:
+        crud_forecast.forecast_cache.invalidate(user_pk)
+        await db.execute(stmt.where(Queue.user_pk == user_pk))
+        return
+    result = await db.execute(stmt.returning(Queue.user_pk))
+    for owner_pk in set(result.scalars().all()):
+        crud_forecast.forecast_cache.invalidate(owner_pk)
+
+
+async def set_due(db: AsyncSession, user_pk: int, card_pk: int, due_at: datetime) -> None:
+    """Enregistre la prochaine échéance d'une carte après une révision."""
+    await set_due_many(db, user_pk, {card_pk: due_at})
+
+
+async def set_due_many(db: AsyncSession, user_pk: int, due: dict[int, datetime]) -> None:
+    """Enregistre les échéances ``{card_pk: due_at}`` en un seul upsert."""
+    if not due:
+        return
+    # La prévision de charge (crud_forecast) repose sur ces échéances
+    crud_forecast.forecast_cache.invalidate(user_pk)
+    stmt = dialect_insert(db, Queue.__table__).values([
+        {"user_pk": user_pk, "card_pk": card_pk, "due_at": _utc(due_at)}
+        for card_pk, due_at in due.items()
+    ])
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_pk", "card_pk"],
+            set_={"due_at": stmt.excluded.due_at},
+        )
+    )
+
+
+async def get_due_queue(
+    db: AsyncSession,
+    user_pk: int,
+    limit: int = 20,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Compteurs de la file et ``limit`` prochaines cartes échues, par échéance croissante."""
+    now = now or datetime.now(timezone.utc)
+    end_of_day = datetime.combine(now.date() + timedelta(days=1), time.min, tzinfo=now.tzinfo)
+    counts = (await db.execute(
+        select(
+            func.count().filter(Queue.due_at <= now),
+            func.count().filter(Queue.due_at < end_of_day),
+            func.count(),
+            func.min(Queue.due_at).filter(Queue.due_at > now),
+        ).where(Queue.user_pk == user_pk)
+    )).one()
+
+    rows = (await db.execute(
+        select(Queue.card_pk, Queue.due_at)
+        .where(Queue.user_pk == user_pk, Queue.due_at <= now)
+        .order_by(Queue.due_at, Queue.card_pk)
+        .limit(limit)
+    )).all()
+    cards = {}
+    if rows:
+        result = await db.execute(
+            select(models.Card)
+            .options(selectinload(models.Card.audio))
+            .where(models.Card.card_pk.in_([card_pk for card_pk, _ in rows]))
+        )
+        cards = {card.card_pk: card for card in result.scalars().all()}
+
+    return {
+        "due_now": counts[0] or 0,
+        "due_today": counts[1] or 0,
+        "total": counts[2] or 0,
+        "next_due_at": counts[3],
+        "cards": [
+            {"due_at": due_at, "card": cards[card_pk]}
+            for card_pk, due_at in rows
+            if card_pk in cards
+        ],
+    }
@@ -0,0 +1,199 @@
+"""Prévision du nombre de révisions à venir, par utilisateur ou pour tout le service.
+
+Lit la file de révision (``user_due_cards``, une ligne par carte des decks de
+l'utilisateur) et l'état de planification (``user_card_schedules``), puis
+simule les révisions avec ``core.review_forecast``, chaque carte avec le
+planificateur de son deck. Les taux de réussite viennent de l'historique
+``user_scores`` : par carte, ramenés vers le taux de l'utilisateur quand la
+carte a peu de réponses.
+
+Les prévisions sont gardées en cache (``forecast_cache``) ; la file de
+révision l'invalide pour chaque utilisateur dont elle change (révision,
+changement de decks, nouvelle carte dans un deck possédé). La simulation,
+coûteuse en calcul, tourne dans un thread pour ne pas bloquer la boucle.
+"""
+
+import asyncio
+import os
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import and_, case, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_schedules, models
+from .core.quiz_selection import naive_utc
+from .core.review_forecast import (
+    DEFAULT_SUCCESS_RATE,
+    ForecastCache,
+    due_days,
+    last_review_days,
+    simulate,
+    smoothed_rates,
+)
+
+FORECAST_CACHE_SIZE = int(os.getenv("FORECAST_CACHE_SIZE", "1024"))
+FORECAST_CACHE_TTL_SECONDS = float(os.getenv("FORECAST_CACHE_TTL_SECONDS", "600"))
+FORECAST_SIMULATION_RUNS = int(os.getenv("FORECAST_SIMULATION_RUNS", "20"))
+forecast_cache = ForecastCache(FORECAST_CACHE_SIZE, FORECAST_CACHE_TTL_SECONDS)
+
+# Lignes de la file simulées à la fois pour la prévision globale
+GLOBAL_FORECAST_CHUNK_SIZE = 50_000
+
+Queue = models.UserDueCard
+Schedule = models.UserCardSchedule
+Score = models.UserScore
+
+_correct = func.sum(case((Score.is_correct, 1), else_=0))
+
+
+def _state_query():
+    """Cartes en file avec leur état (valeurs d'une carte neuve si jamais révisée).
+
+    Le deck d'une carte (pour son planificateur) est le premier de ses decks
+    possédés par l'utilisateur ; NULL (SM-2) s'il n'y en a aucun.
+    """
+    deck_pk = (
+        select(func.min(models.deck_cards.c.deck_pk))
+        .join(models.UserDeck, models.UserDeck.deck_pk == models.deck_cards.c.deck_pk)
+        .where(models.deck_cards.c.card_pk == Queue.card_pk, models.UserDeck.user_pk == Queue.user_pk)
+        .correlate(Queue)
+        .scalar_subquery()
+    )
+    return select(
+        Queue.user_pk,
+        Queue.card_pk,
+        Queue.due_at,
+        func.coalesce(Schedule.easiness, 2.5),
+        func.coalesce(Schedule.interval, 0),
+        func.coalesce(Schedule.consecutive_correct, 0),
+        Schedule.stability,
+        Schedule.last_reviewed_at,
+        deck_pk,
+    ).outerjoin(Schedule, and_(Schedule.user_pk == Queue.user_pk, Schedule.card_pk == Queue.card_pk))
+
+
+async def _deck_configs(db: AsyncSession, rows) -> dict:
+    """Planificateur enregistré des decks des lignes (une requête)."""
+    return await crud_schedules.get_deck_schedulers(db, {row[8] for row in rows})
+
+
+def _start_of_day(now: datetime) -> datetime:
+    return datetime.combine(now.date(), time.min)
+
+
+def _report(counts: np.ndarray, due: np.ndarray, start: datetime, **extra) -> dict:
+    return {
+        **extra,
+        "generated_at": datetime.now(timezone.utc),
+        "daily": [
+            {
+                "date": (start + timedelta(days=day)).date(),
+                "due": int(due[day]),
+                "expected_reviews": round(float(counts[day]), 1),
+            }
+            for day in range(len(counts))
+        ],
+    }
+
+
+def _simulate_rows(rows, rates: np.ndarray, start: datetime, days: int, rng: np.random.Generator, configs: dict):
+    """Comptes simulés et échéances actuelles par jour pour des lignes de ``_state_query``.
+
+    ``configs`` : planificateur de chaque deck (``crud_schedules.get_deck_schedulers``).
+    """
+    day = due_days([naive_utc(row[2]) for row in rows], start)
+    due = np.bincount(day[day < days], minlength=days)
+    # Un groupe par couple (planificateur, paramètres), comme crud_schedules.apply_reviews
+    groups: dict = {}
+    scheduler = []
+    for row in rows:
+        name, params = configs.get(row[8], crud_schedules.DEFAULT_CONFIG)
+        key = (name, tuple(sorted((params or {}).items())))
+        scheduler.append(groups.setdefault(key, len(groups)))
+    counts = simulate(
+        [row[3] for row in rows],
+        [row[4] for row in rows],
+        [row[5] for row in rows],
+        day,
+        rates,
+        days,
+        runs=FORECAST_SIMULATION_RUNS,
+        rng=rng,
+        stability=[np.nan if row[6] is None else row[6] for row in rows],
+        last_review_day=last_review_days([naive_utc(row[7]) if row[7] else None for row in rows], start),
+        scheduler=scheduler,
+        schedulers=[(name, dict(params)) for name, params in groups],
+    )
+    return counts, due
+
+
+async def get_user_forecast(db: AsyncSession, user_pk: int, days: int) -> dict:
+    """Révisions prévues pour les ``days`` prochains jours (jour 0 = aujourd'hui, retards compris)."""
+    key = (user_pk, days)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = forecast_cache.generation(user_pk)
+
+    per_card = (await db.execute(
+        select(Score.card_pk, _correct, func.count())
+        .where(Score.user_pk == user_pk, Score.card_pk.is_not(None))
+        .group_by(Score.card_pk)
+    )).all()
+    correct = sum(row[1] or 0 for row in per_card)
+    total = sum(row[2] for row in per_card)
+    user_rate = float(smoothed_rates(correct, total, DEFAULT_SUCCESS_RATE))
+    card_rates = {row[0]: float(smoothed_rates(row[1] or 0, row[2], user_rate)) for row in per_card}
+
+    rows = (await db.execute(_state_query().where(Queue.user_pk == user_pk))).all()
+    start = _start_of_day(datetime.utcnow())
+    rates = np.array([card_rates.get(row[1], user_rate) for row in rows], dtype=np.float64)
+    # Graine fixe par utilisateur : deux appels sans révision entre eux donnent la même prévision
+    configs = await _deck_configs(db, rows)
+    counts, due = await asyncio.to_thread(
+        _simulate_rows, rows, rates, start, days, np.random.default_rng(user_pk), configs
+    )
+    forecast = _report(counts, due, start, days=days, cards=len(rows), success_rate=round(user_rate, 4))
+    forecast_cache.put(key, generation, forecast)
+    return forecast
+
+
+async def get_global_forecast(db: AsyncSession, days: int, chunk_size: int = GLOBAL_FORECAST_CHUNK_SIZE) -> dict:
+    """Même prévision pour tous les utilisateurs (charge attendue du service), par tranches de la file."""
+    key = (None, days)
+    cached = forecast_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = forecast_cache.generation(None)
+
+    per_user = (await db.execute(
+        select(Score.user_pk, _correct, func.count()).where(Score.card_pk.is_not(None)).group_by(Score.user_pk)
+    )).all()
+    user_rates = {row[0]: float(smoothed_rates(row[1] or 0, row[2], DEFAULT_SUCCESS_RATE)) for row in per_user}
+
+    start = _start_of_day(datetime.utcnow())
+    rng = np.random.default_rng(0)
+    counts = np.zeros(days, dtype=np.float64)
+    due = np.zeros(days, dtype=np.int64)
+    cards = 0
+    users = set()
+    stmt = _state_query().order_by(Queue.user_pk, Queue.card_pk).limit(chunk_size)
+    last_key: Optional[tuple] = None
+    while True:
+        page = stmt if last_key is None else stmt.where(tuple_(Queue.user_pk, Queue.card_pk) > tuple_(*last_key))
+        rows = (await db.execute(page)).all()
+        if not rows:
+            break
+        last_key = (rows[-1][0], rows[-1][1])
+        cards += len(rows)
+        users.update(row[0] for row in rows)
+        rates = np.array([user_rates.get(row[0], DEFAULT_SUCCESS_RATE) for row in rows], dtype=np.float64)
+        configs = await _deck_configs(db, rows)
+        chunk_counts, chunk_due = await asyncio.to_thread(_simulate_rows, rows, rates, start, days, rng, configs)
+        counts += chunk_counts
+        due += chunk_due
+    forecast = _report(counts, due, start, days=days, cards=cards, users=len(users))
+    forecast_cache.put(key, generation, forecast)
+    return forecast
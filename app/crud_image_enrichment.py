@@ -0,0 +1,267 @@
+"""File persistante des recherches d'icônes différées (table ``image_enrichment_jobs``).
+
+La création de cartes se contente d'enregistrer une tâche ; le worker lancé
+au démarrage (ou ``scripts/run_image_enrichment.py`` sur un hébergement sans
+processus permanent) traite les tâches par lots, une recherche par requête
+distincte, avec un nombre borné d'appels simultanés et des nouvelles
+tentatives espacées exponentiellement. Une tâche dont la requête est une URL
+http(s) (image distante d'un import en lot) télécharge directement cette URL.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional, Tuple
+
+import anyio
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_card_media, models
+from .core.image_enrichment import (
+    IMAGE_ENRICHMENT_CONCURRENCY,
+    IMAGE_ENRICHMENT_MAX_ATTEMPTS,
+    ImageFetcher,
+    backoff_delay,
+    fetch_images,
+    is_image_url,
+)
+from .core.image_scraper import download_image
+from .core.media_storage import MediaStorageError, get_media_storage, media_key
+from .database import SessionLocal, dialect_insert
+
+logger = logging.getLogger(__name__)
+
+IMAGE_ENRICHMENT_BATCH_SIZE = int(os.getenv("IMAGE_ENRICHMENT_BATCH_SIZE", "20"))
+IMAGE_ENRICHMENT_POLL_SECONDS = float(os.getenv("IMAGE_ENRICHMENT_POLL_SECONDS", "30"))
+# Une tâche restée « running » plus longtemps (worker interrompu) est reprise.
+IMAGE_ENRICHMENT_LEASE_SECONDS = float(os.getenv("IMAGE_ENRICHMENT_LEASE_SECONDS", "600"))
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+async def enqueue_card_images(db: AsyncSession, items: Iterable[Tuple[int, str]]) -> int:
+    """Planifie la recherche d'image de cartes ``(card_pk, search_query)``.
+
+    Une tâche existante pour la même carte est réinitialisée. Ne commit pas :
+    la tâche est créée dans la même transaction que la carte.
+    """
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "card_pk": card_pk,
+            "search_query": search_query,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for card_pk, search_query in dict(items).items()
+        if search_query
+    ]
+    if not rows:
+        return 0
+    stmt = dialect_insert(db, models.ImageEnrichmentJob.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["card_pk"],
+        set_={
+            "search_query": stmt.excluded.search_query,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "last_error": None,
+            "updated_at": now,
+        },
+    )
+    await db.execute(stmt)
+    return len(rows)
+
+
+async def get_enrichment_status(db: AsyncSession) -> dict:
+    """Nombre de tâches par statut."""
+    result = await db.execute(
+        select(models.ImageEnrichmentJob.status, func.count())
+        .group_by(models.ImageEnrichmentJob.status)
+    )
+    counts = {status: 0 for status in (STATUS_PENDING, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED)}
+    counts.update(dict(result.all()))
+    return counts
+
+
+async def _claim_jobs(db: AsyncSession, batch_size: int) -> list[models.ImageEnrichmentJob]:
+    now = datetime.now(timezone.utc)
+    Job = models.ImageEnrichmentJob
+    result = await db.execute(
+        select(Job)
+        .where(
+            or_(
+                and_(Job.status == STATUS_PENDING, Job.next_attempt_at <= now),
+                and_(
+                    Job.status == STATUS_RUNNING,
+                    Job.updated_at < now - timedelta(seconds=IMAGE_ENRICHMENT_LEASE_SECONDS),
+                ),
+            )
+        )
+        .order_by(Job.next_attempt_at, Job.job_pk)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    jobs = list(result.scalars().all())
+    if not jobs:
+        return []
+    job_pks = [job.job_pk for job in jobs]
+    for job in jobs:
+        job.status = STATUS_RUNNING
+        job.updated_at = now
+    await db.commit()
+    # Rechargement explicite : le commit a expiré les instances (clés relevées avant)
+    result = await db.execute(select(Job).where(Job.job_pk.in_(job_pks)))
+    return list(result.scalars().all())
+
+
+async def _reuse_known_images(db: AsyncSession, queries: set[str]) -> dict[str, Tuple[bytes, str]]:
+    """Relit dans le stockage les images déjà obtenues pour ces requêtes."""
+    Job = models.ImageEnrichmentJob
+    result = await db.execute(
+        select(Job.search_query, Job.sha256, Job.content_type)
+        .where(Job.status == STATUS_DONE, Job.sha256.isnot(None), Job.search_query.in_(queries))
+        .distinct()
+    )
+    storage = get_media_storage()
+    known: dict[str, Tuple[bytes, str]] = {}
+    for search_query, sha256, content_type in result.all():
+        if search_query in known:
+            continue
+        try:
+            payload = await anyio.to_thread.run_sync(storage.read, media_key(sha256, content_type))
+        except MediaStorageError:
+            continue
+        known[search_query] = (payload, content_type)
+    return known
+
+
+async def run_enrichment_batch(
+    db: AsyncSession,
+    fetcher: Optional[ImageFetcher] = None,
+    batch_size: int = IMAGE_ENRICHMENT_BATCH_SIZE,
+    concurrency: int = IMAGE_ENRICHMENT_CONCURRENCY,
+) -> dict:
+    """Traite un lot de tâches échues et retourne un compte rendu."""
+    report = {"claimed": 0, "done": 0, "retried": 0, "failed": 0, "fetched": 0, "missed": 0, "reused": 0}
+    jobs = await _claim_jobs(db, batch_size)
+    report["claimed"] = len(jobs)
+    if not jobs:
+        return report
+
+    queries = {job.search_query for job in jobs}
+    images = await _reuse_known_images(db, queries)
+    report["reused"] = len(images)
+    missing = queries - images.keys()
+    urls = {query for query in missing if is_image_url(query)}
+    fetched = await fetch_images(missing - urls, fetcher, concurrency)
+    fetched.update(await fetch_images(urls, download_image, concurrency))
+    images.update({query: image for query, image in fetched.items() if image})
+    # fetched : recherches qui ont rapporté une image ; missed : sans résultat ou en erreur
+    report["fetched"] = sum(1 for image in fetched.values() if image)
+    report["missed"] = len(fetched) - report["fetched"]
+
+    has_image = dict(
+        (await db.execute(
+            select(models.Card.card_pk, models.Card.image.isnot(None))
+            .where(models.Card.card_pk.in_([job.card_pk for job in jobs]))
+        )).all()
+    )
+    now = datetime.now(timezone.utc)
+    for job in jobs:
+        job.updated_at = now
+        if has_image.get(job.card_pk, True):
+            # Image ajoutée entre-temps (ou carte supprimée) : rien à faire
+            job.status = STATUS_DONE
+            report["done"] += 1
+            continue
+
+        image = images.get(job.search_query)
+        error = "Aucune image trouvée"
+        if image:
+            try:
+                media = await crud_card_media.put_card_image(db, job.card_pk, *image)
+                await db.execute(
+                    update(models.Card)
+                    .where(models.Card.card_pk == job.card_pk)
+                    .values(image=media.url)
+                )
+                job.status = STATUS_DONE
+                job.sha256 = media.sha256
+                job.content_type = media.content_type
+                job.last_error = None
+                report["done"] += 1
+                continue
+            except MediaStorageError as exc:
+                error = str(exc)
+
+        job.attempts += 1
+        job.last_error = error
+        if job.attempts >= IMAGE_ENRICHMENT_MAX_ATTEMPTS:
+            job.status = STATUS_FAILED
+            report["failed"] += 1
+        else:
+            job.status = STATUS_PENDING
+            job.next_attempt_at = now + timedelta(seconds=backoff_delay(job.attempts))
+            report["retried"] += 1
+
+    await db.commit()
+    return report
+
+
+class ImageEnrichmentWorker:
+    """Boucle de fond qui vide la file, réveillée dès qu'une tâche est ajoutée."""
+
+    def __init__(self, poll_seconds: float = IMAGE_ENRICHMENT_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("🖼️ Worker d'enrichissement d'images démarré")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        """Signale qu'une tâche vient d'être planifiée (sans effet si le worker est arrêté)."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            claimed = 0
+            self._wakeup.clear()
+            try:
+                async with SessionLocal() as db:
+                    report = await run_enrichment_batch(db)
+                claimed = report["claimed"]
+                if claimed:
+                    logger.info(f"🖼️ Enrichissement d'images : {report}")
+            except Exception as exc:
+                logger.exception(f"Erreur du worker d'enrichissement d'images : {exc}")
+            if claimed:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+
+image_enrichment_worker = ImageEnrichmentWorker()
@@ -11,6 +11,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from . import models
+from .core.media_storage import public_image_value
 from .security import SECRET_KEY
 
 
@@ -84,7 +85,7 @@ def public_card_payload(card: models.Card, token: str, signature: str) -> dict:
         "front": card.front,
         "back": card.back,
         "pronunciation": card.pronunciation,
-        "image": card.image,
+        "image": public_image_value(card.card_pk, card.image),
         "explanation_it": card.explanation_it,
         "translation_en": card.translation_en,
         "translation_de": card.translation_de,
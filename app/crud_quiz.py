@@ -10,14 +10,30 @@ Implémente:
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, or_
-from sqlalchemy.orm import joinedload
-from . import models
-from .core.anki import anki_review
-from typing import List, Tuple, Optional
+from sqlalchemy import bindparam, select, and_, func, or_, tuple_, update
+from . import crud_due_queue, crud_schedules, models
+from .crud_cards import card_load_options
+from .database import SessionLocal, dialect_insert
+from .core.mixed_review import StreamEntry, merge_streams
+from .core.quiz_prefetch import QuizSelectionCache
+from .core.quiz_selection import Candidate, choose_cards, naive_utc
+from .core.schedulers import answer_grade
+from collections import Counter
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import json
-import random
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Colonnes lues pour les cartes retenues quand aucun ``fields`` n'est demandé
+QUIZ_CARD_COLUMNS = ["front", "back", "pronunciation", "image", "tags"]
+
+# Sélection suivante préparée à la fin d'une session (voir core.quiz_prefetch)
+QUIZ_PREFETCH_CACHE_SIZE = int(os.getenv("QUIZ_PREFETCH_CACHE_SIZE", "1024"))
+QUIZ_PREFETCH_TTL_SECONDS = float(os.getenv("QUIZ_PREFETCH_TTL_SECONDS", "600"))
+quiz_prefetch_cache = QuizSelectionCache(QUIZ_PREFETCH_CACHE_SIZE, QUIZ_PREFETCH_TTL_SECONDS)
 
 
 # ============================================================================
@@ -80,35 +96,9 @@ async def update_card_performance(
     performance.priority_score = (performance.incorrect_count * 2) - performance.correct_count
     performance.last_reviewed_at = datetime.utcnow()
 
-    # === UPDATE ANKI STATS (Global Card) ===
-    # Permet de mettre à jour les compteurs (Mastered/Learning/Review) pour le dashboard
-    stmt_card = select(models.Card).where(models.Card.card_pk == card_pk)
-    result_card = await db.execute(stmt_card)
-    card = result_card.scalar_one_or_none()
-
-    if card:
-        # Mapping simple: Correct -> Good (3), Incorrect -> Again (0)
-        grade = 3 if is_correct else 0
-        
-        anki_stats = anki_review(
-            easiness=card.easiness,
-            interval=card.interval,
-            consecutive_correct=card.consecutive_correct,
-            grade=grade
-        )
-        
-        card.easiness = anki_stats["easiness"]
-        card.interval = anki_stats["interval"]
-        card.consecutive_correct = anki_stats["consecutive_correct"]
-        card.next_review = anki_stats["next_review"]
-        
-        # Mise à jour de la boîte (Leitner system simplifié)
-        if grade >= 2:
-            card.box += 1
-        elif grade == 0:
-            card.box = 0
-            
-        db.add(card)
+    # === UPDATE ANKI STATS (état propre à l'utilisateur) ===
+    await crud_schedules.record_review(db, user_pk, card_pk, answer_grade(is_correct=is_correct), deck_pk=deck_pk)
+    quiz_prefetch_cache.invalidate(user_pk, deck_pk)
 
     # === UPDATE USER SCORE (POINTS) ===
     # Mise à jour des points dans UserDeck (10 points par bonne réponse)
@@ -134,19 +124,157 @@ async def update_card_performance(
                 total_attempts=1
             )
             db.add(user_deck)
+            await db.flush()
+            await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=deck_pk)
 
     await db.commit()
     await db.refresh(performance)
     return performance
 
 
+async def record_answers(
+    db: AsyncSession,
+    user_pk: int,
+    session: models.QuizSession,
+    answers: List[Tuple[int, bool]]
+) -> List[models.CardPerformance]:
+    """
+    Enregistre un lot de réponses ``(card_pk, is_correct)`` de ``session`` dans l'ordre, en une seule transaction.
+
+    Mêmes effets que ``update_card_performance`` appelée pour chaque réponse
+    (performances, état Anki, points du UserDeck) mais avec une lecture et
+    une écriture groupées par table. Retourne les performances des cartes
+    concernées, dans l'ordre de première apparition.
+
+    Seules les cartes tirées pour la session sont acceptées, et plus aucune
+    une fois la session terminée (ValueError). Pour une session mixte,
+    chaque réponse est attribuée au deck de la carte dans
+    ``quiz_session_cards`` et y est comptée.
+    """
+    if session.completed_at is not None:
+        raise ValueError("Session de quiz déjà terminée")
+    mixed_session_pk = session.session_pk if session.deck_pk is None else None
+    card_pks = list(dict.fromkeys(card_pk for card_pk, _ in answers))
+    if mixed_session_pk is not None:
+        card_decks = await get_session_card_decks(db, mixed_session_pk)
+    else:
+        session_card_pks = set(json.loads(session.used_card_pks))
+        result_cards = await db.execute(
+            select(models.Card.card_pk).where(models.Card.card_pk.in_(set(card_pks) & session_card_pks))
+        )
+        card_decks = dict.fromkeys(result_cards.scalars().all(), session.deck_pk)
+    unknown = set(card_pks) - set(card_decks)
+    if unknown:
+        raise ValueError(f"Cartes absentes de la session : {sorted(unknown)}")
+
+    # === PERFORMANCES : une lecture, un flush (INSERT et UPDATE groupés) ===
+    result_perf = await db.execute(
+        select(models.CardPerformance).where(
+            and_(
+                models.CardPerformance.user_pk == user_pk,
+                tuple_(models.CardPerformance.deck_pk, models.CardPerformance.card_pk).in_(
+                    [(card_decks[card_pk], card_pk) for card_pk in card_pks]
+                )
+            )
+        ).order_by(models.CardPerformance.performance_pk)
+    )
+    performances = {}
+    for performance in result_perf.scalars().all():
+        performances.setdefault(performance.card_pk, performance)
+
+    now = datetime.utcnow()
+    reviews = []
+    correct_by_deck = Counter()
+    for card_pk, is_correct in answers:
+        performance = performances.get(card_pk)
+        if performance is None:
+            performance = models.CardPerformance(
+                user_pk=user_pk,
+                card_pk=card_pk,
+                deck_pk=card_decks[card_pk],
+                correct_count=0,
+                incorrect_count=0,
+                total_attempts=0,
+                priority_score=0.0
+            )
+            db.add(performance)
+            performances[card_pk] = performance
+        performance.total_attempts += 1
+        if is_correct:
+            performance.correct_count += 1
+            correct_by_deck[card_decks[card_pk]] += 1
+        else:
+            performance.incorrect_count += 1
+        performance.priority_score = (performance.incorrect_count * 2) - performance.correct_count
+        performance.last_reviewed_at = now
+        reviews.append(crud_schedules.Review(card_pk, answer_grade(is_correct=is_correct), deck_pk=card_decks[card_pk]))
+
+    # === ÉTAT DE PLANIFICATION : planificateur de chaque deck, un upsert ===
+    await crud_schedules.review_cards(db, user_pk, reviews)
+    for answered_deck_pk in set(card_decks.values()):
+        quiz_prefetch_cache.invalidate(user_pk, answered_deck_pk)
+
+    # === POINTS : un UPDATE par deck (10 points par bonne réponse) ===
+    for answered_deck_pk, correct in correct_by_deck.items():
+        result_ud = await db.execute(
+            update(models.UserDeck)
+            .where(and_(models.UserDeck.user_pk == user_pk, models.UserDeck.deck_pk == answered_deck_pk))
+            .values(total_points=models.UserDeck.total_points + 10 * correct)
+        )
+        if result_ud.rowcount == 0:
+            # Même création implicite que update_card_performance
+            db.add(models.UserDeck(
+                user_pk=user_pk,
+                deck_pk=answered_deck_pk,
+                total_points=10 * correct,
+                attempt_count=1,
+                correct_count=1,
+                successful_attempts=1,
+                total_attempts=1
+            ))
+            await db.flush()
+            await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=answered_deck_pk)
+
+    if mixed_session_pk is not None:
+        # Résultats par carte de la session : répartis par deck à la finalisation
+        session_card = models.QuizSessionCard.__table__
+        counts = Counter(card_pk for card_pk, _ in answers)
+        correct_counts = Counter(card_pk for card_pk, is_correct in answers if is_correct)
+        await db.execute(
+            update(session_card)
+            .where(and_(
+                session_card.c.session_pk == mixed_session_pk,
+                session_card.c.card_pk == bindparam("key_card_pk"),
+            ))
+            .values(
+                answered=session_card.c.answered + bindparam("delta_answered"),
+                correct=session_card.c.correct + bindparam("delta_correct"),
+            ),
+            [
+                {"key_card_pk": card_pk, "delta_answered": counts[card_pk], "delta_correct": correct_counts[card_pk]}
+                for card_pk in card_pks
+            ],
+        )
+
+    await db.flush()
+    performance_pks = [performances[card_pk].performance_pk for card_pk in card_pks]
+    await db.commit()
+
+    # Relecture groupée : les objets sont expirés par le commit
+    result_perf = await db.execute(
+        select(models.CardPerformance).where(models.CardPerformance.performance_pk.in_(performance_pks))
+    )
+    by_pk = {performance.performance_pk: performance for performance in result_perf.scalars().all()}
+    return [by_pk[pk] for pk in performance_pks]
+
+
 async def get_deck_performances(
     db: AsyncSession,
     user_pk: int,
     deck_pk: int
 ) -> List[models.CardPerformance]:
     """Récupère toutes les performances pour un deck donné"""
-    stmt = select(models.CardPerformance).options(joinedload(models.CardPerformance.card)).where(
+    stmt = select(models.CardPerformance).where(
         and_(
             models.CardPerformance.user_pk == user_pk,
             models.CardPerformance.deck_pk == deck_pk
@@ -181,48 +309,138 @@ async def get_current_cycle_info(
     if total_cards == 0:
         return (1, [])
     
-    # Récupérer les sessions de quiz pour ce deck
-    stmt_sessions = select(models.QuizSession).where(
-        and_(
-            models.QuizSession.user_pk == user_pk,
-            models.QuizSession.deck_pk == deck_pk
+    # Cycle en cours : MAX(cycle_number) via l'index (user_pk, deck_pk, cycle_number)
+    result_cycle = await db.execute(
+        select(func.max(models.QuizSession.cycle_number)).where(
+            and_(
+                models.QuizSession.user_pk == user_pk,
+                models.QuizSession.deck_pk == deck_pk
+            )
         )
-    ).order_by(models.QuizSession.session_pk.desc())
-    
-    result_sessions = await db.execute(stmt_sessions)
-    sessions = result_sessions.scalars().all()
+    )
+    current_cycle = result_cycle.scalar()
     
-    if not sessions:
+    if current_cycle is None:
         return (1, [])  # Premier cycle, aucune carte utilisée
     
-    # Collecter toutes les cartes utilisées dans toutes les sessions
-    all_used_cards = set()
-    for session in sessions:
-        try:
-            used_pks = json.loads(session.used_card_pks)
-            all_used_cards.update(used_pks)
-        except (json.JSONDecodeError, TypeError):
-            continue
+    # Cartes déjà tirées dans ce cycle (quiz_cycle_cards, tenue à jour par create_quiz_session)
+    result_used = await db.execute(
+        select(models.QuizCycleCard.card_pk).where(
+            and_(
+                models.QuizCycleCard.user_pk == user_pk,
+                models.QuizCycleCard.deck_pk == deck_pk,
+                models.QuizCycleCard.cycle_number == current_cycle
+            )
+        )
+    )
+    used_card_pks = list(result_used.scalars().all())
     
     # Si toutes les cartes ont été utilisées, on réinitialise pour un nouveau cycle
-    if len(all_used_cards) >= total_cards:
-        # Calculer le cycle suivant
-        max_cycle = max(s.cycle_number for s in sessions) if sessions else 0
-        return (max_cycle + 1, [])  # Nouveau cycle, réinitialisation
+    if len(used_card_pks) >= total_cards:
+        return (current_cycle + 1, [])  # Nouveau cycle, réinitialisation
     
     # Sinon, continuer le cycle actuel
-    current_cycle = sessions[0].cycle_number if sessions else 1
-    return (current_cycle, list(all_used_cards))
+    return (current_cycle, used_card_pks)
 
 
-async def select_cards_for_quiz(
+def is_due(due: datetime) -> bool:
+    """Échéance atteinte (dates aware en PostgreSQL, naïves en SQLite)"""
+    return naive_utc(due) <= datetime.utcnow()
+
+
+async def load_quiz_cards(
+    db: AsyncSession,
+    card_pks: List[int],
+    fields: Optional[List[str]] = None
+) -> List[models.Card]:
+    """Cartes retenues, dans l'ordre de ``card_pks``, limitées aux colonnes du quiz"""
+    if not card_pks:
+        return []
+    stmt_cards = (
+        select(models.Card)
+        .options(*card_load_options(fields if fields is not None else QUIZ_CARD_COLUMNS))
+        .where(models.Card.card_pk.in_(card_pks))
+    )
+    cards = {card.card_pk: card for card in (await db.execute(stmt_cards)).scalars().all()}
+    return [cards[pk] for pk in card_pks if pk in cards]
+
+
+async def choose_quiz_cards(
     db: AsyncSession,
     user_pk: int,
     deck_pk: int,
     card_count: int
+) -> Tuple[List[int], int, int]:
+    """
+    Choisit les cartes d'un quiz sans les charger.
+
+    Returns:
+        (selected_pks, cycle_number, review_count)
+    """
+    # Candidats légers : (card_pk, échéance propre à l'utilisateur, priority_score)
+    schedule = models.UserCardSchedule
+    perf = models.CardPerformance
+    result = await db.execute(
+        select(
+            models.Card.card_pk,
+            func.coalesce(schedule.next_review, models.Card.next_review),
+            perf.priority_score,
+        )
+        .outerjoin(schedule, and_(schedule.user_pk == user_pk, schedule.card_pk == models.Card.card_pk))
+        .outerjoin(
+            perf,
+            and_(perf.user_pk == user_pk, perf.deck_pk == deck_pk, perf.card_pk == models.Card.card_pk),
+        )
+        .where(models.Card.deck_pk == deck_pk)
+    )
+    candidates = [Candidate(*row) for row in result.all()]
+    
+    if not candidates:
+        return ([], 1, 0)
+    
+    # Vérifier que card_count est valide
+    card_count = min(card_count, len(candidates))
+    
+    # Déterminer le cycle et les cartes déjà utilisées (pour le message seulement)
+    cycle_number, used_card_pks = await get_current_cycle_info(db, user_pk, deck_pk)
+    
+    # Priorité aux cartes à revoir, puis tirage pondéré (voir core.quiz_selection)
+    selected_pks, review_count = choose_cards(candidates, card_count, datetime.utcnow())
+    return (selected_pks, cycle_number, review_count)
+
+
+async def prefetch_quiz_selection(user_pk: int, deck_pk: int, card_count: int) -> None:
+    """
+    Prépare la sélection du prochain quiz (tâche de fond, session dédiée).
+
+    La génération est relevée avant la lecture : si une réponse arrive
+    pendant le calcul, la sélection obsolète n'est pas stockée.
+    """
+    key = (user_pk, deck_pk)
+    generation = quiz_prefetch_cache.generation(key)
+    try:
+        async with SessionLocal() as db:
+            selected_pks, cycle_number, review_count = await choose_quiz_cards(db, user_pk, deck_pk, card_count)
+    except Exception as exc:
+        logger.warning(f"Préparation du prochain quiz impossible (user={user_pk}, deck={deck_pk}) : {exc}")
+        return
+    if selected_pks:
+        quiz_prefetch_cache.put(key, generation, card_count, selected_pks, cycle_number, review_count)
+
+
+async def select_cards_for_quiz(
+    db: AsyncSession,
+    user_pk: int,
+    deck_pk: int,
+    card_count: int,
+    fields: Optional[List[str]] = None
 ) -> Tuple[List[models.Card], int, str]:
     """
     Sélectionne intelligemment les cartes pour un quiz.
+
+    ``fields`` limite les colonnes lues (voir ``crud_cards.card_load_options``).
+    La sélection préparée à la fin de la session précédente est utilisée si
+    elle est encore valable.
     
     Logique:
     1. Premier cycle : sélection aléatoire sans répétition
@@ -231,98 +449,81 @@ async def select_cards_for_quiz(
     Returns:
         (selected_cards, cycle_number, message)
     """
-    # Obtenir les cartes du deck
-    stmt_cards = select(models.Card).where(models.Card.deck_pk == deck_pk)
-    result_cards = await db.execute(stmt_cards)
-    all_cards = list(result_cards.scalars().all())
+    prefetched = quiz_prefetch_cache.pop((user_pk, deck_pk), card_count)
+    if prefetched is not None:
+        selected_pks, cycle_number, review_count = prefetched.card_pks, prefetched.cycle_number, prefetched.review_count
+    else:
+        selected_pks, cycle_number, review_count = await choose_quiz_cards(db, user_pk, deck_pk, card_count)
     
-    if not all_cards:
+    if not selected_pks:
         return ([], 1, "Ce deck ne contient aucune carte. Ajoutez des cartes pour lancer un quiz.")
     
-    total_cards = len(all_cards)
-    
-    # Vérifier que card_count est valide
-    if card_count > total_cards:
-        card_count = total_cards
-    
-    # Déterminer le cycle et les cartes déjà utilisées (pour le message seulement)
-    cycle_number, used_card_pks = await get_current_cycle_info(db, user_pk, deck_pk)
-    
-    # 1. Récupérer les performances de toutes les cartes (pour le score de priorité)
-    performances = await get_deck_performances(db, user_pk, deck_pk)
-    perf_dict = {p.card_pk: p for p in performances}
-    
-    # 2. Séparer les cartes en groupes de priorité
-    now = datetime.utcnow()
-    review_cards = [] # Cartes à revoir (next_review <= now)
-    learning_new_cards = [] # Cartes en cours ou nouvelles (next_review > now)
-    
-    for card in all_cards:
-        if card.next_review <= now:
-            review_cards.append(card)
-        else:
-            learning_new_cards.append(card)
+    # Seules les cartes retenues sont chargées, avec les colonnes affichées par le quiz
+    # (une carte supprimée depuis la préparation est simplement ignorée)
+    selected_cards = await load_quiz_cards(db, selected_pks, fields)
             
-    # 3. Sélectionner les cartes
-    selected_cards = []
-    
-    # Priorité 1: Toutes les cartes à revoir (Review)
-    # On prend toutes les cartes à revoir, puis on les mélange pour ne pas toujours avoir le même ordre
-    random.shuffle(review_cards)
-    
-    cards_needed = card_count
+    message = f"Quiz de {len(selected_cards)} cartes (Priorité: {review_count} à revoir)."
     
-    # Ajouter les cartes à revoir
-    if len(review_cards) > 0:
-        take_count = min(cards_needed, len(review_cards))
-        selected_cards.extend(review_cards[:take_count])
-        cards_needed -= take_count
-        
-    # Priorité 2: Cartes en cours ou nouvelles (Learning/New)
-    if cards_needed > 0 and len(learning_new_cards) > 0:
-        # Calculer les poids pour les cartes Learning/New
-        card_weights = []
-        for card in learning_new_cards:
-            perf = perf_dict.get(card.card_pk)
-            if perf:
-                # Poids = 1 + max(priority_score, 0)
-                # Les cartes difficiles ont un poids plus élevé
-                weight = 1.0 + max(perf.priority_score, 0)
-            else:
-                # Cartes jamais vues : poids par défaut
-                weight = 1.0
-            
-            card_weights.append((card, weight))
-            
-        # Sélection pondérée parmi les cartes Learning/New
-        cards_list = [cw[0] for cw in card_weights]
-        weights_list = [cw[1] for cw in card_weights]
-        
-        # Sélectionner le nombre de cartes restantes
-        selected_from_learning = random.choices(
-            cards_list,
-            weights=weights_list,
-            k=cards_needed
+    return (selected_cards, cycle_number, message)
+
+
+async def get_user_deck_pks(db: AsyncSession, user_pk: int) -> List[int]:
+    """Decks de l'utilisateur (« tous mes decks » d'une session mixte)"""
+    result = await db.execute(
+        select(models.UserDeck.deck_pk).where(models.UserDeck.user_pk == user_pk).order_by(models.UserDeck.deck_pk)
+    )
+    return list(result.scalars().all())
+
+
+async def select_mixed_cards(
+    db: AsyncSession,
+    user_pk: int,
+    deck_pks: List[int],
+    card_count: int
+) -> List[StreamEntry]:
+    """
+    Cartes d'une session mixte : fusion des files de révision des decks.
+
+    Chaque deck ne fournit que la tête de sa file (au plus ``card_count``
+    cartes, rangées par la base avec ROW_NUMBER) ; les flux sont ensuite
+    fusionnés par un tas (voir ``core.mixed_review``).
+    """
+    if not deck_pks:
+        return []
+    schedule = models.UserCardSchedule
+    perf = models.CardPerformance
+    due = func.coalesce(schedule.next_review, models.Card.next_review)
+    priority = func.coalesce(perf.priority_score, 0)
+    # Même ordre que core.mixed_review.sort_key
+    rank = func.row_number().over(
+        partition_by=models.Card.deck_pk,
+        order_by=(due, priority.desc(), models.Card.card_pk),
+    )
+    heads = (
+        select(
+            models.Card.deck_pk.label("deck_pk"),
+            models.Card.card_pk.label("card_pk"),
+            due.label("due"),
+            priority.label("priority_score"),
+            rank.label("rank"),
         )
-        
-        # Ajouter les cartes sélectionnées (en évitant les doublons, bien que peu probable ici)
-        selected_cards.extend(selected_from_learning)
-        
-    # 4. Finalisation
-    # Mélanger la sélection finale pour ne pas avoir Review en premier
-    random.shuffle(selected_cards)
-    
-    # S'assurer qu'il n'y a pas de doublons (juste au cas où random.choices aurait des cartes en double)
-    selected_unique = []
-    seen_pks = set()
-    for card in selected_cards:
-        if card.card_pk not in seen_pks:
-            selected_unique.append(card)
-            seen_pks.add(card.card_pk)
-            
-    message = f"Quiz de {len(selected_unique)} cartes (Priorité: {len(review_cards)} à revoir)."
-    
-    return (selected_unique, cycle_number, message)
+        .outerjoin(schedule, and_(schedule.user_pk == user_pk, schedule.card_pk == models.Card.card_pk))
+        .outerjoin(
+            perf,
+            and_(perf.user_pk == user_pk, perf.deck_pk == models.Card.deck_pk, perf.card_pk == models.Card.card_pk),
+        )
+        .where(models.Card.deck_pk.in_(deck_pks))
+        .subquery()
+    )
+    result = await db.execute(
+        select(heads.c.deck_pk, heads.c.card_pk, heads.c.due, heads.c.priority_score)
+        .where(heads.c.rank <= card_count)
+        .order_by(heads.c.deck_pk, heads.c.rank)
+    )
+    streams: Dict[int, List[StreamEntry]] = {}
+    for row in result.all():
+        streams.setdefault(row.deck_pk, []).append(StreamEntry(*row))
+    return merge_streams(streams.values(), card_count)
 
 
 # ============================================================================
@@ -353,35 +554,95 @@ async def create_quiz_session(
     )
     
     db.add(session)
+    if selected_card_pks:
+        # Ensemble des cartes vues du cycle, maintenu de façon incrémentale
+        await db.execute(
+            dialect_insert(db, models.QuizCycleCard.__table__)
+            .values([
+                {"user_pk": user_pk, "deck_pk": deck_pk, "cycle_number": cycle_number, "card_pk": card_pk}
+                for card_pk in dict.fromkeys(selected_card_pks)
+            ])
+            .on_conflict_do_nothing()
+        )
     await db.commit()
     await db.refresh(session)
     return session
 
 
-async def complete_quiz_session(
+async def create_mixed_session(
     db: AsyncSession,
-    session_pk: int,
-    correct_count: int,
-    total_questions: int
+    user_pk: int,
+    entries: List[StreamEntry],
+    card_count: int,
+    quiz_type: str
+) -> models.QuizSession:
+    """
+    Crée une session mixte (``deck_pk`` NULL, hors cycles) et mémorise le
+    deck de chaque carte pour l'attribution des réponses.
+    """
+    session = models.QuizSession(
+        user_pk=user_pk,
+        deck_pk=None,
+        card_count=card_count,
+        quiz_type=quiz_type,
+        cycle_number=0,
+        used_card_pks=json.dumps([entry.card_pk for entry in entries]),
+        correct_count=0,
+        total_questions=0,
+        started_at=datetime.utcnow(),
+        completed_at=None
+    )
+    db.add(session)
+    await db.flush()
+    if entries:
+        await db.execute(
+            models.QuizSessionCard.__table__.insert(),
+            [
+                {"session_pk": session.session_pk, "card_pk": entry.card_pk, "deck_pk": entry.deck_pk, "position": position}
+                for position, entry in enumerate(entries)
+            ],
+        )
+    await db.commit()
+    await db.refresh(session)
+    return session
+
+
+async def get_session_card_decks(db: AsyncSession, session_pk: int) -> Dict[int, int]:
+    """``{card_pk: deck_pk}`` d'une session mixte"""
+    result = await db.execute(
+        select(models.QuizSessionCard.card_pk, models.QuizSessionCard.deck_pk)
+        .where(models.QuizSessionCard.session_pk == session_pk)
+    )
+    return dict(result.all())
+
+
+async def get_user_quiz_session(
+    db: AsyncSession,
+    user_pk: int,
+    session_pk: int
 ) -> Optional[models.QuizSession]:
-    """Marque une session de quiz comme terminée ET met à jour le UserDeck"""
-    stmt = select(models.QuizSession).where(models.QuizSession.session_pk == session_pk)
+    """Session de quiz de l'utilisateur, None si elle n'existe pas ou appartient à un autre"""
+    stmt = select(models.QuizSession).where(
+        and_(
+            models.QuizSession.session_pk == session_pk,
+            models.QuizSession.user_pk == user_pk
+        )
+    )
     result = await db.execute(stmt)
-    session = result.scalar_one_or_none()
-    
-    if not session:
-        return None
-    
-    # Mettre à jour la session
-    session.correct_count = correct_count
-    session.total_questions = total_questions
-    session.completed_at = datetime.utcnow()
-    
-    # ⭐ IMPORTANT : Mettre à jour le UserDeck pour le dashboard
-    # Récupérer ou créer le UserDeck
+    return result.scalar_one_or_none()
+
+
+async def _add_session_results(
+    db: AsyncSession,
+    user_pk: int,
+    deck_pk: int,
+    total_questions: int,
+    correct_count: int
+) -> models.UserDeck:
+    """Reporte les résultats d'une session sur le UserDeck (créé au besoin)"""
     stmt_user_deck = select(models.UserDeck).where(
-        models.UserDeck.user_pk == session.user_pk,
-        models.UserDeck.deck_pk == session.deck_pk
+        models.UserDeck.user_pk == user_pk,
+        models.UserDeck.deck_pk == deck_pk
     )
     result_user_deck = await db.execute(stmt_user_deck)
     user_deck = result_user_deck.scalar_one_or_none()
@@ -389,13 +650,15 @@ async def complete_quiz_session(
     if not user_deck:
         # Créer le UserDeck s'il n'existe pas
         user_deck = models.UserDeck(
-            user_pk=session.user_pk,
-            deck_pk=session.deck_pk,
+            user_pk=user_pk,
+            deck_pk=deck_pk,
             correct_count=0,
             attempt_count=0,
             cards_mastered=0
         )
         db.add(user_deck)
+        await db.flush()
+        await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=deck_pk)
     
     # Mettre à jour les compteurs (doublons historiques maintenus pour compatibilité)
     user_deck.attempt_count += total_questions
@@ -405,10 +668,48 @@ async def complete_quiz_session(
     user_deck.total_attempts += total_questions
     user_deck.successful_attempts += correct_count
     user_deck.last_studied = datetime.utcnow()
+    return user_deck
+
+
+async def complete_quiz_session(
+    db: AsyncSession,
+    session_pk: int,
+    correct_count: int,
+    total_questions: int
+) -> Optional[models.QuizSession]:
+    """Marque une session de quiz comme terminée ET met à jour le UserDeck"""
+    stmt = select(models.QuizSession).where(models.QuizSession.session_pk == session_pk)
+    result = await db.execute(stmt)
+    session = result.scalar_one_or_none()
+    
+    if not session:
+        return None
+    
+    # Mettre à jour la session
+    session.correct_count = correct_count
+    session.total_questions = total_questions
+    session.completed_at = datetime.utcnow()
+    
+    # ⭐ IMPORTANT : Mettre à jour le UserDeck pour le dashboard
+    if session.deck_pk is not None:
+        await _add_session_results(db, session.user_pk, session.deck_pk, total_questions, correct_count)
+    else:
+        # Session mixte : résultats répartis par deck selon les réponses reçues
+        per_deck = await db.execute(
+            select(
+                models.QuizSessionCard.deck_pk,
+                func.sum(models.QuizSessionCard.answered),
+                func.sum(models.QuizSessionCard.correct),
+            )
+            .where(models.QuizSessionCard.session_pk == session_pk)
+            .group_by(models.QuizSessionCard.deck_pk)
+        )
+        for deck_pk, answered, correct in per_deck.all():
+            if answered:
+                await _add_session_results(db, session.user_pk, deck_pk, answered, correct or 0)
     
     await db.commit()
     await db.refresh(session)
-    await db.refresh(user_deck)
     
     return session
 
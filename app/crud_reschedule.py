@@ -0,0 +1,180 @@
+"""Recalcul en masse des états de planification (``user_card_schedules``).
+
+Pour un deck ou toute la table, relit les états par tranches (parcours par
+clé ``user_pk, card_pk``), les corrige en NumPy et n'écrit que les lignes
+modifiées, en un ``UPDATE … FROM (VALUES …)`` par tranche ; la file de
+révision (``user_due_cards``) suit avec la même instruction et est aussi
+resynchronisée là où elle s'écarte de l'état.
+
+Corrections appliquées :
+- ``easiness`` absent ou sous 1,3 → borné à 1,3 (2,5 si NaN) ;
+- ``interval``, ``consecutive_correct`` et ``box`` négatifs → 0 ;
+- ``next_review`` = dernière révision + ``interval`` jours (10 minutes si 0),
+  la règle de ``anki_review`` ; une ligne sans dernière révision garde sa date.
+
+Lancé par ``scripts/reschedule_cards.py`` ; une transaction par tranche.
+"""
+
+from datetime import timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import DateTime, and_, Float, Integer, bindparam, column, select, tuple_, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .core.anki_batch import due_dates, to_datetimes
+from .core.quiz_selection import naive_utc
+
+Schedule = models.UserCardSchedule
+Queue = models.UserDueCard
+
+RESCHEDULE_CHUNK_SIZE = 1000
+# 7 paramètres par ligne du VALUES : rester sous la limite de 32 767 d'asyncpg
+MAX_RESCHEDULE_CHUNK_SIZE = 4000
+
+_STATE_COLUMNS = ("easiness", "interval", "consecutive_correct", "box", "next_review")
+
+
+def repair_states(rows) -> dict:
+    """États corrigés d'une tranche ``(user_pk, card_pk, easiness, interval,
+    consecutive_correct, box, next_review, last_reviewed_at, due_at)`` ;
+    renvoie les tableaux corrigés et le masque des lignes à écrire (état
+    modifié, ou file de révision désynchronisée)."""
+    easiness = np.array([row.easiness for row in rows], dtype=np.float64)
+    interval = np.array([row.interval for row in rows], dtype=np.int64)
+    consecutive = np.array([row.consecutive_correct for row in rows], dtype=np.int64)
+    box = np.array([row.box for row in rows], dtype=np.int64)
+    next_review = np.array([naive_utc(row.next_review) for row in rows], dtype="datetime64[us]")
+    reviewed = np.array([row.last_reviewed_at is not None for row in rows], dtype=bool)
+    last_reviewed_at = np.array(
+        [naive_utc(row.last_reviewed_at) if row.last_reviewed_at is not None else None for row in rows],
+        dtype="datetime64[us]",
+    )
+
+    fixed = {
+        "easiness": np.where(np.isnan(easiness), 2.5, np.maximum(1.3, easiness)),
+        "interval": np.maximum(0, interval),
+        "consecutive_correct": np.maximum(0, consecutive),
+        "box": np.maximum(0, box),
+    }
+    fixed["next_review"] = np.where(reviewed, due_dates(last_reviewed_at, fixed["interval"]), next_review)
+    queued = np.array([row.due_at is not None for row in rows], dtype=bool)
+    due_at = np.array([naive_utc(row.due_at) if row.due_at is not None else None for row in rows], dtype="datetime64[us]")
+    fixed["changed"] = (
+        (queued & (due_at != fixed["next_review"]))
+        | (fixed["easiness"] != easiness)
+        | (fixed["interval"] != interval)
+        | (fixed["consecutive_correct"] != consecutive)
+        | (fixed["box"] != box)
+        | (fixed["next_review"] != next_review)
+    )
+    return fixed
+
+
+_SOURCE_COLUMNS = (
+    column("user_pk", Integer),
+    column("card_pk", Integer),
+    column("easiness", Float),
+    column("interval", Integer),
+    column("consecutive_correct", Integer),
+    column("box", Integer),
+    column("next_review", DateTime(timezone=True)),
+)
+
+
+async def _bulk_update(db: AsyncSession, data: list[tuple]) -> None:
+    """États et file de révision, une instruction par table.
+
+    PostgreSQL : ``UPDATE … FROM (VALUES …)`` ; SQLite n'accepte pas de noms
+    de colonnes sur un ``VALUES`` : même UPDATE exécuté pour chaque ligne.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        source = values(*_SOURCE_COLUMNS, name="fixed").data(data)
+        keys = (source.c.user_pk, source.c.card_pk)
+        updates = {name: source.c[name] for name in _STATE_COLUMNS}
+        params = None
+    else:
+        keys = (bindparam("key_user_pk"), bindparam("key_card_pk"))
+        updates = {name: bindparam(f"new_{name}") for name in _STATE_COLUMNS}
+        params = [
+            {"key_user_pk": row[0], "key_card_pk": row[1], **dict(zip((f"new_{name}" for name in _STATE_COLUMNS), row[2:]))}
+            for row in data
+        ]
+    await db.execute(
+        update(Schedule.__table__)
+        .where(Schedule.user_pk == keys[0], Schedule.card_pk == keys[1])
+        .values(updates),
+        params,
+    )
+    await db.execute(
+        update(Queue.__table__)
+        .where(Queue.user_pk == keys[0], Queue.card_pk == keys[1])
+        .values(due_at=updates["next_review"]),
+        params,
+    )
+
+
+async def _write(db: AsyncSession, rows, fixed: dict) -> int:
+    changed = np.flatnonzero(fixed["changed"])
+    if not changed.size:
+        return 0
+    due = to_datetimes(fixed["next_review"][changed])
+    data = [
+        (
+            rows[index].user_pk,
+            rows[index].card_pk,
+            float(fixed["easiness"][index]),
+            int(fixed["interval"][index]),
+            int(fixed["consecutive_correct"][index]),
+            int(fixed["box"][index]),
+            due_at.replace(tzinfo=timezone.utc),
+        )
+        for index, due_at in zip(changed.tolist(), due)
+    ]
+    await _bulk_update(db, data)
+    return len(data)
+
+
+async def reschedule(
+    db: AsyncSession,
+    deck_pk: Optional[int] = None,
+    chunk_size: int = RESCHEDULE_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> dict:
+    """Corrige les états d'un deck (``deck_pk``) ou de toute la table ; ``dry_run`` n'écrit rien."""
+    chunk_size = max(1, min(chunk_size, MAX_RESCHEDULE_CHUNK_SIZE))
+    stmt = select(
+        Schedule.user_pk,
+        Schedule.card_pk,
+        Schedule.easiness,
+        Schedule.interval,
+        Schedule.consecutive_correct,
+        Schedule.box,
+        Schedule.next_review,
+        Schedule.last_reviewed_at,
+        Queue.due_at,
+    ).outerjoin(
+        Queue, and_(Queue.user_pk == Schedule.user_pk, Queue.card_pk == Schedule.card_pk)
+    ).order_by(Schedule.user_pk, Schedule.card_pk).limit(chunk_size)
+    if deck_pk is not None:
+        stmt = stmt.where(
+            Schedule.card_pk.in_(select(models.deck_cards.c.card_pk).where(models.deck_cards.c.deck_pk == deck_pk))
+        )
+
+    scanned = updated = 0
+    last_key = None
+    while True:
+        page = stmt if last_key is None else stmt.where(tuple_(Schedule.user_pk, Schedule.card_pk) > tuple_(*last_key))
+        rows = (await db.execute(page)).all()
+        if not rows:
+            break
+        last_key = (rows[-1].user_pk, rows[-1].card_pk)
+        scanned += len(rows)
+        fixed = repair_states(rows)
+        if dry_run:
+            updated += int(fixed["changed"].sum())
+            continue
+        updated += await _write(db, rows, fixed)
+        await db.commit()
+    return {"scanned": scanned, "updated": updated, "dry_run": dry_run}
@@ -0,0 +1,143 @@
+"""Ingestion des révisions faites hors ligne (``POST /api/users/reviews/sync``).
+
+Un lot = plusieurs centaines de révisions envoyées en une requête. Chaque
+révision porte un UUID client : elle est journalisée dans ``user_scores``
+(contrainte unique ``user_pk, client_event_id``) par un INSERT … ON CONFLICT
+DO NOTHING, et seules les lignes réellement insérées sont rejouées. Renvoyer
+un lot après une coupure réseau est donc sans effet.
+
+Les nouvelles révisions passent par le planificateur de leur deck
+(``crud_schedules.review_cards``) dans l'ordre de leur heure client, le tout
+dans une seule transaction.
+"""
+
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_due_queue, crud_quiz, crud_schedules, crud_score_aggregation, crud_users, models, schemas
+from .core.review_sync import in_review_order, unique_events, utc
+from .core.schedulers import answer_grade
+from .database import dialect_insert
+
+Score = models.UserScore
+
+# Lignes par INSERT (limite de paramètres liés de SQLite et asyncpg)
+INSERT_CHUNK_SIZE = 1000
+
+
+async def _known(db: AsyncSession, column, values: set) -> set:
+    if not values:
+        return set()
+    return set((await db.execute(select(column).where(column.in_(values)))).scalars().all())
+
+
+async def _insert_new_events(db: AsyncSession, user_pk: int, events: List[schemas.ReviewSyncEvent], now: datetime) -> set:
+    """Journalise les révisions ; renvoie les ``client_event_id`` qui n'étaient pas déjà en base."""
+    inserted = set()
+    for start in range(0, len(events), INSERT_CHUNK_SIZE):
+        rows = [
+            {
+                "user_pk": user_pk,
+                "deck_pk": event.deck_pk,
+                "card_pk": event.card_pk,
+                "score": event.score,
+                "is_correct": event.is_correct,
+                "time_spent": event.time_spent,
+                "quiz_type": event.quiz_type,
+                # Historique daté de la révision (jamais dans le futur) ; created_at est naïf en UTC
+                "created_at": min(utc(event.reviewed_at), now).replace(tzinfo=None),
+                "client_event_id": str(event.event_id),
+                "aggregated": False,
+            }
+            for event in events[start:start + INSERT_CHUNK_SIZE]
+        ]
+        stmt = (
+            dialect_insert(db, Score.__table__)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["user_pk", "client_event_id"])
+            .returning(Score.client_event_id)
+        )
+        inserted.update((await db.execute(stmt)).scalars().all())
+    return inserted
+
+
+async def _refresh_user_decks(db: AsyncSession, user_pk: int, deck_pks: set) -> None:
+    """Comme ``crud_users.create_score`` : UserDeck créé au besoin, compteurs de cartes recalculés."""
+    if not deck_pks:
+        return
+    result = await db.execute(
+        select(models.UserDeck).where(models.UserDeck.user_pk == user_pk, models.UserDeck.deck_pk.in_(deck_pks))
+    )
+    user_decks = {user_deck.deck_pk: user_deck for user_deck in result.scalars().all()}
+    for deck_pk in sorted(deck_pks):
+        user_deck = user_decks.get(deck_pk)
+        if user_deck is None:
+            user_deck = models.UserDeck(user_pk=user_pk, deck_pk=deck_pk)
+            db.add(user_deck)
+            await db.flush()
+            await db.refresh(user_deck)
+            await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=deck_pk)
+        await crud_users.update_user_deck_anki_stats(db, user_deck)
+
+
+async def sync_reviews(db: AsyncSession, user_pk: int, events: List[schemas.ReviewSyncEvent]) -> dict:
+    """Applique un lot de révisions hors ligne et renvoie l'état final des cartes concernées.
+
+    Les révisions déjà reçues (même ``event_id``) sont comptées dans
+    ``duplicates`` ; celles qui visent une carte ou un deck inexistant sont
+    listées dans ``rejected``. Commit unique à la fin.
+    """
+    now = datetime.now(timezone.utc)
+    batch = unique_events(events)
+    duplicates = len(events) - len(batch)
+
+    known_cards = await _known(db, models.Card.card_pk, {event.card_pk for event in batch})
+    known_decks = await _known(db, models.Deck.deck_pk, {event.deck_pk for event in batch if event.deck_pk is not None})
+    valid, rejected = [], []
+    for event in batch:
+        if event.card_pk in known_cards and (event.deck_pk is None or event.deck_pk in known_decks):
+            valid.append(event)
+        else:
+            rejected.append(event.event_id)
+
+    inserted = await _insert_new_events(db, user_pk, valid, now) if valid else set()
+    new_events = [event for event in valid if str(event.event_id) in inserted]
+    duplicates += len(valid) - len(new_events)
+
+    if new_events:
+        await crud_schedules.review_cards(
+            db,
+            user_pk,
+            [
+                crud_schedules.Review(event.card_pk, answer_grade(event.score), event.deck_pk, utc(event.reviewed_at))
+                for event in in_review_order(new_events)
+            ],
+            now=now,
+        )
+        await _refresh_user_decks(db, user_pk, {event.deck_pk for event in new_events if event.deck_pk is not None})
+        # Les sélections de quiz préparées ignorent ces révisions
+        crud_quiz.quiz_prefetch_cache.invalidate(user_pk)
+
+    # État de référence de toutes les cartes du lot, doublons compris (un renvoi récupère le même résultat)
+    card_pks = sorted({event.card_pk for event in valid})
+    final = await crud_schedules.get_schedules(db, user_pk, card_pks)
+    await db.commit()
+    if new_events:
+        await crud_score_aggregation.fold_if_backlogged(db)
+    cards = []
+    for card_pk in card_pks:
+        state = final.get(card_pk, crud_schedules.NEW_CARD)
+        cards.append({
+            "card_pk": card_pk,
+            "easiness": state.easiness,
+            "interval": state.interval,
+            "consecutive_correct": state.consecutive_correct,
+            "box": state.box,
+            "next_review": state.next_review,
+            "last_reviewed_at": state.last_reviewed_at,
+            "stability": state.stability,
+        })
+    return {"applied": len(new_events), "duplicates": duplicates, "rejected": rejected, "cards": cards}
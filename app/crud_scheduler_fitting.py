@@ -0,0 +1,80 @@
+"""Calibrage du planificateur ``memory`` d'un deck sur son historique ``user_scores``.
+
+Le journal est relu par tranches (parcours par ``score_pk``, colonnes utiles
+seulement) puis confié à ``core.scheduler_fitting``. Avec ``apply``, les
+paramètres calibrés sont enregistrés sur le deck, qui passe au planificateur
+``memory`` ; les paramètres déjà choisis à la main (``target_retention``) sont
+conservés.
+
+Lancé par ``scripts/fit_scheduler_params.py``.
+"""
+
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .core.scheduler_fitting import fit, review_log
+
+Score = models.UserScore
+
+LOG_CHUNK_SIZE = 100_000
+# En dessous, la grille retient surtout le bruit
+MIN_FIT_REVIEWS = 200
+
+
+async def load_review_log(db: AsyncSession, deck_pk: Optional[int] = None, chunk_size: int = LOG_CHUNK_SIZE) -> dict:
+    """Journal des révisions de cartes (d'un deck ou de tous), prêt pour ``fit``."""
+    stmt = (
+        select(Score.score_pk, Score.user_pk, Score.card_pk, Score.created_at, Score.score, Score.is_correct)
+        .where(Score.card_pk.is_not(None))
+        .order_by(Score.score_pk)
+        .limit(chunk_size)
+    )
+    if deck_pk is not None:
+        stmt = stmt.where(Score.deck_pk == deck_pk)
+    columns = [[] for _ in range(5)]
+    last_pk = None
+    while True:
+        page = stmt if last_pk is None else stmt.where(Score.score_pk > last_pk)
+        rows = (await db.execute(page)).all()
+        if not rows:
+            break
+        last_pk = rows[-1][0]
+        for values, row_values in zip(columns, list(zip(*rows))[1:]):
+            values.extend(row_values)
+    user_pk, card_pk, created_at, score, is_correct = columns
+    return review_log(
+        user_pk,
+        card_pk,
+        # created_at est naïf en UTC
+        np.array(created_at, dtype="datetime64[us]"),
+        score,
+        [bool(value) for value in is_correct],
+    )
+
+
+async def fit_deck_scheduler(
+    db: AsyncSession,
+    deck_pk: Optional[int] = None,
+    apply: bool = False,
+    min_reviews: int = MIN_FIT_REVIEWS,
+) -> dict:
+    """Calibre les paramètres sur l'historique ; ``applied`` indique s'ils ont été enregistrés.
+
+    ``apply`` exige un ``deck_pk`` et au moins ``min_reviews`` révisions prédites.
+    """
+    log = await load_review_log(db, deck_pk)
+    result = fit(log)
+    result["applied"] = False
+    if apply and deck_pk is not None and result["reviews"] >= min_reviews:
+        deck = await db.get(models.Deck, deck_pk)
+        if deck is not None:
+            current = deck.scheduler_params if deck.scheduler == "memory" else None
+            deck.scheduler = "memory"
+            deck.scheduler_params = {**(current or {}), **result["params"]}
+            await db.commit()
+            result["applied"] = True
+    return result
@@ -0,0 +1,239 @@
+"""État de planification Anki par (utilisateur, carte) (table ``user_card_schedules``).
+
+Toutes les révisions passent par ``review_cards`` : le planificateur du deck
+(``core.schedulers``) s'applique à l'état propre de l'utilisateur et le
+résultat est écrit dans sa ligne, jamais dans ``cards``. Une carte sans
+ligne pour l'utilisateur (jamais révisée) part de ``NEW_CARD`` ; seule sa
+première échéance vient de ``cards.next_review`` (file de révision et
+sélection du quiz).
+
+Aucune fonction ne commit : l'appelant garde la maîtrise de la transaction.
+"""
+
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud_due_queue, models
+from .core.anki import Grade
+from .core.anki_batch import to_datetimes
+from .core.review_sync import review_time
+from .core.schedulers import DEFAULT_SCHEDULER, review_batch
+from .database import dialect_insert
+
+Schedule = models.UserCardSchedule
+
+
+@dataclass(frozen=True)
+class ScheduleState:
+    """Vue en lecture seule de l'état d'une carte pour un utilisateur."""
+    easiness: float = 2.5
+    interval: int = 0
+    consecutive_correct: int = 0
+    box: int = 0
+    next_review: Optional[datetime] = None
+    last_reviewed_at: Optional[datetime] = None
+    stability: Optional[float] = None
+
+
+# État de départ d'une carte jamais révisée, quelles que soient les colonnes Anki de ``cards``
+NEW_CARD = ScheduleState()
+
+# (planificateur, paramètres enregistrés du deck)
+SchedulerConfig = Tuple[str, Optional[dict]]
+DEFAULT_CONFIG: SchedulerConfig = (DEFAULT_SCHEDULER, None)
+
+
+@dataclass(frozen=True)
+class Review:
+    """Une révision à appliquer : carte, note, deck (choisit le planificateur) et heure (aware)."""
+    card_pk: int
+    grade: Grade
+    deck_pk: Optional[int] = None
+    reviewed_at: Optional[datetime] = None
+
+
+def _naive(value: Optional[datetime]) -> Optional[datetime]:
+    """Date naïve en UTC (``datetime64`` ne connaît pas les fuseaux)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def next_box(box: int, grade: Grade) -> int:
+    """Boîte de Leitner simplifiée : +1 si réussie, retour à 0 si oubliée."""
+    if grade >= 2:
+        return box + 1
+    if grade == 0:
+        return 0
+    return box
+
+
+async def get_schedules(
+    db: AsyncSession,
+    user_pk: int,
+    card_pks: Iterable[int],
+) -> dict[int, ScheduleState]:
+    """États existants de l'utilisateur pour ces cartes ; les cartes absentes sont nouvelles."""
+    card_pks = list(card_pks)
+    if not card_pks:
+        return {}
+    result = await db.execute(
+        select(Schedule).where(Schedule.user_pk == user_pk, Schedule.card_pk.in_(card_pks))
+    )
+    return {
+        row.card_pk: ScheduleState(
+            easiness=row.easiness,
+            interval=row.interval,
+            consecutive_correct=row.consecutive_correct,
+            box=row.box,
+            next_review=row.next_review,
+            last_reviewed_at=row.last_reviewed_at,
+            stability=row.stability,
+        )
+        for row in result.scalars().all()
+    }
+
+
+def apply_reviews(
+    current: dict[int, ScheduleState],
+    reviews: Sequence[Review],
+    configs: Optional[dict[int, SchedulerConfig]] = None,
+    now: Optional[datetime] = None,
+    rng=random,
+) -> dict[int, ScheduleState]:
+    """Nouveaux états des cartes révisées, sans accès à la base.
+
+    ``current`` : états de départ (carte absente = nouvelle) ; ``configs`` :
+    planificateur de chaque deck (deck absent ou ``deck_pk`` None = SM-2).
+    Les révisions d'une même carte s'appliquent dans l'ordre de ``reviews`` :
+    la k-ième révision de chaque carte est traitée au tour k, en un appel
+    vectorisé par planificateur. Chaque heure de révision est bornée par
+    ``now`` et par la révision précédente de la carte (``review_time``).
+    """
+    now = now or datetime.now(timezone.utc)
+    configs = configs or {}
+    by_card: dict[int, list[Review]] = defaultdict(list)
+    for review in reviews:
+        by_card[review.card_pk].append(review)
+    states = {card_pk: current.get(card_pk, NEW_CARD) for card_pk in by_card}
+
+    for round_index in range(max((len(card_reviews) for card_reviews in by_card.values()), default=0)):
+        groups: dict[tuple, list[Review]] = defaultdict(list)
+        for card_reviews in by_card.values():
+            if round_index < len(card_reviews):
+                review = card_reviews[round_index]
+                name, params = configs.get(review.deck_pk, DEFAULT_CONFIG)
+                groups[(name, tuple(sorted((params or {}).items())))].append(review)
+        for (name, params), batch in groups.items():
+            before = [states[review.card_pk] for review in batch]
+            reviewed_at = [
+                review_time(review.reviewed_at or now, state.last_reviewed_at, now)
+                for review, state in zip(batch, before)
+            ]
+            result = review_batch(
+                name,
+                dict(params),
+                {
+                    "easiness": [state.easiness for state in before],
+                    "interval": [state.interval for state in before],
+                    "consecutive_correct": [state.consecutive_correct for state in before],
+                    "stability": np.array([state.stability for state in before], dtype=np.float64),
+                    "last_reviewed_at": np.array([_naive(state.last_reviewed_at) for state in before], dtype="datetime64[us]"),
+                },
+                [review.grade for review in batch],
+                now=np.array([_naive(value) for value in reviewed_at], dtype="datetime64[us]"),
+                rng=rng,
+            )
+            next_reviews = to_datetimes(result["next_review"])
+            for index, (review, state) in enumerate(zip(batch, before)):
+                stability = float(result["stability"][index])
+                states[review.card_pk] = ScheduleState(
+                    easiness=float(result["easiness"][index]),
+                    interval=int(result["interval"][index]),
+                    consecutive_correct=int(result["consecutive_correct"][index]),
+                    box=next_box(state.box, review.grade),
+                    # Les planificateurs calculent en dates naïves UTC
+                    next_review=next_reviews[index].replace(tzinfo=timezone.utc),
+                    last_reviewed_at=reviewed_at[index],
+                    stability=None if math.isnan(stability) else stability,
+                )
+    return states
+
+
+def apply_review(
+    current: ScheduleState,
+    grade: Grade,
+    reviewed_at: Optional[datetime] = None,
+    config: SchedulerConfig = DEFAULT_CONFIG,
+) -> ScheduleState:
+    """Nouvel état après une révision notée ``grade`` faite à ``reviewed_at`` (aware, défaut : maintenant)."""
+    reviewed_at = reviewed_at or datetime.now(timezone.utc)
+    return apply_reviews({0: current}, [Review(0, grade, reviewed_at=reviewed_at)], {None: config}, now=reviewed_at)[0]
+
+
+async def get_deck_schedulers(db: AsyncSession, deck_pks: Iterable[Optional[int]]) -> dict[int, SchedulerConfig]:
+    """Planificateur et paramètres enregistrés de chaque deck, en une requête."""
+    deck_pks = {deck_pk for deck_pk in deck_pks if deck_pk is not None}
+    if not deck_pks:
+        return {}
+    result = await db.execute(
+        select(models.Deck.deck_pk, models.Deck.scheduler, models.Deck.scheduler_params)
+        .where(models.Deck.deck_pk.in_(deck_pks))
+    )
+    return {deck_pk: (scheduler or DEFAULT_SCHEDULER, params) for deck_pk, scheduler, params in result.all()}
+
+
+async def save_schedules(db: AsyncSession, user_pk: int, states: dict[int, ScheduleState]) -> None:
+    """Enregistre les états ``{card_pk: état}`` en un seul upsert et met à jour la file de l'utilisateur."""
+    if not states:
+        return
+    columns = ("easiness", "interval", "consecutive_correct", "box", "next_review", "last_reviewed_at", "stability")
+    stmt = dialect_insert(db, Schedule.__table__).values([
+        {"user_pk": user_pk, "card_pk": card_pk, **{name: getattr(state, name) for name in columns}}
+        for card_pk, state in states.items()
+    ])
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_pk", "card_pk"],
+            set_={name: stmt.excluded[name] for name in columns},
+        )
+    )
+    await crud_due_queue.set_due_many(
+        db, user_pk, {card_pk: state.next_review for card_pk, state in states.items()}
+    )
+
+
+async def review_cards(
+    db: AsyncSession,
+    user_pk: int,
+    reviews: Sequence[Review],
+    now: Optional[datetime] = None,
+) -> dict[int, ScheduleState]:
+    """Point d'entrée de toutes les révisions : une lecture des états, une des decks, un upsert."""
+    if not reviews:
+        return {}
+    current = await get_schedules(db, user_pk, {review.card_pk for review in reviews})
+    configs = await get_deck_schedulers(db, {review.deck_pk for review in reviews})
+    states = apply_reviews(current, reviews, configs, now=now)
+    await save_schedules(db, user_pk, states)
+    return states
+
+
+async def record_review(
+    db: AsyncSession,
+    user_pk: int,
+    card_pk: int,
+    grade: Grade,
+    deck_pk: Optional[int] = None,
+) -> ScheduleState:
+    """Une révision, avec le planificateur du deck ``deck_pk`` (SM-2 sans deck)."""
+    states = await review_cards(db, user_pk, [Review(card_pk, grade, deck_pk=deck_pk)])
+    return states[card_pk]
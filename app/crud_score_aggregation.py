@@ -0,0 +1,286 @@
+"""Agrégation différée des scores (``user_scores.aggregated``).
+
+``create_score`` n'écrit plus les compteurs partagés (notamment la ligne
+``decks`` commune à tous les élèves d'un deck) : le worker lancé au démarrage
+(ou ``scripts/run_score_aggregation.py``) reporte les scores en attente par
+lots, en une instruction par table. Sans worker, les écritures de scores
+reportent elles-mêmes un lot dès ``SCORE_AGGREGATION_THRESHOLD`` scores en
+attente (``fold_if_backlogged``). Les lectures ajoutent les scores encore
+en attente pour rester exactes (``merge_*``) ; ces ajouts ne sont jamais
+écrits par la session (``set_committed_value``).
+"""
+
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, bindparam, case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+
+from . import models
+from .core.score_aggregation import (
+    DECK_COUNTERS,
+    QUIZ_TYPE_COUNTERS,
+    USER_COUNTERS,
+    USER_DECK_COUNTERS,
+    ScoreEvent,
+    fold_events,
+)
+from .database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+SCORE_AGGREGATION_BATCH_SIZE = int(os.getenv("SCORE_AGGREGATION_BATCH_SIZE", "500"))
+SCORE_AGGREGATION_POLL_SECONDS = float(os.getenv("SCORE_AGGREGATION_POLL_SECONDS", "5"))
+# Nombre de scores en attente qui déclenche un report par l'écriture elle-même (0 : désactivé)
+SCORE_AGGREGATION_THRESHOLD = int(os.getenv("SCORE_AGGREGATION_THRESHOLD", "200"))
+
+Score = models.UserScore
+
+_EVENT_COLUMNS = (Score.user_pk, Score.deck_pk, Score.card_pk, Score.score, Score.is_correct, Score.quiz_type)
+
+
+def _events(rows) -> list[ScoreEvent]:
+    return [ScoreEvent(*row) for row in rows]
+
+
+async def _apply(db: AsyncSession, table, keys: tuple, counters: tuple, deltas: dict) -> None:
+    """Un UPDATE exécuté une fois par ligne cible (executemany) : ``colonne += delta``."""
+    if not deltas:
+        return
+    stmt = (
+        update(table)
+        .where(*(table.c[column] == bindparam(f"key_{column}") for column in keys))
+        .values({
+            name: func.coalesce(table.c[name], 0) + bindparam(f"delta_{name}")
+            for name in counters
+        })
+    )
+    params = []
+    for key, counter in deltas.items():
+        key = key if isinstance(key, tuple) else (key,)
+        params.append({
+            **{f"key_{column}": value for column, value in zip(keys, key)},
+            **{f"delta_{name}": counter[name] for name in counters},
+        })
+    await db.execute(stmt, params)
+
+
+async def run_aggregation_batch(db: AsyncSession, batch_size: int = SCORE_AGGREGATION_BATCH_SIZE) -> dict:
+    """Reporte un lot de scores en attente et retourne un compte rendu."""
+    rows = (await db.execute(
+        select(Score.score_pk, *_EVENT_COLUMNS)
+        .where(Score.aggregated.is_(False))
+        .order_by(Score.score_pk)
+        .limit(batch_size)
+        # Plusieurs workers se partagent les lignes sans s'attendre (PostgreSQL)
+        .with_for_update(skip_locked=True)
+    )).all()
+    report = {"folded": len(rows), "users": 0, "user_decks": 0, "decks": 0}
+    if not rows:
+        return report
+
+    deltas = fold_events(_events(row[1:] for row in rows))
+    await _apply(db, models.User.__table__, ("user_pk",), USER_COUNTERS, deltas.users)
+    await _apply(db, models.UserDeck.__table__, ("user_pk", "deck_pk"), USER_DECK_COUNTERS, deltas.user_decks)
+    await _apply(db, models.Deck.__table__, ("deck_pk",), DECK_COUNTERS, deltas.decks)
+    await db.execute(
+        update(Score)
+        .where(Score.score_pk.in_([row[0] for row in rows]))
+        .values(aggregated=True)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    report.update(users=len(deltas.users), user_decks=len(deltas.user_decks), decks=len(deltas.decks))
+    return report
+
+
+async def fold_if_backlogged(db: AsyncSession, threshold: int = SCORE_AGGREGATION_THRESHOLD) -> Optional[dict]:
+    """Reporte un lot dès que ``threshold`` scores attendent ; appelé après chaque écriture de scores.
+
+    Sans worker permanent (``SCORE_AGGREGATION_WORKER=0``, serverless), le
+    journal ne dépasse donc pas un lot environ. Le comptage s'arrête à
+    ``threshold`` entrées de l'index partiel ; un échec du report est
+    journalisé sans faire échouer l'écriture, déjà validée.
+    """
+    if threshold <= 0:
+        return None
+    pending = (await db.execute(
+        select(func.count()).select_from(
+            select(Score.user_pk).where(Score.aggregated.is_(False)).limit(threshold).subquery()
+        )
+    )).scalar_one()
+    if pending < threshold:
+        return None
+    try:
+        return await run_aggregation_batch(db, batch_size=max(threshold, SCORE_AGGREGATION_BATCH_SIZE))
+    except Exception as exc:
+        await db.rollback()
+        logger.exception(f"Erreur du report des scores en attente : {exc}")
+        return None
+
+
+# Incréments de ``fold_events`` calculés par la base (SUM … GROUP BY), mêmes règles
+_CORRECT = case((Score.is_correct, 1), else_=0)
+_DECK_SCORE = and_(Score.deck_pk.is_not(None), Score.card_pk.is_not(None))
+_PENDING_SUMS = {
+    "users": (None, {
+        "total_score": func.sum(Score.score),
+        "total_cards_learned": func.sum(_CORRECT),
+        "total_cards_reviewed": func.count(),
+    }),
+    "user_decks": (_DECK_SCORE, {
+        "total_attempts": func.count(),
+        "total_points": func.sum(Score.score),
+        "successful_attempts": func.sum(_CORRECT),
+        **{
+            name: func.sum(case((Score.quiz_type == quiz_type, Score.score), else_=0))
+            for quiz_type, name in QUIZ_TYPE_COUNTERS.items()
+        },
+    }),
+    "decks": (_DECK_SCORE, {
+        "total_attempts": func.count(),
+        "total_correct": func.sum(_CORRECT),
+    }),
+}
+
+
+async def _exact_counters(db: AsyncSession, model, keys: tuple, counters: tuple, pending_where, where, part: str) -> dict:
+    """Compteurs reportés + scores en attente, lus dans la même instruction.
+
+    Les scores en attente (filtrés par ``pending_where``, servi par les index
+    partiels ``ix_user_scores_pending*``) sont additionnés par la base puis
+    joints aux lignes agrégées : une seule requête, le worker ne peut pas
+    reporter un lot entre les deux lectures, la somme est donc exacte.
+    """
+    deck_filter, sums = _PENDING_SUMS[part]
+    pending = (
+        select(*(getattr(Score, column) for column in keys), *(sums[name].label(name) for name in counters))
+        .where(Score.aggregated.is_(False), pending_where)
+        .group_by(*(getattr(Score, column) for column in keys))
+    )
+    if deck_filter is not None:
+        pending = pending.where(deck_filter)
+    pending = pending.subquery()
+    rows = (await db.execute(
+        select(
+            *(getattr(model, column) for column in keys),
+            *(
+                func.coalesce(getattr(model, name), 0) + func.coalesce(pending.c[name], 0)
+                for name in counters
+            ),
+        )
+        .outerjoin(pending, and_(*(pending.c[column] == getattr(model, column) for column in keys)))
+        .where(where)
+    )).all()
+    totals = {}
+    for row in rows:
+        key = tuple(row[:len(keys)]) if len(keys) > 1 else row[0]
+        totals[key] = Counter(dict(zip(counters, row[len(keys):])))
+    return totals
+
+
+def _merge(obj, counters: tuple, totals: Optional[Counter]) -> None:
+    if totals is None:
+        return
+    for name in counters:
+        set_committed_value(obj, name, totals[name])
+
+
+async def merge_user(db: AsyncSession, user: models.User) -> models.User:
+    """Compteurs exacts de ``user`` (profil et statistiques)."""
+    totals = await _exact_counters(
+        db, models.User, ("user_pk",), USER_COUNTERS,
+        Score.user_pk == user.user_pk,
+        models.User.user_pk == user.user_pk,
+        "users",
+    )
+    _merge(user, USER_COUNTERS, totals.get(user.user_pk))
+    return user
+
+
+async def merge_user_decks(db: AsyncSession, user_pk: int, user_decks: Iterable[models.UserDeck]) -> None:
+    """Compteurs exacts des UserDeck persistés de l'utilisateur."""
+    user_decks = [user_deck for user_deck in user_decks if user_deck.user_deck_pk]
+    if not user_decks:
+        return
+    deck_pks = [user_deck.deck_pk for user_deck in user_decks]
+    totals = await _exact_counters(
+        db, models.UserDeck, ("user_pk", "deck_pk"), USER_DECK_COUNTERS,
+        and_(Score.user_pk == user_pk, Score.deck_pk.in_(deck_pks)),
+        and_(models.UserDeck.user_pk == user_pk, models.UserDeck.deck_pk.in_(deck_pks)),
+        "user_decks",
+    )
+    for user_deck in user_decks:
+        _merge(user_deck, USER_DECK_COUNTERS, totals.get((user_pk, user_deck.deck_pk)))
+
+
+def _deck_pk(deck) -> int:
+    return deck["deck_pk"] if isinstance(deck, dict) else deck.deck_pk
+
+
+async def merge_decks(db: AsyncSession, decks: Iterable) -> None:
+    """Compteurs globaux exacts des decks (objets ORM ou dictionnaires du catalogue)."""
+    decks = list(decks)
+    if not decks:
+        return
+    deck_pks = [_deck_pk(deck) for deck in decks]
+    totals = await _exact_counters(
+        db, models.Deck, ("deck_pk",), DECK_COUNTERS,
+        # Sans filtre utilisateur : servi par ix_user_scores_pending_deck
+        Score.deck_pk.in_(deck_pks),
+        models.Deck.deck_pk.in_(deck_pks),
+        "decks",
+    )
+    for deck in decks:
+        deck_totals = totals.get(_deck_pk(deck))
+        if isinstance(deck, dict):
+            if deck_totals is not None:
+                deck.update({name: deck_totals[name] for name in DECK_COUNTERS})
+        else:
+            _merge(deck, DECK_COUNTERS, deck_totals)
+
+
+class ScoreAggregationWorker:
+    """Boucle de fond qui reporte les scores en attente toutes les ``poll_seconds``.
+
+    Pas de réveil à chaque score : les scores arrivés entre deux passages sont
+    reportés ensemble, en une instruction par table.
+    """
+
+    def __init__(self, poll_seconds: float = SCORE_AGGREGATION_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("📊 Worker d'agrégation des scores démarré")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            folded = 0
+            try:
+                async with SessionLocal() as db:
+                    report = await run_aggregation_batch(db)
+                folded = report["folded"]
+            except Exception as exc:
+                logger.exception(f"Erreur du worker d'agrégation des scores : {exc}")
+            # Lot plein : d'autres scores attendent, on enchaîne
+            if folded < SCORE_AGGREGATION_BATCH_SIZE:
+                await asyncio.sleep(self.poll_seconds)
+
+
+score_aggregation_worker = ScoreAggregationWorker()
@@ -1,9 +1,12 @@
-from sqlalchemy import select, func
+from sqlalchemy import case, select, func, tuple_
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy.ext.asyncio import AsyncSession
-from . import crud_access, models, schemas
+from . import crud_access, crud_due_queue, crud_quiz, crud_schedules, crud_score_aggregation, models, schemas
+from .core.schedulers import answer_grade
 from .security import hash_password, verify_password
 from datetime import datetime
+from typing import Iterable, Optional, Tuple
 
 
 # ============================================================================
@@ -218,15 +221,18 @@ async def create_or_update_google_user(
 # OPÉRATIONS SCORES
 # ============================================================================
 
-from .core.anki import anki_review
 
 async def create_score(
     db: AsyncSession,
     user_pk: int,
     score_data: schemas.UserScoreCreate
 ) -> models.UserScore:
-    """Crée un nouvel enregistrement de score et met à jour l'algorithme Anki."""
-    # 1. Créer le score
+    """Crée un nouvel enregistrement de score et met à jour l'algorithme Anki.
+
+    Les compteurs (``users``, ``user_decks``, ``decks``) ne sont pas modifiés ici :
+    le score est reporté plus tard par ``crud_score_aggregation``.
+    """
+    # 1. Créer le score (journal lu par le worker d'agrégation)
     db_score = models.UserScore(
         user_pk=user_pk,
         deck_pk=score_data.deck_pk,
@@ -238,56 +244,23 @@ async def create_score(
     )
     
     db.add(db_score)
-    
-    # 2. Mettre à jour les statistiques de l'utilisateur
-    user = await get_user_by_id(db, user_pk)
-    if user:
-        user.total_score += score_data.score
-        if score_data.is_correct:
-            user.total_cards_learned += 1
-        user.total_cards_reviewed += 1
-        db.add(user)
         
-    # 3. Algorithme Anki & Mise à jour de la carte
+    # 2. Algorithme Anki (état propre à l'utilisateur)
     if score_data.card_pk:
-        # Récupérer la carte
-        result = await db.execute(select(models.Card).where(models.Card.card_pk == score_data.card_pk))
-        card = result.scalar_one_or_none()
+        # Vérifier que la carte existe
+        result = await db.execute(select(models.Card.card_pk).where(models.Card.card_pk == score_data.card_pk))
+        card_pk = result.scalar_one_or_none()
         
-        if card:
+        if card_pk:
             # Calculer le grade Anki (0-3) basé sur le score (0-100)
-            if score_data.score < 50:
-                grade = 0  # Again
-            elif score_data.score < 75:
-                grade = 1  # Hard
-            elif score_data.score < 90:
-                grade = 2  # Good
-            else:
-                grade = 3  # Easy
+            grade = answer_grade(score_data.score)
             
-            # Appliquer l'algorithme
-            anki_stats = anki_review(
-                easiness=card.easiness,
-                interval=card.interval,
-                consecutive_correct=card.consecutive_correct,
-                grade=grade
-            )
-            
-            # Mettre à jour la carte
-            card.easiness = anki_stats["easiness"]
-            card.interval = anki_stats["interval"]
-            card.consecutive_correct = anki_stats["consecutive_correct"]
-            card.next_review = anki_stats["next_review"]
-            
-            # Mise à jour de la boîte (Leitner system simplifié)
-            if grade >= 2:
-                card.box += 1
-            elif grade == 0:
-                card.box = 0
-                
-            db.add(card)
+            # Appliquer l'algorithme à l'état de l'utilisateur (la carte partagée n'est pas modifiée)
+            await crud_schedules.record_review(db, user_pk, card_pk, grade, deck_pk=score_data.deck_pk)
+            # La sélection préparée pour le prochain quiz ne tient pas compte de cette réponse
+            crud_quiz.quiz_prefetch_cache.invalidate(user_pk, score_data.deck_pk)
             
-            # Mettre à jour les stats du UserDeck si possible
+            # Compteurs de cartes du UserDeck si possible
             if score_data.deck_pk:
                 ud_result = await db.execute(
                     select(models.UserDeck).where(
@@ -297,7 +270,8 @@ async def create_score(
                 )
                 user_deck = ud_result.scalar_one_or_none()
                 
-                # Si le UserDeck n'existe pas, le créer (cas du premier quiz)
+                # Si le UserDeck n'existe pas, le créer (cas du premier quiz) :
+                # le worker d'agrégation y reportera les points de ce score
                 if not user_deck:
                     user_deck = models.UserDeck(
                         user_pk=user_pk,
@@ -308,54 +282,40 @@ async def create_score(
                     await db.flush()
                     # Rafraîchir l'objet pour obtenir les valeurs par défaut de la DB
                     await db.refresh(user_deck)
-                
-                # Mise à jour des statistiques du UserDeck
-                user_deck.total_attempts += 1
-                user_deck.total_points += score_data.score
-                if score_data.is_correct:
-                    user_deck.successful_attempts += 1
-                
-                # Stats par type
-                if score_data.quiz_type == "frappe":
-                    user_deck.points_frappe += score_data.score
-                elif score_data.quiz_type == "association":
-                    user_deck.points_association += score_data.score
-                elif score_data.quiz_type == "qcm":
-                    user_deck.points_qcm += score_data.score
-                elif score_data.quiz_type == "classique":
-                    user_deck.points_classique += score_data.score
+                    await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=score_data.deck_pk)
                     
                 # Mise à jour des compteurs de cartes maîtrisées/en cours/à revoir
                 await update_user_deck_anki_stats(db, user_deck)
-                
-                # Mise à jour des statistiques globales du Deck (total_correct, total_attempts)
-                deck_result = await db.execute(select(models.Deck).where(models.Deck.deck_pk == score_data.deck_pk))
-                deck = deck_result.scalar_one_or_none()
-                if deck:
-                    deck.total_attempts += 1
-                    if score_data.is_correct:
-                        deck.total_correct += 1
-                    db.add(deck)
     
     await db.commit()
+    # Sans worker permanent, le journal est vidé par les écritures elles-mêmes
+    await crud_score_aggregation.fold_if_backlogged(db)
     await db.refresh(db_score)
     return db_score
 
 
+def _paginate_scores(stmt, limit: int, offset: int, before: Optional[Tuple[datetime, int]]):
+    """Du plus récent au plus ancien ; ``before`` (curseur) remplace ``offset``."""
+    if before is not None:
+        stmt = stmt.where(tuple_(models.UserScore.created_at, models.UserScore.score_pk) < tuple_(*before))
+    else:
+        stmt = stmt.offset(offset)
+    return stmt.order_by(
+        models.UserScore.created_at.desc(),
+        models.UserScore.score_pk.desc(),
+    ).limit(limit)
+
+
 async def get_user_scores(
     db: AsyncSession,
     user_pk: int,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    before: Optional[Tuple[datetime, int]] = None,
 ) -> list[models.UserScore]:
     """Récupère les scores d'un utilisateur."""
-    result = await db.execute(
-        select(models.UserScore)
-        .where(models.UserScore.user_pk == user_pk)
-        .order_by(models.UserScore.created_at.desc())
-        .limit(limit)
-        .offset(offset)
-    )
+    stmt = select(models.UserScore).where(models.UserScore.user_pk == user_pk)
+    result = await db.execute(_paginate_scores(stmt, limit, offset, before))
     return result.scalars().all()
 
 
@@ -364,19 +324,15 @@ async def get_user_deck_scores(
     user_pk: int,
     deck_pk: int,
     limit: int = 100,
-    offset: int = 0
+    offset: int = 0,
+    before: Optional[Tuple[datetime, int]] = None,
 ) -> list[models.UserScore]:
     """Récupère les scores d'un utilisateur pour un deck spécifique."""
-    result = await db.execute(
-        select(models.UserScore)
-        .where(
-            (models.UserScore.user_pk == user_pk) &
-            (models.UserScore.deck_pk == deck_pk)
-        )
-        .order_by(models.UserScore.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+    stmt = select(models.UserScore).where(
+        (models.UserScore.user_pk == user_pk) &
+        (models.UserScore.deck_pk == deck_pk)
     )
+    result = await db.execute(_paginate_scores(stmt, limit, offset, before))
     return result.scalars().all()
 
 
@@ -472,6 +428,8 @@ async def add_user_deck(
     )
     
     db.add(user_deck)
+    await db.flush()
+    await crud_due_queue.enqueue_cards(db, user_pk=user_pk, deck_pk=deck_pk)
     await db.commit()
     await db.refresh(user_deck)
     
@@ -482,108 +440,99 @@ async def add_user_deck(
     return result.unique().scalar_one()
 
 
+DECK_CARD_STATS = ("mastered_cards", "learning_cards", "review_cards")
+
+
+async def get_deck_card_stats(
+    db: AsyncSession,
+    user_pk: int,
+    deck_pks: Iterable[int],
+) -> dict[int, dict[str, int]]:
+    """
+    Cartes maîtrisées / en cours / à revoir de l'utilisateur pour chaque deck, en une requête.
+
+    Une seule agrégation ``GROUP BY deck_pk`` sur ``deck_cards``, ``cards`` et
+    ``card_performance`` (``consecutive_correct`` vient de l'état propre à
+    l'utilisateur, ``user_card_schedules``) :
+    - maîtrisée : au moins une tentative et ``consecutive_correct`` > 0 ;
+    - à revoir : au moins une tentative et ``consecutive_correct`` nul ;
+    - en cours : toutes les autres cartes du deck (jamais tentées).
+    Un deck sans carte est absent du résultat.
+    """
+    deck_pks = list(deck_pks)
+    if not deck_pks:
+        return {}
+    deck_card_pk = models.deck_cards.c.card_pk
+    attempted = models.CardPerformance.total_attempts > 0
+    consecutive = func.coalesce(models.UserCardSchedule.consecutive_correct, 0)
+    stmt = (
+        select(
+            models.deck_cards.c.deck_pk,
+            func.count(func.distinct(deck_card_pk)),
+            func.count(func.distinct(case((attempted & (consecutive > 0), deck_card_pk)))),
+            func.count(func.distinct(case((attempted & (consecutive == 0), deck_card_pk)))),
+        )
+        .join(models.Card, models.Card.card_pk == deck_card_pk)
+        .outerjoin(
+            models.CardPerformance,
+            (models.CardPerformance.user_pk == user_pk)
+            & (models.CardPerformance.deck_pk == models.deck_cards.c.deck_pk)
+            & (models.CardPerformance.card_pk == deck_card_pk),
+        )
+        .outerjoin(
+            models.UserCardSchedule,
+            (models.UserCardSchedule.user_pk == user_pk) & (models.UserCardSchedule.card_pk == deck_card_pk),
+        )
+        .where(models.deck_cards.c.deck_pk.in_(deck_pks))
+        .group_by(models.deck_cards.c.deck_pk)
+    )
+    return {
+        deck_pk: {
+            "mastered_cards": mastered,
+            "learning_cards": max(0, total - mastered - review),
+            "review_cards": review,
+        }
+        for deck_pk, total, mastered, review in (await db.execute(stmt)).all()
+    }
+
+
 async def update_user_deck_anki_stats(
     db: AsyncSession,
     user_deck: models.UserDeck,
     commit_changes: bool = False
 ) -> models.UserDeck:
-    """Met à jour les compteurs de cartes maîtrisées/en cours/à revoir pour un UserDeck."""
-    
-    # 1. Compter le nombre total de cartes dans le deck (Shared)
-    stmt_total = select(func.count(models.Card.card_pk)).where(models.Card.deck_pk == user_deck.deck_pk)
-    result_total = await db.execute(stmt_total)
-    total_cards = result_total.scalar() or 0
-    
-    # 2. Récupérer les performances de l'utilisateur pour ce deck
-    stmt_perf = select(models.CardPerformance).where(
-        (models.CardPerformance.user_pk == user_deck.user_pk) &
-        (models.CardPerformance.deck_pk == user_deck.deck_pk)
-    )
-    result_perf = await db.execute(stmt_perf)
-    performances = result_perf.scalars().all()
-    
-    # 3. Initialiser les compteurs
-    mastered_cards = 0
-    review_cards = 0
-    
-    # Set des cartes ayant une performance (pour déduire celles qui n'en ont pas)
-    seen_cards_count = 0
-    
-    for perf in performances:
-        if perf.total_attempts > 0:
-            seen_cards_count += 1
-            # Logique alignée avec schemas.py (Label)
-            
-            # Maîtrisée : Dernière réponse correcte (consecutive_correct provient d'un join normalement, 
-            # mais ici on doit déduire ou charger.
-            # ATTENTION : CardPerformance contient les stats, mais consecutive_correct est sur Card pour Anki.
-            # MAIS Card est partagé. 
-            # D'après les dernières modifications, on veut que le statut suive la performance perso.
-            # On va utiliser une logique simplifiée basée sur CardPerformance car on ne veut pas join Card pour chaque perf dans une boucle.
-            
-            # Logique stricte :
-            # Maîtrisée = correct_count > 0 ET dernière réponse PAS incorrecte?
-            # Sans timestamp précis par réponse, difficile de savoir "dernière".
-            # Cependant, schemas.py utilise consecutive_correct de la CARTE.
-            # Si on veut aligner TOTALEMENT, on devrait join Cards.
-            pass
-
-    # RE-STRATÉGIE : Faire une requête aggrégée ou join
-    # On va join CardPerformance et Card pour avoir les données exactes
-    # Cependant, Card.consecutive_correct est GLOBAL. Si on l'utilise pour UserStats, on a le problème original.
-    # Pour l'instant, schemas.py utilise Card.consecutive_correct.
-    # SI Card.consecutive_correct est utilisé pour déterminer "Maîtrisée", alors on DOIT l'utiliser ici.
-    
-    stmt_join = select(models.CardPerformance, models.Card).join(
-        models.Card, models.CardPerformance.card_pk == models.Card.card_pk
-    ).where(
-        (models.CardPerformance.user_pk == user_deck.user_pk) &
-        (models.CardPerformance.deck_pk == user_deck.deck_pk)
-    )
-    result_join = await db.execute(stmt_join)
-    rows = result_join.all() # [(CardPerformance, Card), ...]
-    
-    mastered_cards = 0
-    review_cards = 0
-    
-    processed_card_pks = set()
-    
-    for perf, card in rows:
-        processed_card_pks.add(perf.card_pk)
-        
-        # Logique Label (schemas.py)
-        # En cours: attempts == 0 (exclus par la requête perf w/ attempts>0 si on filtre, mais ici on prend tout)
-        if perf.total_attempts == 0:
-            continue # Est "En cours"
-            
-        # Maîtrisée: consecutive_correct > 0
-        if card.consecutive_correct > 0:
-            mastered_cards += 1
-        else:
-            # Non maîtrisée (consecutive_correct == 0, attempts > 0) -> Review
-            review_cards += 1
-            
-    # Learning (En cours) = Total - (Mastered + Review)
-    # Cela couvre :
-    # 1. Les cartes sans enregistrement CardPerformance
-    # 2. Les cartes avec CardPerformance mais attempts == 0
-    learning_cards = max(0, total_cards - mastered_cards - review_cards)
-            
-    # 4. Mettre à jour le UserDeck
-    user_deck.mastered_cards = mastered_cards
-    user_deck.learning_cards = learning_cards
-    user_deck.review_cards = review_cards
-    
+    """Met à jour les compteurs de cartes maîtrisées/en cours/à revoir pour un UserDeck (après une révision)."""
+    stats = (await get_deck_card_stats(db, user_deck.user_pk, [user_deck.deck_pk])).get(user_deck.deck_pk)
+    for name in DECK_CARD_STATS:
+        setattr(user_deck, name, stats[name] if stats else 0)
     db.add(user_deck)
-    
+
     # Commit conditionnel
     if commit_changes:
         await db.commit()
         await db.refresh(user_deck)
-    
+
     return user_deck
 
 
+async def merge_deck_card_stats(db: AsyncSession, user_pk: int, user_decks: Iterable[models.UserDeck]) -> None:
+    """
+    Compteurs de cartes à jour sur les UserDeck persistés, pour une lecture.
+
+    Comme ``crud_score_aggregation.merge_user_decks`` : valeurs posées avec
+    ``set_committed_value``, jamais écrites par la session (un GET ne modifie
+    pas ``user_decks``).
+    """
+    user_decks = [user_deck for user_deck in user_decks if user_deck.user_deck_pk]
+    if not user_decks:
+        return
+    stats = await get_deck_card_stats(db, user_pk, {user_deck.deck_pk for user_deck in user_decks})
+    for user_deck in user_decks:
+        deck_stats = stats.get(user_deck.deck_pk)
+        for name in DECK_CARD_STATS:
+            set_committed_value(user_deck, name, deck_stats[name] if deck_stats else 0)
+
+
 async def get_user_decks(
     db: AsyncSession,
     user_pk: int
@@ -600,11 +549,10 @@ async def get_user_decks(
         .order_by(models.UserDeck.added_at.desc())
     )
     user_decks = result.unique().scalars().all()
-    
-    # Mettre à jour les stats Anki pour chaque deck
-    for user_deck in user_decks:
-        await update_user_deck_anki_stats(db, user_deck)
-        
+
+    # Stats Anki de tous les decks en une requête, sans écrire les UserDeck
+    await merge_deck_card_stats(db, user_pk, user_decks)
+    await crud_score_aggregation.merge_user_decks(db, user_pk, user_decks)
     return user_decks
 
 
@@ -639,9 +587,7 @@ async def get_all_decks_with_user_stats(
     for deck in all_decks:
         if deck.deck_pk in user_decks_dict:
             # L'utilisateur a déjà commencé ce deck
-            user_deck = user_decks_dict[deck.deck_pk]
-            await update_user_deck_anki_stats(db, user_deck)
-            result_list.append(user_deck)
+            result_list.append(user_decks_dict[deck.deck_pk])
         else:
             # L'utilisateur n'a pas encore commencé ce deck
             # Créer un objet UserDeck temporaire avec des stats à 0
@@ -665,6 +611,8 @@ async def get_all_decks_with_user_stats(
             )
             result_list.append(temp_user_deck)
     
+    await merge_deck_card_stats(db, user_pk, result_list)
+    await crud_score_aggregation.merge_user_decks(db, user_pk, result_list)
     return result_list
 
 
@@ -689,8 +637,9 @@ async def get_user_deck_stats(
     user_deck = result.unique().scalar_one_or_none()
 
     if user_deck:
-        # Mettre à jour les stats Anki avant de retourner
-        await update_user_deck_anki_stats(db, user_deck)
+        # Stats Anki à jour, sans écrire le UserDeck
+        await merge_deck_card_stats(db, user_pk, [user_deck])
+        await crud_score_aggregation.merge_user_decks(db, user_pk, [user_deck])
         return user_deck
 
     # 2. Si non, récupérer le deck de base
@@ -744,6 +693,7 @@ async def remove_user_deck(
     user_deck = result.scalars().first()
     
     if user_deck:
+        await crud_due_queue.remove_deck_cards(db, deck_pk, user_pk=user_pk)
         await db.delete(user_deck)
         await db.commit()
     
@@ -764,6 +714,7 @@ async def get_user_stats(
     
     if not user:
         raise ValueError("User not found")
+    await crud_score_aggregation.merge_user(db, user)
     
     # Compter les enregistrements audio
     audio_result = await db.execute(
@@ -21,6 +21,9 @@ def _normalize_db_url(url: str) -> tuple[str, dict]:
         url = url.replace("postgres://", "postgresql://", 1)
     if url.startswith("postgresql://") and "+asyncpg" not in url:
         url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if not url.startswith("postgresql"):
+        # SQLite (benchmarks) : urlunsplit perdrait le « // » des chemins absolus
+        return url, {}
 
     parsed = urlsplit(url)
     query = dict(parse_qsl(parsed.query, keep_blank_values=True))
@@ -80,11 +83,35 @@ async def lifespan(app):
     logger.info("🚀 Démarrage application...")
     await init_db()
     await database.connect()
+    # Recherche d'icônes en tâche de fond : seulement sur un processus permanent
+    # (IMAGE_ENRICHMENT_WORKER=1) ; en serverless, scripts/run_image_enrichment.py
+    from .crud_image_enrichment import image_enrichment_worker
+    enrichment_enabled = os.getenv("IMAGE_ENRICHMENT_WORKER", "0") == "1"
+    if enrichment_enabled:
+        image_enrichment_worker.start()
+    # Report des scores sur les compteurs : même règle (SCORE_AGGREGATION_WORKER=1) ;
+    # sinon scripts/run_score_aggregation.py
+    from .crud_score_aggregation import score_aggregation_worker
+    aggregation_enabled = os.getenv("SCORE_AGGREGATION_WORKER", "0") == "1"
+    if aggregation_enabled:
+        score_aggregation_worker.start()
     logger.info("✅ Application démarrée")
     yield
+    if aggregation_enabled:
+        await score_aggregation_worker.stop()
+    if enrichment_enabled:
+        await image_enrichment_worker.stop()
     await database.disconnect()
     logger.info("👋 Application arrêtée")
 
+def dialect_insert(db: AsyncSession, table):
+    """INSERT propre au dialecte (PostgreSQL ou SQLite) pour ON CONFLICT."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
 async def get_db() -> AsyncSession:
     """Dépendance pour obtenir une session de base de données asynchrone."""
     async with SessionLocal() as session:
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, ForeignKey, Integer, Text,Float, TIMESTAMP, String, inspect, Boolean, DateTime, Table, UniqueConstraint, Numeric
+from sqlalchemy import Column, ForeignKey, Integer, Text,Float, TIMESTAMP, String, inspect, Boolean, DateTime, Table, UniqueConstraint, Numeric, CheckConstraint, Index, JSON, text, true, false
 from sqlalchemy.dialects.postgresql import ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
+from .core.normalization import normalize_back
 from .database import Base
 import os
 from datetime import datetime
@@ -26,6 +27,9 @@ class Deck(Base):
     description = Column(Text, nullable=True)
     published_at = Column(DateTime(timezone=True), nullable=True)
     archived_at = Column(DateTime(timezone=True), nullable=True)
+    # Planificateur des révisions du deck (voir core.schedulers) et paramètres propres
+    scheduler = Column(String(32), nullable=False, default="sm2", server_default="sm2")
+    scheduler_params = Column(JSON, nullable=True)
 
     # Relation Many-to-Many
     cards = relationship("Card", secondary=deck_cards, back_populates="decks")
@@ -33,6 +37,11 @@ class Deck(Base):
 
 class Card(Base):
     __tablename__ = "cards"
+    __table_args__ = (
+        Index("uq_cards_normalized_back", "normalized_back", unique=True),
+        # Pagination par curseur de GET /cards/ (voir core.pagination)
+        Index("ix_cards_next_review_card_pk", "next_review", "card_pk"),
+    )
 
     card_pk = Column(Integer, primary_key=True, autoincrement=True, index=True)
     id_json = Column(Text, unique=True, nullable=False)
@@ -43,6 +52,9 @@ class Card(Base):
     
     front = Column(Text, nullable=False)
     back = Column(Text, nullable=False)
+    # Clé d'unicité dérivée de 'back' (voir core.normalization.normalize_back).
+    # NULL uniquement pour les doublons historiques en attente de fusion.
+    normalized_back = Column(Text, nullable=True)
     pronunciation = Column(Text, nullable=True)
     image = Column(Text, nullable=True)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False)
@@ -80,6 +92,11 @@ class Card(Base):
         lazy="selectin",
     )
     
+    @validates("back")
+    def _sync_normalized_back(self, key, value):
+        self.normalized_back = normalize_back(value) if value is not None else None
+        return value
+
     # Ancienne relation (pour compatibilité, pointe vers le deck "principal" si deck_pk est rempli)
     # Note: cela peut être source de confusion si le deck_pk n'est pas synchronisé avec deck_cards
     # deck = relationship("Deck", back_populates="cards") # On commente ou retire car conflit avec 'decks' et 'cards'
@@ -121,6 +138,78 @@ class CardAudio(Base):
         return f"/cards/{self.card_pk}/audio"
 
 
+class CardMedia(Base):
+    """Référence vers un média de carte stocké hors de PostgreSQL.
+
+    Le contenu est adressé par son empreinte SHA-256 : plusieurs lignes peuvent
+    pointer vers le même ``pathname`` lorsque des cartes partagent une icône.
+    """
+    __tablename__ = "card_media"
+    __table_args__ = (
+        CheckConstraint("kind IN ('image', 'audio')", name="ck_card_media_kind"),
+        Index("ix_card_media_card_kind", "card_pk", "kind"),
+        Index(
+            "uq_card_media_primary_kind",
+            "card_pk",
+            "kind",
+            unique=True,
+            postgresql_where=text("is_primary"),
+            sqlite_where=text("is_primary"),
+        ),
+    )
+
+    media_pk = Column(Integer, primary_key=True, autoincrement=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(16), nullable=False, index=True)
+    storage_provider = Column(String(32), nullable=False, default="local", server_default="local")
+    url = Column(Text, nullable=False)
+    pathname = Column(Text, nullable=False)
+    content_type = Column(String(127), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False, index=True)
+    original_filename = Column(String(255), nullable=True)
+    is_primary = Column(Boolean, nullable=False, default=True, server_default=true())
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    card = relationship("Card")
+
+
+class ImageEnrichmentJob(Base):
+    """Recherche d'icône différée pour une carte créée sans image.
+
+    Une ligne par carte ; le worker regroupe les tâches par ``search_query``
+    afin qu'une requête partagée par plusieurs cartes ne soit envoyée qu'une
+    fois à Magnific. Une requête réussie garde l'empreinte du média obtenu,
+    réutilisée ensuite sans nouvel appel réseau.
+    """
+    __tablename__ = "image_enrichment_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'running', 'done', 'failed')",
+            name="ck_image_enrichment_jobs_status",
+        ),
+        Index("ix_image_enrichment_jobs_due", "status", "next_attempt_at"),
+    )
+
+    job_pk = Column(Integer, primary_key=True, autoincrement=True)
+    card_pk = Column(
+        Integer,
+        ForeignKey("cards.card_pk", ondelete="CASCADE"),
+        nullable=False,
+        unique=True,
+    )
+    search_query = Column(Text, nullable=False, index=True)
+    status = Column(String(16), nullable=False, default="pending", server_default="pending")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+    content_type = Column(String(127), nullable=True)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
 class CardPublicQRLink(Base):
     """Lien de consultation publique révoquable pour une flashcard imprimée.
 
@@ -229,9 +318,71 @@ class UserDeck(Base):
     deck = relationship("Deck")
 
 
+class UserDueCard(Base):
+    """File de révision d'un utilisateur : une ligne par carte de ses decks.
+
+    Tenue à jour à chaque révision et à chaque ajout/retrait de deck (voir
+    ``crud_due_queue``) ; l'index (user_pk, due_at, card_pk) sert compteurs
+    et prochaines cartes par un simple parcours d'intervalle.
+    """
+    __tablename__ = "user_due_cards"
+    __table_args__ = (
+        Index("ix_user_due_cards_user_due", "user_pk", "due_at", "card_pk"),
+    )
+
+    user_pk = Column(Integer, ForeignKey("users.user_pk", ondelete="CASCADE"), primary_key=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), primary_key=True, index=True)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class UserCardSchedule(Base):
+    """État Anki d'une carte pour un utilisateur (voir ``crud_schedules``).
+
+    Les révisions n'écrivent plus dans ``cards`` : chaque utilisateur met à
+    jour sa propre ligne, et deux élèves révisant la même carte ne se
+    disputent plus le même verrou. Une carte sans ligne part de
+    ``crud_schedules.NEW_CARD`` ; de ``cards``, seul ``next_review`` sert
+    encore (première échéance dans la file et la sélection du quiz).
+    """
+    __tablename__ = "user_card_schedules"
+
+    user_pk = Column(Integer, ForeignKey("users.user_pk", ondelete="CASCADE"), primary_key=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), primary_key=True, index=True)
+    easiness = Column(Float, nullable=False, default=2.5)
+    interval = Column(Integer, nullable=False, default=0)
+    consecutive_correct = Column(Integer, nullable=False, default=0)
+    box = Column(Integer, nullable=False, default=0)
+    next_review = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+    # Stabilité en jours du planificateur "memory" ; NULL pour SM-2
+    stability = Column(Float, nullable=True)
+
+
 class UserScore(Base):
     """Historique des scores utilisateur"""
     __tablename__ = "user_scores"
+    __table_args__ = (
+        # Pagination par curseur (created_at, score_pk) des historiques de scores
+        Index("ix_user_scores_user_created_score", "user_pk", "created_at", "score_pk"),
+        Index("ix_user_scores_user_deck_created_score", "user_pk", "deck_pk", "created_at", "score_pk"),
+        # Scores pas encore reportés sur les compteurs (voir crud_score_aggregation)
+        Index(
+            "ix_user_scores_pending",
+            "user_pk",
+            "deck_pk",
+            postgresql_where=text("NOT aggregated"),
+            sqlite_where=text("NOT aggregated"),
+        ),
+        # Lectures par deck seul (catalogue /decks/, compteurs globaux d'un deck)
+        Index(
+            "ix_user_scores_pending_deck",
+            "deck_pk",
+            postgresql_where=text("NOT aggregated"),
+            sqlite_where=text("NOT aggregated"),
+        ),
+        # Révisions synchronisées hors ligne : un renvoi du même lot ne crée pas de doublon
+        UniqueConstraint("user_pk", "client_event_id", name="uq_user_scores_client_event"),
+    )
 
     score_pk = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_pk = Column(Integer, ForeignKey("users.user_pk", ondelete="CASCADE"), nullable=False, index=True)
@@ -246,6 +397,12 @@ class UserScore(Base):
     
     # Timestamp
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    # UUID généré par l'application mobile (NULL pour les scores envoyés en ligne)
+    client_event_id = Column(String(36), nullable=True)
+
+    # Reporté sur users / user_decks / decks par le worker d'agrégation
+    aggregated = Column(Boolean, nullable=False, default=False, server_default=false())
     
     user = relationship("User", back_populates="scores")
     deck = relationship("Deck")
@@ -391,10 +548,15 @@ class CardPerformance(Base):
 class QuizSession(Base):
     """Historique des sessions de quiz pour éviter les répétitions jusqu'à ce que toutes les cartes soient vues"""
     __tablename__ = "quiz_sessions"
+    __table_args__ = (
+        # Cycle en cours d'un (utilisateur, deck) : MAX(cycle_number) lu dans l'index
+        Index("ix_quiz_sessions_user_deck_cycle", "user_pk", "deck_pk", "cycle_number"),
+    )
 
     session_pk = Column(Integer, primary_key=True, autoincrement=True, index=True)
     user_pk = Column(Integer, ForeignKey("users.user_pk", ondelete="CASCADE"), nullable=False, index=True)
-    deck_pk = Column(Integer, ForeignKey("decks.deck_pk", ondelete="CASCADE"), nullable=False, index=True)
+    # NULL pour une session mixte : le deck de chaque carte est dans quiz_session_cards
+    deck_pk = Column(Integer, ForeignKey("decks.deck_pk", ondelete="CASCADE"), nullable=True, index=True)
     
     # Configuration du quiz
     card_count = Column(Integer, nullable=False)  # Nombre de cartes dans ce quiz
@@ -403,7 +565,7 @@ class QuizSession(Base):
     # État du cycle
     cycle_number = Column(Integer, default=1, nullable=False)  # Quel cycle de révision (1, 2, 3...)
     
-    # Cartes utilisées (stockées en JSON array d'IDs)
+    # Cartes utilisées (stockées en JSON array d'IDs) ; l'état du cycle est dans quiz_cycle_cards
     used_card_pks = Column(Text, nullable=False)  # JSON array: [1, 5, 12, ...]
     
     # Résultats
@@ -419,6 +581,56 @@ class QuizSession(Base):
     deck = relationship("Deck")
 
 
+class QuizCycleCard(Base):
+    """Cartes déjà tirées dans un cycle de quiz d'un utilisateur pour un deck.
+
+    Alimentée à chaque création de session ; remplace la relecture du JSON
+    ``used_card_pks`` de toutes les sessions passées.
+    """
+    __tablename__ = "quiz_cycle_cards"
+
+    user_pk = Column(Integer, ForeignKey("users.user_pk", ondelete="CASCADE"), primary_key=True)
+    deck_pk = Column(Integer, ForeignKey("decks.deck_pk", ondelete="CASCADE"), primary_key=True)
+    cycle_number = Column(Integer, primary_key=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), primary_key=True, index=True)
+
+
+class QuizSessionCard(Base):
+    """Carte d'une session mixte et deck auquel ses réponses sont attribuées.
+
+    Les réponses reçues pour la session y sont comptées (``answered``,
+    ``correct``) ; la finalisation répartit ainsi les résultats par deck.
+    """
+    __tablename__ = "quiz_session_cards"
+
+    session_pk = Column(Integer, ForeignKey("quiz_sessions.session_pk", ondelete="CASCADE"), primary_key=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), primary_key=True)
+    deck_pk = Column(Integer, ForeignKey("decks.deck_pk", ondelete="CASCADE"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    answered = Column(Integer, nullable=False, default=0, server_default="0")
+    correct = Column(Integer, nullable=False, default=0, server_default="0")
+
+
+class DeckDistractor(Base):
+    """Groupe de distracteurs d'une carte dans un deck (voir ``core.distractors``).
+
+    Tenu à jour à chaque écriture de carte (``crud_distractors``) ; l'index
+    (deck_pk, pos, length_band, theme) donne les distracteurs d'une question
+    QCM en une lecture, sans charger le deck.
+    """
+    __tablename__ = "deck_distractors"
+    __table_args__ = (
+        Index("ix_deck_distractors_pool", "deck_pk", "pos", "length_band", "theme"),
+    )
+
+    deck_pk = Column(Integer, ForeignKey("decks.deck_pk", ondelete="CASCADE"), primary_key=True)
+    card_pk = Column(Integer, ForeignKey("cards.card_pk", ondelete="CASCADE"), primary_key=True, index=True)
+    pos = Column(Text, nullable=False, default="")
+    length_band = Column(Integer, nullable=False, default=0)
+    theme = Column(Text, nullable=False, default="")
+    answer = Column(Text, nullable=False)
+
+
 # ============================================================================
 # CONJUGAISONS ITALIENNES — corpus local, sans service externe à l’exécution
 # ============================================================================
@@ -1,9 +1,12 @@
 # app/schemas.py
-from pydantic import BaseModel, field_validator, Field, computed_field
-from datetime import datetime
-from typing import List, Optional, Literal
+from pydantic import BaseModel, field_validator, model_validator, Field, computed_field
+from datetime import date, datetime
+from typing import Dict, List, Optional, Literal
+from uuid import UUID
 import json
 
+from .core.media_storage import public_image_value
+
 
 # ============================================================================
 # DECKS & CARDS
@@ -33,6 +36,13 @@ class DeckSimple(DeckBase):
     model_config = {"from_attributes": True}
 
 
+class DeckSummary(DeckSimple):
+    """Entrée du catalogue : métadonnées du deck et compteurs, sans les cartes."""
+    card_count: int = 0
+    has_audio_count: int = 0
+    has_image_count: int = 0
+
+
 class DeckSimpleSafe(DeckSimple):
     """Version de DeckSimple qui masque les stats globales pour éviter la confusion"""
     @field_validator('total_correct', 'total_attempts', mode='before', check_fields=False)
@@ -45,7 +55,7 @@ class CardBase(BaseModel):
     front: str
     back: str
     pronunciation: Optional[str] = None
-    image: Optional[str] = None # Contient désormais l'image en Base64 (Data URI) ou l'URL originale si non convertie
+    image: Optional[str] = None # Data URI ou URL en entrée ; URL de streaming en sortie
     
     # Nouveaux champs optionnels
     explanation_it: Optional[str] = None
@@ -102,6 +112,51 @@ class Card(CardBase):
 
     model_config = {"from_attributes": True}
 
+    @model_validator(mode="after")
+    def image_as_url(self):
+        """Ne renvoie jamais le binaire : une image inline devient son URL de streaming."""
+        self.image = public_image_value(self.card_pk, self.image)
+        return self
+
+
+def project_card(card, fields: List[str]) -> dict:
+    """Sérialise uniquement ``fields`` d'une carte ORM (attributs non chargés jamais lus).
+
+    Mêmes conversions que ``Card`` : image inline → URL, tags JSON → liste.
+    """
+    payload = {}
+    for name in fields:
+        if name == "image":
+            payload[name] = public_image_value(card.card_pk, card.image)
+        elif name == "tags":
+            payload[name] = CardBase.parse_tags_if_string(card.tags)
+        elif name == "audio":
+            payload[name] = CardAudioPublic.model_validate(card.audio, from_attributes=True) if card.audio else None
+        else:
+            payload[name] = getattr(card, name)
+    return payload
+
+
+class DueCard(BaseModel):
+    due_at: datetime
+    card: Card
+
+
+class DueQueue(BaseModel):
+    """File de révision de l'utilisateur : compteurs et prochaines cartes échues."""
+    due_now: int
+    due_today: int
+    total: int
+    next_due_at: Optional[datetime] = None  # prochaine échéance future (None si rien n'est planifié)
+    cards: List[DueCard] = []
+
+
+class CardSearchResult(BaseModel):
+    card: Card
+    score: float
+    # Extraits par champ ('back', 'translation_en'…), termes entourés de <mark>
+    highlights: Dict[str, str] = {}
+
 
 class CardPublicQRLinkRequest(BaseModel):
     card_pks: List[int] = Field(..., min_length=1, max_length=1000)
@@ -235,6 +290,38 @@ class UserScore(UserScoreBase):
     model_config = {"from_attributes": True}
 
 
+class ReviewSyncEvent(UserScoreBase):
+    """Révision faite hors ligne : ``event_id`` est généré par le client (renvoi sans doublon)."""
+    event_id: UUID
+    card_pk: int
+    deck_pk: Optional[int] = None
+    reviewed_at: datetime  # heure du téléphone ; sans fuseau = UTC
+    quiz_type: Literal["frappe", "association", "qcm", "classique"] = "classique"
+
+
+class ReviewSyncRequest(BaseModel):
+    events: List[ReviewSyncEvent] = Field(..., min_length=1, max_length=5000)
+
+
+class CardScheduleState(BaseModel):
+    """État de planification de la carte pour l'utilisateur, tel qu'enregistré par le serveur."""
+    card_pk: int
+    easiness: float
+    interval: int
+    consecutive_correct: int
+    box: int
+    next_review: Optional[datetime] = None
+    last_reviewed_at: Optional[datetime] = None
+    stability: Optional[float] = None  # planificateur "memory" uniquement
+
+
+class ReviewSyncResponse(BaseModel):
+    applied: int  # nouvelles révisions appliquées
+    duplicates: int  # déjà reçues (lot renvoyé) ou répétées dans le lot
+    rejected: List[UUID] = []  # carte ou deck inconnu
+    cards: List[CardScheduleState]
+
+
 # ============================================================================
 # USER DECK RESPONSE – TOUTES LES STATS
 # ============================================================================
@@ -309,6 +396,32 @@ class UserAudio(UserAudioBase):
     model_config = {"from_attributes": True}
 
 
+class ForecastDay(BaseModel):
+    date: date
+    due: int  # cartes dont l'échéance actuelle tombe ce jour-là (retards compris le premier jour)
+    expected_reviews: float  # révisions simulées, relectures après oubli comprises
+
+
+class ReviewForecast(BaseModel):
+    days: int
+    cards: int
+    success_rate: Optional[float] = None  # taux de réussite historique (prévision d'un utilisateur)
+    users: Optional[int] = None  # nombre d'utilisateurs (prévision globale)
+    generated_at: datetime
+    daily: List[ForecastDay]
+
+
+class DeckSchedulerConfig(BaseModel):
+    """Planificateur des révisions d'un deck (voir core.schedulers) et paramètres à surcharger."""
+    scheduler: Literal["sm2", "memory"] = "sm2"
+    params: Dict[str, float] = {}
+
+
+class DeckScheduler(DeckSchedulerConfig):
+    deck_pk: int
+    effective_params: Dict[str, float]  # params complétés par les valeurs par défaut
+
+
 class UserStatsResponse(BaseModel):
     total_score: int
     total_cards_learned: int
@@ -439,6 +552,26 @@ class QuizConfigRequest(BaseModel):
     deck_pk: int
     card_count: int = Field(..., ge=1, description="Nombre de cartes à utiliser dans le quiz")
     quiz_type: Literal["frappe", "association", "qcm", "classique"] = "classique"
+    include_questions: bool = Field(False, description="Renvoyer les questions à choix multiples toutes prêtes")
+    choice_count: int = Field(4, ge=2, le=8, description="Nombre de propositions par question (bonne réponse comprise)")
+
+
+class QuizMixedConfigRequest(BaseModel):
+    """Requête pour une session de révision sur plusieurs decks"""
+    deck_pks: Optional[List[int]] = Field(None, min_length=1, max_length=100, description="Decks à mélanger ; absent = tous mes decks")
+    card_count: int = Field(..., ge=1, le=200, description="Nombre de cartes de la session")
+    quiz_type: Literal["frappe", "association", "qcm", "classique"] = "classique"
+
+
+class QuizAnswer(BaseModel):
+    """Une réponse d'un lot (POST /api/quiz/sessions/{session_pk}/answers)"""
+    card_pk: int
+    is_correct: bool
+
+
+class QuizAnswerBatch(BaseModel):
+    """Réponses d'une session, dans l'ordre où elles ont été données"""
+    answers: List[QuizAnswer] = Field(..., min_length=1, max_length=500)
 
 
 class QuizCardPublic(BaseModel):
@@ -447,7 +580,7 @@ class QuizCardPublic(BaseModel):
     front: str
     back: str
     pronunciation: Optional[str] = None
-    image: Optional[str] = None # Contient désormais l'image en Base64 (Data URI) ou l'URL originale si non convertie
+    image: Optional[str] = None # URL de l'image (/cards/{card_pk}/image ou URL externe)
     
     # Nouveaux champs optionnels
     explanation_it: Optional[str] = None
@@ -461,6 +594,18 @@ class QuizCardPublic(BaseModel):
 
     model_config = {"from_attributes": True}
 
+    @model_validator(mode="after")
+    def image_as_url(self):
+        self.image = public_image_value(self.card_pk, self.image)
+        return self
+
+
+class QuizQuestion(BaseModel):
+    """Question à choix multiples construite par le serveur (front → back)"""
+    card_pk: int
+    prompt: str
+    choices: List[str]  # Bonne réponse (back) et distracteurs, mélangés
+
 
 class QuizCardSelection(BaseModel):
     """Réponse retournant les cartes sélectionnées pour un quiz"""
@@ -471,12 +616,27 @@ class QuizCardSelection(BaseModel):
     requested_card_count: int
     selected_cards: List[QuizCardPublic]
     message: str  # Info sur le cycle, les cartes restantes, etc.
+    questions: Optional[List[QuizQuestion]] = None  # Si include_questions
+
+
+class QuizMixedCard(QuizCardPublic):
+    """Carte d'une session mixte, avec le deck auquel sa réponse sera attribuée"""
+    deck_pk: int
+
+
+class QuizMixedSelection(BaseModel):
+    """Réponse de POST /api/quiz/start-mixed"""
+    session_pk: int
+    deck_pks: List[int]
+    requested_card_count: int
+    selected_cards: List[QuizMixedCard]
+    message: str
 
 
 class QuizSessionResponse(BaseModel):
     """Informations sur une session de quiz"""
     session_pk: int
-    deck_pk: int
+    deck_pk: Optional[int] = None  # None : session mixte (plusieurs decks)
     card_count: int
     quiz_type: str
     cycle_number: int
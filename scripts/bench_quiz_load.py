@@ -0,0 +1,311 @@
+"""Benchmark de charge reproductible des routes de quiz, en processus (ASGI).
+
+Usage :
+    python scripts/bench_quiz_load.py [--database-url URL] [--users 20] [--deck-size 200]
+        [--sessions 3] [--card-count 10] [--seed 42]
+        [--baseline scripts/baselines/quiz_load_sqlite.json] [--save-baseline] [--tolerance 0.5]
+
+Génère des élèves (avec un pass par deck), des decks de ``--deck-size``
+cartes et des flux de réponses à partir de ``--seed``, puis joue pour chaque
+élève ``--sessions`` quiz complets (``/api/quiz/start``, un ``/answer`` par
+carte, ``/complete``) à travers l'application ASGI, sans serveur ni réseau.
+
+Base : SQLite par défaut (fichier temporaire recréé, nécessite ``aiosqlite``)
+ou PostgreSQL local (``--database-url postgresql+asyncpg://…/apprendiamo_bench``,
+tables supprimées puis recréées : utiliser une base dédiée).
+
+Rapport par route : p50/p95/p99 (ms), requêtes SQL par appel et débit. Les
+appels sont joués l'un après l'autre (latences et comptes de requêtes
+reproductibles) ; ``/complete`` inclut la préparation du quiz suivant,
+exécutée en tâche de fond après la réponse.
+
+Avec ``--baseline``, compare à une référence enregistrée (même scénario) et
+sort en erreur si une route fait plus de requêtes (compte déterministe) ou si
+son p95 dépasse la référence de plus de ``--tolerance`` ; ``--save-baseline``
+l'écrit. Les latences dépendent de la machine : ne comparer qu'à une
+référence enregistrée sur le même poste.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+ROUTES = ("start", "answer", "complete")
+P_CORRECT = 0.7
+
+
+def percentile(values: list[float], rank: float) -> float:
+    """Percentile au rang le plus proche (``rank`` entre 0 et 100)."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(rank / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: dict, queries: dict, elapsed: float) -> dict:
+    report = {}
+    for route in ROUTES:
+        values = latencies[route]
+        if not values:
+            continue
+        report[route] = {
+            "calls": len(values),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+            "queries_per_call": round(sum(queries[route]) / len(values), 2),
+            "throughput_rps": round(len(values) / sum(values) * 1000, 1),
+        }
+    total_calls = sum(len(values) for values in latencies.values())
+    report["overall"] = {"calls": total_calls, "throughput_rps": round(total_calls / elapsed, 1)}
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Régressions par rapport à la référence (liste vide si aucune)."""
+    regressions = []
+    for route in ROUTES:
+        current, reference = report.get(route), baseline.get(route)
+        if not current or not reference:
+            continue
+        if current["p95_ms"] > reference["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{route}: p95 {current['p95_ms']} ms > {reference['p95_ms']} ms (+{tolerance:.0%})")
+        if current["queries_per_call"] > reference["queries_per_call"]:
+            regressions.append(
+                f"{route}: {current['queries_per_call']} requêtes/appel > {reference['queries_per_call']}"
+            )
+    return regressions
+
+
+def print_report(report: dict, baseline: dict | None) -> None:
+    print(f"{'route':<10} {'appels':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/appel':>10} {'appels/s':>9}")
+    for route in ROUTES:
+        stats = report.get(route)
+        if not stats:
+            continue
+        print(
+            f"{route:<10} {stats['calls']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+            f"{stats['p99_ms']:>9.2f} {stats['queries_per_call']:>10.2f} {stats['throughput_rps']:>9.1f}"
+        )
+        reference = (baseline or {}).get(route)
+        if reference:
+            print(
+                f"{'  réf.':<10} {reference['calls']:>7} {reference['p50_ms']:>9.2f} {reference['p95_ms']:>9.2f} "
+                f"{reference['p99_ms']:>9.2f} {reference['queries_per_call']:>10.2f} {reference['throughput_rps']:>9.1f}"
+            )
+    print(f"Débit global : {report['overall']['throughput_rps']} appels/s ({report['overall']['calls']} appels)")
+
+
+async def seed_data(models, session, args, rng: random.Random, sqlite: bool) -> list[int]:
+    """Decks, cartes, élèves, passes et UserDeck synthétiques ; retourne les user_pk."""
+    now = datetime.now(timezone.utc)
+    tag_sets = [["nom", "maison"], ["verbe", "action"], ["adjectif", "taille"], ["expression"]]
+    cards, links = [], []
+    for deck_pk in range(1, args.decks + 1):
+        session.add(models.Deck(deck_pk=deck_pk, id_json=f"bench-deck-{deck_pk}", name=f"Bench {deck_pk}"))
+        for index in range(args.deck_size):
+            card_pk = (deck_pk - 1) * args.deck_size + index + 1
+            tags = rng.choice(tag_sets)
+            cards.append({
+                "card_pk": card_pk,
+                "deck_pk": deck_pk,
+                "id_json": f"bench-card-{card_pk}",
+                "front": f"mot {card_pk}",
+                "back": f"parola {card_pk}",
+                "normalized_back": f"parola {card_pk}",
+                "created_at": now,
+                # Un tiers des cartes déjà échues
+                "next_review": now + timedelta(hours=rng.randint(-72, 144)),
+                "tags": json.dumps(tags) if sqlite else tags,
+            })
+            links.append({"deck_pk": deck_pk, "card_pk": card_pk})
+    await session.flush()
+    await session.execute(models.Card.__table__.insert(), cards)
+    await session.execute(models.deck_cards.insert(), links)
+
+    user_pks = list(range(1, args.users + 1))
+    for user_pk in user_pks:
+        session.add(models.User(
+            user_pk=user_pk,
+            email=f"bench{user_pk}@example.com",
+            username=f"bench{user_pk}",
+            hashed_password="x",
+            role="etudiant",
+        ))
+    await session.flush()
+    for user_pk in user_pks:
+        for deck_pk in range(1, args.decks + 1):
+            session.add(models.Subscription(
+                user_pk=user_pk, product_type="deck", product_id=deck_pk, origin="manual",
+                start_at=now - timedelta(days=1), end_at=now + timedelta(days=365),
+            ))
+            session.add(models.UserDeck(
+                user_pk=user_pk, deck_pk=deck_pk,
+                total_attempts=0, successful_attempts=0, attempt_count=0, correct_count=0,
+            ))
+    await session.commit()
+    return user_pks
+
+
+async def run(args) -> dict:
+    sqlite = args.database_url.startswith("sqlite")
+    if sqlite:
+        # Colonnes tags en texte JSON (voir models.Card)
+        os.environ["TESTING"] = "1"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("SCORE_AGGREGATION_WORKER", "0")
+    os.environ.setdefault("IMAGE_ENRICHMENT_WORKER", "0")
+
+    import httpx
+    from fastapi import Request
+    from sqlalchemy import event
+
+    from app import models
+    from app.database import Base, SessionLocal, engine
+    from app.main import app
+    from app.security import get_current_active_user
+
+    random.seed(args.seed)
+    rng = random.Random(args.seed)
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.drop_all)
+        await connection.run_sync(Base.metadata.create_all)
+    async with SessionLocal() as session:
+        user_pks = await seed_data(models, session, args, rng, sqlite)
+        users = {
+            user.user_pk: user
+            for user in (await session.execute(models.User.__table__.select())).all()
+        }
+
+    async def bench_user(request: Request):
+        row = users[int(request.headers["X-Bench-User"])]
+        return models.User(user_pk=row.user_pk, role=row.role, email=row.email, username=row.username, is_active=True)
+
+    app.dependency_overrides[get_current_active_user] = bench_user
+
+    statements = [0]
+
+    def count_statement(*_):
+        statements[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_statement)
+    latencies, queries = defaultdict(list), defaultdict(list)
+
+    async def call(client, route: str, method: str, url: str, user_pk: int, **kwargs) -> httpx.Response:
+        statements[0] = 0
+        started = time.perf_counter()
+        response = await client.request(method, url, headers={"X-Bench-User": str(user_pk)}, **kwargs)
+        latencies[route].append((time.perf_counter() - started) * 1000)
+        queries[route].append(statements[0])
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url} → {response.status_code} {response.text[:200]}")
+        return response
+
+    transport = httpx.ASGITransport(app=app)
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(args.sessions):
+            for user_pk in user_pks:
+                deck_pk = rng.randint(1, args.decks)
+                response = await call(
+                    client, "start", "POST", "/api/quiz/start", user_pk,
+                    json={"deck_pk": deck_pk, "card_count": args.card_count, "quiz_type": "classique"},
+                )
+                payload = response.json()
+                correct = 0
+                for card in payload["selected_cards"]:
+                    is_correct = rng.random() < P_CORRECT
+                    correct += is_correct
+                    await call(
+                        client, "answer", "POST", "/api/quiz/answer", user_pk,
+                        params={"card_pk": card["card_pk"], "deck_pk": deck_pk, "is_correct": str(is_correct).lower()},
+                    )
+                await call(
+                    client, "complete", "POST", f"/api/quiz/complete/{payload['session_pk']}", user_pk,
+                    params={"correct_count": correct, "total_questions": len(payload["selected_cards"])},
+                )
+    elapsed = time.perf_counter() - started
+    event.remove(engine.sync_engine, "before_cursor_execute", count_statement)
+    await engine.dispose()
+    return summarize(latencies, queries, elapsed)
+
+
+def scenario(args) -> dict:
+    return {
+        "backend": "sqlite" if args.database_url.startswith("sqlite") else "postgresql",
+        "users": args.users,
+        "decks": args.decks,
+        "deck_size": args.deck_size,
+        "sessions": args.sessions,
+        "card_count": args.card_count,
+        "seed": args.seed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--decks", type=int, default=2)
+    parser.add_argument("--deck-size", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--card-count", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+    if args.database_url is None:
+        path = os.path.join(tempfile.gettempdir(), "apprendiamo_bench.db")
+        if os.path.exists(path):
+            os.remove(path)
+        args.database_url = f"sqlite+aiosqlite:///{path}"
+
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.baseline and os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            stored = json.load(handle)
+        if stored.get("scenario") == scenario(args):
+            baseline = stored["report"]
+        else:
+            print("⚠️ Référence ignorée : scénario différent", stored.get("scenario"))
+    print(json.dumps(scenario(args)))
+    print_report(report, baseline)
+
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error("--save-baseline nécessite --baseline")
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump({"scenario": scenario(args), "report": report}, handle, indent=2, ensure_ascii=False)
+            handle.write("\n")
+        print(f"✅ Référence enregistrée : {args.baseline}")
+        return 0
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            return 1
+        print("✅ Pas de régression par rapport à la référence")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Micro-benchmark du tirage des cartes de quiz (``core.quiz_selection``).
+
+Usage : ``python scripts/bench_quiz_selection.py [--sizes 100,1000,10000] [--card-count 20] [--repeat 200]``
+Compare l'ancien tirage (``random.choices`` avec remise puis dédoublonnage)
+au tirage sans remise à clés exponentielles, sur des candidats tous à venir
+(cas où le tirage pondéré fait tout le travail) : temps par appel et nombre
+moyen de cartes réellement renvoyées.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.core.quiz_selection import Candidate, choose_cards, naive_utc, weight
+
+
+def choose_cards_with_replacement(candidates, card_count, now, rng=random):
+    """Ancienne implémentation, conservée pour la comparaison."""
+    review, learning = [], []
+    for candidate in candidates:
+        (review if naive_utc(candidate.next_review) <= now else learning).append(candidate)
+    rng.shuffle(review)
+    selected = [candidate.card_pk for candidate in review[:card_count]]
+    cards_needed = card_count - len(selected)
+    if cards_needed > 0 and learning:
+        selected.extend(
+            candidate.card_pk
+            for candidate in rng.choices(learning, weights=[weight(c) for c in learning], k=cards_needed)
+        )
+    rng.shuffle(selected)
+    return list(dict.fromkeys(selected)), len(review)
+
+
+def make_candidates(size: int, now: datetime, rng: random.Random) -> list[Candidate]:
+    # Quelques cartes très difficiles : c'est là que l'ancien tirage perd des cartes
+    return [
+        Candidate(
+            card_pk,
+            now + timedelta(hours=rng.randint(1, 240)),
+            rng.choice([None, -2, 0, 1, 3]) if card_pk % 50 else 40,
+        )
+        for card_pk in range(1, size + 1)
+    ]
+
+
+def bench(function, candidates, card_count, now, repeat: int) -> tuple[float, float]:
+    rng = random.Random(0)
+    returned = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        selected, _ = function(candidates, card_count, now, rng)
+        returned += len(selected)
+    elapsed = time.perf_counter() - started
+    return elapsed / repeat * 1e6, returned / repeat
+
+
+def main(sizes: list[int], card_count: int, repeat: int) -> None:
+    now = datetime(2026, 1, 1)
+    print(f"{'candidats':>10} {'implémentation':<18} {'µs/appel':>10} {'cartes':>8}")
+    for size in sizes:
+        candidates = make_candidates(size, now, random.Random(size))
+        count = min(card_count, size)
+        for name, function in (
+            ("avec remise", choose_cards_with_replacement),
+            ("clés expo.", choose_cards),
+        ):
+            micros, returned = bench(function, candidates, count, now, repeat)
+            print(f"{size:>10} {name:<18} {micros:>10.1f} {returned:>5.2f}/{count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--card-count", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    main([int(size) for size in args.sizes.split(",")], args.card_count, args.repeat)
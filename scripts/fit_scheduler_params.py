@@ -0,0 +1,45 @@
+"""Calibre les paramètres du planificateur ``memory`` sur l'historique ``user_scores``.
+
+Usage : ``python scripts/fit_scheduler_params.py [--deck-pk N] [--apply] [--min-reviews 200]``
+Recherche sur une grille les paramètres qui prédisent le mieux les réponses
+passées (voir ``app/core/scheduler_fitting.py``). Avec ``--apply`` (deck
+obligatoire), les enregistre sur le deck et lui fait utiliser ``memory``.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.crud_scheduler_fitting import MIN_FIT_REVIEWS, fit_deck_scheduler
+from app.database import SessionLocal, engine
+
+
+async def main(deck_pk: int | None, apply: bool, min_reviews: int) -> None:
+    async with SessionLocal() as session:
+        report = await fit_deck_scheduler(session, deck_pk=deck_pk, apply=apply, min_reviews=min_reviews)
+    await engine.dispose()
+    params = ", ".join(f"{name}={value:g}" for name, value in report["params"].items())
+    print(f"📈 {report['reviews']} révision(s) prédite(s) : {params}")
+    print(f"   perte logarithmique {report['log_loss']} (paramètres par défaut : {report['default_log_loss']})")
+    if report["applied"]:
+        print(f"✅ Paramètres enregistrés sur le deck {deck_pk} (planificateur memory).")
+    elif apply:
+        print(f"⚠️ Rien d'enregistré : deck introuvable ou moins de {min_reviews} révisions.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deck-pk", type=int, default=None)
+    parser.add_argument("--apply", action="store_true")
+    parser.add_argument("--min-reviews", type=int, default=MIN_FIT_REVIEWS)
+    args = parser.parse_args()
+    if args.apply and args.deck_pk is None:
+        parser.error("--apply exige --deck-pk")
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.deck_pk, args.apply, args.min_reviews))
@@ -0,0 +1,45 @@
+"""Déplace les images base64 de ``cards.image`` vers le stockage ``card_media``.
+
+Usage : ``python scripts/migrate_card_images_to_media.py [--batch-size 50] [--max-cards N]``
+La variable ``DATABASE_URL`` désigne la base cible ; ``MEDIA_ROOT`` le dossier
+de stockage local, qui doit être persistant (``MEDIA_ROOT_PERSISTENT=1``) :
+sinon le script refuse de remplacer les Data URI. Il est relançable : seules
+les Data URI restantes sont traitées.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.core.media_storage import MediaStorageError
+from app.crud_card_media import migrate_inline_images
+from app.database import SessionLocal, engine
+
+
+async def main(batch_size: int, max_cards: int | None) -> None:
+    try:
+        async with SessionLocal() as session:
+            report = await migrate_inline_images(session, batch_size=batch_size, max_cards=max_cards)
+    except MediaStorageError as exc:
+        sys.exit(f"❌ {exc}")
+    finally:
+        await engine.dispose()
+    print(
+        f"✅ {report['migrated']} image(s) migrée(s) en {report['batches']} lot(s), "
+        f"{report['errors']} erreur(s)."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--max-cards", type=int, default=None)
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.batch_size, args.max_cards))
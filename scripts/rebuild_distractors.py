@@ -0,0 +1,42 @@
+"""Recalcule les groupes de distracteurs QCM (``deck_distractors``) de toutes les cartes.
+
+Usage : ``python scripts/rebuild_distractors.py [--deck-pk N]``
+Facultatif : sans lui, chaque deck est construit à son premier QCM. Ensuite
+la table est tenue à jour à chaque écriture de carte.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from sqlalchemy import select
+
+from app import models
+from app.crud_distractors import sync_cards
+from app.database import SessionLocal, engine
+
+
+async def main(deck_pk: int | None) -> None:
+    async with SessionLocal() as session:
+        stmt = select(models.deck_cards.c.card_pk).distinct()
+        if deck_pk is not None:
+            stmt = stmt.where(models.deck_cards.c.deck_pk == deck_pk)
+        card_pks = (await session.execute(stmt)).scalars().all()
+        await sync_cards(session, card_pks)
+        await session.commit()
+    await engine.dispose()
+    print(f"✅ Distracteurs recalculés pour {len(card_pks)} carte(s).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deck-pk", type=int, default=None)
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.deck_pk))
@@ -0,0 +1,38 @@
+"""Recalcule en masse les échéances (``user_card_schedules``) d'un deck ou de toute la table.
+
+Usage : ``python scripts/reschedule_cards.py [--deck-pk N] [--chunk-size 1000] [--dry-run]``
+Corrige les états invalides et remet ``next_review`` (et la file de
+révision) à dernière révision + intervalle ; voir ``app/crud_reschedule.py``.
+Une transaction par tranche : le script peut être interrompu et relancé.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.crud_reschedule import RESCHEDULE_CHUNK_SIZE, reschedule
+from app.database import SessionLocal, engine
+
+
+async def main(deck_pk: int | None, chunk_size: int, dry_run: bool) -> None:
+    async with SessionLocal() as session:
+        report = await reschedule(session, deck_pk=deck_pk, chunk_size=chunk_size, dry_run=dry_run)
+    await engine.dispose()
+    verb = "à corriger" if dry_run else "corrigé(s)"
+    print(f"✅ {report['scanned']} état(s) relu(s), {report['updated']} {verb}.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--deck-pk", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=RESCHEDULE_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.deck_pk, args.chunk_size, args.dry_run))
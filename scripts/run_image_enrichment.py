@@ -0,0 +1,47 @@
+"""Vide la file des recherches d'images différées (``image_enrichment_jobs``).
+
+Usage : ``python scripts/run_image_enrichment.py [--batch-size 20] [--max-batches N]``
+Destiné aux hébergements sans processus permanent (``IMAGE_ENRICHMENT_WORKER=0``) :
+à lancer périodiquement. Les tâches dont la prochaine tentative n'est pas
+encore échue sont laissées pour un passage ultérieur.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.crud_image_enrichment import run_enrichment_batch
+from app.database import SessionLocal, engine
+
+
+async def main(batch_size: int, max_batches: int | None) -> None:
+    totals = {"claimed": 0, "done": 0, "retried": 0, "failed": 0}
+    batches = 0
+    async with SessionLocal() as session:
+        while max_batches is None or batches < max_batches:
+            report = await run_enrichment_batch(session, batch_size=batch_size)
+            if not report["claimed"]:
+                break
+            batches += 1
+            for key in totals:
+                totals[key] += report[key]
+    await engine.dispose()
+    print(
+        f"✅ {totals['done']} image(s) obtenue(s) en {batches} lot(s), "
+        f"{totals['retried']} à retenter, {totals['failed']} abandonnée(s)."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.batch_size, args.max_batches))
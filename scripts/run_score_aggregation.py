@@ -0,0 +1,42 @@
+"""Reporte les scores en attente (``user_scores.aggregated``) sur les compteurs.
+
+Usage : ``python scripts/run_score_aggregation.py [--batch-size 500] [--max-batches N]``
+Destiné aux hébergements sans processus permanent (``SCORE_AGGREGATION_WORKER=0``) :
+à lancer périodiquement. Les lectures restent exactes entre deux passages.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.append(ROOT)
+
+from app.crud_score_aggregation import run_aggregation_batch
+from app.database import SessionLocal, engine
+
+
+async def main(batch_size: int, max_batches: int | None) -> None:
+    folded = 0
+    batches = 0
+    async with SessionLocal() as session:
+        while max_batches is None or batches < max_batches:
+            report = await run_aggregation_batch(session, batch_size=batch_size)
+            if not report["folded"]:
+                break
+            batches += 1
+            folded += report["folded"]
+    await engine.dispose()
+    print(f"✅ {folded} score(s) reporté(s) en {batches} lot(s).")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main(args.batch_size, args.max_batches))
@@ -0,0 +1,12 @@
+"""Configuration commune des tests.
+
+``TESTING`` doit être posé avant le premier import de ``app.models`` : les
+tests sur base SQLite temporaire (``sqlite_case``) ont besoin de la colonne
+``cards.tags`` en texte JSON. Les workers de fond ne démarrent jamais.
+"""
+
+import os
+
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("SCORE_AGGREGATION_WORKER", "0")
+os.environ.setdefault("IMAGE_ENRICHMENT_WORKER", "0")
@@ -0,0 +1,68 @@
+"""Base des tests sur base SQLite en mémoire (aiosqlite), schéma créé depuis les modèles."""
+
+import importlib.util
+import os
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+os.environ.setdefault("TESTING", "1")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.database import Base
+
+
+@unittest.skipUnless(importlib.util.find_spec("aiosqlite"), "aiosqlite n'est pas installé")
+class SQLiteTestCase(unittest.IsolatedAsyncioTestCase):
+    """Une base vide par test ; ``self.db`` se comporte comme ``SessionLocal``."""
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        self.Session = sessionmaker(bind=self.engine, class_=AsyncSession, autoflush=False)
+        self.db = self.Session()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.engine.dispose()
+
+    @contextmanager
+    def count_statements(self):
+        """Compte les requêtes SQL envoyées dans le bloc (``counter[0]``)."""
+        counter = [0]
+
+        def count(*_):
+            counter[0] += 1
+
+        event.listen(self.engine.sync_engine, "before_cursor_execute", count)
+        try:
+            yield counter
+        finally:
+            event.remove(self.engine.sync_engine, "before_cursor_execute", count)
+
+    async def add_user(self, user_pk: int, role: str = "etudiant") -> models.User:
+        user = models.User(user_pk=user_pk, email=f"user{user_pk}@test.it", username=f"user{user_pk}", role=role, hashed_password="x")
+        self.db.add(user)
+        await self.db.flush()
+        return user
+
+    async def add_deck(self, deck_pk: int, card_pks=()) -> models.Deck:
+        """Deck et ses cartes (liées par ``deck_cards``)."""
+        now = datetime.now(timezone.utc)
+        deck = models.Deck(deck_pk=deck_pk, id_json=f"deck{deck_pk}", name=f"Deck {deck_pk}")
+        self.db.add(deck)
+        for card_pk in card_pks:
+            self.db.add(models.Card(
+                card_pk=card_pk, deck_pk=deck_pk, id_json=f"card{card_pk}", front=f"front {card_pk}",
+                back=f"back {card_pk}", created_at=now, next_review=now, tags="[]",
+            ))
+        await self.db.flush()
+        if card_pks:
+            await self.db.execute(models.deck_cards.insert(), [{"deck_pk": deck_pk, "card_pk": card_pk} for card_pk in card_pks])
+        return deck
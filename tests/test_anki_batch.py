@@ -0,0 +1,90 @@
+"""Tests unitaires du planificateur vectorisé et du recalcul en masse des échéances."""
+
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.core.anki import anki_review
+from app.core.anki_batch import anki_review_batch, due_dates, round4, to_datetimes
+from app.crud_reschedule import repair_states
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def random_states(size: int, seed: int) -> tuple[list, list, list, list]:
+    rng = random.Random(seed)
+    easiness = [round(rng.uniform(1.3, 3.5), rng.choice([1, 2, 4, 6])) for _ in range(size)]
+    interval = [rng.choice([0, 1, 6, rng.randint(0, 400)]) for _ in range(size)]
+    consecutive = [rng.randint(0, 6) for _ in range(size)]
+    grade = [rng.randint(0, 3) for _ in range(size)]
+    return easiness, interval, consecutive, grade
+
+
+class AnkiReviewBatchTests(unittest.TestCase):
+    def assert_identical(self, scalar_rng, batch_rng, size=5000, seed=1):
+        states = random_states(size, seed)
+        expected = [anki_review(*state, now=NOW, rng=scalar_rng) for state in zip(*states)]
+        result = anki_review_batch(*states, now=NOW, rng=batch_rng)
+        next_review = to_datetimes(result["next_review"])
+        for index, stats in enumerate(expected):
+            self.assertEqual(
+                (stats["easiness"], stats["interval"], stats["consecutive_correct"], stats["next_review"]),
+                (result["easiness"][index], result["interval"][index],
+                 result["consecutive_correct"][index], next_review[index]),
+                msg=f"carte {index}",
+            )
+
+    def test_identical_to_scalar_with_seeded_random(self):
+        self.assert_identical(random.Random(7), random.Random(7))
+
+    def test_identical_to_scalar_with_seeded_numpy_generator(self):
+        self.assert_identical(np.random.default_rng(7), np.random.default_rng(7), seed=2)
+
+    def test_per_card_review_times(self):
+        times = np.array([NOW, NOW + timedelta(days=3)], dtype="datetime64[us]")
+        result = anki_review_batch([2.5, 2.5], [0, 0], [0, 0], [3, 0], now=times)
+        self.assertEqual(to_datetimes(result["next_review"]), [NOW + timedelta(days=1), NOW + timedelta(days=3, minutes=10)])
+
+    def test_round4_matches_python_round_on_ties(self):
+        values = np.array([1.74265, 1.93275, 2.5, 2.67515, 1.30005])
+        self.assertEqual(round4(values).tolist(), [round(value, 4) for value in values.tolist()])
+
+
+class RepairStatesTests(unittest.TestCase):
+    def row(self, card_pk, **overrides):
+        last = datetime(2026, 4, 20, 8, 0, tzinfo=timezone.utc)
+        values = dict(
+            user_pk=1, card_pk=card_pk, easiness=2.5, interval=6, consecutive_correct=2, box=2,
+            next_review=last + timedelta(days=6), last_reviewed_at=last, due_at=last + timedelta(days=6),
+        )
+        values.update(overrides)
+        return SimpleNamespace(**values)
+
+    def test_consistent_state_is_left_alone(self):
+        self.assertFalse(repair_states([self.row(1)])["changed"][0])
+
+    def test_invalid_values_are_clamped_and_due_date_recomputed(self):
+        fixed = repair_states([self.row(1, easiness=0.4, interval=-2, next_review=datetime(2030, 1, 1))])
+        self.assertTrue(fixed["changed"][0])
+        self.assertEqual((fixed["easiness"][0], fixed["interval"][0]), (1.3, 0))
+        self.assertEqual(to_datetimes(fixed["next_review"]), [datetime(2026, 4, 20, 8, 10)])
+
+    def test_state_without_review_keeps_its_date(self):
+        due = datetime(2030, 1, 1)
+        fixed = repair_states([self.row(1, last_reviewed_at=None, next_review=due, due_at=due)])
+        self.assertFalse(fixed["changed"][0])
+
+    def test_desynchronized_queue_is_rewritten(self):
+        self.assertTrue(repair_states([self.row(1, due_at=datetime(2030, 1, 1))])["changed"][0])
+        self.assertFalse(repair_states([self.row(1, due_at=None)])["changed"][0])
+
+    def test_due_dates(self):
+        last = np.array([NOW, NOW], dtype="datetime64[us]")
+        self.assertEqual(to_datetimes(due_dates(last, [0, 4])), [NOW + timedelta(minutes=10), NOW + timedelta(days=4)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests unitaires du stockage adressé par contenu des images de cartes."""
+
+import base64
+import tempfile
+import unittest
+from pathlib import Path
+
+from app import crud_card_media, models
+from app.core import media_storage
+from sqlite_case import SQLiteTestCase
+
+
+class LocalMediaStorageTests(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.storage = media_storage.LocalMediaStorage(Path(self._tmp.name))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_put_is_content_addressed_and_idempotent(self):
+        payload = b"\x89PNG\r\n\x1a\nicon"
+        first = self.storage.put(payload, "image/png")
+        second = self.storage.put(payload, "image/png")
+        self.assertEqual(first, second)
+        digest, pathname = first
+        self.assertEqual(digest, media_storage.sha256_hex(payload))
+        self.assertEqual(pathname, f"{digest[:2]}/{digest[2:4]}/{digest}.png")
+        self.assertEqual(self.storage.read(pathname), payload)
+
+    def test_chunks_cover_whole_payload(self):
+        payload = bytes(range(256)) * 10
+        _, pathname = self.storage.put(payload, "image/jpeg")
+        chunks = list(self.storage.iter_chunks(pathname, chunk_size=100))
+        self.assertEqual(len(chunks), 26)
+        self.assertEqual(b"".join(chunks), payload)
+
+    def test_path_traversal_is_rejected(self):
+        with self.assertRaises(media_storage.MediaStorageError):
+            self.storage.exists("../../etc/passwd")
+
+    def test_empty_payload_is_rejected(self):
+        with self.assertRaises(media_storage.MediaStorageError):
+            self.storage.put(b"", "image/png")
+
+
+class DataUriTests(unittest.TestCase):
+    def test_decode_data_uri(self):
+        payload = b"<svg/>"
+        data_uri = "data:image/svg+xml;base64," + base64.b64encode(payload).decode("ascii")
+        self.assertEqual(media_storage.decode_data_uri(data_uri), (payload, "image/svg+xml"))
+
+    def test_invalid_data_uri_is_rejected(self):
+        with self.assertRaises(media_storage.MediaStorageError):
+            media_storage.decode_data_uri("data:image/png;base64,@@@")
+
+    def test_inline_images_are_served_as_urls(self):
+        self.assertEqual(media_storage.public_image_value(7, "data:image/png;base64,AAAA"), "/cards/7/image")
+        self.assertEqual(media_storage.public_image_value(7, "/cards/7/image?v=abc"), "/cards/7/image?v=abc")
+        self.assertIsNone(media_storage.public_image_value(7, None))
+        self.assertEqual(media_storage.card_image_url(7, "0123456789abcdef"), "/cards/7/image?v=0123456789ab")
+
+
+class MigrateInlineImagesTests(SQLiteTestCase):
+    DATA_URI = "data:image/png;base64," + base64.b64encode(b"\x89PNG image").decode("ascii")
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self._media = tempfile.TemporaryDirectory()
+        await self.add_deck(1, card_pks=[1])
+        card = await self.db.get(models.Card, 1)
+        card.image = self.DATA_URI
+        await self.db.commit()
+
+    async def asyncTearDown(self):
+        media_storage.set_media_storage(None)
+        self._media.cleanup()
+        await super().asyncTearDown()
+
+    async def image(self) -> str:
+        self.db.expire_all()
+        return (await self.db.get(models.Card, 1)).image
+
+    async def test_ephemeral_storage_keeps_data_uris(self):
+        media_storage.set_media_storage(media_storage.LocalMediaStorage(Path(self._media.name), durable=False))
+        with self.assertRaises(media_storage.MediaStorageError):
+            await crud_card_media.migrate_inline_images(self.db)
+        self.assertEqual(await self.image(), self.DATA_URI)
+
+    async def test_persistent_storage_migrates(self):
+        media_storage.set_media_storage(media_storage.LocalMediaStorage(Path(self._media.name), durable=True))
+        report = await crud_card_media.migrate_inline_images(self.db)
+        self.assertEqual(report["migrated"], 1)
+        self.assertTrue((await self.image()).startswith("/cards/1/image?v="))
+
+
+if __name__ == "__main__":
+    unittest.main()
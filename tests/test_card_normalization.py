@@ -0,0 +1,28 @@
+"""Tests unitaires de la clé d'unicité des cartes (``normalized_back``)."""
+
+import unittest
+
+from app.core.normalization import normalize_back
+
+
+class NormalizeBackTests(unittest.TestCase):
+    def test_case_and_outer_spaces_are_ignored(self):
+        self.assertEqual(normalize_back("  Gatto "), "gatto")
+
+    def test_inner_whitespace_is_collapsed(self):
+        self.assertEqual(normalize_back("Buona \t sera"), "buona sera")
+        self.assertEqual(normalize_back("buona sera"), "buona sera")
+
+    def test_unicode_compatibility_forms_are_unified(self):
+        decomposed = "città"
+        self.assertEqual(normalize_back("CITTÀ"), normalize_back("città"))
+        self.assertEqual(normalize_back("ﬁne"), "fine")
+        # NFKC recompose les accents saisis en deux points de code
+        self.assertEqual(normalize_back(decomposed), "città")
+
+    def test_accents_are_kept(self):
+        self.assertNotEqual(normalize_back("però"), normalize_back("pero"))
+
+
+if __name__ == "__main__":
+    unittest.main()
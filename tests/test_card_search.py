@@ -0,0 +1,80 @@
+"""Tests unitaires de l'index de recherche en mémoire (moteur SQLite/TESTING)."""
+
+import unittest
+
+from app.core import search
+
+
+class InvertedIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = search.InvertedIndex()
+        self.index.add(1, {"back": "Perché", "front": "Pourquoi", "example": "Perché sei qui?"})
+        self.index.add(2, {"back": "l'acqua", "front": "eau", "translation_en": "water"})
+        self.index.add(3, {"back": "gatto", "front": "chat", "translation_en": "cat"})
+        self.index.add(4, {"back": "gattino", "front": "chaton", "explanation_it": "un piccolo gatto"})
+
+    def pks(self, query, **kwargs):
+        return [hit.card_pk for hit in self.index.search(query, **kwargs)]
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(self.pks("PERCHE"), [1])
+
+    def test_elision_and_stopwords(self):
+        self.assertEqual(self.pks("acqua"), [2])
+        self.assertEqual(self.pks("l'eau"), [2])
+
+    def test_translations_and_explanations_are_searched(self):
+        self.assertEqual(self.pks("water"), [2])
+        self.assertEqual(self.pks("piccolo"), [4])
+
+    def test_ranking_prefers_main_fields(self):
+        self.assertEqual(self.pks("gatto"), [3, 4])
+
+    def test_prefix_and_typo_matching(self):
+        self.assertEqual(sorted(self.pks("gatt")), [3, 4])
+        self.assertEqual(self.pks("gato")[0], 3)
+
+    def test_all_terms_are_required(self):
+        self.assertEqual(self.pks("piccolo gatto"), [4])
+
+    def test_allowed_restricts_results(self):
+        self.assertEqual(self.pks("gatto", allowed=[4]), [4])
+
+    def test_remove_and_reindex(self):
+        self.index.add(3, {"back": "micio", "front": "chat"})
+        self.assertEqual(self.pks("gatto"), [4])
+        self.index.remove(4)
+        self.assertEqual(self.pks("gatto"), [])
+
+
+class HighlightTests(unittest.TestCase):
+    def test_marks_matched_words_in_original_text(self):
+        self.assertEqual(
+            search.highlight("Perché sei qui?", search.query_terms("perche")),
+            "<mark>Perché</mark> sei qui?",
+        )
+
+    def test_snippet_is_html_escaped(self):
+        self.assertEqual(
+            search.highlight('<img onerror="x"> gatto & <b>cane</b>', ["gatto"]),
+            "&lt;img onerror=&quot;x&quot;&gt; <mark>gatto</mark> &amp; &lt;b&gt;cane&lt;/b&gt;",
+        )
+        self.assertEqual(search.highlight("<gatto>", ["gatto"]), "&lt;<mark>gatto</mark>&gt;")
+
+    def test_long_text_is_cut_around_first_match(self):
+        text = " ".join(f"w{i}" for i in range(30)) + " gatto " + " ".join(f"x{i}" for i in range(30))
+        snippet = search.highlight(text, ["gatto"], max_words=6)
+        self.assertTrue(snippet.startswith("…"))
+        self.assertTrue(snippet.endswith("…"))
+        self.assertIn("<mark>gatto</mark>", snippet)
+
+    def test_highlights_only_fields_with_matches(self):
+        fields = {"back": "gatto", "front": "chat", "translation_en": "cat"}
+        self.assertEqual(search.highlights(fields, "gatto"), {"back": "<mark>gatto</mark>"})
+
+    def test_tsquery_uses_prefixes(self):
+        self.assertEqual(search.tsquery_text("Il gatto NERO"), "gatto:* & nero:*")
+
+
+if __name__ == "__main__":
+    unittest.main()
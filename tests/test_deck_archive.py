@@ -0,0 +1,77 @@
+"""Tests unitaires du format d'archive de deck (zip en flux)."""
+
+import io
+import json
+import unittest
+import zipfile
+
+from app.core import deck_archive
+from app.core.media_storage import sha256_hex
+
+
+def _build(members):
+    writer = deck_archive.ArchiveStreamWriter()
+    chunks = []
+    for name, payload in members:
+        writer.write_member(name, payload)
+        chunks.append(writer.drain())
+    chunks.append(writer.close())
+    return chunks
+
+
+class ArchiveStreamWriterTests(unittest.TestCase):
+    def test_streamed_chunks_form_a_valid_zip(self):
+        manifest = deck_archive.build_manifest({"name": "Saluti", "id_json": "saluti"})
+        cards = deck_archive.card_line({"back": "ciao"}) + deck_archive.card_line({"back": "perché"})
+        chunks = _build([(deck_archive.MANIFEST_NAME, manifest), (deck_archive.CARDS_NAME, cards)])
+        self.assertTrue(all(chunks[:-1]), "chaque membre doit produire des octets immédiatement")
+
+        archive = deck_archive.open_archive(io.BytesIO(b"".join(chunks)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(deck_archive.read_manifest(archive)["deck"]["name"], "Saluti")
+        lines = archive.read(deck_archive.CARDS_NAME).decode().splitlines()
+        self.assertEqual([json.loads(line)["back"] for line in lines], ["ciao", "perché"])
+
+    def test_media_members_round_trip(self):
+        payload = b"\x89PNG" + b"x" * 64
+        digest = sha256_hex(payload)
+        name = deck_archive.media_member(digest, "image/png")
+        self.assertEqual(name, f"media/{digest}.png")
+        self.assertEqual(deck_archive.parse_media_member(name), (digest, "image/png"))
+        self.assertEqual(deck_archive.parse_media_member(f"media/{digest}.mp3"), (digest, "audio/mpeg"))
+        for other in ("cards.ndjson", "media/abc.png", f"media/{digest}.exe", f"../media/{digest}.png"):
+            self.assertIsNone(deck_archive.parse_media_member(other))
+
+
+class ReadManifestTests(unittest.TestCase):
+    def _archive(self, manifest, with_cards=True):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            if manifest is not None:
+                archive.writestr(deck_archive.MANIFEST_NAME, json.dumps(manifest))
+            if with_cards:
+                archive.writestr(deck_archive.CARDS_NAME, "")
+        buffer.seek(0)
+        return zipfile.ZipFile(buffer)
+
+    def test_rejects_foreign_or_incomplete_archives(self):
+        valid = {"format": deck_archive.ARCHIVE_FORMAT, "version": deck_archive.ARCHIVE_VERSION, "deck": {"name": "A"}}
+        invalid = [
+            (None, True),
+            ({**valid, "format": "anki"}, True),
+            ({**valid, "version": 99}, True),
+            ({**valid, "deck": {}}, True),
+            (valid, False),
+        ]
+        for manifest, with_cards in invalid:
+            with self.assertRaises(deck_archive.DeckArchiveError):
+                deck_archive.read_manifest(self._archive(manifest, with_cards))
+        self.assertEqual(deck_archive.read_manifest(self._archive(valid))["deck"]["name"], "A")
+
+    def test_not_a_zip(self):
+        with self.assertRaises(deck_archive.DeckArchiveError):
+            deck_archive.open_archive(io.BytesIO(b"pas un zip"))
+
+
+if __name__ == "__main__":
+    unittest.main()
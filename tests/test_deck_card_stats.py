@@ -0,0 +1,82 @@
+"""Compteurs maîtrisées / en cours / à revoir des decks (``crud_users.get_deck_card_stats``)."""
+
+from datetime import datetime, timezone
+
+from app import crud_users, models
+from sqlite_case import SQLiteTestCase
+
+NOW = datetime(2026, 5, 1, tzinfo=timezone.utc)
+
+
+class DeckCardStatsTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_user(1)
+        await self.add_user(2)
+        await self.add_deck(10, card_pks=[1, 2, 3, 4, 5])
+        await self.add_deck(20, card_pks=[6])
+        # Carte 1 partagée : aucune tentative dans le deck 20
+        await self.db.execute(models.deck_cards.insert().values(deck_pk=20, card_pk=1))
+        await self.add_deck(30)
+
+    def performance(self, user_pk: int, deck_pk: int, card_pk: int, attempts: int = 1):
+        self.db.add(models.CardPerformance(
+            user_pk=user_pk, deck_pk=deck_pk, card_pk=card_pk, total_attempts=attempts, correct_count=attempts,
+        ))
+
+    def schedule(self, user_pk: int, card_pk: int, consecutive_correct: int):
+        self.db.add(models.UserCardSchedule(
+            user_pk=user_pk, card_pk=card_pk, consecutive_correct=consecutive_correct, next_review=NOW,
+        ))
+
+    async def test_counts_follow_attempts_and_user_schedule(self):
+        self.performance(1, 10, 1, attempts=2)
+        self.schedule(1, 1, 2)  # maîtrisée
+        self.performance(1, 10, 2)
+        self.schedule(1, 2, 0)  # à revoir
+        self.performance(1, 10, 3)  # à revoir : jamais planifiée
+        self.schedule(1, 4, 3)  # en cours : aucune tentative dans ce deck
+        self.performance(2, 10, 5)  # autre utilisateur
+        self.schedule(2, 5, 4)
+        await self.db.commit()
+
+        stats = await crud_users.get_deck_card_stats(self.db, 1, [10, 20, 30])
+        self.assertEqual(stats, {
+            10: {"mastered_cards": 1, "learning_cards": 2, "review_cards": 2},
+            20: {"mastered_cards": 0, "learning_cards": 2, "review_cards": 0},
+        })
+        self.assertEqual(
+            (await crud_users.get_deck_card_stats(self.db, 2, [10]))[10],
+            {"mastered_cards": 1, "learning_cards": 4, "review_cards": 0},
+        )
+
+    async def test_query_count_does_not_depend_on_deck_count(self):
+        for deck_pk in range(40, 50):
+            await self.add_deck(deck_pk, card_pks=[100 + deck_pk])
+        await self.db.commit()
+
+        counts = []
+        for deck_pks in ([10], [10, 20, 30, *range(40, 50)]):
+            with self.count_statements() as counter:
+                stats = await crud_users.get_deck_card_stats(self.db, 1, deck_pks)
+            self.assertEqual(len(stats), len([deck_pk for deck_pk in deck_pks if deck_pk != 30]))
+            counts.append(counter[0])
+        self.assertEqual(counts, [1, 1])
+
+    async def test_user_decks_listing_uses_constant_queries(self):
+        for deck_pk in range(40, 50):
+            await self.add_deck(deck_pk, card_pks=[100 + deck_pk])
+        self.db.add(models.UserDeck(user_pk=1, deck_pk=10))
+        self.db.add(models.UserDeck(user_pk=2, deck_pk=10))
+        self.db.add_all(models.UserDeck(user_pk=2, deck_pk=deck_pk) for deck_pk in (20, 30, *range(40, 50)))
+        self.performance(2, 10, 1)
+        await self.db.commit()
+
+        counts = {}
+        for user_pk in (1, 2):
+            with self.count_statements() as counter:
+                user_decks = await crud_users.get_user_decks(self.db, user_pk)
+            counts[user_pk] = counter[0]
+            stats = {user_deck.deck_pk: user_deck.review_cards for user_deck in user_decks}
+            self.assertEqual(stats[10], 1 if user_pk == 2 else 0)
+        self.assertEqual(counts[1], counts[2])
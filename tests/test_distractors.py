@@ -0,0 +1,120 @@
+"""Tests unitaires des groupes de distracteurs QCM."""
+
+import random
+import unittest
+
+from app import crud_distractors, models
+from app.core.distractors import (
+    PoolEntry,
+    PoolKey,
+    build_choices,
+    closest_answers,
+    length_band,
+    part_of_speech,
+    pool_key,
+    theme,
+)
+from sqlite_case import SQLiteTestCase
+
+
+class PoolKeyTests(unittest.TestCase):
+    def test_explicit_tag_gives_the_part_of_speech(self):
+        self.assertEqual(part_of_speech(["italien", "adjectif", "taille"], "Largo"), "adjectif")
+        self.assertEqual(part_of_speech(["verbo pronominale"], "Alzarsi"), "verbe")
+
+    def test_part_of_speech_is_guessed_from_the_answer(self):
+        self.assertEqual(part_of_speech([], "Mangiare"), "verbe")
+        self.assertEqual(part_of_speech([], "Buona sera"), "expression")
+        self.assertEqual(part_of_speech([], "Casa"), "")
+
+    def test_theme_skips_generic_and_part_of_speech_tags(self):
+        self.assertEqual(theme(["italien", "nom", "fréquent", "Cuisine"]), "cuisine")
+        self.assertEqual(theme(["italien", "A2"]), "")
+
+    def test_length_bands(self):
+        self.assertEqual([length_band(word) for word in ("Oro", "Profondo", "Silenzioso", "Contemporaneamente")], [0, 1, 2, 3])
+
+    def test_pool_key(self):
+        self.assertEqual(pool_key(["adjectif", "taille"], "Largo"), PoolKey("adjectif", 1, "taille"))
+
+
+class BuildChoicesTests(unittest.TestCase):
+    def test_answer_and_distinct_distractors(self):
+        choices = build_choices("Largo", ["largo ", "Lungo", "Alto", "Lungo", "Basso"], 4, random.Random(1))
+        self.assertEqual(sorted(choices), ["Alto", "Basso", "Largo", "Lungo"])
+
+    def test_small_pool_gives_fewer_choices(self):
+        self.assertEqual(sorted(build_choices("Largo", ["Alto"], 4, random.Random(1))), ["Alto", "Largo"])
+
+
+class ClosestAnswersTests(unittest.TestCase):
+    key = PoolKey("adjectif", 1, "taille")
+    entries = [
+        PoolEntry(1, PoolKey("adjectif", 1, "taille"), "Largo"),
+        PoolEntry(2, PoolKey("nom", 1, "taille"), "Metro"),
+        PoolEntry(3, PoolKey("adjectif", 3, "taille"), "Grandissimo"),
+        PoolEntry(4, PoolKey("adjectif", 1, "colore"), "Rosso"),
+        PoolEntry(5, PoolKey("adjectif", 1, "taille"), "Lungo"),
+    ]
+
+    def test_same_group_first_then_other_parts_of_speech(self):
+        self.assertEqual(
+            closest_answers(self.key, 1, self.entries, 10, random.Random(1)),
+            ["Lungo", "Grandissimo", "Rosso", "Metro"],
+        )
+
+    def test_limit_keeps_the_closest(self):
+        self.assertEqual(closest_answers(self.key, 5, self.entries, 1, random.Random(1)), ["Largo"])
+
+    def test_ties_are_shuffled(self):
+        entries = [PoolEntry(card_pk, self.key, f"Parola{card_pk}") for card_pk in range(20)]
+        draws = {tuple(closest_answers(self.key, 0, entries, 3, random.Random(seed))) for seed in range(5)}
+        self.assertGreater(len(draws), 1)
+
+
+class BuildQuestionsTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_deck(1, card_pks=range(1, 21))
+        await crud_distractors.sync_cards(self.db, range(1, 21))
+        await self.db.commit()
+
+    async def test_pool_is_read_once_per_quiz(self):
+        for card_pks in ([1], list(range(1, 11))):
+            with self.count_statements() as counter:
+                questions = await crud_distractors.build_questions(self.db, 1, card_pks, 4, random.Random(1))
+            self.assertEqual(counter[0], 2)
+            self.assertEqual([question["card_pk"] for question in questions], card_pks)
+            for question in questions:
+                self.assertEqual(len(set(question["choices"])), 4)
+                self.assertIn(f"back {question['card_pk']}", question["choices"])
+
+    async def test_small_group_falls_back_to_the_rest_of_the_deck(self):
+        await self.add_deck(2, card_pks=[])
+        await self.db.execute(models.deck_cards.insert(), [{"deck_pk": 2, "card_pk": card_pk} for card_pk in (1, 2)])
+        card = await self.db.get(models.Card, 1)
+        card.tags = '["verbe"]'
+        await self.db.flush()
+        await crud_distractors.sync_cards(self.db, [1, 2])
+        await self.db.commit()
+
+        with self.count_statements() as counter:
+            questions = await crud_distractors.build_questions(self.db, 2, [1], 4, random.Random(1))
+        self.assertEqual(counter[0], 3)
+        self.assertEqual(sorted(questions[0]["choices"]), ["back 1", "back 2"])
+
+    async def test_missing_pool_is_built_on_first_use(self):
+        await self.add_deck(3, card_pks=range(30, 40))
+        await self.db.commit()
+
+        questions = await crud_distractors.build_questions(self.db, 3, [30, 31], 4, random.Random(1))
+        self.assertEqual([len(set(question["choices"])) for question in questions], [4, 4])
+        self.assertEqual(len(await crud_distractors.load_pool(self.db, 3)), 10)
+        # Construit une seule fois : lecture du quiz seule ensuite
+        with self.count_statements() as counter:
+            await crud_distractors.build_questions(self.db, 3, [30], 4, random.Random(1))
+        self.assertEqual(counter[0], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""Maintenance incrémentale de la file de révision (``user_due_cards``) sur base SQLite."""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app import (
+    crud_access,
+    crud_cards,
+    crud_decks,
+    crud_due_queue,
+    crud_forecast,
+    crud_quiz,
+    crud_users,
+    models,
+    schemas,
+)
+from app.core.normalization import normalize_back
+from sqlite_case import SQLiteTestCase
+
+
+class DueQueueMaintenanceTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_user(1)
+        await self.add_deck(10, card_pks=[1, 2, 3])
+        await self.add_deck(20, card_pks=[4])
+        # Carte 3 partagée par les deux decks
+        await self.db.execute(models.deck_cards.insert().values(deck_pk=20, card_pk=3))
+        await self.db.commit()
+
+    async def queued(self, user_pk: int = 1) -> set:
+        result = await self.db.execute(
+            select(models.UserDueCard.card_pk).where(models.UserDueCard.user_pk == user_pk)
+        )
+        return set(result.scalars().all())
+
+    async def test_add_and_remove_deck(self):
+        await crud_users.add_user_deck(self.db, 1, 10)
+        await crud_users.add_user_deck(self.db, 1, 20)
+        self.assertEqual(await self.queued(), {1, 2, 3, 4})
+
+        await crud_users.remove_user_deck(self.db, 1, 10)
+        # La carte 3 reste due par le deck 20
+        self.assertEqual(await self.queued(), {3, 4})
+
+    async def test_subscription_enqueues_deck(self):
+        now = datetime.now(timezone.utc)
+        self.db.add(models.Subscription(
+            user_pk=1, product_type="deck", product_id=10, origin="manual",
+            start_at=now - timedelta(days=1), end_at=now + timedelta(days=30),
+        ))
+        await self.db.commit()
+
+        self.assertEqual(await crud_access.sync_active_deck_subscriptions(self.db, 1), 1)
+        await self.db.commit()
+        self.assertEqual(await self.queued(), {1, 2, 3})
+
+    async def test_card_linked_to_owned_deck_reaches_owners(self):
+        await self.add_user(2)
+        await crud_users.add_user_deck(self.db, 1, 20)
+        card = await self.db.get(models.Card, 1)
+        card.normalized_back = normalize_back(card.back)
+        await self.db.commit()
+
+        # Carte existante (même clé normalisée) liée au deck 20
+        now = datetime.now(timezone.utc)
+        await crud_cards.create_card(self.db, schemas.CardCreate(
+            front="front 1", back="back 1", deck_pk=20, created_at=now, next_review=now,
+        ))
+
+        self.assertEqual(await self.queued(1), {1, 3, 4})
+        self.assertEqual(await self.queued(2), set())
+
+    async def test_owner_forecasts_are_invalidated_without_user_pk(self):
+        await self.add_user(2)
+        await crud_users.add_user_deck(self.db, 1, 20)
+        cache = crud_forecast.forecast_cache
+        for user_pk in (1, 2):
+            cache.put((user_pk, 7), cache.generation(user_pk), {"days": 7})
+
+        await self.db.execute(models.deck_cards.insert().values(deck_pk=20, card_pk=1))
+        await crud_due_queue.enqueue_cards(self.db, deck_pk=20, card_pks=[1])
+        self.assertIsNone(cache.get((1, 7)))
+        self.assertIsNotNone(cache.get((2, 7)))
+
+        cache.put((1, 7), cache.generation(1), {"days": 7})
+        await crud_decks.delete_deck(self.db, 20)
+        self.assertIsNone(cache.get((1, 7)))
+        self.assertIsNotNone(cache.get((2, 7)))
+
+    async def test_scheduler_change_invalidates_owner_caches(self):
+        await self.add_user(2)
+        await crud_users.add_user_deck(self.db, 1, 10)
+        forecasts, selections = crud_forecast.forecast_cache, crud_quiz.quiz_prefetch_cache
+        for user_pk in (1, 2):
+            forecasts.put((user_pk, 7), forecasts.generation(user_pk), {"days": 7})
+            selections.put((user_pk, 10), selections.generation((user_pk, 10)), 3, [1, 2, 3], 1, 0)
+
+        self.assertIsNotNone(await crud_decks.set_deck_scheduler(self.db, 10, "memory"))
+        self.assertIsNone(forecasts.get((1, 7)))
+        self.assertIsNone(selections.pop((1, 10), 3))
+        self.assertIsNotNone(forecasts.get((2, 7)))
+        self.assertIsNotNone(selections.pop((2, 10), 3))
+
+    async def test_quiz_results_create_user_deck_with_queue(self):
+        await crud_quiz._add_session_results(self.db, 1, 10, total_questions=3, correct_count=2)
+        await self.db.commit()
+        self.assertEqual(await self.queued(), {1, 2, 3})
@@ -0,0 +1,49 @@
+"""Tests unitaires de la sélection de champs (``fields=``)."""
+
+import unittest
+from types import SimpleNamespace
+
+from app.core.fieldsets import UnknownFieldError, parse_fields
+
+ALLOWED = ["card_pk", "front", "back", "image", "tags"]
+
+
+class ParseFieldsTests(unittest.TestCase):
+    def test_absent_parameter_means_full_payload(self):
+        self.assertIsNone(parse_fields(None, ALLOWED))
+
+    def test_identifier_always_first_and_duplicates_removed(self):
+        self.assertEqual(parse_fields(" back, front ,back,", ALLOWED), ["card_pk", "back", "front"])
+        self.assertEqual(parse_fields("front,card_pk", ALLOWED), ["card_pk", "front"])
+
+    def test_empty_value_keeps_only_identifier(self):
+        self.assertEqual(parse_fields("", ALLOWED), ["card_pk"])
+
+    def test_unknown_fields_are_rejected_with_available_list(self):
+        with self.assertRaises(UnknownFieldError) as ctx:
+            parse_fields("front,nope,hash", ALLOWED)
+        message = str(ctx.exception)
+        self.assertIn("hash, nope", message)
+        self.assertIn("front", message)
+
+
+class ProjectCardTests(unittest.TestCase):
+    def test_only_requested_fields_are_read(self):
+        from app import schemas
+
+        class Card(SimpleNamespace):
+            def __getattr__(self, name):
+                raise AssertionError(f"attribut non demandé lu : {name}")
+
+        card = Card(card_pk=3, back="ciao", tags='["saluti"]', image="data:image/png;base64,AAAA")
+        payload = schemas.project_card(card, ["card_pk", "back", "tags", "image"])
+        self.assertEqual(payload, {
+            "card_pk": 3,
+            "back": "ciao",
+            "tags": ["saluti"],
+            "image": "/cards/3/image",
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
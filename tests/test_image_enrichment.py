@@ -0,0 +1,80 @@
+"""Tests unitaires de la recherche d'icônes différée (sans réseau)."""
+
+import asyncio
+import threading
+import time
+import unittest
+
+from app.core import image_enrichment
+
+
+class FakeMagnific:
+    """Fournisseur local : enregistre les appels et le parallélisme observé."""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, query):
+        with self._lock:
+            self.calls.append(query)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        if query == "boom":
+            raise RuntimeError("quota")
+        if query in self.missing:
+            return None
+        return query.encode(), "image/png"
+
+
+class FetchImagesTests(unittest.TestCase):
+    def test_one_call_per_distinct_query(self):
+        fake = FakeMagnific()
+        results = asyncio.run(
+            image_enrichment.fetch_images(["cat", "dog", "cat", "cat"], fetcher=fake, concurrency=4)
+        )
+        self.assertEqual(sorted(fake.calls), ["cat", "dog"])
+        self.assertEqual(results["cat"], (b"cat", "image/png"))
+
+    def test_concurrency_is_bounded(self):
+        fake = FakeMagnific()
+        queries = [f"q{i}" for i in range(8)]
+        asyncio.run(image_enrichment.fetch_images(queries, fetcher=fake, concurrency=2))
+        self.assertEqual(len(fake.calls), 8)
+        self.assertLessEqual(fake.peak, 2)
+
+    def test_failures_become_missing_results(self):
+        fake = FakeMagnific(missing={"zzz"})
+        results = asyncio.run(image_enrichment.fetch_images(["boom", "zzz"], fetcher=fake))
+        self.assertEqual(results, {"boom": None, "zzz": None})
+
+    def test_fetcher_can_be_swapped(self):
+        fake = FakeMagnific()
+        image_enrichment.set_image_fetcher(fake)
+        try:
+            asyncio.run(image_enrichment.fetch_images(["cat"]))
+        finally:
+            image_enrichment.set_image_fetcher(None)
+        self.assertEqual(fake.calls, ["cat"])
+        self.assertIs(image_enrichment.get_image_fetcher(), image_enrichment.fetch_magnific_image)
+
+
+class BackoffTests(unittest.TestCase):
+    def test_backoff_is_exponential_and_capped(self):
+        base = image_enrichment.IMAGE_ENRICHMENT_BACKOFF_SECONDS
+        self.assertEqual(image_enrichment.backoff_delay(1), base)
+        self.assertEqual(image_enrichment.backoff_delay(3), base * 4)
+        self.assertEqual(
+            image_enrichment.backoff_delay(50),
+            image_enrichment.IMAGE_ENRICHMENT_MAX_BACKOFF_SECONDS,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
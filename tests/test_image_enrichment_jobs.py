@@ -0,0 +1,126 @@
+"""Cycle de vie des tâches d'enrichissement d'images sur base SQLite temporaire."""
+
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from sqlalchemy import select, update
+
+from app import crud_cards, crud_image_enrichment, models, schemas
+from app.core import media_storage
+from app.core.image_enrichment import IMAGE_ENRICHMENT_MAX_ATTEMPTS, backoff_delay
+from app.core.normalization import normalize_back
+from sqlite_case import SQLiteTestCase
+
+Job = models.ImageEnrichmentJob
+
+
+class ImageEnrichmentJobTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self._media = tempfile.TemporaryDirectory()
+        media_storage.set_media_storage(media_storage.LocalMediaStorage(Path(self._media.name)))
+        await self.add_deck(1, card_pks=[1, 2, 3])
+        await crud_image_enrichment.enqueue_card_images(self.db, [(1, "gatto"), (2, "gatto"), (3, "cane")])
+        await self.db.commit()
+        self.calls = []
+
+    async def asyncTearDown(self):
+        media_storage.set_media_storage(None)
+        self._media.cleanup()
+        await super().asyncTearDown()
+
+    def fetcher(self, found=("gatto",)):
+        def fetch(query):
+            self.calls.append(query)
+            return (b"\x89PNG" + query.encode(), "image/png") if query in found else None
+        return fetch
+
+    async def jobs(self) -> dict:
+        self.db.expire_all()
+        return {job.card_pk: job for job in (await self.db.execute(select(Job))).scalars()}
+
+    async def run_batch(self, **kwargs):
+        return await crud_image_enrichment.run_enrichment_batch(self.db, fetcher=self.fetcher(**kwargs), concurrency=2)
+
+    async def test_success_and_miss(self):
+        report = await self.run_batch()
+        self.assertEqual(sorted(self.calls), ["cane", "gatto"])  # une recherche par requête distincte
+        self.assertEqual(
+            {key: report[key] for key in ("claimed", "done", "retried", "fetched", "missed")},
+            {"claimed": 3, "done": 2, "retried": 1, "fetched": 1, "missed": 1},
+        )
+        jobs = await self.jobs()
+        self.assertEqual((jobs[1].status, jobs[2].status, jobs[3].status), ("done", "done", "pending"))
+        self.assertEqual(jobs[3].attempts, 1)
+        images = dict((await self.db.execute(select(models.Card.card_pk, models.Card.image))).all())
+        self.assertTrue(images[1].startswith("/cards/1/image?v="))
+        self.assertIsNone(images[3])
+
+    async def test_retry_waits_for_backoff_then_fails(self):
+        await self.run_batch()
+        job = (await self.jobs())[3]
+        delay = (job.next_attempt_at.replace(tzinfo=timezone.utc) - job.updated_at.replace(tzinfo=timezone.utc)).total_seconds()
+        self.assertAlmostEqual(delay, backoff_delay(1), delta=1)
+        self.assertEqual((await self.run_batch())["claimed"], 0)  # pas avant l'échéance
+
+        for attempt in range(2, IMAGE_ENRICHMENT_MAX_ATTEMPTS + 1):
+            await self.db.execute(update(Job).where(Job.card_pk == 3).values(next_attempt_at=datetime.now(timezone.utc) - timedelta(seconds=1)))
+            await self.db.commit()
+            report = await self.run_batch()
+            self.assertEqual(report["claimed"], 1)
+        job = (await self.jobs())[3]
+        self.assertEqual((job.status, job.attempts), ("failed", IMAGE_ENRICHMENT_MAX_ATTEMPTS))
+        self.assertEqual(job.last_error, "Aucune image trouvée")
+        self.assertEqual((await self.run_batch())["claimed"], 0)
+
+    async def test_expired_lease_is_claimed_again(self):
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=crud_image_enrichment.IMAGE_ENRICHMENT_LEASE_SECONDS + 60)
+        await self.db.execute(update(Job).where(Job.card_pk == 1).values(status="running", updated_at=stale))
+        await self.db.execute(update(Job).where(Job.card_pk.in_([2, 3])).values(status="running", updated_at=now))
+        await self.db.commit()
+        report = await self.run_batch()
+        self.assertEqual(report["claimed"], 1)
+        self.assertEqual(self.calls, ["gatto"])
+        jobs = await self.jobs()
+        self.assertEqual((jobs[1].status, jobs[2].status), ("done", "running"))
+
+    async def test_known_image_is_reused_without_fetching(self):
+        await self.run_batch()
+        await self.add_deck(2, card_pks=[4])
+        await crud_image_enrichment.enqueue_card_images(self.db, [(4, "gatto")])
+        await self.db.commit()
+        self.calls.clear()
+        report = await self.run_batch()
+        self.assertEqual((report["reused"], report["fetched"], self.calls), (1, 0, []))
+        self.assertEqual((await self.jobs())[4].status, "done")
+
+    async def test_batch_import_queues_remote_urls(self):
+        url = "https://example.com/cane.png"
+        await self.add_deck(2, card_pks=[4])
+        card = await self.db.get(models.Card, 4)
+        card.normalized_back = normalize_back(card.back)
+        await self.db.commit()
+
+        now = datetime.now(timezone.utc)
+        with mock.patch.object(crud_image_enrichment, "download_image") as download:
+            await crud_cards.batch_upsert_cards(self.db, [schemas.CardCreate(
+                front="front 4", back="back 4", image=url, deck_pk=2, created_at=now, next_review=now,
+            )])
+            # Rien n'est téléchargé pendant l'import : l'URL attend dans la file
+            download.assert_not_called()
+            self.assertEqual((await self.jobs())[4].search_query, url)
+
+            download.return_value = (b"\x89PNG cane", "image/png")
+            await self.run_batch()
+        download.assert_called_once_with(url)
+        self.assertNotIn(url, self.calls)
+        self.assertEqual((await self.jobs())[4].status, "done")
+        self.assertTrue((await self.db.get(models.Card, 4)).image.startswith("/cards/4/image?v="))
+
+
+if __name__ == "__main__":
+    unittest.main()
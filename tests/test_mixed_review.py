@@ -0,0 +1,48 @@
+"""Tests unitaires de la fusion des files de révision (sessions mixtes)."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from app.core.mixed_review import StreamEntry, merge_streams
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def entry(deck_pk, card_pk, due_in_hours, priority_score=None):
+    return StreamEntry(deck_pk, card_pk, NOW + timedelta(hours=due_in_hours), priority_score)
+
+
+class MergeStreamsTests(unittest.TestCase):
+    def test_streams_are_merged_by_due_date(self):
+        first = [entry(1, 1, -10), entry(1, 2, 5)]
+        second = [entry(2, 3, -3), entry(2, 4, 1)]
+        merged = merge_streams([first, second], 3)
+        self.assertEqual([item.card_pk for item in merged], [1, 3, 4])
+
+    def test_difficult_card_first_on_equal_due_date(self):
+        merged = merge_streams([[entry(1, 1, 0, 0)], [entry(2, 2, 0, 5)]], 2)
+        self.assertEqual([item.card_pk for item in merged], [2, 1])
+
+    def test_shared_card_is_kept_once_for_its_first_deck(self):
+        merged = merge_streams([[entry(1, 7, -2)], [entry(2, 7, -1), entry(2, 8, 0)]], 5)
+        self.assertEqual([(item.deck_pk, item.card_pk) for item in merged], [(1, 7), (2, 8)])
+
+    def test_streams_are_consumed_lazily(self):
+        pulled = []
+
+        def stream(deck_pk):
+            for card_pk in range(deck_pk * 100, deck_pk * 100 + 50):
+                pulled.append(card_pk)
+                yield entry(deck_pk, card_pk, card_pk - deck_pk * 100)
+
+        merge_streams([stream(1), stream(2)], 4)
+        self.assertLess(len(pulled), 10)
+
+    def test_aware_and_naive_dates_compare(self):
+        aware = StreamEntry(1, 1, (NOW - timedelta(hours=1)).replace(tzinfo=timezone.utc))
+        merged = merge_streams([[aware], [entry(2, 2, 0)]], 2)
+        self.assertEqual([item.card_pk for item in merged], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
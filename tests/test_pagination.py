@@ -0,0 +1,40 @@
+"""Tests unitaires des curseurs de pagination keyset."""
+
+import unittest
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.core import pagination
+
+
+class CursorTests(unittest.TestCase):
+    def test_round_trip_keeps_timezone_and_microseconds(self):
+        position = datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=timezone.utc)
+        token = pagination.encode_cursor("cards", position, 42)
+        self.assertNotIn("=", token)
+        self.assertEqual(pagination.decode_cursor("cards", token), (position, 42))
+
+    def test_naive_datetimes_stay_naive(self):
+        position = datetime(2026, 3, 1, 8, 30)
+        token = pagination.encode_cursor("scores", position, 7)
+        self.assertEqual(pagination.decode_cursor("scores", token), (position, 7))
+
+    def test_cursor_is_bound_to_its_listing(self):
+        token = pagination.encode_cursor("scores", datetime(2026, 1, 1), 1)
+        with self.assertRaises(pagination.InvalidCursorError):
+            pagination.decode_cursor("cards", token)
+
+    def test_garbage_is_rejected(self):
+        for token in ("garbage", "", "e30", "eyJzIjoiY2FyZHMifQ"):
+            with self.assertRaises(pagination.InvalidCursorError):
+                pagination.decode_cursor("cards", token)
+
+    def test_next_cursor_only_for_full_pages(self):
+        rows = [SimpleNamespace(next_review=datetime(2026, 1, i), card_pk=i) for i in range(1, 4)]
+        self.assertIsNone(pagination.next_cursor("cards", rows, 5, "next_review", "card_pk"))
+        token = pagination.next_cursor("cards", rows, 3, "next_review", "card_pk")
+        self.assertEqual(pagination.decode_cursor("cards", token), (datetime(2026, 1, 3), 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""``POST /api/quiz/sessions/{session_pk}/answers`` sur base SQLite."""
+
+import json
+
+import httpx
+from sqlalchemy import func, select
+
+from app import models
+from app.database import get_db
+from app.main import app
+from app.security import get_current_active_user
+from sqlite_case import SQLiteTestCase
+
+
+class SessionAnswersEndpointTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_user(1, role="professeur")
+        await self.add_deck(10, card_pks=[1, 2, 3, 4])
+        session = models.QuizSession(
+            user_pk=1, deck_pk=10, card_count=2, cycle_number=1, used_card_pks=json.dumps([1, 2]),
+        )
+        self.db.add(session)
+        await self.db.flush()
+        self.session_pk = session.session_pk
+        await self.db.commit()
+
+        async def override_db():
+            yield self.db
+
+        async def override_user():
+            return await self.db.get(models.User, 1)
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_active_user] = override_user
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        app.dependency_overrides.clear()
+        await super().asyncTearDown()
+
+    async def post_answers(self, *answers):
+        return await self.client.post(
+            f"/api/quiz/sessions/{self.session_pk}/answers",
+            json={"answers": [{"card_pk": card_pk, "is_correct": correct} for card_pk, correct in answers]},
+        )
+
+    async def attempts(self) -> int:
+        result = await self.db.execute(select(func.coalesce(func.sum(models.CardPerformance.total_attempts), 0)))
+        return result.scalar_one()
+
+    async def test_records_answers_of_session_cards(self):
+        response = await self.post_answers((1, True), (2, False), (1, True))
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual([row["card_pk"] for row in response.json()], [1, 2])
+        self.assertEqual(await self.attempts(), 3)
+
+    async def test_rejects_cards_outside_session(self):
+        # Carte 3 : du même deck, mais pas tirée pour cette session
+        response = await self.post_answers((1, True), (3, True))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("[3]", response.json()["detail"])
+        self.assertEqual(await self.attempts(), 0)
+
+    async def test_rejects_answers_after_completion(self):
+        self.assertEqual((await self.post_answers((1, True), (2, True))).status_code, 200)
+        completed = await self.client.post(
+            f"/api/quiz/complete/{self.session_pk}", params={"correct_count": 2, "total_questions": 2}
+        )
+        self.assertEqual(completed.status_code, 200, completed.text)
+
+        # Lot renvoyé après la finalisation : pas de second crédit
+        response = await self.post_answers((1, True), (2, True))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(await self.attempts(), 2)
@@ -0,0 +1,74 @@
+"""Tests unitaires du cache des sélections de quiz préparées."""
+
+import unittest
+
+from app.core.quiz_prefetch import QuizSelectionCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class QuizSelectionCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = QuizSelectionCache(max_entries=2, ttl_seconds=60, clock=self.clock)
+
+    def store(self, key, card_count=10, card_pks=(1, 2, 3)):
+        return self.cache.put(key, self.cache.generation(key), card_count, list(card_pks), 1, 0)
+
+    def test_entry_is_served_once(self):
+        self.store((1, 5))
+        entry = self.cache.pop((1, 5), 10)
+        self.assertEqual(entry.card_pks, [1, 2, 3])
+        self.assertIsNone(self.cache.pop((1, 5), 10))
+        self.assertEqual((self.cache.counters["hits"], self.cache.counters["misses"]), (1, 1))
+
+    def test_other_card_count_or_expired_entry_is_a_miss(self):
+        self.store((1, 5))
+        self.assertIsNone(self.cache.pop((1, 5), 20))
+        self.store((1, 5))
+        self.clock.now = 61
+        self.assertIsNone(self.cache.pop((1, 5), 10))
+        self.assertEqual(self.cache.counters["misses"], 2)
+
+    def test_invalidation_during_preparation_discards_the_result(self):
+        generation = self.cache.generation((1, 5))
+        self.cache.invalidate(1, 5)
+        self.assertFalse(self.cache.put((1, 5), generation, 10, [1], 1, 0))
+        self.assertIsNone(self.cache.pop((1, 5), 10))
+        self.assertEqual(self.cache.counters["discarded"], 1)
+
+    def test_forgotten_generations_discard_pending_preparations(self):
+        generation = self.cache.generation((1, 5))
+        for user_pk in range(2, 12):
+            self.cache.invalidate(user_pk, 5)
+        self.assertFalse(self.cache.put((1, 5), generation, 10, [1], 1, 0))
+
+    def test_invalidating_a_user_drops_all_their_decks(self):
+        self.store((1, 5))
+        self.store((1, 6))
+        self.cache.invalidate(1)
+        self.assertEqual(self.cache.stats()["entries"], 0)
+        self.assertEqual(self.cache.counters["invalidations"], 2)
+
+    def test_invalidating_a_user_discards_their_pending_preparations(self):
+        generation = self.cache.generation((1, 7))
+        self.cache.invalidate(1)
+        self.assertFalse(self.cache.put((1, 7), generation, 10, [1], 1, 0))
+
+    def test_least_recently_stored_entry_is_evicted(self):
+        self.store((1, 5))
+        self.store((2, 5))
+        self.store((3, 5))
+        self.assertIsNone(self.cache.pop((1, 5), 10))
+        self.assertIsNotNone(self.cache.pop((3, 5), 10))
+        self.assertEqual(self.cache.counters["evictions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
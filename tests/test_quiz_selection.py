@@ -0,0 +1,80 @@
+"""Tests unitaires du choix des cartes de quiz sur candidats légers."""
+
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from app.core.quiz_selection import Candidate, choose_cards, naive_utc, weight, weighted_sample
+
+NOW = datetime(2026, 5, 1, 12, 0)
+
+
+def candidate(card_pk, due_in_hours, priority_score=None):
+    return Candidate(card_pk, NOW + timedelta(hours=due_in_hours), priority_score)
+
+
+class ChooseCardsTests(unittest.TestCase):
+    def test_due_cards_are_always_taken_first(self):
+        candidates = [candidate(pk, -1) for pk in (1, 2, 3)] + [candidate(pk, 24) for pk in range(4, 40)]
+        selected, review_count = choose_cards(candidates, 3, NOW, random.Random(1))
+        self.assertEqual(sorted(selected), [1, 2, 3])
+        self.assertEqual(review_count, 3)
+
+    def test_learning_cards_complete_the_selection_without_duplicates(self):
+        candidates = [candidate(1, -1)] + [candidate(pk, 24) for pk in range(2, 6)]
+        selected, _ = choose_cards(candidates, 5, NOW, random.Random(3))
+        self.assertIn(1, selected)
+        self.assertEqual(len(selected), len(set(selected)))
+        self.assertLessEqual(len(selected), 5)
+
+    def test_difficult_cards_are_drawn_more_often(self):
+        candidates = [candidate(1, 24, priority_score=9), candidate(2, 24, priority_score=-3)]
+        rng = random.Random(7)
+        picks = [choose_cards(candidates, 1, NOW, rng)[0][0] for _ in range(500)]
+        self.assertGreater(picks.count(1), picks.count(2) * 5)
+
+    def test_exact_card_count_when_enough_cards(self):
+        candidates = [candidate(1, 24, priority_score=50)] + [candidate(pk, 24) for pk in range(2, 30)]
+        rng = random.Random(11)
+        for _ in range(50):
+            selected, _ = choose_cards(candidates, 10, NOW, rng)
+            self.assertEqual(len(selected), 10)
+            self.assertEqual(len(set(selected)), 10)
+
+    def test_duplicate_candidates_count_once(self):
+        candidates = [candidate(1, 24), candidate(1, 24, priority_score=3), candidate(2, 24)]
+        selected, _ = choose_cards(candidates, 5, NOW, random.Random(2))
+        self.assertEqual(sorted(selected), [1, 2])
+
+    def test_weight_ignores_negative_scores(self):
+        self.assertEqual(weight(candidate(1, 0)), 1.0)
+        self.assertEqual(weight(candidate(1, 0, priority_score=-4)), 1.0)
+        self.assertEqual(weight(candidate(1, 0, priority_score=3)), 4.0)
+
+    def test_aware_due_dates_compare_with_naive_now(self):
+        aware = datetime(2026, 5, 1, 13, 0, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(naive_utc(aware), datetime(2026, 5, 1, 11, 0))
+        selected, review_count = choose_cards([Candidate(1, aware)], 1, NOW, random.Random(0))
+        self.assertEqual((selected, review_count), ([1], 1))
+
+
+class WeightedSampleTests(unittest.TestCase):
+    def test_returns_k_distinct_items(self):
+        items = list(range(100))
+        sample = weighted_sample(items, [1.0] * 99 + [1000.0], 20, random.Random(4))
+        self.assertEqual(len(sample), 20)
+        self.assertEqual(len(set(sample)), 20)
+        self.assertIn(99, sample)
+
+    def test_k_larger_than_population(self):
+        self.assertEqual(sorted(weighted_sample("abc", [1, 2, 3], 10, random.Random(1))), ["a", "b", "c"])
+        self.assertEqual(weighted_sample("abc", [1, 2, 3], 0), [])
+
+    def test_first_draw_is_proportional_to_weight(self):
+        rng = random.Random(5)
+        firsts = [weighted_sample("ab", [3.0, 1.0], 1, rng)[0] for _ in range(4000)]
+        self.assertAlmostEqual(firsts.count("a") / 4000, 0.75, delta=0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
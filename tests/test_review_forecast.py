@@ -0,0 +1,117 @@
+"""Tests unitaires de la prévision de charge de révision."""
+
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from app import crud_forecast, crud_users, models
+from app.core.review_forecast import ForecastCache, due_days, simulate, smoothed_rates
+from sqlite_case import SQLiteTestCase
+
+START = datetime(2026, 5, 1)
+
+
+class SimulateTests(unittest.TestCase):
+    def test_always_remembered_card_follows_anki_intervals(self):
+        counts = simulate([2.5], [0], [0], [0], [1.0], 10, runs=3, rng=np.random.default_rng(0))
+        # Jour 0 (intervalle 1), jour 1 (intervalle 6), jour 7
+        self.assertEqual(np.flatnonzero(counts).tolist(), [0, 1, 7])
+        self.assertEqual(counts[[0, 1, 7]].tolist(), [1.0, 1.0, 1.0])
+
+    def test_forgotten_card_is_seen_again_the_same_day_and_the_next(self):
+        counts = simulate([2.5], [10], [3], [0], [0.0], 3, runs=1, rng=np.random.default_rng(0))
+        self.assertEqual(counts.tolist(), [2.0, 2.0, 2.0])
+
+    def test_cards_beyond_the_horizon_are_not_counted(self):
+        counts = simulate([2.5, 2.5], [6, 6], [2, 2], [3, 40], [1.0, 1.0], 10, runs=1, rng=np.random.default_rng(0))
+        self.assertEqual(counts[3], 1.0)
+        self.assertEqual(counts.sum(), 1.0)
+
+    def test_seeded_simulation_is_reproducible(self):
+        args = ([2.5] * 50, [0] * 50, [0] * 50, list(range(50)), [0.7] * 50, 20)
+        first = simulate(*args, rng=np.random.default_rng(4))
+        second = simulate(*args, rng=np.random.default_rng(4))
+        self.assertEqual(first.tolist(), second.tolist())
+
+    def test_memory_scheduler_spaces_reviews_by_stability(self):
+        counts = simulate(
+            [2.5], [0], [0], [0], [1.0], 15, runs=1, rng=np.random.default_rng(0),
+            scheduler=[0], schedulers=[("memory", None)],
+        )
+        # Stabilité 1 jour, puis 3,6 (réponse 3) puis environ 14 : au-delà de l'horizon
+        self.assertEqual(np.flatnonzero(counts).tolist(), [0, 1, 5])
+
+    def test_cards_follow_their_own_scheduler(self):
+        counts = simulate(
+            [2.5, 2.5], [0, 0], [0, 0], [0, 0], [1.0, 1.0], 10, runs=1, rng=np.random.default_rng(0),
+            scheduler=[0, 1], schedulers=[("sm2", None), ("memory", None)],
+        )
+        self.assertEqual(counts[[0, 1, 5, 7]].tolist(), [2.0, 2.0, 1.0, 1.0])
+
+    def test_no_cards(self):
+        self.assertEqual(simulate([], [], [], [], [], 4).tolist(), [0.0] * 4)
+
+
+class HelpersTests(unittest.TestCase):
+    def test_overdue_cards_fall_on_day_zero(self):
+        due = [datetime(2026, 4, 20), datetime(2026, 5, 1, 23, 0), datetime(2026, 5, 3, 0, 0)]
+        self.assertEqual(due_days(due, START).tolist(), [0, 0, 2])
+
+    def test_rates_are_pulled_towards_prior(self):
+        self.assertAlmostEqual(float(smoothed_rates(0, 0, 0.8)), 0.8)
+        self.assertAlmostEqual(float(smoothed_rates(1, 1, 0.5, weight=1)), 0.75)
+        self.assertAlmostEqual(float(smoothed_rates(900, 1000, 0.5)), 902.5 / 1005)
+
+
+class ForecastCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = ForecastCache(max_entries=2, ttl_seconds=60, clock=lambda: self.now)
+
+    def test_review_invalidates_user_forecasts_only(self):
+        for key in ((1, 30), (2, 30)):
+            self.cache.put(key, self.cache.generation(key[0]), {"user": key[0]})
+        self.cache.invalidate(1)
+        self.assertIsNone(self.cache.get((1, 30)))
+        self.assertEqual(self.cache.get((2, 30)), {"user": 2})
+
+    def test_computation_started_before_a_review_is_not_stored(self):
+        generation = self.cache.generation(1)
+        self.cache.invalidate(1)
+        self.assertFalse(self.cache.put((1, 30), generation, {}))
+
+    def test_entries_expire_and_are_bounded(self):
+        self.cache.put((1, 30), self.cache.generation(1), {})
+        self.now = 61
+        self.assertIsNone(self.cache.get((1, 30)))
+        for user_pk in (1, 2, 3):
+            self.cache.put((user_pk, 7), self.cache.generation(user_pk), {})
+        self.assertIsNone(self.cache.get((1, 7)))
+        self.assertIsNotNone(self.cache.get((3, 7)))
+
+
+class UserForecastTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_user(1)
+        await self.add_deck(10, card_pks=range(1, 11))
+        await crud_users.add_user_deck(self.db, 1, 10)
+
+    async def total_reviews(self, scheduler: str, params=None) -> float:
+        deck = await self.db.get(models.Deck, 10)
+        deck.scheduler, deck.scheduler_params = scheduler, params
+        await self.db.commit()
+        crud_forecast.forecast_cache.invalidate(1)
+        forecast = await crud_forecast.get_user_forecast(self.db, 1, 14)
+        return sum(day["expected_reviews"] for day in forecast["daily"])
+
+    async def test_forecast_uses_the_deck_scheduler(self):
+        sm2 = await self.total_reviews("sm2")
+        # Rétention visée 0,99 : révisions presque quotidiennes au début
+        memory = await self.total_reviews("memory", {"target_retention": 0.99})
+        self.assertGreater(memory, 2 * sm2)
+
+
+if __name__ == "__main__":
+    unittest.main()
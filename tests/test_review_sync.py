@@ -0,0 +1,90 @@
+"""Tests unitaires de la synchronisation des révisions hors ligne."""
+
+import gzip
+import unittest
+import zlib
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import UUID
+
+from app.core.review_sync import (
+    SyncPayloadError,
+    SyncPayloadTooLarge,
+    decode_body,
+    in_review_order,
+    review_time,
+    unique_events,
+)
+from app.core.schedulers import answer_grade
+from app.crud_schedules import NEW_CARD, apply_review
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def event(number, hours_ago, card_pk=1):
+    return SimpleNamespace(
+        event_id=UUID(int=number),
+        card_pk=card_pk,
+        reviewed_at=NOW - timedelta(hours=hours_ago),
+    )
+
+
+class DecodeBodyTests(unittest.TestCase):
+    def test_plain_gzip_and_deflate_bodies(self):
+        data = b'{"events": []}'
+        self.assertEqual(decode_body(data, None), data)
+        self.assertEqual(decode_body(gzip.compress(data), "gzip"), data)
+        self.assertEqual(decode_body(zlib.compress(data), "Deflate"), data)
+
+    def test_invalid_or_unknown_encoding_is_rejected(self):
+        with self.assertRaises(SyncPayloadError):
+            decode_body(b"not gzip", "gzip")
+        with self.assertRaises(SyncPayloadError):
+            decode_body(b"{}", "br")
+        with self.assertRaises(SyncPayloadError):
+            decode_body(gzip.compress(b"x" * 1000)[:20], "gzip")
+
+    def test_decompressed_size_is_bounded(self):
+        bomb = gzip.compress(b" " * 10_000)
+        with self.assertRaises(SyncPayloadTooLarge):
+            decode_body(bomb, "gzip", max_bytes=1000)
+        with self.assertRaises(SyncPayloadTooLarge):
+            decode_body(b" " * 1001, None, max_bytes=1000)
+
+
+class EventOrderTests(unittest.TestCase):
+    def test_duplicates_in_batch_keep_first_occurrence(self):
+        first, again, other = event(1, 5), event(1, 1), event(2, 3)
+        self.assertEqual(unique_events([first, other, again]), [first, other])
+
+    def test_events_are_applied_by_client_time(self):
+        late, early, naive = event(1, 1), event(2, 5), event(3, 3)
+        naive.reviewed_at = naive.reviewed_at.replace(tzinfo=None)
+        self.assertEqual(in_review_order([late, early, naive]), [early, naive, late])
+
+    def test_ties_are_broken_by_event_id(self):
+        second, first = event(2, 1), event(1, 1)
+        self.assertEqual(in_review_order([second, first]), [first, second])
+
+
+class ReviewTimeTests(unittest.TestCase):
+    def test_client_time_is_kept(self):
+        reviewed_at = NOW - timedelta(days=2)
+        self.assertEqual(review_time(reviewed_at, None, NOW), reviewed_at)
+
+    def test_future_client_clock_is_clamped_to_now(self):
+        self.assertEqual(review_time(NOW + timedelta(hours=3), None, NOW), NOW)
+
+    def test_never_before_last_known_review(self):
+        last = (NOW - timedelta(hours=1)).replace(tzinfo=None)
+        self.assertEqual(review_time(NOW - timedelta(days=1), last, NOW), last.replace(tzinfo=timezone.utc))
+
+    def test_next_review_is_computed_from_review_time(self):
+        reviewed_at = NOW - timedelta(days=3)
+        state = apply_review(NEW_CARD, answer_grade(95), reviewed_at)
+        self.assertEqual(state.last_reviewed_at, reviewed_at)
+        self.assertEqual(state.next_review, reviewed_at + timedelta(days=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
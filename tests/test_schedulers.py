@@ -0,0 +1,142 @@
+"""Tests unitaires des planificateurs interchangeables et de leur calibrage."""
+
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.core.scheduler_fitting import fit, grades_from_scores, log_losses, review_log
+from app.core.schedulers import answer_grade, get_scheduler, next_stability, retrievability
+from app.crud_schedules import NEW_CARD, Review, apply_review, apply_reviews
+
+NOW = datetime(2026, 5, 1, 12, 0, tzinfo=timezone.utc)
+MEMORY = ("memory", None)
+
+
+class RegistryTests(unittest.TestCase):
+    def test_params_are_merged_with_defaults(self):
+        params = get_scheduler("memory").params({"growth": 3})
+        self.assertEqual(params["growth"], 3.0)
+        self.assertEqual(params["target_retention"], 0.9)
+        self.assertEqual(get_scheduler(None).name, "sm2")
+
+    def test_invalid_configurations(self):
+        for name, params in (("fsrs", None), ("memory", {"foo": 1}), ("memory", {"lapse": 2}), ("sm2", {"growth": 1})):
+            with self.assertRaises(ValueError):
+                get_scheduler(name).params(params)
+
+
+class MemorySchedulerTests(unittest.TestCase):
+    def test_new_card_starts_at_initial_stability(self):
+        state = apply_review(NEW_CARD, 2, NOW, MEMORY)
+        self.assertEqual((state.stability, state.interval), (1.0, 1))
+        self.assertEqual(state.next_review, NOW + timedelta(days=1))
+
+    def test_review_at_due_date_grows_stability(self):
+        state = apply_review(NEW_CARD, 2, NOW, MEMORY)
+        state = apply_review(state, 2, state.next_review, MEMORY)
+        # R = 0,9 à l'échéance : S × (1 + growth)
+        self.assertAlmostEqual(state.stability, 3.0)
+        self.assertEqual(state.interval, 3)
+
+    def test_lapse_shrinks_stability_and_relearns_in_ten_minutes(self):
+        state = apply_review(NEW_CARD, 2, NOW, ("memory", {"initial_stability": 10}))
+        state = apply_review(state, 0, NOW + timedelta(days=10), ("memory", {"initial_stability": 10}))
+        self.assertAlmostEqual(state.stability, 3.0)
+        self.assertEqual((state.interval, state.consecutive_correct, state.box), (0, 0, 0))
+        self.assertEqual(state.next_review, NOW + timedelta(days=10, minutes=10))
+
+    def test_sm2_interval_seeds_stability(self):
+        sm2_state = apply_review(apply_review(NEW_CARD, 2, NOW), 2, NOW + timedelta(days=1))
+        self.assertIsNone(sm2_state.stability)
+        state = apply_review(sm2_state, 2, sm2_state.next_review, MEMORY)
+        self.assertAlmostEqual(state.stability, 6.0 * 3)
+
+    def test_retention_target_shortens_intervals(self):
+        self.assertLess(retrievability(10, 10), 0.91)
+        state = apply_review(NEW_CARD, 2, NOW, ("memory", {"initial_stability": 10, "target_retention": 0.95}))
+        self.assertEqual(state.interval, 5)
+
+
+class ApplyReviewsTests(unittest.TestCase):
+    def test_each_deck_uses_its_scheduler(self):
+        states = apply_reviews(
+            {}, [Review(1, 3, deck_pk=1), Review(2, 3, deck_pk=2), Review(3, 3)], {2: MEMORY}, now=NOW,
+        )
+        self.assertIsNone(states[1].stability)
+        self.assertEqual(states[2].stability, 1.0)
+        self.assertEqual(states[1], states[3])
+
+    def test_reviews_of_a_card_apply_in_order(self):
+        reviews = [Review(1, 2, 1, NOW), Review(1, 2, 1, NOW + timedelta(days=1)), Review(1, 0, 1, NOW + timedelta(days=4))]
+        states = apply_reviews({}, reviews, {1: MEMORY}, now=NOW + timedelta(days=5))
+        expected = NEW_CARD
+        for review in reviews:
+            expected = apply_review(expected, review.grade, review.reviewed_at, MEMORY)
+        self.assertEqual(states[1], expected)
+
+    def test_review_time_is_clamped_to_now(self):
+        state = apply_reviews({}, [Review(1, 2, None, NOW + timedelta(days=3))], now=NOW)[1]
+        self.assertEqual(state.last_reviewed_at, NOW)
+
+
+class FittingTests(unittest.TestCase):
+    def synthetic_log(self, params, sequences=1500, reviews=6, seed=3):
+        rng = np.random.default_rng(seed)
+        users, cards, days, scores, correct = [], [], [], [], []
+        for sequence in range(sequences):
+            stability, day, previous = np.nan, 0.0, 0.0
+            for position in range(reviews):
+                remembered = True
+                if position:
+                    day += stability * rng.uniform(0.3, 3.0)
+                    remembered = rng.random() < retrievability(day - previous, stability)
+                grade = 2 if remembered else 0
+                stability = float(next_stability(np.array([stability]), day - previous, np.array([grade]), **params)[0])
+                users.append(sequence // 20)
+                cards.append(sequence % 20)
+                days.append(day)
+                scores.append(80 if remembered else 20)
+                correct.append(remembered)
+                previous = day
+        reviewed_at = np.datetime64("2026-01-01", "us") + (np.array(days) * 86_400e6).astype("timedelta64[us]")
+        return review_log(users, cards, reviewed_at, scores, correct)
+
+    def test_log_is_split_into_ordered_sequences(self):
+        start = np.datetime64("2026-01-01", "us")
+        day = np.timedelta64(86_400_000_000, "us")
+        log = review_log([1, 1, 2, 1], [5, 5, 5, 6], [start + 2 * day, start, start, start], [90, 20, 80, 60], [1, 0, 1, 1])
+        self.assertEqual(log["sequences"], 3)
+        self.assertEqual(log["position"].tolist(), [0, 1, 0, 0])
+        self.assertEqual(log["elapsed"].tolist(), [0.0, 2.0, 0.0, 0.0])
+        self.assertEqual(log["grade"].tolist(), [0, 3, 1, 2])
+
+    def test_grades_follow_score_thresholds(self):
+        scores = [0, 49, 50, 74, 75, 89, 90, 100]
+        self.assertEqual(grades_from_scores(scores).tolist(), [0, 0, 1, 1, 2, 2, 3, 3])
+        self.assertEqual([answer_grade(score) for score in scores], [0, 0, 1, 1, 2, 2, 3, 3])
+
+    def test_quiz_answers_without_score(self):
+        self.assertEqual((answer_grade(is_correct=True), answer_grade(is_correct=False)), (3, 0))
+
+    def test_fit_recovers_generating_parameters(self):
+        params = {"initial_stability": 2.0, "growth": 3.0, "lapse": 0.2}
+        log = self.synthetic_log(params)
+        result = fit(log)
+        self.assertEqual(result["params"], params)
+        self.assertLess(result["log_loss"], result["default_log_loss"])
+        self.assertEqual(result["reviews"], 1500 * 5)
+
+    def test_losses_of_several_parameter_sets_at_once(self):
+        log = self.synthetic_log({"initial_stability": 1.0, "growth": 2.0, "lapse": 0.3}, sequences=200)
+        together = log_losses(log, [1.0, 4.0], [2.0, 0.5], [0.3, 0.7])
+        alone = [log_losses(log, [s], [g], [l])[0] for s, g, l in ((1.0, 2.0, 0.3), (4.0, 0.5, 0.7))]
+        np.testing.assert_allclose(together, alone)
+
+    def test_empty_log(self):
+        log = review_log([], [], np.array([], dtype="datetime64[us]"), [], [])
+        self.assertEqual(fit(log)["reviews"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
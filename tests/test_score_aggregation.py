@@ -0,0 +1,137 @@
+"""Tests unitaires du report des scores sur les compteurs agrégés."""
+
+import unittest
+
+import httpx
+from sqlalchemy import func, select
+
+from app import crud_score_aggregation, models
+from app.database import get_db
+from app.main import app
+from app.security import hash_password
+from app.core.score_aggregation import ScoreEvent, fold_events
+from sqlite_case import SQLiteTestCase
+
+
+def event(user_pk=1, deck_pk=10, card_pk=100, score=80, is_correct=True, quiz_type="qcm"):
+    return ScoreEvent(user_pk, deck_pk, card_pk, score, is_correct, quiz_type)
+
+
+class FoldEventsTests(unittest.TestCase):
+    def test_user_counters_count_every_score(self):
+        deltas = fold_events([event(score=90), event(score=20, is_correct=False), event(deck_pk=None, score=5)])
+        self.assertEqual(
+            dict(deltas.users[1]),
+            {"total_score": 115, "total_cards_learned": 2, "total_cards_reviewed": 3},
+        )
+
+    def test_deck_counters_require_a_card_of_a_deck(self):
+        deltas = fold_events([event(card_pk=None), event(deck_pk=None)])
+        self.assertEqual(deltas.user_decks, {})
+        self.assertEqual(deltas.decks, {})
+
+    def test_user_deck_points_are_split_by_quiz_type(self):
+        deltas = fold_events([
+            event(score=100, quiz_type="qcm"),
+            event(score=40, is_correct=False, quiz_type="frappe"),
+            event(score=70, quiz_type="inconnu"),
+        ])
+        user_deck = deltas.user_decks[(1, 10)]
+        self.assertEqual(user_deck["total_attempts"], 3)
+        self.assertEqual(user_deck["total_points"], 210)
+        self.assertEqual(user_deck["successful_attempts"], 2)
+        self.assertEqual(user_deck["points_qcm"], 100)
+        self.assertEqual(user_deck["points_frappe"], 40)
+        self.assertEqual(user_deck["points_classique"], 0)
+
+    def test_deck_counters_merge_all_learners(self):
+        deltas = fold_events([event(user_pk=1), event(user_pk=2, is_correct=False), event(user_pk=3, deck_pk=11)])
+        self.assertEqual(dict(deltas.decks[10]), {"total_attempts": 2, "total_correct": 1})
+        self.assertEqual(dict(deltas.decks[11]), {"total_attempts": 1, "total_correct": 1})
+        self.assertEqual(set(deltas.user_decks), {(1, 10), (2, 10), (3, 11)})
+
+
+class ExactCountersTests(SQLiteTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        await self.add_user(1)
+        await self.add_user(2)
+        await self.add_deck(10, card_pks=[100, 101])
+        self.db.add(models.UserDeck(user_pk=1, deck_pk=10))
+        await self.db.commit()
+
+    def score(self, user_pk=1, deck_pk=10, card_pk=100, score=80, is_correct=True, quiz_type="qcm", aggregated=False):
+        self.db.add(models.UserScore(
+            user_pk=user_pk, deck_pk=deck_pk, card_pk=card_pk, score=score,
+            is_correct=is_correct, quiz_type=quiz_type, aggregated=aggregated,
+        ))
+
+    async def pending(self) -> int:
+        result = await self.db.execute(
+            select(func.count()).select_from(models.UserScore).where(models.UserScore.aggregated.is_(False))
+        )
+        return result.scalar_one()
+
+    async def test_reads_add_pending_scores_summed_by_the_database(self):
+        self.score(score=100)
+        self.score(score=40, is_correct=False, quiz_type="frappe")
+        self.score(user_pk=2, score=60)
+        self.score(card_pk=None, score=5)
+        self.score(score=90, aggregated=True)  # déjà reporté : compté par la ligne agrégée seulement
+        await self.db.commit()
+
+        deck = {"deck_pk": 10, "total_attempts": 0, "total_correct": 0}
+        await crud_score_aggregation.merge_decks(self.db, [deck])
+        self.assertEqual(deck, {"deck_pk": 10, "total_attempts": 3, "total_correct": 2})
+
+        user = await self.db.get(models.User, 1)
+        await crud_score_aggregation.merge_user(self.db, user)
+        self.assertEqual(
+            (user.total_score, user.total_cards_learned, user.total_cards_reviewed),
+            (145, 2, 3),
+        )
+
+        user_deck = (await self.db.execute(select(models.UserDeck))).scalar_one()
+        await crud_score_aggregation.merge_user_decks(self.db, 1, [user_deck])
+        self.assertEqual(
+            (user_deck.total_attempts, user_deck.total_points, user_deck.points_qcm, user_deck.points_frappe),
+            (2, 140, 100, 40),
+        )
+
+    async def test_score_writes_fold_the_backlog_past_the_threshold(self):
+        for _ in range(3):
+            self.score()
+        await self.db.commit()
+
+        self.assertIsNone(await crud_score_aggregation.fold_if_backlogged(self.db, threshold=4))
+        self.assertEqual(await self.pending(), 3)
+
+        self.score()
+        await self.db.commit()
+        report = await crud_score_aggregation.fold_if_backlogged(self.db, threshold=4)
+        self.assertEqual(report["folded"], 4)
+        self.assertEqual(await self.pending(), 0)
+        deck = await self.db.get(models.Deck, 10)
+        self.assertEqual((deck.total_attempts, deck.total_correct), (4, 4))
+
+    async def test_login_returns_exact_counters(self):
+        user = await self.db.get(models.User, 1)
+        user.hashed_password = hash_password("secret123")
+        self.score(score=70)
+        await self.db.commit()
+
+        async def override_db():
+            yield self.db
+
+        app.dependency_overrides[get_db] = override_db
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+                response = await client.post("/api/users/login", json={"email": "user1@test.it", "password": "secret123"})
+        finally:
+            app.dependency_overrides.clear()
+        self.assertEqual(response.status_code, 200, response.text)
+        self.assertEqual(response.json()["user"]["total_score"], 70)
+
+
+if __name__ == "__main__":
+    unittest.main()